@@ -0,0 +1,268 @@
+"""
+ClinicalSetu - Admission Control
+Bounds how many requests run model work at once in a process (local server,
+on-prem box, or a Lambda container) and decides who goes next by priority lane:
+
+  interactive  - a doctor waiting on /api/process (default)
+  translation  - /api/translate and translation pre-warm
+  batch        - re-processing, trial-only refreshes, fetch-trials
+                 (X-Priority: batch header or "priority": "batch" in the body)
+
+Each lane has a bounded FIFO queue and a wait deadline. Lower lanes may only
+occupy part of the slots (max_share), so interactive work always finds
+headroom. Freed slots go to the highest-priority waiter. On arrival the wait is
+estimated from the queue ahead and the recent service time per lane. If it
+would exceed the lane deadline (or the caller's X-Deadline-Ms), or the queue is
+full, the request is shed at once with Shed (a 429 with Retry-After) instead
+of queueing for nothing. A waiter whose deadline passes is shed the same way.
+
+Admission is re-entrant per thread: the local server admits a request, and the
+process_consultation handler it calls does not queue it a second time.
+
+Configuration (env): ADMISSION_CONCURRENCY (slots, default 8), and per lane
+ADMISSION_<LANE>_QUEUE / ADMISSION_<LANE>_WAIT_MS / ADMISSION_<LANE>_SHARE.
+stats() returns queue depth, running, shed counts and wait percentiles per lane.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import tracing
+
+LANES = ("interactive", "translation", "batch")  # priority order
+
+
+@dataclass
+class Lane:
+    name: str
+    priority: int  # 0 = highest
+    max_queue: int
+    max_wait_ms: float
+    max_share: float = 1.0  # fraction of the slots this lane may occupy
+
+
+def default_lanes():
+    def env(lane, key, default):
+        return float(os.environ.get(f"ADMISSION_{lane.upper()}_{key}", default))
+
+    defaults = {"interactive": (64, 15000, 1.0), "translation": (128, 20000, 0.75), "batch": (512, 300000, 0.5)}
+    return {name: Lane(name, i, int(env(name, "QUEUE", q)), env(name, "WAIT_MS", w), env(name, "SHARE", s))
+            for i, (name, (q, w, s)) in enumerate(defaults.items())}
+
+
+class Shed(Exception):
+    """Request not admitted. reason: queue_full | deadline | timeout."""
+
+    def __init__(self, lane, reason, retry_after_s):
+        super().__init__(f"{lane} lane {reason.replace('_', ' ')}")
+        self.lane, self.reason, self.retry_after_s = lane, reason, max(1, int(retry_after_s + 0.999))
+
+    def response(self, headers=None):
+        """Lambda-proxy style 429 response."""
+        return {
+            "statusCode": 429,
+            "headers": {**(headers or {}), "Content-Type": "application/json", "Retry-After": str(self.retry_after_s)},
+            "body": json.dumps({"error": f"Server busy ({self}), retry in {self.retry_after_s}s",
+                                "lane": self.lane, "reason": self.reason, "retry_after_s": self.retry_after_s}),
+        }
+
+
+class _Ticket:
+    __slots__ = ("lane", "granted")
+
+    def __init__(self, lane):
+        self.lane, self.granted = lane, False
+
+
+class Controller:
+    WAIT_SAMPLES = 512
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, concurrency=8, lanes=None):
+        self.concurrency = concurrency
+        self.lanes = lanes or default_lanes()
+        self.cond = threading.Condition()
+        self.running = 0
+        self.lane_running = {name: 0 for name in self.lanes}
+        self.queues = {name: deque() for name in self.lanes}
+        self.service_ms = {name: None for name in self.lanes}  # EWMA of time holding a slot
+        self.waits = {name: deque(maxlen=self.WAIT_SAMPLES) for name in self.lanes}
+        self.counters = {name: {"admitted": 0, "completed": 0, "shed_queue_full": 0, "shed_deadline": 0,
+                                "shed_timeout": 0} for name in self.lanes}
+        self._local = threading.local()
+
+    def lane(self, name):
+        return self.lanes.get(name) or self.lanes["interactive"]
+
+    @contextlib.contextmanager
+    def admit(self, lane_name="interactive", deadline_ms=None):
+        """Hold a slot for the block. Raises Shed. Nested admits on the same thread are free."""
+        if getattr(self._local, "admitted", False):
+            yield
+            return
+        lane = self.lane(lane_name)
+        with tracing.span("admission.wait", kind="queue", lane=lane.name):
+            self._acquire(lane, deadline_ms)
+        self._local.admitted = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.admitted = False
+            self._release(lane, (time.perf_counter() - start) * 1000)
+
+    def _slots_for(self, lane):
+        return max(1, int(self.concurrency * lane.max_share))
+
+    def _can_start(self, lane):
+        return self.running < self.concurrency and self.lane_running[lane.name] < self._slots_for(lane)
+
+    def _estimate_wait_ms(self, lane):
+        """Queue ahead (same or higher priority) x recent service time, spread over the lane's slots."""
+        work = 0.0
+        for other in self.lanes.values():
+            if other.priority <= lane.priority:
+                work += len(self.queues[other.name]) * (self.service_ms[other.name] or 0.0)
+        running = sum(self.lane_running[name] * (self.service_ms[name] or 0.0) for name in self.lanes) / 2
+        own = self.service_ms[lane.name] or 0.0
+        return (work + running + own) / min(self.concurrency, self._slots_for(lane))
+
+    def _acquire(self, lane, deadline_ms):
+        wait_limit_ms = min(lane.max_wait_ms, deadline_ms) if deadline_ms is not None else lane.max_wait_ms
+        start = time.perf_counter()
+        with self.cond:
+            queue = self.queues[lane.name]
+            tracing.count("admission_queue_depth", sum(len(q) for q in self.queues.values()))
+            if not any(self.queues[o.name] for o in self.lanes.values() if o.priority <= lane.priority) \
+                    and self._can_start(lane):
+                self._start(lane)
+                self.waits[lane.name].append(0.0)
+                return
+            if len(queue) >= lane.max_queue:
+                raise self._shed(lane, "queue_full", self._estimate_wait_ms(lane))
+            estimate = self._estimate_wait_ms(lane)
+            if estimate > wait_limit_ms:
+                raise self._shed(lane, "deadline", estimate)
+            ticket = _Ticket(lane.name)
+            queue.append(ticket)
+            self._dispatch()
+            deadline = start + wait_limit_ms / 1000
+            while not ticket.granted:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    queue.remove(ticket)
+                    raise self._shed(lane, "timeout", self._estimate_wait_ms(lane))
+                self.cond.wait(remaining)
+            self.waits[lane.name].append((time.perf_counter() - start) * 1000)
+
+    def _start(self, lane):
+        self.running += 1
+        self.lane_running[lane.name] += 1
+        self.counters[lane.name]["admitted"] += 1
+
+    def _dispatch(self):
+        """Grant freed slots to queued tickets, highest priority first (caller holds the lock)."""
+        granted = False
+        for lane in sorted(self.lanes.values(), key=lambda l: l.priority):
+            queue = self.queues[lane.name]
+            while queue and self._can_start(lane):
+                queue.popleft().granted = True
+                self._start(lane)
+                granted = True
+        if granted:
+            self.cond.notify_all()
+
+    def _release(self, lane, held_ms):
+        with self.cond:
+            self.running -= 1
+            self.lane_running[lane.name] -= 1
+            self.counters[lane.name]["completed"] += 1
+            previous = self.service_ms[lane.name]
+            self.service_ms[lane.name] = held_ms if previous is None else (
+                previous + self.EWMA_ALPHA * (held_ms - previous))
+            self._dispatch()
+
+    def _shed(self, lane, reason, estimate_ms):
+        self.counters[lane.name][f"shed_{reason}"] += 1
+        tracing.count(f"admission_shed_{lane.name}")
+        return Shed(lane.name, reason, estimate_ms / 1000)
+
+    def stats(self):
+        with self.cond:
+            lanes = {}
+            for name, lane in self.lanes.items():
+                waits = sorted(self.waits[name])
+
+                def pct(q):
+                    return round(waits[min(len(waits) - 1, int(q * len(waits)))], 1) if waits else None
+
+                lanes[name] = {
+                    "queued": len(self.queues[name]), "running": self.lane_running[name],
+                    "max_queue": lane.max_queue, "max_wait_ms": lane.max_wait_ms,
+                    "slots": self._slots_for(lane),
+                    "service_ms": round(self.service_ms[name], 1) if self.service_ms[name] is not None else None,
+                    "wait_ms_p50": pct(0.50), "wait_ms_p99": pct(0.99),
+                    **self.counters[name],
+                }
+            return {"concurrency": self.concurrency, "running": self.running,
+                    "queued": sum(len(q) for q in self.queues.values()), "lanes": lanes}
+
+
+def lane_for(event):
+    """Lane for a Lambda-proxy style event (path, headers, body)."""
+    if event.get("action") == "prewarm_translations":
+        return "translation"
+    headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+    requested = headers.get("x-priority")
+    if requested is None:
+        body = event.get("body")
+        if isinstance(body, str) and '"priority"' in body:
+            try:
+                body = json.loads(body)
+            except json.JSONDecodeError:
+                body = None
+        if isinstance(body, dict):
+            requested = body.get("priority")
+    if requested in LANES:
+        return requested
+    path = event.get("path", "") or event.get("resource", "")
+    if "/translate" in path:
+        return "translation"
+    if "/fetch-trials" in path:
+        return "batch"
+    return "interactive"
+
+
+def deadline_for(event):
+    """Caller's maximum queue wait (X-Deadline-Ms header), or None."""
+    headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+    try:
+        return float(headers["x-deadline-ms"])
+    except (KeyError, ValueError):
+        return None
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def controller():
+    """The process-wide controller (shared by the local server and the handlers it runs)."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = Controller(int(os.environ.get("ADMISSION_CONCURRENCY", "8")))
+        return _controller
+
+
+def set_controller(new):
+    """Replace the process-wide controller (benchmarks, tests). Returns the previous one."""
+    global _controller
+    with _controller_lock:
+        previous, _controller = _controller, new
+    return previous
@@ -16,6 +16,9 @@ Features:
   - Bedrock Converse API (model-agnostic: works with Nova Lite, Claude, etc.)
   - Retry with exponential backoff + jitter for throttling
   - Model fallback chain: Nova Lite (primary) -> Nova Micro (fallback)
+  - Tiered JSON recovery for model output, so a malformed response does not fail the tool call
+  - Schema validation per output with regeneration of only the failing sections
+  - Optional prompt-level cache of model calls with record/replay modes (bedrock_cache)
 """
 
 import json
@@ -23,12 +26,26 @@ import os
 import time
 import random
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from pathlib import Path
 
+import bedrock_cache
+import circuit_breaker
+import deadline
+import lifecycle
+import llm_json
+import model_usage
+import output_schemas
+import tracing
+
+tracing.instrument_boto3()
+
 bedrock_runtime = boto3.client(
     "bedrock-runtime",
-    region_name=os.environ.get("AWS_REGION", "us-east-1")
+    region_name=os.environ.get("AWS_REGION", "us-east-1"),
+    # _converse owns retries (deadline-aware); no SDK retries hidden underneath them
+    config=Config(retries={"max_attempts": 0, "mode": "standard"})  # max_attempts counts retries
 )
 bedrock_agent_runtime = boto3.client(
     "bedrock-agent-runtime",
@@ -46,6 +63,27 @@ TEMPERATURE = 0.3
 MAX_RETRIES = 3
 BASE_DELAY = 1.0
 MAX_DELAY = 15.0
+MIN_ATTEMPT_MS = float(os.environ.get("BEDROCK_MIN_ATTEMPT_MS", "2000"))  # budget needed to start another attempt
+
+CACHE_TABLE = os.environ.get("DYNAMODB_CACHE_TABLE", "ClinicalSetu-Cache")
+dynamodb = boto3.resource("dynamodb", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+
+
+def _resolve_cache_table():
+    table = dynamodb.Table(CACHE_TABLE)
+    table.load()
+    return table
+
+
+def _get_cache_table():
+    """Shared cache table for the dynamodb prompt cache backend (resolved once per container, None if unavailable)."""
+    try:
+        return lifecycle.resource(f"table:{CACHE_TABLE}", _resolve_cache_table, dynamodb)
+    except ClientError:
+        return None
+
+
+_prompt_cache = bedrock_cache.from_env(table_factory=_get_cache_table)
 
 
 def get_param(parameters, name):
@@ -60,68 +98,133 @@ def invoke_bedrock(prompt, model_id=None, max_tokens=MAX_TOKENS, temperature=TEM
     """
     Call Amazon Bedrock using the Converse API (model-agnostic).
     Retries with exponential backoff + jitter, then falls back to secondary model.
+    Served from / recorded into the prompt cache when BEDROCK_CACHE_MODE is set.
+    """
+    return invoke_bedrock_with_usage(prompt, model_id, max_tokens, temperature)[0]
+
+
+def invoke_bedrock_with_usage(prompt, model_id=None, max_tokens=MAX_TOKENS, temperature=TEMPERATURE):
+    """
+    invoke_bedrock that also returns the call's usage: (text, {"model", "input_tokens",
+    "output_tokens", "model_latency_ms", "wall_ms", "cached"}). The call is recorded in
+    model_usage for the step summary.
     """
     if model_id is None:
         model_id = MODEL_ID
-
+    start = time.perf_counter()
+    response = {}
+    text = _prompt_cache.call(model_id, prompt, temperature, max_tokens,
+                              lambda: _converse(prompt, model_id, max_tokens, temperature, response))
+    call = model_usage.record(response.get("model", model_id), response.get("usage", {}),
+                              response.get("metrics", {}).get("latencyMs"),
+                              (time.perf_counter() - start) * 1000, cached=not response)
+    return text, call
+
+
+def _converse(prompt, model_id, max_tokens, temperature, response_info=None):
+    """Converse with retries and fallback. response_info, if given, receives the model used, usage and metrics."""
     models_to_try = [model_id]
     if model_id != FALLBACK_MODEL_ID:
         models_to_try.append(FALLBACK_MODEL_ID)
 
     last_error = None
-
-    for current_model in models_to_try:
+    deadline.check(MIN_ATTEMPT_MS, "Bedrock call")
+
+    for model_index, current_model in enumerate(models_to_try):
+        breaker = circuit_breaker.get(f"bedrock:{current_model}")
+        if model_index:
+            if not deadline.fits(MIN_ATTEMPT_MS):
+                tracing.count("deadline_skipped_fallbacks")
+                raise deadline.DeadlineExceeded(f"Deadline: no budget for the fallback after {last_error}")
+            tracing.count("bedrock_fallbacks")
         for attempt in range(MAX_RETRIES):
+            if attempt:
+                tracing.count("bedrock_retries")
             try:
-                response = bedrock_runtime.converse(
-                    modelId=current_model,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [{"text": prompt}]
+                with breaker.guard():
+                    response = bedrock_runtime.converse(
+                        modelId=current_model,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": [{"text": prompt}]
+                            }
+                        ],
+                        inferenceConfig={
+                            "maxTokens": max_tokens,
+                            "temperature": temperature
                         }
-                    ],
-                    inferenceConfig={
-                        "maxTokens": max_tokens,
-                        "temperature": temperature
-                    }
-                )
+                    )
+                if response_info is not None:
+                    response_info.update(model=current_model, usage=response.get("usage", {}),
+                                         metrics=response.get("metrics", {}))
                 return response["output"]["message"]["content"][0]["text"]
 
+            except circuit_breaker.CircuitOpen as e:
+                # Model known to be failing: straight to the fallback, no retries
+                last_error = e
+                break
             except ClientError as e:
                 error_code = e.response["Error"]["Code"]
                 last_error = e
 
                 if error_code in ("ThrottlingException", "TooManyRequestsException",
                                   "ServiceUnavailableException", "ModelTimeoutException"):
-                    delay = min(BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), MAX_DELAY)
-                    print(f"[ClinicalSetu] {error_code} on {current_model}, retry {attempt+1}/{MAX_RETRIES} after {delay:.1f}s")
-                    time.sleep(delay)
+                    print(f"[ClinicalSetu] {error_code} on {current_model}, attempt {attempt+1}/{MAX_RETRIES}")
+                    if not _backoff(attempt, e):
+                        break
                     continue
                 else:
                     raise
             except Exception as e:
                 last_error = e
-                delay = min(BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), MAX_DELAY)
-                time.sleep(delay)
+                if not _backoff(attempt, e):
+                    break
 
         print(f"[ClinicalSetu] Exhausted retries on {current_model}, trying next model...")
 
     raise last_error or Exception("All Bedrock invocation attempts failed")
 
 
+def _backoff(attempt, error):
+    """
+    Sleep before the next attempt, shortened to what the request deadline allows. False when
+    the retries on this model are used up; DeadlineExceeded when no further attempt fits.
+    """
+    if attempt == MAX_RETRIES - 1:
+        return False
+    delay = min(BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), MAX_DELAY)
+    if not deadline.budget_sleep(delay, MIN_ATTEMPT_MS):
+        tracing.count("deadline_skipped_retries")
+        raise deadline.DeadlineExceeded(f"Deadline: no budget to retry after {error}") from error
+    return True
+
+
 def parse_json_response(text):
-    """Parse JSON from LLM response, stripping markdown fences if present."""
-    text = text.strip()
-    if text.startswith("```"):
-        lines = text.split("\n")
-        lines = [l for l in lines if not l.strip().startswith("```")]
-        text = "\n".join(lines)
-    return json.loads(text)
+    """Parse JSON from LLM response via the llm_json recovery tiers (repair model call last)."""
+    value, tier = llm_json.parse_llm_json(text, repair_call=invoke_bedrock)
+    if tier != "strict":
+        print(f"[ClinicalSetu] Recovered model JSON via {tier} tier")
+    return value
+
+
+def generate_validated(output_name, prompt):
+    """Generate an output; sections failing its schema (output_schemas) are regenerated and merged."""
+    value = parse_json_response(invoke_bedrock(prompt))
+    value, report = output_schemas.ensure_valid(
+        output_name, value, prompt, lambda p: parse_json_response(invoke_bedrock(p))
+    )
+    if report["regenerated_sections"] or not report["valid"]:
+        print(f"[ClinicalSetu] {output_name} schema check: {json.dumps(report)}")
+    return value
 
 
 def load_prompt_template(template_name):
-    """Load a prompt template from the prompts directory."""
+    """Load a prompt template from the prompts directory (read once per container)."""
+    return lifecycle.resource(f"prompt:{template_name}", lambda: _read_prompt_template(template_name))
+
+
+def _read_prompt_template(template_name):
     template_path = Path(__file__).parent.parent / "prompts" / f"{template_name}.txt"
     if template_path.exists():
         return template_path.read_text(encoding="utf-8")
@@ -206,7 +309,7 @@ Return ONLY valid JSON (no markdown, no code blocks):
   "flags": []
 }}"""
 
-    return parse_json_response(invoke_bedrock(prompt))
+    return generate_validated("soap_note", prompt)
 
 
 # ==========================================
@@ -268,7 +371,7 @@ Return ONLY valid JSON (no markdown, no code blocks):
   "disclaimer": "This summary was generated by AI based on your doctor's notes. Always follow your doctor's verbal instructions."
 }}"""
 
-    return parse_json_response(invoke_bedrock(prompt))
+    return generate_validated("patient_summary", prompt)
 
 
 # ==========================================
@@ -329,7 +432,7 @@ Return ONLY valid JSON (no markdown, no code blocks):
   "flags": []
 }}"""
 
-    return parse_json_response(invoke_bedrock(prompt))
+    return generate_validated("referral_letter", prompt)
 
 
 # ==========================================
@@ -408,7 +511,7 @@ Return ONLY valid JSON (no markdown, no code blocks):
   "disclaimer": "AI-Generated - Requires Clinician Validation."
 }}"""
 
-    return parse_json_response(invoke_bedrock(prompt))
+    return generate_validated("discharge_summary", prompt)
 
 
 # ==========================================
@@ -432,16 +535,17 @@ def tool_search_trials(params):
     if KNOWLEDGE_BASE_ID:
         try:
             query = f"Clinical trials for {diagnosis} in {patient_gender} patients aged {patient_age} in India"
-            rag_response = bedrock_agent_runtime.retrieve_and_generate(
-                input={"text": query},
-                retrieveAndGenerateConfiguration={
-                    "type": "KNOWLEDGE_BASE",
-                    "knowledgeBaseConfiguration": {
-                        "knowledgeBaseId": KNOWLEDGE_BASE_ID,
-                        "modelArn": f"arn:aws:bedrock:us-east-1::foundation-model/{MODEL_ID}"
+            with circuit_breaker.get(f"knowledge_base:{KNOWLEDGE_BASE_ID}").guard():
+                rag_response = bedrock_agent_runtime.retrieve_and_generate(
+                    input={"text": query},
+                    retrieveAndGenerateConfiguration={
+                        "type": "KNOWLEDGE_BASE",
+                        "knowledgeBaseConfiguration": {
+                            "knowledgeBaseId": KNOWLEDGE_BASE_ID,
+                            "modelArn": f"arn:aws:bedrock:us-east-1::foundation-model/{MODEL_ID}"
+                        }
                     }
-                }
-            )
+                )
             rag_context = rag_response["output"]["text"]
         except Exception as e:
             print(f"[ClinicalSetu] KB RAG failed: {e}")
@@ -493,17 +597,33 @@ Return ONLY valid JSON (no markdown, no code blocks):
   "disclaimer": "INFORMATIONAL ONLY: These are potential eligibility signals. A qualified physician must review all criteria. Patient consent is always required."
 }}"""
 
-    return parse_json_response(invoke_bedrock(prompt))
+    return generate_validated("trial_matching", prompt)
 
 
 # ==========================================
 # Lambda Entry Point
 # ==========================================
+def _log_usage(function_name):
+    """Log the tool's model usage (the response body goes back to the agent, so it is not added there)."""
+    calls = model_usage.take()
+    if calls:
+        print(f"[ClinicalSetu] Usage for {function_name}: {json.dumps(model_usage.summarize(calls))}")
+
+
+@tracing.traced_handler("agent_tool_executor")
+@lifecycle.handler
 def lambda_handler(event, context):
     """
-    Called by Bedrock Agent collaborators. Routes to the correct tool based on event["function"].
-    Returns response in the exact format Bedrock Agent expects.
+    Called by Bedrock Agent collaborators ({"warmup": true} / scheduled pings only warm the
+    container). Routes to the correct tool based on event["function"].
+    Returns response in the exact format Bedrock Agent expects. The trace context and the
+    request deadline ("deadline_ms", epoch) set by invoke_agent arrive in sessionAttributes.
     """
+    with deadline.scope(context, until_ms=(event.get("sessionAttributes") or {}).get("deadline_ms")):
+        return _handle_tool_call(event)
+
+
+def _handle_tool_call(event):
     action_group = event.get("actionGroup", "ClinicalTools")
     function_name = event.get("function", "")
     parameters = event.get("parameters", [])
@@ -511,19 +631,22 @@ def lambda_handler(event, context):
     print(f"[ClinicalSetu] Tool called: {function_name}")
     print(f"[ClinicalSetu] Parameters: {json.dumps(parameters, default=str)[:500]}")
 
+    model_usage.start()
     try:
-        if function_name == "generate_soap":
-            result = tool_generate_soap(parameters)
-        elif function_name == "generate_patient_summary":
-            result = tool_generate_patient_summary(parameters)
-        elif function_name == "generate_referral":
-            result = tool_generate_referral(parameters)
-        elif function_name == "generate_discharge":
-            result = tool_generate_discharge(parameters)
-        elif function_name == "search_trials":
-            result = tool_search_trials(parameters)
-        else:
-            result = {"error": f"Unknown function: {function_name}"}
+        with tracing.span(function_name or "unknown", kind="tool"):
+            if function_name == "generate_soap":
+                result = tool_generate_soap(parameters)
+            elif function_name == "generate_patient_summary":
+                result = tool_generate_patient_summary(parameters)
+            elif function_name == "generate_referral":
+                result = tool_generate_referral(parameters)
+            elif function_name == "generate_discharge":
+                result = tool_generate_discharge(parameters)
+            elif function_name == "search_trials":
+                result = tool_search_trials(parameters)
+            else:
+                result = {"error": f"Unknown function: {function_name}"}
+        _log_usage(function_name)
 
         return {
             "messageVersion": "1.0",
@@ -544,6 +667,7 @@ def lambda_handler(event, context):
 
     except Exception as e:
         print(f"[ClinicalSetu] ERROR in {function_name}: {str(e)}")
+        _log_usage(function_name)
         return {
             "messageVersion": "1.0",
             "response": {
@@ -561,3 +685,23 @@ def lambda_handler(event, context):
             "sessionAttributes": event.get("sessionAttributes", {}),
             "promptSessionAttributes": event.get("promptSessionAttributes", {})
         }
+
+
+# ============================================================
+# Container warm-up (provisioned concurrency init, scheduled pings)
+# ============================================================
+
+TEMPLATES = ("soap_note", "patient_summary", "referral_letter", "discharge_summary")
+OUTPUTS = TEMPLATES + ("trial_matching",)
+
+lifecycle.on_warmup("agent_tool_executor.templates",
+                    lambda: [load_prompt_template(name) for name in TEMPLATES])
+lifecycle.on_warmup("agent_tool_executor.schemas",
+                    lambda: [output_schemas.load_schema(name) for name in OUTPUTS])
+# Only the dynamodb prompt cache backend uses the table
+lifecycle.on_warmup("agent_tool_executor.cache_table",
+                    lambda: os.environ.get("BEDROCK_CACHE_BACKEND", "").lower() == "dynamodb" and _get_cache_table())
+# A Converse call Bedrock rejects before the model runs (no messages): TLS + signing, no tokens
+lifecycle.on_warmup("agent_tool_executor.bedrock",
+                    lambda: lifecycle.prime(lambda: bedrock_runtime.converse(modelId=MODEL_ID, messages=[])))
+lifecycle.init_done()
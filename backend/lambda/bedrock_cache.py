@@ -0,0 +1,237 @@
+"""
+ClinicalSetu - Bedrock Prompt Cache
+Optional memoization of model calls inside invoke_bedrock, keyed by
+(requested model ID, SHA-256 of the prompt, temperature, max_tokens).
+
+Backends:
+  memory    - in-process LRU (per Lambda container / local process)
+  sqlite    - on-disk SQLite file, shared by runs on one machine (CI, demo replays)
+  dynamodb  - the shared cache table (cache_key = "bedrock#<key hash>")
+
+Modes (BEDROCK_CACHE_MODE):
+  off     - no caching (default)
+  on      - read-through: serve hits, call the model and store on a miss
+  record  - always call the model and store the answer (refreshes a recording)
+  replay  - serve from the cache only; a miss raises ReplayMiss instead of calling
+            Bedrock, so whole pipelines can be replayed offline
+
+Only successful answers are stored. Because the key uses the requested model, an
+answer that came from the fallback model is replayed for the primary model ID.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import tracing
+
+MODES = ("off", "on", "record", "replay")
+MEMORY_MAX_ENTRIES = 1024
+DYNAMO_TTL = 7 * 86400  # seconds
+
+
+class ReplayMiss(LookupError):
+    """Replay mode and the prompt was never recorded."""
+
+
+def prompt_key(model_id, prompt, temperature, max_tokens):
+    canonical = json.dumps({
+        "model": model_id,
+        "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "temperature": float(temperature),
+        "max_tokens": int(max_tokens),
+    }, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ----- backends: get(key) -> text or None, put(key, text, model_id) -----
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_entries=MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            text = self.entries.get(key)
+            if text is not None:
+                self.entries.move_to_end(key)
+            return text
+
+    def put(self, key, text, model_id):
+        with self.lock:
+            self.entries[key] = text
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        prompt_key TEXT PRIMARY KEY,
+        model_id   TEXT NOT NULL,
+        text       TEXT NOT NULL,
+        stored_at  INTEGER NOT NULL
+    )
+    """
+
+    def __init__(self, path):
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(self.SCHEMA)
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT text FROM responses WHERE prompt_key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, text, model_id):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (prompt_key, model_id, text, stored_at) VALUES (?, ?, ?, ?)",
+                (key, model_id, text, int(time.time())))
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class DynamoBackend:
+    """table_factory returns the DynamoDB cache table (or None); resolved once, on first use."""
+
+    name = "dynamodb"
+
+    def __init__(self, table_factory, ttl=DYNAMO_TTL):
+        self.table_factory = table_factory
+        self.ttl = ttl
+        self._table = None
+        self._table_resolved = False
+
+    def _get_table(self):
+        if not self._table_resolved:
+            self._table = self.table_factory() if self.table_factory else None
+            self._table_resolved = True
+        return self._table
+
+    def get(self, key):
+        table = self._get_table()
+        if table is None:
+            return None
+        item = table.get_item(Key={"cache_key": f"bedrock#{key}"}).get("Item")
+        if not item or int(item.get("ttl", 0)) < time.time():
+            return None
+        return item["response_text"]
+
+    def put(self, key, text, model_id):
+        table = self._get_table()
+        if table is None:
+            return
+        now = int(time.time())
+        table.put_item(Item={
+            "cache_key": f"bedrock#{key}",
+            "response_text": text,
+            "model_id": model_id,
+            "cached_at": now,
+            "ttl": now + self.ttl,
+        })
+
+
+class PromptCache:
+    def __init__(self, backend=None, mode="off"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown Bedrock cache mode: {mode} (expected one of {', '.join(MODES)})")
+        self.backend = backend
+        self.mode = mode if backend is not None else "off"
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "replay_misses": 0, "errors": 0}
+
+    def call(self, model_id, prompt, temperature, max_tokens, invoke):
+        """Return invoke()'s text for this prompt, served from / stored in the cache per the mode."""
+        if self.mode == "off":
+            return invoke()
+        key = prompt_key(model_id, prompt, temperature, max_tokens)
+
+        if self.mode in ("on", "replay"):
+            try:
+                text = self.backend.get(key)
+            except Exception as e:
+                if self.mode == "replay":
+                    raise
+                print(f"[ClinicalSetu] Bedrock cache read failed: {e}")
+                self._count("errors")
+                text = None
+            if text is not None:
+                self._count("hits")
+                return text
+            if self.mode == "replay":
+                self._count("replay_misses")
+                raise ReplayMiss(f"Prompt not recorded for {model_id} (key {key[:12]})")
+
+        self._count("misses")
+        text = invoke()
+        try:
+            self.backend.put(key, text, model_id)
+            self._count("stores")
+        except Exception as e:
+            print(f"[ClinicalSetu] Bedrock cache write failed: {e}")  # caching must not fail the call
+            self._count("errors")
+        return text
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "mode": self.mode,
+            "backend": self.backend.name if self.backend is not None else None,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+        }
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+        tracing.count(f"prompt_cache_{name}")
+
+
+def from_env(table_factory=None):
+    """
+    PromptCache configured from BEDROCK_CACHE_MODE (off|on|record|replay),
+    BEDROCK_CACHE_BACKEND (memory|sqlite|dynamodb) and BEDROCK_CACHE_PATH (SQLite file).
+    """
+    mode = os.environ.get("BEDROCK_CACHE_MODE", "off").lower()
+    if mode == "off":
+        return PromptCache()
+    backend_name = os.environ.get("BEDROCK_CACHE_BACKEND", "memory").lower()
+    if backend_name == "memory":
+        backend = MemoryBackend()
+    elif backend_name == "sqlite":
+        backend = SQLiteBackend(os.environ.get("BEDROCK_CACHE_PATH", "/tmp/bedrock_cache.sqlite"))
+    elif backend_name == "dynamodb":
+        backend = DynamoBackend(table_factory)
+    else:
+        raise ValueError(f"Unknown Bedrock cache backend: {backend_name}")
+    return PromptCache(backend, mode)
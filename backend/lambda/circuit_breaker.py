@@ -0,0 +1,186 @@
+"""
+ClinicalSetu - Circuit Breakers
+One breaker per downstream dependency (each Bedrock model, the Knowledge Base,
+the DynamoDB cache table), shared by every request in the container, so an
+outage is discovered once instead of by every request paying its own retries.
+
+  closed     calls pass; outcomes go into a rolling window (CIRCUIT_WINDOW_S).
+             Once the window holds CIRCUIT_MIN_CALLS calls and the error rate
+             reaches CIRCUIT_ERROR_RATE, the breaker opens.
+  open       calls fail fast with CircuitOpen for CIRCUIT_OPEN_S; callers
+             route to their fallback (the next model, plain generation without
+             RAG, no cache).
+  half-open  after that, CIRCUIT_HALF_OPEN_PROBES calls go through as probes;
+             a success closes the breaker, a failure opens it again.
+
+Only outages count as failures (throttling, 5xx, timeouts, connection errors
+- see is_outage); a request the service rejects (e.g. ValidationException)
+means the dependency is up. Transitions and fast failures are counted on the
+request trace (circuit_<name>_opened / _closed / _probes / _rejected) and a
+request that meets a breaker that is not closed carries its state as the
+circuit_<name> property; stats() returns every breaker's state and window for
+/health.
+
+Usage:
+  with circuit_breaker.get("bedrock:" + model_id).guard():
+      response = bedrock_runtime.converse(...)
+"""
+
+import contextlib
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from botocore.exceptions import ClientError
+
+import tracing
+
+WINDOW_S = float(os.environ.get("CIRCUIT_WINDOW_S", "30"))
+MIN_CALLS = int(os.environ.get("CIRCUIT_MIN_CALLS", "5"))
+ERROR_RATE = float(os.environ.get("CIRCUIT_ERROR_RATE", "0.5"))
+OPEN_S = float(os.environ.get("CIRCUIT_OPEN_S", "20"))
+HALF_OPEN_PROBES = int(os.environ.get("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+OUTAGE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException",
+                "ModelTimeoutException", "InternalServerException", "ModelNotReadyException",
+                "ProvisionedThroughputExceededException", "RequestLimitExceeded", "InternalServerError"}
+
+
+class CircuitOpen(Exception):
+    """The dependency's breaker is open; the call was not attempted."""
+
+    def __init__(self, name, retry_in_s):
+        super().__init__(f"Circuit open for {name} (next probe in {retry_in_s:.1f}s)")
+        self.name, self.retry_in_s = name, retry_in_s
+
+
+def is_outage(exc):
+    """Does this exception say the dependency is unhealthy (rather than the request being bad)?"""
+    if isinstance(exc, ClientError):
+        error = exc.response.get("Error", {})
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return error.get("Code") in OUTAGE_CODES or status >= 500
+    return not isinstance(exc, (ValueError, KeyError, TypeError, CircuitOpen))
+
+
+class Breaker:
+    def __init__(self, name, window_s=WINDOW_S, min_calls=MIN_CALLS, error_rate=ERROR_RATE, open_s=OPEN_S,
+                 half_open_probes=HALF_OPEN_PROBES):
+        self.name = name
+        self.metric = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
+        self.window_s, self.min_calls, self.error_rate = window_s, min_calls, error_rate
+        self.open_s, self.half_open_probes = open_s, half_open_probes
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probes = 0  # half-open calls in flight
+        self.buckets = deque()  # [second, calls, failures], oldest first
+        self.counters = {"opened": 0, "closed": 0, "rejected": 0}
+
+    # ----- rolling window -----
+
+    def _prune(self, now):
+        while self.buckets and self.buckets[0][0] <= now - self.window_s:
+            self.buckets.popleft()
+
+    def _add(self, now, failed):
+        second = int(now)
+        if not self.buckets or self.buckets[-1][0] != second:
+            self.buckets.append([second, 0, 0])
+        self.buckets[-1][1] += 1
+        self.buckets[-1][2] += int(failed)
+        self._prune(now)
+
+    def _window(self):
+        calls = sum(b[1] for b in self.buckets)
+        return calls, sum(b[2] for b in self.buckets)
+
+    # ----- state machine -----
+
+    def allow(self):
+        """Take permission for one call (a probe slot when half-open). False when the call must fail fast."""
+        with self.lock:
+            now = time.monotonic()
+            if self.state == "open" and now - self.opened_at >= self.open_s:
+                self.state, self.probes = "half_open", 0
+            if self.state == "closed":
+                return True
+            state = self.state
+            allowed = state == "half_open" and self.probes < self.half_open_probes
+            if allowed:
+                self.probes += 1
+            else:
+                self.counters["rejected"] += 1
+        tracing.annotate(**{f"circuit_{self.metric}": state})
+        tracing.count(f"circuit_{self.metric}_{'probes' if allowed else 'rejected'}")
+        return allowed
+
+    def record(self, ok):
+        with self.lock:
+            now = time.monotonic()
+            if self.state == "half_open":
+                self.probes = max(0, self.probes - 1)
+                if ok:
+                    self._transition("closed", now)
+                    self.buckets.clear()
+                else:
+                    self._transition("open", now)
+                return
+            self._add(now, not ok)
+            calls, failures = self._window()
+            if self.state == "closed" and calls >= self.min_calls and failures / calls >= self.error_rate:
+                self._transition("open", now)
+
+    def _transition(self, state, now):
+        """Caller holds the lock."""
+        self.state = state
+        if state == "open":
+            self.opened_at = now
+        self.counters["opened" if state == "open" else "closed"] += 1
+        tracing.count(f"circuit_{self.metric}_{'opened' if state == 'open' else 'closed'}")
+        print(f"[ClinicalSetu] Circuit {self.name} -> {state}")
+
+    @contextlib.contextmanager
+    def guard(self, is_failure=is_outage):
+        """Run the block as one call: CircuitOpen if not allowed, outcome recorded on exit."""
+        if not self.allow():
+            raise CircuitOpen(self.name, max(0.0, self.opened_at + self.open_s - time.monotonic()))
+        try:
+            yield
+        except BaseException as e:
+            self.record(not is_failure(e))
+            raise
+        self.record(True)
+
+    def stats(self):
+        with self.lock:
+            self._prune(time.monotonic())
+            calls, failures = self._window()
+            return {"state": self.state, "window_calls": calls, "window_failures": failures,
+                    "error_rate": round(failures / calls, 3) if calls else 0.0, **self.counters}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get(name):
+    """The container-wide breaker for a dependency (created on first use)."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = Breaker(name)
+        return _breakers[name]
+
+
+def stats():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.stats() for b in breakers}
+
+
+def reset():
+    """Forget every breaker (benchmarks, tests)."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -0,0 +1,313 @@
+"""
+ClinicalSetu - Condition Term Normalization
+Maps free-text diagnoses (SOAP assessment.primary_diagnosis, seeded visit
+diagnoses) and ClinicalTrials.gov `conditions` onto canonical concept IDs so
+trial candidates can be looked up locally before any model call.
+
+Concept IDs are ICD-10 category codes. Each concept carries its clinical name,
+English synonyms/abbreviations and common Indian colloquial names (Hindi,
+Bengali, Marathi, Tamil transliterations). Parents let a specific finding
+("diabetic neuropathy") also match trials for the broader condition.
+
+Lookup walks a token trie once over the input (longest match wins), so
+normalization is O(tokens in the text), independent of dictionary size.
+
+Usage:
+  from conditions import normalize, TrialConditionIndex
+  normalize("Type 2 Diabetes Mellitus with Peripheral Neuropathy")  # ['E11.4', 'E11']
+  index = TrialConditionIndex(trials)
+  index.candidates("Stage 1 Hypertension")                          # trial dicts for I10
+"""
+
+import re
+
+# concept_id -> (canonical name, parent concept IDs, synonyms)
+CONCEPTS = {
+    "E11": ("Type 2 diabetes mellitus", [], [
+        "type 2 diabetes", "type 2 diabetes mellitus", "type ii diabetes", "t2dm", "t2d", "dm2", "dm type 2",
+        "diabetes mellitus, type 2", "diabetes mellitus type ii", "diabetes type 2",
+        "diabetes mellitus, non insulin dependent", "diabetes", "diabetes mellitus", "diabetic", "niddm",
+        "non insulin dependent diabetes", "sugar disease", "sugar ki bimari", "high sugar", "madhumeh",
+        "madhumeha", "shugar", "dayabitis",
+    ]),
+    "E10": ("Type 1 diabetes mellitus", [], [
+        "type 1 diabetes", "type 1 diabetes mellitus", "type i diabetes", "t1dm", "t1d", "iddm",
+        "diabetes mellitus, type 1", "diabetes mellitus type i", "diabetes type 1",
+        "diabetes mellitus, insulin dependent", "juvenile diabetes", "insulin dependent diabetes",
+    ]),
+    "O24": ("Gestational diabetes mellitus", [], [
+        "gestational diabetes", "gestational diabetes mellitus", "diabetes, gestational", "gdm",
+        "pregnancy induced diabetes",
+    ]),
+    "E16": ("Hypoglycaemia", [], [
+        "hypoglycemia", "hypoglycaemia", "low blood sugar", "low sugar",
+    ]),
+    "E11.2": ("Diabetic nephropathy", ["E11", "N18"], [
+        "diabetic nephropathy", "diabetic kidney disease", "dkd",
+    ]),
+    "E11.4": ("Diabetic neuropathy", ["E11"], [
+        "diabetic neuropathy", "diabetic peripheral neuropathy", "dpn", "painful diabetic neuropathy",
+        "diabetes mellitus with peripheral neuropathy", "diabetes with peripheral neuropathy",
+        "diabetes mellitus with neuropathy", "type 2 diabetes mellitus with peripheral neuropathy",
+        "type 2 diabetes with peripheral neuropathy",
+    ]),
+    "E11.3": ("Diabetic retinopathy", ["E11"], [
+        "diabetic retinopathy", "diabetic macular edema", "diabetic macular oedema", "dme",
+    ]),
+    "G62": ("Peripheral neuropathy", [], [
+        "peripheral neuropathy", "polyneuropathy", "neuropathy", "jhunjhuni",
+    ]),
+    "I10": ("Hypertension", [], [
+        "hypertension", "essential hypertension", "high blood pressure", "high bp", "htn",
+        "stage 1 hypertension", "hypertension stage 1", "stage 2 hypertension", "hypertension stage 2",
+        "uchh raktachap", "ucch raktachaap", "raktachap", "bp ki bimari",
+    ]),
+    "J45": ("Asthma", [], [
+        "asthma", "bronchial asthma", "dama", "dama rog", "saans ki bimari", "haanpani", "hapani",
+    ]),
+    "J44": ("Chronic obstructive pulmonary disease", [], [
+        "copd", "chronic obstructive pulmonary disease", "chronic obstructive lung disease",
+        "chronic bronchitis", "emphysema", "severe copd",
+    ]),
+    "A15": ("Tuberculosis", [], [
+        "tuberculosis", "tb", "pulmonary tuberculosis", "pulmonary tb", "mdr tb", "kshay", "kshay rog",
+        "tapedik", "tapedic", "raj rog", "yakshma",
+    ]),
+    "C80": ("Cancer", [], [
+        "cancer", "malignancy", "malignant neoplasm", "neoplasm", "tumour", "tumor", "carcinoma",
+        "oncology", "karkrog", "kark rog",
+    ]),
+    "C34": ("Lung cancer", ["C80"], [
+        "lung cancer", "lung carcinoma", "nsclc", "non small cell lung cancer", "sclc",
+        "small cell lung cancer", "bronchogenic carcinoma", "lung opacity", "lung mass", "lung nodule",
+    ]),
+    "C50": ("Breast cancer", ["C80"], [
+        "breast cancer", "breast carcinoma", "carcinoma breast",
+    ]),
+    "I50": ("Heart failure", [], [
+        "heart failure", "congestive heart failure", "chf", "hfref", "hfpef", "cardiac failure",
+        "dil ki kamzori",
+    ]),
+    "I25": ("Coronary artery disease", [], [
+        "coronary artery disease", "cad", "ischemic heart disease", "ischaemic heart disease", "ihd",
+        "angina", "heart attack", "myocardial infarction", "mi",
+    ]),
+    "I63": ("Stroke", [], [
+        "stroke", "ischemic stroke", "ischaemic stroke", "cerebrovascular accident", "cva",
+        "lakwa", "lakva", "paralysis attack", "pakshaghat",
+    ]),
+    "M32": ("Systemic lupus erythematosus", [], [
+        "systemic lupus erythematosus", "sle", "lupus", "lupus nephritis",
+    ]),
+    "M06": ("Rheumatoid arthritis", [], [
+        "rheumatoid arthritis", "ra", "inflammatory arthritis", "gathiya", "gathiya vaat", "aamvaat",
+    ]),
+    "M17": ("Osteoarthritis of knee", ["M19"], [
+        "osteoarthritis of knee", "knee osteoarthritis", "osteoarthritis of both knees", "knee oa",
+        "ghutno ka dard",
+    ]),
+    "M19": ("Osteoarthritis", [], [
+        "osteoarthritis", "oa", "degenerative joint disease", "jodon ka dard",
+    ]),
+    "G43": ("Migraine", [], [
+        "migraine", "migraine without aura", "migraine with aura", "chronic migraine", "adhasisi",
+        "aadhasisi", "aadha sheesha",
+    ]),
+    "G30": ("Alzheimer's disease", ["F03"], [
+        "alzheimer", "alzheimers", "alzheimer disease", "alzheimers disease", "alzheimer dementia",
+        "alzheimers dementia", "early alzheimers dementia",
+    ]),
+    "F03": ("Dementia", [], [
+        "dementia", "cognitive impairment", "mild cognitive impairment", "mci", "memory loss",
+        "vascular cognitive impairment", "vascular dementia", "bhulne ki bimari",
+    ]),
+    "N18": ("Chronic kidney disease", [], [
+        "chronic kidney disease", "ckd", "chronic renal failure", "chronic renal disease", "crf",
+        "kidney failure", "gurde ki bimari",
+    ]),
+    "A90": ("Dengue", [], [
+        "dengue", "dengue fever", "dengue hemorrhagic fever", "dengue haemorrhagic fever",
+    ]),
+    "B54": ("Malaria", [], [
+        "malaria", "plasmodium falciparum", "falciparum malaria", "vivax malaria", "plasmodium vivax",
+        "jaade ka bukhar", "thanda bukhar",
+    ]),
+    "A01": ("Typhoid fever", [], [
+        "typhoid", "typhoid fever", "enteric fever", "salmonella typhi", "miyadi bukhar", "motijhara",
+    ]),
+    "E03": ("Hypothyroidism", [], [
+        "hypothyroidism", "hypothyroid", "underactive thyroid",
+    ]),
+    "E78": ("Dyslipidaemia", [], [
+        "dyslipidemia", "dyslipidaemia", "hyperlipidemia", "hyperlipidaemia", "hypercholesterolemia",
+        "hypercholesterolaemia", "high cholesterol",
+    ]),
+    "E66": ("Obesity", [], [
+        "obesity", "obese", "overweight", "motapa",
+    ]),
+    "E55": ("Vitamin D deficiency", [], [
+        "vitamin d deficiency", "vit d deficiency", "hypovitaminosis d",
+    ]),
+    "K29": ("Gastritis", [], [
+        "gastritis", "chronic gastritis", "acid peptic disease", "apd", "acidity", "gas ki samasya",
+    ]),
+    "B24": ("HIV disease", [], [
+        "hiv", "hiv infection", "hiv aids", "aids",
+    ]),
+    "K74": ("Liver cirrhosis", [], [
+        "cirrhosis", "liver cirrhosis", "chronic liver disease", "cld",
+    ]),
+    "D50": ("Anaemia", [], [
+        "anemia", "anaemia", "iron deficiency anemia", "iron deficiency anaemia", "khoon ki kami",
+    ]),
+}
+
+# Qualifiers that don't change the concept and would otherwise block a trie match
+_STOPWORDS = frozenset({
+    "suspected", "probable", "possible", "likely", "early", "known", "case", "of", "the", "a", "an",
+    "newly", "detected", "diagnosed", "uncontrolled", "controlled", "improved", "control", "suboptimal",
+    "with", "and", "k", "ki", "ka",
+})
+
+# A type qualifier right after a generic diabetes term decides the concept
+# ("Diabetes Mellitus, Type 1" is E10, not the generic E11 hit on "diabetes mellitus")
+_GENERIC_DIABETES = frozenset({("diabetes",), ("diabetes", "mellitus"), ("diabetic",)})
+_DIABETES_QUALIFIERS = [  # longest first
+    (("non", "insulin", "dependent"), "E11"),
+    (("insulin", "dependent"), "E10"),
+    (("type", "1"), "E10"), (("type", "i"), "E10"), (("juvenile",), "E10"),
+    (("type", "2"), "E11"), (("type", "ii"), "E11"),
+    (("gestational",), "O24"),
+]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_POSSESSIVE_RE = re.compile(r"['’]s\b")
+_TERMINAL = "$"
+
+
+def tokenize(text):
+    """Lower-case alphanumeric tokens with possessives removed ("Alzheimer's" -> ["alzheimer"])."""
+    return _TOKEN_RE.findall(_POSSESSIVE_RE.sub("", (text or "").lower()))
+
+
+def _build_trie():
+    trie = {}
+    for concept_id, (name, _parents, synonyms) in CONCEPTS.items():
+        for term in [name, *synonyms]:
+            tokens = [t for t in tokenize(term) if t not in _STOPWORDS] or tokenize(term)
+            node = trie
+            for tok in tokens:
+                node = node.setdefault(tok, {})
+            # First registration wins so a term listed under a specific concept isn't overwritten
+            node.setdefault(_TERMINAL, concept_id)
+    return trie
+
+
+_TRIE = _build_trie()
+
+
+def _with_parents(concept_ids):
+    out = []
+    for cid in concept_ids:
+        stack = [cid]
+        while stack:
+            c = stack.pop()
+            if c not in out:
+                out.append(c)
+                stack.extend(CONCEPTS[c][1])
+    return out
+
+
+def match_terms(text):
+    """
+    Scan text for dictionary terms, longest match first.
+    Returns a list of (concept_id, matched_phrase) in order of appearance.
+    """
+    tokens = [t for t in tokenize(text) if t not in _STOPWORDS]
+    found = []
+    i, n = 0, len(tokens)
+    while i < n:
+        node = _TRIE
+        best_end, best_id = None, None
+        j = i
+        while j < n and tokens[j] in node:
+            node = node[tokens[j]]
+            j += 1
+            if _TERMINAL in node:
+                best_end, best_id = j, node[_TERMINAL]
+        if best_id and tuple(tokens[i:best_end]) in _GENERIC_DIABETES:
+            for qualifier, qualified_id in _DIABETES_QUALIFIERS:
+                if tuple(tokens[best_end:best_end + len(qualifier)]) == qualifier:
+                    best_id, best_end = qualified_id, best_end + len(qualifier)
+                    break
+        if best_id:
+            found.append((best_id, " ".join(tokens[i:best_end])))
+            i = best_end
+        else:
+            i += 1
+    return found
+
+
+def normalize(text, include_parents=True):
+    """Map free text to a de-duplicated list of concept IDs (most specific first)."""
+    ids = []
+    for cid, _phrase in match_terms(text):
+        if cid not in ids:
+            ids.append(cid)
+    return _with_parents(ids) if include_parents else ids
+
+
+def normalize_conditions(conditions):
+    """Normalize a ClinicalTrials.gov conditions list into concept IDs."""
+    ids = []
+    for condition in conditions or []:
+        for cid in normalize(condition):
+            if cid not in ids:
+                ids.append(cid)
+    return ids
+
+
+def concept_name(concept_id):
+    return CONCEPTS[concept_id][0] if concept_id in CONCEPTS else concept_id
+
+
+class TrialConditionIndex:
+    """
+    Inverted index: concept ID -> trial IDs, built from parsed trial records.
+    Postings keep insertion order (NCT ID order when built from TrialStore.iter_trials).
+    """
+
+    def __init__(self, trials=()):
+        self.postings = {}
+        self.trials = {}
+        for trial in trials:
+            self.add(trial)
+
+    def __len__(self):
+        return len(self.trials)
+
+    def add(self, trial):
+        trial_id = trial["trial_id"]
+        if trial_id in self.trials:
+            return
+        self.trials[trial_id] = trial
+        concept_ids = trial.get("condition_ids") or normalize_conditions(trial.get("conditions", []))
+        for cid in concept_ids:
+            self.postings.setdefault(cid, []).append(trial_id)
+
+    def candidate_ids(self, *diagnoses, limit=None):
+        """Trial IDs whose conditions share a concept with any diagnosis, most specific concept first."""
+        ranked = []
+        seen = set()
+        for diagnosis in diagnoses:
+            for cid in normalize(diagnosis or ""):
+                for trial_id in self.postings.get(cid, ()):
+                    if trial_id not in seen:
+                        seen.add(trial_id)
+                        ranked.append(trial_id)
+                        if limit is not None and len(ranked) >= limit:
+                            return ranked
+        return ranked
+
+    def candidates(self, *diagnoses, limit=None):
+        return [self.trials[i] for i in self.candidate_ids(*diagnoses, limit=limit)]
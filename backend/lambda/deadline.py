@@ -0,0 +1,101 @@
+"""
+ClinicalSetu - Request Deadlines
+The time budget of the current request, threaded through every step so work
+that cannot finish is skipped instead of being cut off by the Lambda timeout
+(which discards the steps that did complete).
+
+scope(context) starts the budget from context.get_remaining_time_in_millis()
+(Lambda, or the local server's stand-in context) minus DEADLINE_SAFETY_MS kept
+for building and returning the response. Without a context there is no
+deadline, unless REQUEST_BUDGET_MS is set. A caller's deadline travels to
+another Lambda as wall-clock epoch ms (epoch_ms(), e.g. in Bedrock Agent
+sessionAttributes) and is passed back in as scope(context, until_ms=...); the
+earlier of the two wins. Inside the scope:
+
+  remaining_ms()         - None when unbounded
+  fits(ms)               - is there room for another attempt / step of this size
+  budget_sleep(s, ms)    - back-off sleep shortened to leave ms for the next
+                           attempt; False (no sleep) when even that cannot fit
+  wrap(fn)               - carry the deadline into pool threads
+
+The deadline lives in a context variable, so concurrent requests on the local
+server each see their own.
+"""
+
+import contextlib
+import contextvars
+import os
+import time
+
+SAFETY_MS = float(os.environ.get("DEADLINE_SAFETY_MS", "1500"))
+DEFAULT_BUDGET_MS = os.environ.get("REQUEST_BUDGET_MS")
+
+_deadline = contextvars.ContextVar("clinicalsetu_deadline", default=None)  # absolute time.monotonic()
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request budget cannot fit the next attempt or step."""
+
+
+@contextlib.contextmanager
+def scope(context=None, budget_ms=None, until_ms=None):
+    """Set the deadline for the block: the earliest of the Lambda context, budget_ms and until_ms (epoch)."""
+    budgets = [budget_ms] if budget_ms is not None else []
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        budgets.append(context.get_remaining_time_in_millis() - SAFETY_MS)
+    if until_ms is not None:
+        budgets.append(float(until_ms) - time.time() * 1000 - SAFETY_MS)
+    if not budgets and DEFAULT_BUDGET_MS:
+        budgets.append(float(DEFAULT_BUDGET_MS))
+    token = _deadline.set(time.monotonic() + min(budgets) / 1000 if budgets else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_ms():
+    deadline = _deadline.get()
+    return None if deadline is None else (deadline - time.monotonic()) * 1000
+
+
+def epoch_ms():
+    """The deadline as wall-clock epoch milliseconds (to hand to another process), or None."""
+    remaining = remaining_ms()
+    return None if remaining is None else int(time.time() * 1000 + remaining)
+
+
+def fits(ms):
+    remaining = remaining_ms()
+    return remaining is None or remaining >= ms
+
+
+def check(ms, what="request"):
+    """Raise DeadlineExceeded unless ms more fits in the budget."""
+    if not fits(ms):
+        raise DeadlineExceeded(f"Deadline: {remaining_ms():.0f} ms left, {what} needs ~{ms:.0f} ms")
+
+
+def budget_sleep(delay_s, reserve_ms):
+    """Sleep up to delay_s, keeping reserve_ms for the next attempt. False (no sleep) if that cannot fit."""
+    remaining = remaining_ms()
+    if remaining is not None:
+        room_s = (remaining - reserve_ms) / 1000
+        if room_s < 0:
+            return False
+        delay_s = min(delay_s, room_s)
+    time.sleep(delay_s)
+    return True
+
+
+def wrap(fn):
+    """Run fn under the caller's deadline (for work submitted to a thread pool)."""
+    deadline = _deadline.get()
+
+    def run(*args, **kwargs):
+        token = _deadline.set(deadline)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _deadline.reset(token)
+    return run
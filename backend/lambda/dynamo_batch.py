@@ -0,0 +1,78 @@
+"""
+ClinicalSetu - DynamoDB Bulk Writer
+Chunked BatchWriteItem with UnprocessedItems retry, shared by the visit API
+(/api/save-visits) and scripts/seed_visits.py.
+
+Features:
+  - 25-item BatchWriteItem chunks (the DynamoDB per-call maximum)
+  - Duplicate keys within a chunk collapsed (last write wins) instead of failing the call
+  - UnprocessedItems folded into the next request; exponential backoff + jitter when throttled
+"""
+
+import random
+import time
+from collections import deque
+
+BATCH_SIZE = 25
+MAX_ATTEMPTS = 8
+BASE_DELAY = 0.05  # seconds
+MAX_DELAY = 2.0  # seconds
+
+
+def _dedupe(items, key_attrs):
+    """Collapse duplicate keys (last write wins); BatchWriteItem rejects a request that repeats a key."""
+    unique = {}
+    for item in items:
+        unique[tuple(item[k] for k in key_attrs)] = item
+    return list(unique.values())
+
+
+def _key(request, key_attrs):
+    item = request["PutRequest"]["Item"]
+    return tuple(item[k] for k in key_attrs)
+
+
+def batch_write(dynamodb, table_name, items, key_attrs=("pk", "sk"), max_attempts=MAX_ATTEMPTS, sleep=time.sleep):
+    """
+    Write items (already DynamoDB-safe, see visit_codec.to_dynamo) through dynamodb.meta.client.batch_write_item.
+    Returns {"written", "batches", "retries", "unprocessed"}; unprocessed holds items still
+    rejected after max_attempts so the caller can report or re-queue them.
+
+    UnprocessedItems are folded into the next request alongside fresh items, so a partially
+    throttled batch costs no extra round trip. Backoff only kicks in once a request makes no
+    progress or nothing but retries is left to send.
+    """
+    client = dynamodb.meta.client
+    stats = {"written": 0, "batches": 0, "retries": 0, "unprocessed": []}
+    fresh = deque(_dedupe(items, key_attrs))
+    retry = deque()  # (request, attempts so far)
+    backoff = 0
+
+    while fresh or retry:
+        batch = [retry.popleft() for _ in range(min(BATCH_SIZE, len(retry)))]
+        while len(batch) < BATCH_SIZE and fresh:
+            batch.append(({"PutRequest": {"Item": fresh.popleft()}}, 0))
+
+        stats["batches"] += 1
+        resp = client.batch_write_item(RequestItems={table_name: [req for req, _ in batch]})
+        left = resp.get("UnprocessedItems", {}).get(table_name, [])
+        stats["written"] += len(batch) - len(left)
+        if not left:
+            backoff = 0
+            continue
+
+        attempts = {_key(req, key_attrs): n for req, n in batch}
+        for req in left:
+            n = attempts.get(_key(req, key_attrs), 0) + 1
+            if n >= max_attempts:
+                stats["unprocessed"].append(req["PutRequest"]["Item"])
+            else:
+                stats["retries"] += 1
+                retry.append((req, n))
+
+        if len(left) == len(batch) or not fresh:
+            delay = min(BASE_DELAY * (2 ** backoff) + random.uniform(0, BASE_DELAY), MAX_DELAY)
+            backoff += 1
+            sleep(delay)
+
+    return stats
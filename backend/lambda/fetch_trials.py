@@ -4,7 +4,8 @@ Fetches recruiting clinical trials in India from ClinicalTrials.gov v2 API.
 
 Runs as:
   1. AWS Lambda (triggered by EventBridge daily) — uploads to S3, triggers KB sync
-  2. Local script — saves to data/trials/ for development
+  2. Local script — upserts into data/trials.sqlite and exports changed trials
+     to data/trials/ for development and Knowledge Base ingestion
 
 Features:
   - Incremental sync: only fetches trials updated since last sync
@@ -14,7 +15,7 @@ Features:
 
 Usage:
   python backend/lambda/fetch_trials.py --test        # Fetch 1 trial, print it
-  python backend/lambda/fetch_trials.py --local        # Save to data/trials/
+  python backend/lambda/fetch_trials.py --local        # Save to data/trials.sqlite + data/trials/
   python backend/lambda/fetch_trials.py --local --test # Test locally
 
 Environment variables (Lambda mode):
@@ -30,6 +31,10 @@ import urllib.request
 import urllib.parse
 from datetime import datetime, timezone
 
+import tracing
+from conditions import normalize_conditions
+from eligibility import parse_eligibility
+
 # Conditions to search for — covers common Indian healthcare needs
 SEARCH_CONDITIONS = [
     "diabetes",
@@ -82,7 +87,7 @@ def fetch_studies(condition, last_sync_date=None, page_size=PAGE_SIZE, max_pages
 
         try:
             req = urllib.request.Request(url, headers={"User-Agent": "ClinicalSetu/1.0"})
-            with urllib.request.urlopen(req, timeout=30) as resp:
+            with tracing.span("clinicaltrials.gov", kind="http"), urllib.request.urlopen(req, timeout=30) as resp:
                 data = json.loads(resp.read().decode("utf-8"))
         except Exception as e:
             print(f"  API error for '{condition}': {e}")
@@ -145,47 +150,8 @@ def parse_study(study):
         email = c.get("email", "")
         contact_info = f"{name}, {email}" if email else name
 
-    # Parse eligibility criteria text
-    elig_text = eligibility.get("eligibilityCriteria", "")
-    min_age = eligibility.get("minimumAge", "")
-    max_age = eligibility.get("maximumAge", "")
-    sex = eligibility.get("sex", "ALL")
-
-    # Parse age values
-    def parse_age(age_str):
-        if not age_str:
-            return None
-        try:
-            return int(age_str.split()[0])
-        except (ValueError, IndexError):
-            return None
-
-    age_min = parse_age(min_age)
-    age_max = parse_age(max_age)
-
-    # Split eligibility into inclusion/exclusion
-    inclusion_text = ""
-    exclusion_list = []
-    if "Exclusion Criteria:" in elig_text:
-        parts = elig_text.split("Exclusion Criteria:")
-        inclusion_text = parts[0].replace("Inclusion Criteria:", "").strip()
-        exclusion_raw = parts[1].strip()
-        exclusion_list = [
-            line.strip().lstrip("0123456789.-) ").strip()
-            for line in exclusion_raw.split("\n")
-            if line.strip() and not line.strip().startswith("Exclusion")
-        ]
-        exclusion_list = [e for e in exclusion_list if len(e) > 3]
-    elif "Inclusion Criteria:" in elig_text:
-        inclusion_text = elig_text.replace("Inclusion Criteria:", "").strip()
-
-    # Extract inclusion additional criteria
-    inclusion_additional = [
-        line.strip().lstrip("0123456789.-) ").strip()
-        for line in inclusion_text.split("\n")
-        if line.strip() and len(line.strip()) > 3
-    ]
-    inclusion_additional = [i for i in inclusion_additional if len(i) > 3][:10]
+    # Parse eligibility: ages in years, sex, full inclusion/exclusion lists, numeric constraints
+    elig = parse_eligibility(eligibility)
 
     # Get conditions
     conditions = conditions_mod.get("conditions", [])
@@ -200,14 +166,16 @@ def parse_study(study):
         "sponsor": sponsor_name,
         "status": status.get("overallStatus", "RECRUITING"),
         "conditions": conditions,
+        "condition_ids": normalize_conditions(conditions),
         "inclusion_criteria": {
-            "age_min": age_min or 18,
-            "age_max": age_max or 99,
-            "gender": "All" if sex == "ALL" else sex.title(),
+            "age_min": elig["age_min"] if elig["age_min"] is not None else 18,
+            "age_max": elig["age_max"] if elig["age_max"] is not None else 99,
+            "gender": elig["gender"],
             "diagnosis": conditions[0] if conditions else "Not specified",
-            "additional": inclusion_additional[:6],
+            "additional": elig["inclusion"],
         },
-        "exclusion_criteria": exclusion_list[:8],
+        "exclusion_criteria": elig["exclusion"],
+        "eligibility_constraints": elig["constraints"],
         "locations": locations[:5],
         "contact": contact_info,
         "summary": desc.get("briefSummary", ""),
@@ -262,11 +230,16 @@ def fetch_all_trials(last_sync_date=None, test_mode=False):
 
 
 def run_local(test_mode=False):
-    """Run locally — save trials to data/trials/."""
+    """
+    Run locally — upsert trials into the consolidated store (data/trials.sqlite),
+    then export only new/updated trials to data/trials/ for Knowledge Base ingestion.
+    """
+    from trial_store import TrialStore
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(os.path.dirname(script_dir))
     trials_dir = os.path.join(project_root, "data", "trials")
-    os.makedirs(trials_dir, exist_ok=True)
+    store_path = os.environ.get("TRIAL_STORE_PATH") or os.path.join(project_root, "data", "trials.sqlite")
 
     print(f"Fetching clinical trials from ClinicalTrials.gov...")
     trials = fetch_all_trials(test_mode=test_mode)
@@ -277,32 +250,29 @@ def run_local(test_mode=False):
         print(json.dumps(first, indent=2))
         print(f"--- API working! ---\n")
 
-    new_count = 0
-    for nct_id, trial in trials.items():
-        filepath = os.path.join(trials_dir, f"{nct_id}.json")
-        # Skip if file exists with same last_updated date
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    existing = json.load(f)
-                if existing.get("last_updated") == trial.get("last_updated"):
-                    continue
-            except Exception:
-                pass
+    with TrialStore(store_path) as store:
+        # One-time migration from the legacy one-file-per-trial layout
+        if len(store) == 0 and os.path.isdir(trials_dir):
+            migrated = store.import_json_dir(trials_dir)
+            if migrated:
+                print(f"Imported {len(migrated)} existing trials from {trials_dir}")
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(trial, f, indent=2, ensure_ascii=False)
-        new_count += 1
+        changed = store.upsert_many(trials.values())
+        exported = store.export_json(trials_dir, changed)
 
-    print(f"Saved {new_count} new/updated trials to {trials_dir}")
-    print(f"Total trials in directory: {len(os.listdir(trials_dir))}")
+        print(f"Saved {len(changed)} new/updated trials to {store_path}")
+        print(f"Exported {exported} trial files to {trials_dir}")
+        print(f"Total trials in store: {len(store)}")
     return trials
 
 
+@tracing.traced_handler("fetch_trials")
 def lambda_handler(event=None, context=None):
     """Lambda entry point — triggered by EventBridge schedule."""
     import boto3
 
+    tracing.instrument_boto3()
+
     bucket = os.environ.get("TRIALS_BUCKET", "")
     kb_id = os.environ.get("KNOWLEDGE_BASE_ID", "")
     ds_id = os.environ.get("DATA_SOURCE_ID", "")
@@ -17,6 +17,13 @@ import uuid
 import time
 import boto3
 
+import deadline
+import model_usage
+import tracing
+from llm_json import parse_llm_json
+
+tracing.instrument_boto3()
+
 bedrock_agent_runtime = boto3.client(
     "bedrock-agent-runtime",
     region_name=os.environ.get("AWS_REGION", "us-east-1")
@@ -75,6 +82,7 @@ Please coordinate with your specialist agents:
 After all agents complete, provide a brief summary of what was generated."""
 
     session_id = body.get("id", str(uuid.uuid4()))
+    tracing.annotate(consultation_id=session_id)
 
     # Invoke the Supervisor Agent
     response = bedrock_agent_runtime.invoke_agent(
@@ -84,11 +92,13 @@ After all agents complete, provide a brief summary of what was generated."""
         inputText=agent_prompt,
         enableTrace=True,
         sessionState={
-            "sessionAttributes": {
+            # trace_id / parent_span_id and the request deadline ride along to the tool executor Lambda
+            "sessionAttributes": tracing.inject({
                 "patient_id": patient.get("patient_id", "N/A"),
                 "consultation_id": session_id,
-                "doctor_name": doctor["name"]
-            }
+                "doctor_name": doctor["name"],
+                **({"deadline_ms": str(deadline.epoch_ms())} if deadline.epoch_ms() is not None else {})
+            })
         }
     )
 
@@ -96,60 +106,74 @@ After all agents complete, provide a brief summary of what was generated."""
     agent_response_text = ""
     processing_steps = []
     tool_outputs = {}
-
-    for event_item in response.get("completion", []):
-        if "chunk" in event_item:
-            chunk_bytes = event_item["chunk"].get("bytes", b"")
-            if isinstance(chunk_bytes, bytes):
-                agent_response_text += chunk_bytes.decode("utf-8")
-            else:
-                agent_response_text += str(chunk_bytes)
-
-        if "trace" in event_item:
-            trace = event_item["trace"].get("trace", {})
-
-            # Capture orchestration trace for processing steps
-            if "orchestrationTrace" in trace:
-                orch = trace["orchestrationTrace"]
-
-                # Tool invocation
-                if "invocationInput" in orch:
-                    inv = orch["invocationInput"]
-                    if "actionGroupInvocationInput" in inv:
-                        tool_info = inv["actionGroupInvocationInput"]
-                        tool_name = tool_info.get("function", "unknown")
-                        processing_steps.append({
-                            "step": f"Agent called: {tool_name}",
-                            "duration_ms": 0,
-                            "model": MODEL_ID_DISPLAY,
-                            "status": "invoked"
-                        })
-                    # Track collaborator invocations
-                    if "collaboratorInvocationInput" in inv:
-                        collab = inv["collaboratorInvocationInput"]
-                        collab_name = collab.get("collaboratorName", "unknown")
-                        processing_steps.append({
-                            "step": f"Supervisor -> {collab_name}",
-                            "duration_ms": 0,
-                            "model": MODEL_ID_DISPLAY,
-                            "status": "invoked"
-                        })
-
-                # Tool response (direct action group or collaborator output)
-                if "observation" in orch:
-                    obs = orch["observation"]
-                    if "actionGroupInvocationOutput" in obs:
-                        output = obs["actionGroupInvocationOutput"]
-                        output_text = output.get("text", "")
-                        _parse_tool_output(output_text, tool_outputs)
-                    # Collaborator agent responses (multi-agent collaboration)
-                    if "collaboratorInvocationOutput" in obs:
-                        collab_output = obs["collaboratorInvocationOutput"]
-                        collab_text = collab_output.get("output", {}).get("text", "")
-                        if collab_text:
-                            _parse_tool_output(collab_text, tool_outputs)
-                            # Also try to extract JSON blocks from the collaborator's response
-                            _extract_json_from_text(collab_text, tool_outputs)
+    supervisor_calls = []
+    deadline_exceeded = False
+
+    # The invoke_agent SDK span ends when the stream opens; this one covers the orchestration
+    with tracing.span("bedrock-agent-runtime.InvokeAgent.stream", kind="bedrock"):
+        for event_item in response.get("completion", []):
+            if not deadline.fits(0):
+                # Return what the collaborators produced so far instead of hitting the Lambda timeout
+                deadline_exceeded = True
+                tracing.count("deadline_abandoned_steps")
+                break
+            if "chunk" in event_item:
+                chunk_bytes = event_item["chunk"].get("bytes", b"")
+                if isinstance(chunk_bytes, bytes):
+                    agent_response_text += chunk_bytes.decode("utf-8")
+                else:
+                    agent_response_text += str(chunk_bytes)
+
+            if "trace" in event_item:
+                trace = event_item["trace"].get("trace", {})
+
+                # Capture orchestration trace for processing steps
+                if "orchestrationTrace" in trace:
+                    orch = trace["orchestrationTrace"]
+
+                    # Supervisor model usage (tool executor usage is counted in its own trace)
+                    if "modelInvocationOutput" in orch:
+                        usage = orch["modelInvocationOutput"].get("metadata", {}).get("usage", {})
+                        supervisor_calls.append(model_usage.record(MODEL_ID_DISPLAY, usage, None, 0))
+
+                    # Tool invocation
+                    if "invocationInput" in orch:
+                        inv = orch["invocationInput"]
+                        if "actionGroupInvocationInput" in inv:
+                            tool_info = inv["actionGroupInvocationInput"]
+                            tool_name = tool_info.get("function", "unknown")
+                            processing_steps.append({
+                                "step": f"Agent called: {tool_name}",
+                                "duration_ms": 0,
+                                "model": MODEL_ID_DISPLAY,
+                                "status": "invoked"
+                            })
+                        # Track collaborator invocations
+                        if "collaboratorInvocationInput" in inv:
+                            collab = inv["collaboratorInvocationInput"]
+                            collab_name = collab.get("collaboratorName", "unknown")
+                            processing_steps.append({
+                                "step": f"Supervisor -> {collab_name}",
+                                "duration_ms": 0,
+                                "model": MODEL_ID_DISPLAY,
+                                "status": "invoked"
+                            })
+
+                    # Tool response (direct action group or collaborator output)
+                    if "observation" in orch:
+                        obs = orch["observation"]
+                        if "actionGroupInvocationOutput" in obs:
+                            output = obs["actionGroupInvocationOutput"]
+                            output_text = output.get("text", "")
+                            _parse_tool_output(output_text, tool_outputs)
+                        # Collaborator agent responses (multi-agent collaboration)
+                        if "collaboratorInvocationOutput" in obs:
+                            collab_output = obs["collaboratorInvocationOutput"]
+                            collab_text = collab_output.get("output", {}).get("text", "")
+                            if collab_text:
+                                _parse_tool_output(collab_text, tool_outputs)
+                                # Also try to extract JSON blocks from the collaborator's response
+                                _extract_json_from_text(collab_text, tool_outputs)
 
     total_duration = int((time.time() - start_time) * 1000)
 
@@ -181,6 +205,8 @@ After all agents complete, provide a brief summary of what was generated."""
             "architecture": "Bedrock Multi-Agent Collaboration (Supervisor + 4 Specialists)",
             "tools_called": len([s for s in processing_steps if "Agent called" in s.get("step", "")]),
             "agents_invoked": len([s for s in processing_steps if "Supervisor ->" in s.get("step", "")]),
+            "supervisor_usage": model_usage.summarize(supervisor_calls, wall_ms=total_duration),
+            "deadline_exceeded": deadline_exceeded,
             "disclaimer": "AI-Generated - Requires Clinician Validation. This output does not constitute medical advice.",
             "version": "3.0.0-multi-agent"
         }
@@ -194,11 +220,11 @@ After all agents complete, provide a brief summary of what was generated."""
 
 
 def _parse_tool_output(output_text, tool_outputs):
-    """Parse tool output and classify it into the correct result category."""
+    """Parse tool output (local llm_json recovery tiers only) and classify it into the correct result category."""
     try:
-        parsed = json.loads(output_text)
+        parsed, _ = parse_llm_json(output_text)
         _classify_parsed_output(parsed, tool_outputs)
-    except (json.JSONDecodeError, TypeError):
+    except (json.JSONDecodeError, TypeError, AttributeError):
         pass
 
 
@@ -242,6 +268,7 @@ def _extract_json_from_text(text, tool_outputs):
                 start = None
 
 
+@tracing.traced_handler("invoke_agent")
 def lambda_handler(event, context):
     """Main handler. Invokes multi-agent orchestration."""
     # Handle CORS preflight
@@ -252,7 +279,8 @@ def lambda_handler(event, context):
         return _error_response(500, "Multi-agent not configured: BEDROCK_AGENT_ID or BEDROCK_AGENT_ALIAS_ID missing")
 
     try:
-        return _invoke_multi_agent(event)
+        with deadline.scope(context):
+            return _invoke_multi_agent(event)
     except Exception as e:
         print(f"[ClinicalSetu] Multi-agent failed: {e}")
         return _error_response(500, f"Multi-agent processing failed: {e}")
@@ -0,0 +1,154 @@
+"""
+ClinicalSetu - Container Lifecycle
+What a Lambda container (or the local server process) sets up once and reuses
+across requests, and how it is warmed before real traffic arrives.
+
+  resource(name, factory, *deps)  init-once, container-scoped object (DynamoDB Table
+                                  objects, prompt templates). Built on first use; a factory
+                                  that raises is tried again next time. deps (e.g. the boto3
+                                  resource a table comes from) are part of the key, so a
+                                  swapped client gets fresh objects.
+  on_warmup(name, fn)             register a warm-up task (handler modules do this at import)
+  warmup()                        run every task: pre-load templates and schemas, resolve
+                                  tables, open the TLS connections to Bedrock / DynamoDB and
+                                  send a tiny request through them
+  handler                         decorator: answers warm-up events ({"warmup": true}, as sent
+                                  by the WarmupSchedule rule, or an X-Warmup: 1 header; trace
+                                  property warmup, so they stay out of RequestDuration), marks
+                                  the container's first real request as the cold one (trace
+                                  property cold_start, counter cold_starts) and keeps
+                                  first-request vs. steady-state latency
+  init_done()                     end of module init: records the init time and, during
+                                  provisioned-concurrency init
+                                  (AWS_LAMBDA_INITIALIZATION_TYPE=provisioned-concurrency),
+                                  runs the warm-up before the container takes traffic
+  stats()                         init time, warm-ups, first-request and steady-state latency
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import tracing
+
+_start = time.perf_counter()  # first handler module import ~ container init start
+
+_resources = {}
+_resources_lock = threading.Lock()
+_warmups = {}  # name -> fn, in registration order
+
+_state = {"init_ms": None, "warmups": 0, "last_warmup": None, "cold_taken": False, "first_request_ms": None,
+          "first_request_warmed": None}
+_warm_ms = deque(maxlen=512)
+_state_lock = threading.Lock()
+
+
+def resource(name, factory, *deps):
+    """The container's instance of a resource, built by factory() on first use."""
+    key = (name,) + tuple(id(d) for d in deps)
+    entry = _resources.get(key)
+    if entry is None:
+        with _resources_lock:
+            entry = _resources.get(key)
+            if entry is None:
+                entry = _resources[key] = (factory(), deps)  # deps kept alive so their ids stay unique
+    return entry[0]
+
+
+def reset():
+    """Forget every resource (benchmarks, tests)."""
+    with _resources_lock:
+        _resources.clear()
+
+
+def on_warmup(name, fn):
+    _warmups[name] = fn
+
+
+def warmup():
+    """Run every registered warm-up task. Returns {"tasks": {name: {"ms", "ok"[, "error"]}}, "total_ms"}."""
+    start = time.perf_counter()
+    tasks = {}
+    for name, fn in list(_warmups.items()):
+        task_start = time.perf_counter()
+        try:
+            with tracing.span(f"warmup.{name}", kind="warmup"):
+                fn()
+            tasks[name] = {"ms": round((time.perf_counter() - task_start) * 1000, 1), "ok": True}
+        except Exception as e:
+            tasks[name] = {"ms": round((time.perf_counter() - task_start) * 1000, 1), "ok": False, "error": str(e)}
+    report = {"tasks": tasks, "total_ms": round((time.perf_counter() - start) * 1000, 1)}
+    with _state_lock:
+        _state["warmups"] += 1
+        _state["last_warmup"] = report
+    return report
+
+
+def is_warmup(event):
+    if not isinstance(event, dict):
+        return False
+    headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+    return event.get("warmup") is True or headers.get("x-warmup") == "1"
+
+
+def handler(fn):
+    """Lambda handler decorator: warm-up events and cold/warm request latency."""
+
+    @functools.wraps(fn)
+    def wrapper(event=None, context=None):
+        if is_warmup(event):
+            tracing.annotate(warmup=True)  # exported as WarmupDuration, not RequestDuration
+            return {"statusCode": 200, "headers": {"Content-Type": "application/json"},
+                    "body": json.dumps({"warmup": warmup(), "lifecycle": stats()})}
+        with _state_lock:
+            cold = not _state["cold_taken"]
+            _state["cold_taken"] = True
+            if cold:
+                _state["first_request_warmed"] = _state["warmups"] > 0
+        tracing.annotate(cold_start=cold)
+        if cold:
+            tracing.count("cold_starts")
+        start = time.perf_counter()
+        try:
+            return fn(event, context)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            with _state_lock:
+                if cold:
+                    _state["first_request_ms"] = round(ms, 1)
+                else:
+                    _warm_ms.append(ms)
+    return wrapper
+
+
+def init_done():
+    """Call at the end of a handler module's init."""
+    with _state_lock:
+        _state["init_ms"] = round((time.perf_counter() - _start) * 1000, 1)
+    if os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE") == "provisioned-concurrency":
+        warmup()
+
+
+def prime(call):
+    """Send a request whose only purpose is the connection; a service error still leaves it pooled."""
+    try:
+        call()
+    except Exception as e:
+        if not hasattr(e, "response"):  # no answer from the service: the connection did not open
+            raise
+
+
+def stats():
+    with _state_lock:
+        warm = sorted(_warm_ms)
+
+        def pct(q):
+            return round(warm[min(len(warm) - 1, int(q * len(warm)))], 1) if warm else None
+
+        return {"init_ms": _state["init_ms"], "warmups": _state["warmups"],
+                "first_request_ms": _state["first_request_ms"], "first_request_warmed": _state["first_request_warmed"],
+                "steady_requests": len(warm), "steady_ms_p50": pct(0.50), "steady_ms_p99": pct(0.99),
+                "resources": len(_resources)}
@@ -0,0 +1,375 @@
+"""
+ClinicalSetu - LLM JSON Recovery
+Parses JSON out of model output, escalating through cheaper tiers before
+paying for another model call:
+
+  1. strict   - json.loads after stripping ``` fences
+  2. extract  - raw_decode from the first '{' / '[' (leading or trailing prose)
+  3. repair   - one bounded pass over the tokens: trailing commas, single-quoted
+                strings, Python literals, missing commas, mismatched closers,
+                and output truncated at MAX_TOKENS (dangling key / partial
+                value dropped, open strings and containers closed)
+  4. model    - a targeted repair call (caller-supplied), whose answer goes
+                through tiers 1-3 again
+
+The tier that succeeded is returned and kept per thread (first_tier() /
+last_tier() since reset_tier()) so step runners can record it next to the step.
+"""
+
+import json
+import re
+import threading
+
+TIERS = ("strict", "extract", "repair", "model")
+MAX_REPAIR_CHARS = 200_000  # larger outputs skip the repair pass
+MAX_START_CANDIDATES = 4  # '{' / '[' positions tried when prose before the JSON contains brackets
+
+_decoder = json.JSONDecoder()
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {tier: 0 for tier in TIERS}
+_stats["failed"] = 0
+
+_NUMBER_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_WORD_RE = re.compile(r"[A-Za-z_]+")
+_HEX4_RE = re.compile(r"[0-9a-fA-F]{4}")
+_PARTIAL_TOKEN_RE = re.compile(r"[\w+\-.]*")
+_LITERALS = {"true": "true", "false": "false", "null": "null",
+             "True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def strip_fences(text):
+    text = text.strip()
+    if text.startswith("```"):
+        lines = text.split("\n")
+        lines = [l for l in lines if not l.strip().startswith("```")]
+        text = "\n".join(lines)
+    return text
+
+
+def _next_start(text, after=-1):
+    """Position of the first '{' / '[' after index `after`, or -1."""
+    starts = [i for i in (text.find("{", after + 1), text.find("[", after + 1)) if i != -1]
+    return min(starts) if starts else -1
+
+
+def _is_prose(text, start, end):
+    """A failed candidate is prose (e.g. "{see below}") if no string began before it broke."""
+    return '"' not in text[start:end]
+
+
+def _span_end(text, start):
+    """Index just past the bracket group opened at start (brackets only; strings ignored)."""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] in "{[":
+            depth += 1
+        elif text[i] in "}]":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
+
+
+def extract_json(text):
+    """
+    raw_decode the first JSON object/array in text, ignoring prose around it. A failed candidate
+    is skipped only when it is prose, so a fragment inside a broken value is never returned.
+    """
+    error = json.JSONDecodeError("No JSON object or array found", text, 0)
+    start = _next_start(text)
+    for _ in range(MAX_START_CANDIDATES):
+        if start == -1:
+            break
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+            return value
+        except json.JSONDecodeError as e:
+            error = e
+            if not _is_prose(text, start, e.pos):
+                break
+            start = _next_start(text, _span_end(text, start))
+    raise error
+
+
+# ----- repair pass -----
+
+def _read_string(text, i, quote):
+    """Read a string starting after its opening quote. Returns (json string literal, next index)."""
+    out = []
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == "\\" and i + 1 < n:
+            nxt = text[i + 1]
+            if nxt == "'":
+                out.append("'")
+            elif nxt == "u":
+                hex4 = text[i + 2:i + 6]
+                if len(hex4) < 4:  # truncated escape
+                    break
+                if _HEX4_RE.fullmatch(hex4):
+                    out.append("\\u" + hex4)
+                    i += 6
+                    continue
+                out.append("\\\\u")
+            elif nxt in "\"\\/bfnrt":
+                out.append(ch + nxt)
+            else:
+                out.append("\\\\" + nxt if nxt != "\n" else "\\n")
+            i += 2
+            continue
+        if ch == "\\":  # lone backslash at end of truncated output
+            i += 1
+            continue
+        if ch == quote:
+            return '"' + "".join(out) + '"', i + 1
+        if ch == '"':
+            out.append('\\"')
+        elif ch == "\n":
+            out.append("\\n")
+        elif ch == "\t":
+            out.append("\\t")
+        elif ch < " ":
+            out.append(f"\\u{ord(ch):04x}")
+        else:
+            out.append(ch)
+        i += 1
+    return '"' + "".join(out) + '"', n  # unterminated (truncated): close it
+
+
+def _number(literal):
+    literal = literal.rstrip(".")
+    try:
+        json.loads(literal)
+        return literal
+    except json.JSONDecodeError:  # ".5", "007"
+        return json.dumps(float(literal)) if any(c in literal for c in ".eE") else str(int(literal))
+
+
+def _tokens(text, start):
+    """
+    Yield (kind, literal) from start. At the first character that cannot be JSON, yields
+    ("junk", index) and stops.
+    """
+    i, n = start, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in " \t\r\n":
+            i += 1
+        elif ch in "{}[]:,":
+            yield ch, ch
+            i += 1
+        elif ch in "\"'":
+            literal, i = _read_string(text, i + 1, ch)
+            yield "value", literal
+        elif ch == "/" and text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+        else:
+            m = _NUMBER_RE.match(text, i)
+            if m:
+                yield "value", _number(m.group(0))
+                i = m.end()
+                continue
+            m = _WORD_RE.match(text, i)
+            if m and m.group(0) in _LITERALS:
+                yield "value", _LITERALS[m.group(0)]
+                i = m.end()
+                continue
+            yield "junk", i  # prose after the JSON, or a truncated literal
+            return
+
+
+def repair_json(text):
+    """
+    Rewrite the first JSON value in text into valid JSON in a single pass per start candidate.
+    Returns the repaired JSON text; raises json.JSONDecodeError if there is nothing to repair.
+    """
+    if len(text) <= MAX_REPAIR_CHARS:
+        start = _next_start(text)
+        for _ in range(MAX_START_CANDIDATES):
+            if start == -1:
+                break
+            repaired, stopped_at = _repair_from(text, start)
+            if repaired is not None:
+                return repaired
+            if not _is_prose(text, start, stopped_at):
+                break
+            start = _next_start(text, _span_end(text, start))
+    raise json.JSONDecodeError("Nothing repairable", text, 0)
+
+
+def _repair_from(text, start):
+    """
+    Returns (repaired JSON text, None) for the value starting at text[start], or
+    (None, index) when non-JSON text at index interrupts the value.
+    """
+    out = []
+    stack = []  # [opener, state]; state: "key" | "colon" | "value" | "comma"
+    rollback = None  # output length before the pending key, to drop a dangling "key":
+
+    def begin_value():
+        """Prepare out for a value in the current container; False if no value is allowed here."""
+        if not stack:
+            return not out
+        top = stack[-1]
+        if top[1] == "comma":  # missing comma between values
+            out.append(",")
+            top[1] = "key" if top[0] == "{" else "value"
+        if top[0] == "{" and top[1] == "colon":  # "key" "value": missing colon
+            out.append(":")
+            top[1] = "value"
+        return True
+
+    for kind, literal in _tokens(text, start):
+        top = stack[-1] if stack else None
+        if kind == "junk":
+            # Only a partial literal at the very end (truncation) is tolerated inside the value
+            if stack and not _PARTIAL_TOKEN_RE.fullmatch(text[literal:].rstrip()):
+                return None, literal
+            break
+        if kind in "{[":
+            if not begin_value():
+                break
+            if top is not None and top[0] == "{" and top[1] == "key":
+                break  # container where a key belongs: give up on the rest
+            out.append(literal)
+            stack.append([literal, "key" if literal == "{" else "value"])
+            rollback = None
+        elif kind in "}]":
+            if not stack:
+                break
+            if rollback is not None and stack[-1][1] in ("colon", "value"):
+                del out[rollback:]
+            if out[-1] == ",":
+                out.pop()  # trailing comma
+            rollback = None
+            opener = stack.pop()[0]
+            out.append(_CLOSERS[opener])  # also fixes a mismatched closer
+            if stack:
+                stack[-1][1] = "comma"
+            else:
+                break  # first complete value; anything after is prose
+        elif kind == ":":
+            if top is not None and top[0] == "{" and top[1] == "colon":
+                out.append(":")
+                top[1] = "value"
+        elif kind == ",":
+            if top is not None and top[1] == "comma":
+                out.append(",")
+                top[1] = "key" if top[0] == "{" else "value"
+        else:  # value: string, number or literal
+            if top is None:
+                break
+            if top[0] == "{" and top[1] in ("key", "comma"):
+                if not literal.startswith('"'):
+                    break
+                if top[1] == "comma":
+                    rollback = len(out)
+                    out.append(",")
+                else:
+                    rollback = len(out)
+                out.append(literal)
+                top[1] = "colon"
+                continue
+            if not begin_value():
+                break
+            out.append(literal)
+            top[1] = "comma"
+            rollback = None
+
+    # Truncated output: drop a dangling key or separator, then close what is open
+    if stack and rollback is not None and stack[-1][1] in ("colon", "value"):
+        del out[rollback:]
+    if out and out[-1] in (",", ":"):
+        out.pop()
+    while stack:
+        out.append(_CLOSERS[stack.pop()[0]])
+    return "".join(out) or None, start
+
+
+def repair_prompt(text, error):
+    """Prompt for the model tier: fix the JSON without regenerating the content."""
+    return f"""The text below was supposed to be a single valid JSON value but it fails to parse ({error}).
+It may be cut off at the end or contain formatting mistakes.
+Return ONLY the corrected JSON: keep every key and value that is present, fix the syntax,
+and complete any cut-off structure as briefly as possible. No markdown, no code blocks, no commentary.
+
+TEXT:
+{text}"""
+
+
+# ----- pipeline -----
+
+def _local_tiers(text):
+    """Tiers 1-3. Returns (value, tier); raises the strict-parse error if all fail."""
+    cleaned = strip_fences(text)
+    try:
+        return json.loads(cleaned), "strict"
+    except json.JSONDecodeError as e:
+        error = e
+    try:
+        return extract_json(cleaned), "extract"
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_json(cleaned)), "repair"
+    except json.JSONDecodeError:
+        pass
+    raise error
+
+
+def parse_llm_json(text, repair_call=None):
+    """
+    Parse model output. repair_call(prompt) -> text enables the model tier.
+    Returns (value, tier); raises json.JSONDecodeError when every tier fails.
+    """
+    try:
+        value, tier = _local_tiers(text)
+    except json.JSONDecodeError as e:
+        if repair_call is None:
+            _count("failed")
+            raise
+        try:
+            value, _ = _local_tiers(repair_call(repair_prompt(text, e)))
+        except json.JSONDecodeError:
+            _count("failed")
+            raise e
+        tier = "model"
+    _tiers().append(tier)
+    _count(tier)
+    return value, tier
+
+
+def _tiers():
+    if not hasattr(_local, "tiers"):
+        _local.tiers = []
+    return _local.tiers
+
+
+def first_tier():
+    """Tier of the first successful parse on this thread since reset_tier() (None if none)."""
+    tiers = _tiers()
+    return tiers[0] if tiers else None
+
+
+def last_tier():
+    """Tier of the most recent successful parse on this thread since reset_tier() (None if none)."""
+    tiers = _tiers()
+    return tiers[-1] if tiers else None
+
+
+def reset_tier():
+    _local.tiers = []
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
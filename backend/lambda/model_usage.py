@@ -0,0 +1,94 @@
+"""
+ClinicalSetu - Model Usage Accounting
+Per-call token usage and latency of Bedrock converse calls, aggregated per
+processing step.
+
+invoke_bedrock_with_usage (process_consultation, agent_tool_executor) records
+each call here: input/output tokens and the model's own latency (metrics.latencyMs)
+from the converse response, and the wall time of the call as the handler saw it
+(retries, throttling back-off, fallback and network included). Prompt-cache hits
+are recorded as cached calls with no tokens.
+
+Collection is per thread and only while a step is open (start() ... take()), so
+calls made on pool threads outside a step are counted in the trace only.
+
+summarize() turns a list of calls into the figures reported in processing_steps
+and metadata: token totals, model vs. wall time, output tokens/sec of model time
+and an estimated cost from PRICING.
+"""
+
+import os
+import threading
+
+import tracing
+
+# USD per 1,000 tokens (input, output), on-demand pricing in us-east-1
+PRICING = {
+    "amazon.nova-lite-v1:0": (0.00006, 0.00024),
+    "amazon.nova-micro-v1:0": (0.000035, 0.00014),
+    "amazon.nova-pro-v1:0": (0.0008, 0.0032),
+}
+DEFAULT_PRICE = tuple(float(p) for p in os.environ.get("MODEL_PRICE_PER_1K", "0.00006,0.00024").split(","))
+
+_local = threading.local()
+
+
+def start():
+    """Begin collecting calls on this thread (discards anything uncollected)."""
+    _local.calls = []
+
+
+def take():
+    """Calls recorded on this thread since start(); stops collecting."""
+    calls = getattr(_local, "calls", None) or []
+    _local.calls = None
+    return calls
+
+
+def record(model_id, usage, latency_ms, wall_ms, cached=False):
+    """Record one call. usage is the converse "usage" dict ({} for cache hits). Returns the call."""
+    call = {
+        "model": model_id,
+        "input_tokens": int(usage.get("inputTokens", 0)),
+        "output_tokens": int(usage.get("outputTokens", 0)),
+        "model_latency_ms": int(latency_ms or 0),
+        "wall_ms": int(wall_ms),
+        "cached": cached,
+    }
+    calls = getattr(_local, "calls", None)
+    if calls is not None:
+        calls.append(call)
+    tracing.count("bedrock_input_tokens", call["input_tokens"])
+    tracing.count("bedrock_output_tokens", call["output_tokens"])
+    return call
+
+
+def price(model_id):
+    """(input, output) USD per 1K tokens; inference-profile prefixes (us., eu., ...) are ignored."""
+    base = model_id.split(".", 1)[1] if model_id.split(".", 1)[0] in ("us", "eu", "apac") else model_id
+    return PRICING.get(base, DEFAULT_PRICE)
+
+
+def summarize(calls, wall_ms=None):
+    """Aggregate calls (or already-summarized dicts with the same keys). wall_ms overrides the summed wall time."""
+    totals = {"model_calls": 0, "cached_calls": 0, "input_tokens": 0, "output_tokens": 0,
+              "model_latency_ms": 0, "wall_ms": 0, "estimated_cost_usd": 0.0}
+    for call in calls:
+        if "model_calls" in call:  # a step summary
+            for key in totals:
+                totals[key] += call.get(key, 0)
+            continue
+        totals["model_calls"] += 1
+        totals["cached_calls"] += int(call["cached"])
+        for key in ("input_tokens", "output_tokens", "model_latency_ms", "wall_ms"):
+            totals[key] += call[key]
+        input_price, output_price = price(call["model"])
+        totals["estimated_cost_usd"] += (call["input_tokens"] * input_price + call["output_tokens"] * output_price) / 1000
+    if wall_ms is not None:
+        totals["wall_ms"] = int(wall_ms)
+    totals["estimated_cost_usd"] = round(totals["estimated_cost_usd"], 6)
+    totals["tokens_per_sec"] = (round(totals["output_tokens"] / (totals["model_latency_ms"] / 1000), 1)
+                                if totals["model_latency_ms"] else None)
+    totals["model_time_share"] = (round(min(totals["model_latency_ms"] / totals["wall_ms"], 1.0), 3)
+                                  if totals["wall_ms"] and totals["model_latency_ms"] else None)
+    return totals
@@ -0,0 +1,184 @@
+"""
+ClinicalSetu - Output Schemas
+JSON Schemas for the five generated outputs (backend/prompts/schemas/*.json),
+a validator that reports the exact failing paths, and partial regeneration:
+only the sections that fail validation are requested from the model again and
+merged into the output, instead of regenerating the whole document.
+
+Sections are the properties of the output object, or of the object at the
+schema's "x-section-root" path for wrapped outputs (e.g. referral_letter.*),
+plus any top-level property outside that root.
+
+The validator covers the draft-07 subset the schemas use: type, properties,
+required, items, minimum, maximum. A null is accepted for properties that are
+not required, since the model uses it for "not mentioned".
+"""
+
+import json
+import threading
+from pathlib import Path
+
+_schemas = {}
+_local = threading.local()
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "number": (int, float),
+    "integer": int,
+    "null": type(None),
+}
+
+
+def load_schema(name):
+    """Load (once per container) the schema for an output, e.g. "soap_note"."""
+    if name not in _schemas:
+        for base in (Path(__file__).parent.parent / "prompts", Path(__file__).parent / "prompts"):
+            path = base / "schemas" / f"{name}.json"
+            if path.exists():
+                _schemas[name] = json.loads(path.read_text(encoding="utf-8"))
+                break
+        else:
+            raise FileNotFoundError(f"Output schema not found: {name}")
+    return _schemas[name]
+
+
+def _type_ok(value, expected):
+    for name in expected if isinstance(expected, list) else [expected]:
+        python_type = _TYPES[name]
+        if isinstance(value, python_type) and not (isinstance(value, bool) and name in ("number", "integer")):
+            return True
+    return False
+
+
+def validate(value, schema, path=()):
+    """Return [(path tuple, message)] for every violation; [] when value is valid."""
+    errors = []
+    expected = schema.get("type")
+    if expected and not _type_ok(value, expected):
+        return [(path, f"expected {expected}, got {type(value).__name__}")]
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        required = schema.get("required", [])
+        for key in required:
+            if key not in value:
+                errors.append((path + (key,), "missing"))
+        for key, child in properties.items():
+            if key in value and not (value[key] is None and key not in required):
+                errors.extend(validate(value[key], child, path + (key,)))
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], path + (i,)))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append((path, f"below minimum {schema['minimum']}"))
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append((path, f"above maximum {schema['maximum']}"))
+    return errors
+
+
+def format_path(path):
+    out = ""
+    for part in path:
+        out += f"[{part}]" if isinstance(part, int) else (f".{part}" if out else part)
+    return out or "(root)"
+
+
+def failing_sections(errors, schema):
+    """Section paths (tuples) containing the errors, in first-seen order."""
+    root = tuple(schema.get("x-section-root", ()))
+    sections = []
+    for path, _ in errors:
+        if root and path[:len(root)] == root and len(path) > len(root):
+            section = path[:len(root) + 1]
+        else:
+            section = path[:1]
+        if section not in sections:
+            sections.append(section)
+    return sections
+
+
+def section_prompt(prompt, sections, errors):
+    """The original prompt plus an instruction to return only the failing sections."""
+    fields = ", ".join(format_path(s) for s in sections)
+    problems = "\n".join(f"- {format_path(path)}: {message}" for path, message in errors[:20])
+    return f"""{prompt}
+
+PARTIAL REGENERATION:
+A previous answer was valid except for these fields:
+{problems}
+
+Return ONLY a JSON object with the same nesting as the OUTPUT FORMAT above that contains
+just these fields: {fields}. Do not include any other fields. No markdown, no code blocks."""
+
+
+def _get(value, path):
+    for part in path:
+        if not isinstance(value, dict) or part not in value:
+            return None, False
+        value = value[part]
+    return value, True
+
+
+def merge_sections(value, patch, sections):
+    """Copy each section path from patch into value (in place). Returns the sections merged."""
+    merged = []
+    for section in sections:
+        new, found = _get(patch, section)
+        if not found:
+            continue
+        target = value
+        for part in section[:-1]:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        target[section[-1]] = new
+        merged.append(section)
+    return merged
+
+
+def ensure_valid(name, value, prompt, regenerate, max_rounds=1):
+    """
+    Validate a generated output and regenerate only its failing sections.
+    regenerate(prompt) -> parsed JSON. Returns (value, report); the report is also kept per
+    thread (last_report()). Raises ValueError when the output is not a JSON object at all.
+    """
+    schema = load_schema(name)
+    if not isinstance(value, dict):
+        raise ValueError(f"{name}: expected a JSON object, got {type(value).__name__}")
+
+    errors = validate(value, schema)
+    regenerated = []
+    for _ in range(max_rounds):
+        if not errors:
+            break
+        sections = failing_sections(errors, schema)
+        try:
+            patch = regenerate(section_prompt(prompt, sections, errors))
+        except Exception as e:
+            print(f"Partial regeneration of {name} failed: {e}")
+            break
+        if not isinstance(patch, dict):
+            break
+        regenerated.extend(format_path(s) for s in merge_sections(value, patch, sections))
+        errors = validate(value, schema)
+
+    report = {
+        "valid": not errors,
+        "regenerated_sections": regenerated,
+        "errors": [f"{format_path(path)}: {message}" for path, message in errors[:10]],
+    }
+    _local.report = report
+    return value, report
+
+
+def last_report():
+    """Report of the most recent ensure_valid call on this thread (None if none since reset_report())."""
+    return getattr(_local, "report", None)
+
+
+def reset_report():
+    _local.report = None
@@ -7,23 +7,58 @@ Discharge Summary, Trial Matching).
 Features:
 - Retry with exponential backoff for Bedrock throttling
 - Fallback to secondary model if primary model fails (Nova Lite -> Nova Micro)
+- Circuit breakers per model, Knowledge Base and cache table: a dependency that keeps failing
+  is skipped (fallback model, plain generation, no cache) until a half-open probe succeeds
 - DynamoDB caching to reduce costs and improve latency
+- Single-flight: identical requests in flight (double-click, client retry) run the pipeline once,
+  in-process via a shared Future and across containers via a lease item in the cache table
+- Translation cache (in-process + DynamoDB) and multi-language batch translation
+- Field-level translation memory: only strings not translated before are sent to the model
+- Pre-warmed translations: the patient summary is translated into the clinic's languages
+  in the background while the remaining steps run
 - Partial result handling (returns completed steps even if later steps fail)
+- Request deadline from the Lambda context: retries/fallback fit the remaining budget,
+  trial matching is dropped first, partial results carry metadata.deadline_exceeded
+- Tiered JSON recovery for model output (strict -> extract -> repair -> repair call)
+- Schema validation of each output; only failing sections are regenerated and merged
+- Optional prompt-level cache of model calls with record/replay modes (bedrock_cache)
+- Cache table and prompt templates resolved once per container; {"warmup": true} (provisioned
+  concurrency init, scheduled pings) pre-loads them and opens the Bedrock / DynamoDB connections
 """
 
 import json
 import os
+import threading
 import time
 import hashlib
 import random
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from pathlib import Path
 
-# Initialize AWS clients
+import admission
+import bedrock_cache
+import circuit_breaker
+import deadline
+import lifecycle
+import llm_json
+import model_usage
+import output_schemas
+import single_flight
+import tracing
+from translation_cache import TranslationCache
+from translation_memory import PhraseMemory, translate_fields
+
+# Initialize AWS clients (SDK calls are timed as trace spans)
+tracing.instrument_boto3()
+
 bedrock_runtime = boto3.client(
     "bedrock-runtime",
-    region_name=os.environ.get("AWS_REGION", "us-east-1")
+    region_name=os.environ.get("AWS_REGION", "us-east-1"),
+    # _converse owns retries (deadline-aware); no SDK retries hidden underneath them
+    config=Config(retries={"max_attempts": 0, "mode": "standard"})  # max_attempts counts retries
 )
 
 bedrock_agent_runtime = boto3.client(
@@ -31,6 +66,11 @@ bedrock_agent_runtime = boto3.client(
     region_name=os.environ.get("AWS_REGION", "us-east-1")
 )
 
+lambda_client = boto3.client(
+    "lambda",
+    region_name=os.environ.get("AWS_REGION", "us-east-1")
+)
+
 # DynamoDB client for caching
 CACHE_TABLE = os.environ.get("DYNAMODB_CACHE_TABLE", "ClinicalSetu-Cache")
 CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "true").lower() == "true"
@@ -40,21 +80,41 @@ dynamodb = boto3.resource("dynamodb", region_name=os.environ.get("AWS_REGION", "
 MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "us.amazon.nova-lite-v1:0")
 FALLBACK_MODEL_ID = os.environ.get("BEDROCK_FALLBACK_MODEL_ID", "us.amazon.nova-micro-v1:0")
 KNOWLEDGE_BASE_ID = os.environ.get("KNOWLEDGE_BASE_ID", "")
+TRIAL_STORE_PATH = os.environ.get("TRIAL_STORE_PATH", "")
+MAX_TRIAL_CANDIDATES = 10
 MAX_TOKENS = 4096
 TEMPERATURE = 0.3
+# Bump when the translation prompt changes so cached translations are not reused
+TRANSLATION_PROMPT_VERSION = "1"
+MAX_TRANSLATION_LANGUAGES = 8
+TRANSLATION_MEMORY_ENABLED = os.environ.get("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+# Languages to pre-warm patient summary translations into, per clinic:
+#   "Hindi,Tamil" for every clinic, or JSON {"<hospital>": ["Bengali", "Hindi"], "*": ["Hindi"]}
+PREWARM_LANGUAGES = os.environ.get("PREWARM_LANGUAGES", "")
 
 # Retry configuration
 MAX_RETRIES = 3
 BASE_DELAY = 1.0  # seconds
 MAX_DELAY = 15.0  # seconds
+MIN_ATTEMPT_MS = float(os.environ.get("BEDROCK_MIN_ATTEMPT_MS", "2000"))  # budget needed to start another attempt
+
+# Steps dropped first when the request deadline is close (they need their full
+# estimated duration left to start; the others only MIN_ATTEMPT_MS)
+OPTIONAL_STEPS = {"Clinical Trial Matching"}
+STEP_ESTIMATE_MS = float(os.environ.get("STEP_ESTIMATE_MS", "8000"))  # until a step has been timed
+_step_ms = {}  # EWMA of completed step durations in this container
+
+
+def _resolve_cache_table():
+    table = dynamodb.Table(CACHE_TABLE)
+    table.load()
+    return table
 
 
 def _get_cache_table():
-    """Get DynamoDB table, returns None if table doesn't exist."""
+    """Get DynamoDB table (resolved once per container), returns None if table doesn't exist."""
     try:
-        table = dynamodb.Table(CACHE_TABLE)
-        table.load()
-        return table
+        return lifecycle.resource(f"table:{CACHE_TABLE}", _resolve_cache_table, dynamodb)
     except ClientError:
         return None
 
@@ -71,14 +131,15 @@ def _compute_cache_key(consultation_text, patient, referral_reason):
 
 
 def _get_cached_result(cache_key):
-    """Check DynamoDB for a cached result."""
+    """Check DynamoDB for a cached result (skipped while the cache table's circuit is open)."""
     if not CACHE_ENABLED:
         return None
-    table = _get_cache_table()
-    if not table:
-        return None
     try:
-        response = table.get_item(Key={"cache_key": cache_key})
+        with circuit_breaker.get(f"dynamodb:{CACHE_TABLE}").guard():
+            table = _get_cache_table()
+            if not table:
+                return None
+            response = table.get_item(Key={"cache_key": cache_key})
         item = response.get("Item")
         if item:
             # Check TTL (24 hours)
@@ -91,25 +152,37 @@ def _get_cached_result(cache_key):
 
 
 def _put_cached_result(cache_key, result):
-    """Store a result in DynamoDB cache."""
+    """Store a result in DynamoDB cache (skipped while the cache table's circuit is open)."""
     if not CACHE_ENABLED:
         return
-    table = _get_cache_table()
-    if not table:
-        return
     try:
-        table.put_item(Item={
-            "cache_key": cache_key,
-            "result_json": json.dumps(result),
-            "cached_at": int(time.time()),
-            "ttl": int(time.time()) + 86400  # 24h TTL
-        })
+        with circuit_breaker.get(f"dynamodb:{CACHE_TABLE}").guard():
+            table = _get_cache_table()
+            if not table:
+                return
+            table.put_item(Item={
+                "cache_key": cache_key,
+                "result_json": json.dumps(result),
+                "cached_at": int(time.time()),
+                "ttl": int(time.time()) + 86400  # 24h TTL
+            })
     except Exception:
         pass  # Caching failure should not break the main flow
 
 
+_translation_cache = TranslationCache(table_factory=_get_cache_table)
+_phrase_memory = PhraseMemory(table_factory=lambda: _get_cache_table() if CACHE_ENABLED else None)
+_prompt_cache = bedrock_cache.from_env(table_factory=_get_cache_table)
+_flights = single_flight.Group()
+_lease = single_flight.Lease(_get_cache_table, breaker=f"dynamodb:{CACHE_TABLE}")
+
+
 def load_prompt_template(template_name):
-    """Load a prompt template from the prompts directory."""
+    """Load a prompt template from the prompts directory (read once per container)."""
+    return lifecycle.resource(f"prompt:{template_name}", lambda: _read_prompt_template(template_name))
+
+
+def _read_prompt_template(template_name):
     template_path = Path(__file__).parent.parent / "prompts" / f"{template_name}.txt"
     if template_path.exists():
         return template_path.read_text(encoding="utf-8")
@@ -123,62 +196,129 @@ def invoke_bedrock(prompt, model_id=None, max_tokens=MAX_TOKENS, temperature=TEM
     """
     Call Amazon Bedrock using the Converse API (model-agnostic: works with Nova, Claude, etc.)
     Retries with exponential backoff, then falls back to secondary model.
+    Served from / recorded into the prompt cache when BEDROCK_CACHE_MODE is set.
+    """
+    return invoke_bedrock_with_usage(prompt, model_id, max_tokens, temperature)[0]
+
+
+def invoke_bedrock_with_usage(prompt, model_id=None, max_tokens=MAX_TOKENS, temperature=TEMPERATURE):
+    """
+    invoke_bedrock that also returns the call's usage: (text, {"model", "input_tokens",
+    "output_tokens", "model_latency_ms", "wall_ms", "cached"}). The call is recorded in
+    model_usage for the step summary.
     """
     if model_id is None:
         model_id = MODEL_ID
-
+    start = time.perf_counter()
+    response = {}
+    text = _prompt_cache.call(model_id, prompt, temperature, max_tokens,
+                              lambda: _converse(prompt, model_id, max_tokens, temperature, response))
+    call = model_usage.record(response.get("model", model_id), response.get("usage", {}),
+                              response.get("metrics", {}).get("latencyMs"),
+                              (time.perf_counter() - start) * 1000, cached=not response)
+    return text, call
+
+
+def _converse(prompt, model_id, max_tokens, temperature, response_info=None):
+    """Converse with retries and fallback. response_info, if given, receives the model used, usage and metrics."""
     models_to_try = [model_id]
     if model_id != FALLBACK_MODEL_ID:
         models_to_try.append(FALLBACK_MODEL_ID)
 
     last_error = None
-
-    for current_model in models_to_try:
+    deadline.check(MIN_ATTEMPT_MS, "Bedrock call")
+
+    for model_index, current_model in enumerate(models_to_try):
+        breaker = circuit_breaker.get(f"bedrock:{current_model}")
+        if model_index:
+            if not deadline.fits(MIN_ATTEMPT_MS):
+                tracing.count("deadline_skipped_fallbacks")
+                raise deadline.DeadlineExceeded(f"Deadline: no budget for the fallback after {last_error}")
+            tracing.count("bedrock_fallbacks")
         for attempt in range(MAX_RETRIES):
+            if attempt:
+                tracing.count("bedrock_retries")
             try:
-                response = bedrock_runtime.converse(
-                    modelId=current_model,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [{"text": prompt}]
+                with breaker.guard():
+                    response = bedrock_runtime.converse(
+                        modelId=current_model,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": [{"text": prompt}]
+                            }
+                        ],
+                        inferenceConfig={
+                            "maxTokens": max_tokens,
+                            "temperature": temperature
                         }
-                    ],
-                    inferenceConfig={
-                        "maxTokens": max_tokens,
-                        "temperature": temperature
-                    }
-                )
+                    )
 
+                if response_info is not None:
+                    response_info.update(model=current_model, usage=response.get("usage", {}),
+                                         metrics=response.get("metrics", {}))
                 return response["output"]["message"]["content"][0]["text"]
 
+            except circuit_breaker.CircuitOpen as e:
+                # Model known to be failing: straight to the fallback, no retries
+                last_error = e
+                break
             except ClientError as e:
                 error_code = e.response["Error"]["Code"]
                 last_error = e
 
                 if error_code in ("ThrottlingException", "TooManyRequestsException",
                                   "ServiceUnavailableException", "ModelTimeoutException"):
-                    delay = min(BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), MAX_DELAY)
-                    time.sleep(delay)
+                    if not _backoff(attempt, e):
+                        break
                     continue
                 else:
                     raise
             except Exception as e:
                 last_error = e
-                delay = min(BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), MAX_DELAY)
-                time.sleep(delay)
+                if not _backoff(attempt, e):
+                    break
 
     raise last_error or Exception("All Bedrock invocation attempts failed")
 
 
+def _backoff(attempt, error):
+    """
+    Sleep before the next attempt, shortened to what the request deadline allows. False when
+    the retries on this model are used up; DeadlineExceeded when no further attempt fits.
+    """
+    if attempt == MAX_RETRIES - 1:
+        return False
+    delay = min(BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), MAX_DELAY)
+    if not deadline.budget_sleep(delay, MIN_ATTEMPT_MS):
+        tracing.count("deadline_skipped_retries")
+        raise deadline.DeadlineExceeded(f"Deadline: no budget to retry after {error}") from error
+    return True
+
+
 def parse_json_response(response_text):
-    """Extract and parse JSON from LLM response, handling markdown code blocks."""
-    text = response_text.strip()
-    if text.startswith("```"):
-        lines = text.split("\n")
-        lines = [l for l in lines if not l.strip().startswith("```")]
-        text = "\n".join(lines)
-    return json.loads(text)
+    """
+    Extract and parse JSON from LLM response via the llm_json recovery tiers; a repair model
+    call is the last resort. The tier used is recorded on the step by _run_step.
+    """
+    value, tier = llm_json.parse_llm_json(response_text, repair_call=invoke_bedrock)
+    if tier != "strict":
+        print(f"Recovered model JSON via {tier} tier")
+    return value
+
+
+def generate_validated(output_name, prompt):
+    """
+    Generate an output and validate it against its schema (output_schemas); only the sections
+    that fail are requested again and merged, instead of regenerating the whole output.
+    """
+    value = parse_json_response(invoke_bedrock(prompt))
+    value, report = output_schemas.ensure_valid(
+        output_name, value, prompt, lambda p: parse_json_response(invoke_bedrock(p))
+    )
+    if report["regenerated_sections"] or not report["valid"]:
+        print(f"{output_name} schema check: {json.dumps(report)}")
+    return value
 
 
 def generate_soap_note(consultation_text, patient_context):
@@ -187,8 +327,7 @@ def generate_soap_note(consultation_text, patient_context):
     prompt = template.replace("{consultation_text}", consultation_text)
     prompt = prompt.replace("{patient_context}", json.dumps(patient_context, indent=2))
 
-    response_text = invoke_bedrock(prompt)
-    return parse_json_response(response_text)
+    return generate_validated("soap_note", prompt)
 
 
 def generate_patient_summary(soap_note, patient_name, doctor_name):
@@ -198,8 +337,7 @@ def generate_patient_summary(soap_note, patient_name, doctor_name):
     prompt = prompt.replace("{patient_name}", patient_name)
     prompt = prompt.replace("{doctor_name}", doctor_name)
 
-    response_text = invoke_bedrock(prompt)
-    return parse_json_response(response_text)
+    return generate_validated("patient_summary", prompt)
 
 
 def generate_referral_letter(soap_note, referral_reason, referring_doctor, specialist_type):
@@ -218,8 +356,7 @@ def generate_referral_letter(soap_note, referral_reason, referring_doctor, speci
     prompt = prompt.replace("{specialist_type}", specialist_type or "Specialist")
     prompt = prompt.replace("{current_date}", time.strftime("%Y-%m-%d"))
 
-    response_text = invoke_bedrock(prompt)
-    return parse_json_response(response_text)
+    return generate_validated("referral_letter", prompt)
 
 
 def generate_discharge_summary(soap_note, patient_name, patient_age, patient_gender, doctor_name):
@@ -232,8 +369,7 @@ def generate_discharge_summary(soap_note, patient_name, patient_age, patient_gen
     prompt = prompt.replace("{doctor_name}", doctor_name)
     prompt = prompt.replace("{current_date}", time.strftime("%Y-%m-%d"))
 
-    response_text = invoke_bedrock(prompt)
-    return parse_json_response(response_text)
+    return generate_validated("discharge_summary", prompt)
 
 
 def generate_trial_matches(soap_note, patient_age, patient_gender, clinical_trials_data):
@@ -250,38 +386,80 @@ def generate_trial_matches(soap_note, patient_age, patient_gender, clinical_tria
         except Exception:
             pass
 
-    response_text = invoke_bedrock(prompt)
-    return parse_json_response(response_text)
+    return generate_validated("trial_matching", prompt)
 
 
 def _trial_matching_with_rag(prompt, soap_note):
     """Use Bedrock Knowledge Bases for RAG-enhanced trial matching."""
     query = f"Find clinical trials relevant to this patient profile: {json.dumps(soap_note.get('assessment', {}))}"
 
-    response = bedrock_agent_runtime.retrieve_and_generate(
-        input={"text": query},
-        retrieveAndGenerateConfiguration={
-            "type": "KNOWLEDGE_BASE",
-            "knowledgeBaseConfiguration": {
-                "knowledgeBaseId": KNOWLEDGE_BASE_ID,
-                "modelArn": f"arn:aws:bedrock:us-east-1::foundation-model/{MODEL_ID}"
+    # An open Knowledge Base circuit raises CircuitOpen: plain generation without a failed call first
+    with circuit_breaker.get(f"knowledge_base:{KNOWLEDGE_BASE_ID}").guard():
+        response = bedrock_agent_runtime.retrieve_and_generate(
+            input={"text": query},
+            retrieveAndGenerateConfiguration={
+                "type": "KNOWLEDGE_BASE",
+                "knowledgeBaseConfiguration": {
+                    "knowledgeBaseId": KNOWLEDGE_BASE_ID,
+                    "modelArn": f"arn:aws:bedrock:us-east-1::foundation-model/{MODEL_ID}"
+                }
             }
-        }
-    )
+        )
 
     rag_context = response["output"]["text"]
     enriched_prompt = prompt + f"\n\nADDITIONAL CONTEXT FROM KNOWLEDGE BASE:\n{rag_context}"
-    response_text = invoke_bedrock(enriched_prompt)
-    return parse_json_response(response_text)
+    return generate_validated("trial_matching", enriched_prompt)
+
+
+def _get_trial_index():
+    """The condition index over the local trial store, built once per container (None if not configured)."""
+    if not TRIAL_STORE_PATH or not os.path.exists(TRIAL_STORE_PATH):
+        return None
+    return lifecycle.resource(f"trial_index:{TRIAL_STORE_PATH}", _build_trial_index)
 
 
-def load_clinical_trials():
-    """Load clinical trials data. Returns empty list — real data comes from Bedrock KB via RAG."""
-    return []
+def _build_trial_index():
+    from conditions import TrialConditionIndex
+    from trial_store import TrialStore
+    with TrialStore(TRIAL_STORE_PATH) as store:
+        return TrialConditionIndex(store.iter_trials())
+
+
+def load_clinical_trials(soap_note=None):
+    """
+    Load candidate clinical trials for the SOAP assessment.
+    When TRIAL_STORE_PATH points at a local trial store, candidates are looked up by
+    normalized condition concept before any model call. Otherwise returns an empty
+    list — real data comes from Bedrock KB via RAG.
+    """
+    index = _get_trial_index()
+    if not index or not soap_note:
+        return []
+    assessment = soap_note.get("assessment", {})
+    secondary = assessment.get("secondary_diagnoses") or []
+    diagnoses = [assessment.get("primary_diagnosis", ""), *[d for d in secondary if isinstance(d, str)]]
+    return index.candidates(*diagnoses, limit=MAX_TRIAL_CANDIDATES)
 
 
 def translate_patient_summary(summary, target_language):
-    """Translate a patient summary into a regional Indian language using Bedrock."""
+    """
+    Translate a patient summary into a regional Indian language.
+    Uses the field-level translation memory when enabled, falling back to translating the
+    whole document if the model's string batch cannot be used.
+    """
+    if TRANSLATION_MEMORY_ENABLED:
+        try:
+            translated, _ = translate_fields(
+                summary, target_language, _phrase_memory, translate_strings, TRANSLATION_PROMPT_VERSION
+            )
+            return translated
+        except ValueError as e:  # includes json.JSONDecodeError
+            print(f"Field-level translation failed, translating whole summary: {e}")
+    return translate_summary_document(summary, target_language)
+
+
+def translate_summary_document(summary, target_language):
+    """Translate a patient summary in one model call with the full JSON as the prompt."""
     prompt = f"""Translate the following patient summary into {target_language}.
 Keep the EXACT same JSON structure and keys in English, but translate ALL values into {target_language}.
 Keep medication names in English (transliterated names in parentheses where helpful).
@@ -296,35 +474,249 @@ Return ONLY valid JSON with the same structure, all values translated to {target
     return parse_json_response(response_text)
 
 
+def translate_strings(texts, target_language):
+    """Translate a list of strings in one model call. Returns the translations in the same order."""
+    prompt = f"""Translate each string in the JSON array below into {target_language}.
+Use simple, conversational {target_language} that a patient with basic literacy can understand.
+Keep medication names in English (transliterated names in parentheses where helpful).
+
+STRINGS:
+{json.dumps(texts, ensure_ascii=False, separators=(",", ":"))}
+
+Return ONLY a JSON array of {len(texts)} translated strings, in the same order. No markdown, no code blocks."""
+
+    response_text = invoke_bedrock(prompt)
+    return parse_json_response(response_text)
+
+
+def translate_patient_summary_cached(summary, target_language, consultation_id=None):
+    """
+    Cached translate_patient_summary.
+    Returns (translated, cache tier: prewarmed | memory | dynamodb | miss | disabled).
+    With a consultation_id the pre-warmed translation is used when present; summary may then
+    be None, in which case a missing translation raises LookupError.
+    """
+    if consultation_id and CACHE_ENABLED:
+        translated = _translation_cache.get_for_consultation(
+            consultation_id, target_language, TRANSLATION_PROMPT_VERSION
+        )
+        if translated is not None:
+            tracing.count("translation_prewarmed")
+            return translated, "prewarmed"
+    if summary is None:
+        raise LookupError(f"No pre-warmed {target_language} translation for consultation {consultation_id}")
+    if not CACHE_ENABLED:
+        return translate_patient_summary(summary, target_language), "disabled"
+    translated, tier = _translation_cache.get_or_translate(
+        summary, target_language, TRANSLATION_PROMPT_VERSION, translate_patient_summary
+    )
+    tracing.count(f"translation_{tier}")
+    return translated, tier
+
+
+def prewarm_languages(hospital):
+    """Languages configured (PREWARM_LANGUAGES) for a clinic; [] when pre-warming is off."""
+    config = PREWARM_LANGUAGES.strip()
+    if not config:
+        return []
+    if config.startswith("{"):
+        try:
+            by_hospital = json.loads(config)
+        except json.JSONDecodeError:
+            print(f"Ignoring invalid PREWARM_LANGUAGES: {config}")
+            return []
+        languages = by_hospital.get(hospital or "", by_hospital.get("*", []))
+    else:
+        languages = config.split(",")
+    languages = [lang.strip() for lang in languages if lang.strip()]
+    return list(dict.fromkeys(languages))[:MAX_TRANSLATION_LANGUAGES]
+
+
+def prewarm_translations(consultation_id, summary, languages):
+    """
+    Translate a patient summary into each language concurrently and store the results against
+    the consultation ID (and the summary hash). Returns {language: cache tier or error}.
+    """
+    outcome = {}
+
+    def translate(lang):
+        translated, tier = translate_patient_summary_cached(summary, lang)
+        _translation_cache.put_for_consultation(consultation_id, lang, TRANSLATION_PROMPT_VERSION, translated)
+        return tier
+
+    with ThreadPoolExecutor(max_workers=len(languages) or 1) as pool:
+        futures = {lang: pool.submit(tracing.wrap(translate), lang) for lang in languages}
+        for lang, future in futures.items():
+            try:
+                outcome[lang] = future.result()
+            except Exception as e:
+                outcome[lang] = f"error: {e}"
+    print(f"Pre-warmed translations for {consultation_id}: {json.dumps(outcome, ensure_ascii=False)}")
+    return outcome
+
+
+_prewarm_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prewarm")
+
+
+def start_translation_prewarm(consultation_id, summary, hospital, context=None):
+    """
+    Kick off pre-warming without blocking on the translations. Returns the languages scheduled.
+    Inside Lambda the work is handed to an asynchronous (Event) invocation of this function,
+    sent from the request thread: Lambda only queues the event, and a background thread could
+    be frozen with the container before the invoke goes out once the response is returned.
+    Elsewhere (local server, scripts) the translations run on a background thread.
+    """
+    languages = prewarm_languages(hospital)
+    if not languages or not CACHE_ENABLED:
+        return []
+    function_arn = getattr(context, "invoked_function_arn", None)
+    if function_arn:
+        payload = {
+            "action": "prewarm_translations",
+            "consultation_id": consultation_id,
+            "summary": summary,
+            "languages": languages,
+            "trace": tracing.inject({}),  # the async invocation joins this request's trace
+        }
+        _invoke_prewarm(function_arn, payload)
+    else:
+        _prewarm_pool.submit(prewarm_translations, consultation_id, summary, languages)
+    return languages
+
+
+def _invoke_prewarm(function_arn, payload):
+    try:
+        lambda_client.invoke(
+            FunctionName=function_arn,
+            InvocationType="Event",
+            Payload=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        )
+    except Exception as e:
+        print(f"Translation pre-warm invocation failed: {e}")  # Translation falls back to on-demand
+
+
 def _run_step(step_name, fn, results, model_used=None):
-    """Run a processing step with error isolation. Returns the result or None on failure."""
+    """
+    Run a processing step with error isolation. Returns the result or None on failure.
+    The step's model usage (tokens, model vs. wall time, tokens/sec) is added as "usage".
+
+    Under a request deadline the step is skipped when the remaining budget cannot fit it
+    (OPTIONAL_STEPS need their estimated duration, the rest one Bedrock attempt), and is
+    abandoned when it runs past the deadline; both mark results["deadline_exceeded"].
+    """
+    remaining = deadline.remaining_ms()
+    if remaining is None:
+        result, step = _step_body(step_name, fn, model_used)
+        results["processing_steps"].append(step)
+        return result
+
+    needed = _step_ms.get(step_name, STEP_ESTIMATE_MS) if step_name in OPTIONAL_STEPS else MIN_ATTEMPT_MS
+    if remaining < needed:
+        tracing.count("deadline_dropped_steps")
+        results["deadline_exceeded"] = True
+        results["processing_steps"].append({
+            "step": step_name, "duration_ms": 0, "model": model_used or MODEL_ID, "status": "skipped",
+            "error": f"Deadline: {remaining:.0f} ms left, step needs ~{needed:.0f} ms",
+        })
+        return None
+
+    # Run on a watchdog thread so a step that overruns cannot take the finished ones down with it
+    future = Future()
     step_start = time.time()
+
+    def work():
+        try:
+            future.set_result(_step_body(step_name, fn, model_used))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=deadline.wrap(tracing.wrap(work)), daemon=True).start()
     try:
-        result = fn()
+        result, step = future.result(timeout=max(deadline.remaining_ms(), 0) / 1000)
+    except FutureTimeout:
+        tracing.count("deadline_abandoned_steps")
+        results["deadline_exceeded"] = True
         results["processing_steps"].append({
+            "step": step_name, "duration_ms": int((time.time() - step_start) * 1000),
+            "model": model_used or MODEL_ID, "status": "deadline_exceeded",
+        })
+        return None
+    if step["status"] == "deadline_exceeded":
+        results["deadline_exceeded"] = True
+    results["processing_steps"].append(step)
+    return result
+
+
+def _step_body(step_name, fn, model_used):
+    """Run fn and build its processing_steps entry. Returns (result or None, step)."""
+    step_start = time.time()
+    llm_json.reset_tier()
+    output_schemas.reset_report()
+    model_usage.start()
+    try:
+        with tracing.span(step_name, kind="step"):
+            result = fn()
+        step = {
             "step": step_name,
             "duration_ms": int((time.time() - step_start) * 1000),
             "model": model_used or MODEL_ID,
             "status": "completed"
-        })
-        return result
+        }
+        previous = _step_ms.get(step_name)
+        _step_ms[step_name] = step["duration_ms"] if previous is None else (
+            0.8 * previous + 0.2 * step["duration_ms"])
+        calls = model_usage.take()
+        if calls:
+            step["usage"] = model_usage.summarize(calls, wall_ms=step["duration_ms"])
+        if llm_json.first_tier():
+            step["json_parse"] = llm_json.first_tier()
+        report = output_schemas.last_report()
+        if report and (report["regenerated_sections"] or not report["valid"]):
+            step["schema"] = report
+        return result, step
     except Exception as e:
-        results["processing_steps"].append({
+        step = {
             "step": step_name,
             "duration_ms": int((time.time() - step_start) * 1000),
             "model": model_used or MODEL_ID,
-            "status": "failed",
+            "status": "deadline_exceeded" if isinstance(e, deadline.DeadlineExceeded) else "failed",
             "error": str(e)
-        })
-        return None
+        }
+        calls = model_usage.take()
+        if calls:
+            step["usage"] = model_usage.summarize(calls, wall_ms=step["duration_ms"])
+        return None, step
 
 
+@tracing.traced_handler("process_consultation")
+@lifecycle.handler
 def lambda_handler(event, context):
     """
-    Main Lambda handler. Routes based on path:
+    Main Lambda handler: admission control (priority lane, bounded queue, 429 when the
+    wait would exceed its deadline), then _handle_event under the request deadline taken
+    from context.get_remaining_time_in_millis(). Warm-up pings ({"warmup": true}, the
+    scheduled rule) are answered by lifecycle.handler and only warm the container.
+    """
+    with deadline.scope(context):
+        waits = [ms for ms in (admission.deadline_for(event), deadline.remaining_ms()) if ms is not None]
+        try:
+            with admission.controller().admit(admission.lane_for(event), min(waits) if waits else None):
+                return _handle_event(event, context)
+        except admission.Shed as e:
+            return e.response(_cors_headers())
+
+
+def _handle_event(event, context):
+    """
+    Routes based on path:
     - POST /api/process  -> process consultation
     - POST /api/translate -> translate patient summary
+    - {"action": "prewarm_translations"} -> asynchronous translation pre-warm (self-invoked)
     """
+    if event.get("action") == "prewarm_translations":
+        outcome = prewarm_translations(event["consultation_id"], event["summary"], event["languages"])
+        return {"statusCode": 200, "body": json.dumps(outcome, ensure_ascii=False)}
+
     path = event.get("path", "") or event.get("resource", "")
     if "/translate" in path:
         return _handle_translate(event)
@@ -341,146 +733,297 @@ def lambda_handler(event, context):
         doctor = body["doctor"]
         referral_reason = body.get("referral_reason")
         specialist_type = body.get("specialist_type")
+        consultation_id = body.get("id", f"CONSULT-{int(time.time())}")
+        tracing.annotate(consultation_id=consultation_id)
 
         # Check DynamoDB cache first
         cache_key = _compute_cache_key(consultation_text, patient, referral_reason)
         cached = _get_cached_result(cache_key)
+        tracing.count("consultation_cache_hits" if cached else "consultation_cache_misses")
         if cached:
-            cached["metadata"]["cache_hit"] = True
-            return {
-                "statusCode": 200,
-                "headers": _cors_headers(),
-                "body": json.dumps(cached, indent=2)
-            }
+            return _cached_response(cached)
 
-        start_time = time.time()
-        results = {"processing_steps": []}
-
-        # Step 1: SOAP Note (critical - all others depend on this)
-        soap_note = _run_step(
-            "SOAP Note Generation",
-            lambda: generate_soap_note(
-                consultation_text,
-                patient_context={
-                    "name": patient["name"],
-                    "age": patient["age"],
-                    "gender": patient["gender"],
-                    "id": patient.get("patient_id", "N/A")
-                }
-            ),
-            results
-        )
+        # Identical requests in flight (double-click, client retry) share one pipeline run
+        return _single_flight(cache_key, lambda: _run_pipeline(
+            consultation_text, patient, doctor, referral_reason, specialist_type, consultation_id, cache_key, context
+        ))
 
-        if soap_note is None:
-            return _error_response(500, "SOAP Note generation failed. Please try again.")
+    except deadline.DeadlineExceeded as e:
+        return _error_response(504, f"{e}. Please try again.")
+    except KeyError as e:
+        return _error_response(400, f"Missing required field: {str(e)}")
+    except json.JSONDecodeError as e:
+        return _error_response(400, f"Invalid JSON in request or AI response: {str(e)}")
+    except Exception as e:
+        return _error_response(500, f"Internal error: {str(e)}")
 
-        results["soap_note"] = soap_note
 
-        # Step 2: Patient Summary
-        patient_summary = _run_step(
-            "Patient Summary Generation",
-            lambda: generate_patient_summary(soap_note, patient["name"], doctor["name"]),
-            results
-        )
-        results["patient_summary"] = patient_summary or {
-            "error": "Generation failed", "message": "Patient summary could not be generated."
-        }
+def _cached_response(cached, coalesced=False):
+    cached["metadata"]["cache_hit"] = True
+    if coalesced:
+        cached["metadata"]["coalesced"] = True
+    return {
+        "statusCode": 200,
+        "headers": _cors_headers(),
+        "body": json.dumps(cached, indent=2)
+    }
 
-        # Step 3: Referral Letter
-        referral_letter = _run_step(
-            "Referral Letter Generation",
-            lambda: generate_referral_letter(
-                soap_note, referral_reason,
-                f"{doctor['name']}, {doctor['speciality']}",
-                specialist_type
-            ),
-            results
-        )
-        results["referral_letter"] = referral_letter or {
-            "error": "Generation failed", "message": "Referral letter could not be generated."
-        }
 
-        # Step 4: Discharge Summary
-        discharge_summary = _run_step(
-            "Discharge Summary Generation",
-            lambda: generate_discharge_summary(
-                soap_note, patient["name"], patient["age"],
-                patient["gender"], f"{doctor['name']}, {doctor['speciality']}"
-            ),
-            results
-        )
-        results["discharge_summary"] = discharge_summary or {
-            "error": "Generation failed", "message": "Discharge summary could not be generated."
-        }
+def _single_flight(cache_key, generate):
+    """
+    Run generate() once for concurrent identical requests: callers in this container share
+    the running call (_flights); across containers the cache table lease (_lease) makes later
+    callers wait for the first caller's cached result instead of generating it again.
+    """
+    response, leader = _flights.do(cache_key, lambda: _under_lease(cache_key, generate))
+    if not leader:
+        tracing.annotate(coalesced="in_process")
+        tracing.count("consultation_coalesced")
+        response = {**response, "headers": dict(response["headers"])}
+    return response
 
-        # Step 5: Clinical Trial Matching
-        trial_matches = _run_step(
-            "Clinical Trial Matching",
-            lambda: generate_trial_matches(
-                soap_note, patient["age"], patient["gender"], load_clinical_trials()
-            ),
-            results
+
+def _under_lease(cache_key, generate):
+    if not CACHE_ENABLED:
+        return generate()
+    remaining = deadline.remaining_ms()
+    hold_s = remaining / 1000 if remaining is not None else single_flight.LEASE_S
+    while True:
+        state = _lease.acquire(cache_key, hold_s)
+        if state == "held":
+            cached = _lease.wait(cache_key, lambda: _get_cached_result(cache_key))
+            if cached is None:
+                continue  # released without a result, expired or unreadable (after a poll): try to take it
+            tracing.annotate(coalesced="lease")
+            tracing.count("consultation_coalesced")
+            return _cached_response(cached, coalesced=True)
+        try:
+            cached = _get_cached_result(cache_key) if state == "acquired" else None
+            if cached:  # written by the previous holder between our cache miss and the lease
+                return _cached_response(cached, coalesced=True)
+            return generate()
+        finally:
+            if state == "acquired":
+                _lease.release(cache_key)
+
+
+def _run_pipeline(consultation_text, patient, doctor, referral_reason, specialist_type, consultation_id, cache_key,
+                  context):
+    """The five generation steps; caches complete results under cache_key."""
+    start_time = time.time()
+    results = {"processing_steps": []}
+
+    # Step 1: SOAP Note (critical - all others depend on this)
+    soap_note = _run_step(
+        "SOAP Note Generation",
+        lambda: generate_soap_note(
+            consultation_text,
+            patient_context={
+                "name": patient["name"],
+                "age": patient["age"],
+                "gender": patient["gender"],
+                "id": patient.get("patient_id", "N/A")
+            }
+        ),
+        results
+    )
+
+    if soap_note is None:
+        if results.get("deadline_exceeded"):
+            return {
+                "statusCode": 504,
+                "headers": _cors_headers(),
+                "body": json.dumps({
+                    "error": "SOAP Note generation did not fit the request deadline. Please try again.",
+                    "deadline_exceeded": True,
+                    "processing_steps": results["processing_steps"],
+                    "disclaimer": "AI-Generated - Requires Clinician Validation"
+                })
+            }
+        return _error_response(500, "SOAP Note generation failed. Please try again.")
+
+    results["soap_note"] = soap_note
+
+    # Step 2: Patient Summary
+    patient_summary = _run_step(
+        "Patient Summary Generation",
+        lambda: generate_patient_summary(soap_note, patient["name"], doctor["name"]),
+        results
+    )
+    results["patient_summary"] = patient_summary or _step_error(
+        results, "Patient summary could not be generated.")
+    prewarmed_languages = []
+    if patient_summary:
+        # Translations run in the background while the remaining steps are generated
+        prewarmed_languages = start_translation_prewarm(
+            consultation_id, patient_summary, doctor.get("hospital"), context
         )
-        results["trial_matches"] = trial_matches or {
-            "error": "Generation failed", "message": "Trial matching could not be completed."
-        }
 
-        # Metadata
-        total_duration = int((time.time() - start_time) * 1000)
-        completed = sum(1 for s in results["processing_steps"] if s["status"] == "completed")
-        total = len(results["processing_steps"])
-
-        results["metadata"] = {
-            "total_processing_time_ms": total_duration,
-            "model_used": MODEL_ID,
-            "fallback_model": FALLBACK_MODEL_ID,
-            "consultation_id": body.get("id", f"CONSULT-{int(time.time())}"),
-            "patient_id": patient.get("patient_id", "N/A"),
-            "steps_completed": f"{completed}/{total}",
-            "cache_hit": False,
-            "disclaimer": "AI-Generated - Requires Clinician Validation. This output is for informational purposes only and does not constitute medical advice, diagnosis, or treatment recommendations.",
-            "version": "1.1.0"
-        }
+    # Step 3: Referral Letter
+    referral_letter = _run_step(
+        "Referral Letter Generation",
+        lambda: generate_referral_letter(
+            soap_note, referral_reason,
+            f"{doctor['name']}, {doctor['speciality']}",
+            specialist_type
+        ),
+        results
+    )
+    results["referral_letter"] = referral_letter or _step_error(
+        results, "Referral letter could not be generated.")
+
+    # Step 4: Discharge Summary
+    discharge_summary = _run_step(
+        "Discharge Summary Generation",
+        lambda: generate_discharge_summary(
+            soap_note, patient["name"], patient["age"],
+            patient["gender"], f"{doctor['name']}, {doctor['speciality']}"
+        ),
+        results
+    )
+    results["discharge_summary"] = discharge_summary or _step_error(
+        results, "Discharge summary could not be generated.")
+
+    # Step 5: Clinical Trial Matching
+    trial_matches = _run_step(
+        "Clinical Trial Matching",
+        lambda: generate_trial_matches(
+            soap_note, patient["age"], patient["gender"], load_clinical_trials(soap_note)
+        ),
+        results
+    )
+    results["trial_matches"] = trial_matches or _step_error(
+        results, "Trial matching could not be completed.")
+
+    # Metadata
+    total_duration = int((time.time() - start_time) * 1000)
+    completed = sum(1 for s in results["processing_steps"] if s["status"] == "completed")
+    total = len(results["processing_steps"])
+
+    results["metadata"] = {
+        "total_processing_time_ms": total_duration,
+        "model_used": MODEL_ID,
+        "fallback_model": FALLBACK_MODEL_ID,
+        "consultation_id": consultation_id,
+        "patient_id": patient.get("patient_id", "N/A"),
+        "steps_completed": f"{completed}/{total}",
+        "cache_hit": False,
+        "prewarmed_languages": prewarmed_languages,
+        "deadline_exceeded": results.pop("deadline_exceeded", False),
+        "usage": model_usage.summarize(
+            [s["usage"] for s in results["processing_steps"] if "usage" in s], wall_ms=total_duration
+        ),
+        "disclaimer": "AI-Generated - Requires Clinician Validation. This output is for informational purposes only and does not constitute medical advice, diagnosis, or treatment recommendations.",
+        "version": "1.1.0"
+    }
 
-        # Cache the result in DynamoDB
+    # Cache the result in DynamoDB (partial results are not cached)
+    if not results["metadata"]["deadline_exceeded"]:
         _put_cached_result(cache_key, results)
 
-        return {
-            "statusCode": 200,
-            "headers": _cors_headers(),
-            "body": json.dumps(results, indent=2)
-        }
+    return {
+        "statusCode": 200,
+        "headers": _cors_headers(),
+        "body": json.dumps(results, indent=2)
+    }
 
-    except KeyError as e:
-        return _error_response(400, f"Missing required field: {str(e)}")
-    except json.JSONDecodeError as e:
-        return _error_response(400, f"Invalid JSON in request or AI response: {str(e)}")
-    except Exception as e:
-        return _error_response(500, f"Internal error: {str(e)}")
+
+def _step_error(results, message):
+    """Placeholder for an output whose step (the last one recorded) failed or was cut by the deadline."""
+    status = results["processing_steps"][-1]["status"]
+    return {"error": "Generation failed" if status == "failed" else "Deadline exceeded", "message": message}
 
 
 def _handle_translate(event):
-    """Handle translation of patient summary into regional languages."""
+    """
+    Handle translation of patient summary into regional languages.
+    Body: {"summary": {...}, "target_language": "Hindi"}
+      or  {"summary": {...}, "target_languages": ["Hindi", "Tamil", ...]} (translated concurrently)
+    An optional "consultation_id" serves pre-warmed translations; "summary" may then be omitted
+    (404 when the language was not pre-warmed).
+    """
     try:
         if isinstance(event.get("body"), str):
             body = json.loads(event["body"])
         else:
             body = event.get("body", event)
 
-        summary = body["summary"]
-        target_language = body["target_language"]
+        consultation_id = body.get("consultation_id")
+        summary = body.get("summary") if consultation_id else body["summary"]
+        start = time.perf_counter()
+
+        if "target_languages" in body:
+            return _handle_translate_batch(summary, body["target_languages"], start, consultation_id)
 
-        translated = translate_patient_summary(summary, target_language)
+        translated, tier = translate_patient_summary_cached(summary, body["target_language"], consultation_id)
 
         return {
             "statusCode": 200,
             "headers": _cors_headers(),
-            "body": json.dumps({"translated_summary": translated}, ensure_ascii=False)
+            "body": json.dumps({
+                "translated_summary": translated,
+                "metrics": _translation_metrics(start, {body["target_language"]: tier}),
+            }, ensure_ascii=False)
         }
+    except KeyError as e:
+        return _error_response(400, f"Missing required field: {str(e)}")
+    except LookupError as e:
+        return _error_response(404, str(e))
     except Exception as e:
         return _error_response(500, f"Translation error: {str(e)}")
 
 
+def _handle_translate_batch(summary, languages, start, consultation_id=None):
+    if not isinstance(languages, list) or not languages:
+        return _error_response(400, "target_languages must be a non-empty list")
+    languages = list(dict.fromkeys(languages))  # de-duplicate, keep order
+    if len(languages) > MAX_TRANSLATION_LANGUAGES:
+        return _error_response(400, f"At most {MAX_TRANSLATION_LANGUAGES} target_languages per request")
+
+    translations, tiers, errors = {}, {}, {}
+    pool = ThreadPoolExecutor(max_workers=len(languages))
+    futures = {lang: pool.submit(deadline.wrap(tracing.wrap(translate_patient_summary_cached)),
+                                 summary, lang, consultation_id)
+               for lang in languages}
+    for lang, future in futures.items():
+        remaining = deadline.remaining_ms()
+        try:
+            translations[lang], tiers[lang] = future.result(
+                timeout=max(remaining, 0) / 1000 if remaining is not None else None)
+        except FutureTimeout:
+            errors[lang] = "Deadline exceeded"
+        except Exception as e:
+            errors[lang] = str(e)
+    pool.shutdown(wait=False)  # languages past the deadline finish in the background
+
+    if not translations:
+        if set(errors.values()) == {"Deadline exceeded"}:
+            return _error_response(504, "Translation did not fit the request deadline")
+        return _error_response(500, f"Translation error: {'; '.join(f'{k}: {v}' for k, v in errors.items())}")
+
+    return {
+        "statusCode": 200,
+        "headers": _cors_headers(),
+        "body": json.dumps({
+            "translations": translations,
+            "errors": errors,
+            "deadline_exceeded": "Deadline exceeded" in errors.values(),
+            "metrics": _translation_metrics(start, tiers),
+        }, ensure_ascii=False)
+    }
+
+
+def _translation_metrics(start, tiers):
+    stats = _translation_cache.stats()
+    return {
+        "latency_ms": int((time.perf_counter() - start) * 1000),
+        "cache": tiers,
+        "container_hit_rate": round(stats["hit_rate"], 3),
+        "phrase_memory_hit_rate": round(_phrase_memory.stats()["hit_rate"], 3),
+        "prompt_version": TRANSLATION_PROMPT_VERSION,
+    }
+
+
 def _cors_headers():
     """Standard CORS headers."""
     return {
@@ -503,6 +1046,24 @@ def _error_response(status_code, message):
     }
 
 
+# ============================================================
+# Container warm-up (provisioned concurrency init, scheduled pings, GET /warmup locally)
+# ============================================================
+
+OUTPUTS = ("soap_note", "patient_summary", "referral_letter", "discharge_summary", "trial_matching")
+
+lifecycle.on_warmup("process_consultation.templates",
+                    lambda: [load_prompt_template(name) for name in OUTPUTS])
+lifecycle.on_warmup("process_consultation.schemas",
+                    lambda: [output_schemas.load_schema(name) for name in OUTPUTS])
+# DescribeTable: resolves the cache table and opens the DynamoDB connection
+lifecycle.on_warmup("process_consultation.cache_table", lambda: CACHE_ENABLED and _get_cache_table())
+# A Converse call Bedrock rejects before the model runs (no messages): TLS + signing, no tokens
+lifecycle.on_warmup("process_consultation.bedrock",
+                    lambda: lifecycle.prime(lambda: bedrock_runtime.converse(modelId=MODEL_ID, messages=[])))
+lifecycle.init_done()
+
+
 # For local testing
 if __name__ == "__main__":
     data_path = Path(__file__).parent.parent.parent / "data" / "synthetic_consultations.json"
@@ -0,0 +1,156 @@
+"""
+ClinicalSetu - Single-Flight Generation
+Identical work submitted while the first copy is still running (a double-click
+on Generate, an axios retry of a slow /api/process) runs once. Both copies miss
+the result cache, because neither has written it yet, so the cache alone cannot
+catch them.
+
+  Group      in-process: the first caller for a key runs the work; callers that
+             arrive while it runs wait on its Future and share the result (or
+             exception).
+  Lease      across containers: a lease item in the cache table
+             (cache_key = "lease#<key>", owner, expires_at) written with a
+             conditional put. The caller that wins runs the work; the others
+             poll the cache for its result every SINGLE_FLIGHT_POLL_S and take
+             over when the lease is released without a result or expires (the
+             holder's request deadline, so a crashed holder frees it at its
+             Lambda timeout). DynamoDB TTL removes old lease items.
+
+Lease calls go through the cache table's circuit breaker; when the table cannot
+be reached the caller does the work itself (coalescing is an optimization, never
+a reason to fail a request).
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+import circuit_breaker
+import deadline
+
+POLL_S = float(os.environ.get("SINGLE_FLIGHT_POLL_S", "0.5"))
+LEASE_S = float(os.environ.get("SINGLE_FLIGHT_LEASE_S", "120"))  # without a request deadline (function timeout)
+
+
+class Group:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}  # key -> Future of the running call
+
+    def do(self, key, fn):
+        """
+        Run fn() once per key at a time. Returns (value, leader); leader is False for callers
+        that shared another caller's run. Followers wait at most the request deadline
+        (DeadlineExceeded).
+        """
+        with self.lock:
+            future = self.flights.get(key)
+            leader = future is None
+            if leader:
+                future = self.flights[key] = Future()
+        if not leader:
+            remaining = deadline.remaining_ms()
+            try:
+                return future.result(timeout=None if remaining is None else max(0.0, remaining) / 1000), False
+            except TimeoutError:
+                raise deadline.DeadlineExceeded("Deadline exceeded waiting for an identical request")
+        try:
+            value = fn()
+            future.set_result(value)
+            return value, True
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.flights)
+
+
+class Lease:
+    """Conditional-write lease on the cache table (see module docstring)."""
+
+    def __init__(self, table_factory, breaker, poll_s=None):
+        self.table_factory = table_factory
+        self.breaker = breaker  # circuit_breaker name of the table
+        self.poll_s = poll_s
+        self.owner = uuid.uuid4().hex  # this container
+
+    @staticmethod
+    def item_key(key):
+        return {"cache_key": f"lease#{key}"}
+
+    def acquire(self, key, hold_s):
+        """ "acquired", "held" (by another live caller) or None (no table: proceed without a lease)."""
+        now_ms = int(time.time() * 1000)
+        try:
+            with circuit_breaker.get(self.breaker).guard(is_failure=_is_outage):
+                table = self.table_factory()
+                if table is None:
+                    return None
+                table.put_item(
+                    Item={**self.item_key(key), "owner": self.owner, "expires_at": now_ms + int(hold_s * 1000),
+                          "ttl": int(now_ms / 1000 + hold_s) + 3600},
+                    ConditionExpression="attribute_not_exists(cache_key) OR expires_at < :now",
+                    ExpressionAttributeValues={":now": now_ms},
+                )
+            return "acquired"
+        except Exception as e:
+            return "held" if _conditional_failed(e) else None
+
+    def release(self, key):
+        try:
+            with circuit_breaker.get(self.breaker).guard(is_failure=_is_outage):
+                table = self.table_factory()
+                if table is not None:
+                    table.delete_item(Key=self.item_key(key), ConditionExpression="#o = :o",
+                                      ExpressionAttributeNames={"#o": "owner"},
+                                      ExpressionAttributeValues={":o": self.owner})
+        except Exception:
+            pass  # taken over after expiry, or unreachable: the lease expires on its own
+
+    def holder(self, key):
+        """True while another caller holds a live lease on key, False once released or expired, None if unreadable."""
+        try:
+            with circuit_breaker.get(self.breaker).guard():
+                table = self.table_factory()
+                item = table.get_item(Key=self.item_key(key)).get("Item") if table is not None else None
+        except Exception:
+            return None
+        return bool(item) and int(item.get("expires_at", 0)) >= time.time() * 1000
+
+    def wait(self, key, lookup):
+        """
+        Poll lookup() while another caller holds the lease. Returns its result, or None once the
+        lease is released without one or has expired (the caller may take over). When the lease
+        cannot be read it returns None after one poll interval, so a caller that goes back to
+        acquire() does not spin. Raises DeadlineExceeded when the request deadline would pass first.
+        """
+        poll_s = self.poll_s if self.poll_s is not None else POLL_S
+        while True:
+            result = lookup()
+            if result is not None:
+                return result
+            held = self.holder(key)
+            if held is False:
+                return lookup()  # the holder may have written the result just before releasing
+            remaining = deadline.remaining_ms()
+            if remaining is not None and remaining < poll_s * 1000:
+                raise deadline.DeadlineExceeded("Deadline exceeded waiting for an identical request")
+            time.sleep(poll_s)
+            if held is None:
+                return None
+
+
+def _conditional_failed(exc):
+    return getattr(exc, "response", {}).get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def _is_outage(exc):
+    """A lost conditional write means the table answered."""
+    return not _conditional_failed(exc) and circuit_breaker.is_outage(exc)
@@ -0,0 +1,342 @@
+"""
+ClinicalSetu - Request Tracing and Metrics
+Lightweight per-request tracing shared by every Lambda:
+
+  - A trace per handler invocation (traced_handler), with spans for each
+    processing step (span()) and every AWS SDK call. instrument_boto3()
+    hooks before-call / after-call on the default boto3 session, so Bedrock,
+    DynamoDB and S3 clients created afterwards are timed without wrapping
+    each call site. HTTP calls use span(..., kind="http").
+  - Counters (count()) for retries, throttles, fallbacks and cache tiers.
+    Throttled SDK attempts are counted per service (bedrock_throttles, ...),
+    including the ones botocore retries internally.
+  - Context propagation: inject() writes trace_id / parent_span_id into a
+    dict (Bedrock Agent sessionAttributes, async invoke payloads) and
+    traced_handler picks them up again (event sessionAttributes, "trace"
+    key, or an X-Trace-Id header), so invoke_agent -> supervisor -> tool
+    executor share one trace ID.
+
+When a trace finishes it is exported as CloudWatch Embedded Metric Format
+(EMF) records: one per span name (Duration in ms, dimensions Function + Span),
+one for the request, one for the counters. A warm-up invocation (trace
+property warmup, set by lifecycle.handler) reports WarmupDuration instead of
+RequestDuration, so pings do not pull down the request latency metrics.
+TRACING_EXPORTER selects the exporter: "emf" (stdout, which CloudWatch Logs
+turns into metrics; the default inside Lambda), "memory" (records kept
+in-process, for checks and benchmarks), "file:<path>" (JSON lines), or "off"
+(default elsewhere).
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+NAMESPACE = os.environ.get("TRACING_NAMESPACE", "ClinicalSetu")
+MAX_EMF_VALUES = 100  # EMF limit on values per metric in one record
+
+_trace = contextvars.ContextVar("clinicalsetu_trace", default=None)
+_span = contextvars.ContextVar("clinicalsetu_span", default=None)
+
+_SERVICE_KINDS = {"bedrock-runtime": "bedrock", "bedrock-agent-runtime": "bedrock", "bedrock-agent": "bedrock",
+                  "dynamodb": "dynamodb", "s3": "s3", "lambda": "lambda"}
+
+
+def _new_id():
+    return uuid.uuid4().hex[:16]
+
+
+class Trace:
+    def __init__(self, function, trace_id=None, parent_id=None):
+        self.function = function
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.parent_id = parent_id
+        self.root_id = _new_id()
+        self.start = time.perf_counter()
+        self.spans = []  # dicts: name, kind, span_id, parent_id, ms, error
+        self.counters = {}
+        self.properties = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, record):
+        with self.lock:
+            self.spans.append(record)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+
+# ----- exporters -----
+
+class StdoutExporter:
+    def export(self, records):
+        for record in records:
+            print(json.dumps(record, default=str))
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.records = []
+        self.lock = threading.Lock()
+
+    def export(self, records):
+        with self.lock:
+            self.records.extend(records)
+
+    def clear(self):
+        with self.lock:
+            self.records = []
+
+
+class FileExporter:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, records):
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+
+
+def _exporter_from_env():
+    default = "emf" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "off"
+    name = os.environ.get("TRACING_EXPORTER", default)
+    if name == "emf":
+        return StdoutExporter()
+    if name == "memory":
+        return MemoryExporter()
+    if name.startswith("file:"):
+        return FileExporter(name[len("file:"):])
+    return None
+
+
+_exporter = _exporter_from_env()
+
+
+def set_exporter(exporter):
+    """Replace the exporter (None disables tracing). Returns the previous one."""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    return previous
+
+
+def get_exporter():
+    return _exporter
+
+
+# ----- spans and counters -----
+
+class span:
+    """Context manager timing a block as a child of the current span."""
+
+    def __init__(self, name, kind="internal", **attrs):
+        self.name, self.kind, self.attrs = name, kind, attrs
+
+    def __enter__(self):
+        self.trace = _trace.get()
+        if self.trace is None:
+            return self
+        self.span_id = _new_id()
+        self.parent_id = _span.get() or self.trace.root_id
+        self.token = _span.set(self.span_id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is None:
+            return False
+        _span.reset(self.token)
+        self.trace.add_span({
+            "name": self.name, "kind": self.kind, "span_id": self.span_id, "parent_id": self.parent_id,
+            "ms": (time.perf_counter() - self.start) * 1000, "error": exc_type.__name__ if exc_type else None,
+            **self.attrs,
+        })
+        return False
+
+
+def count(name, n=1):
+    """Increment a counter on the current trace (no-op outside a trace)."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.count(name, n)
+
+
+def annotate(**properties):
+    """Attach searchable properties (e.g. consultation_id) to the current trace's records."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.properties.update(properties)
+
+
+def current_trace_id():
+    trace = _trace.get()
+    return trace.trace_id if trace else None
+
+
+def inject(attributes):
+    """Add the current trace context to a dict (sessionAttributes, async payloads). Returns the dict."""
+    trace = _trace.get()
+    if trace is not None:
+        attributes["trace_id"] = trace.trace_id
+        attributes["parent_span_id"] = _span.get() or trace.root_id
+    return attributes
+
+
+def extract(event):
+    """(trace_id, parent_span_id) from a handler event, or (None, None)."""
+    for attrs in (event.get("sessionAttributes"), event.get("trace")):
+        if isinstance(attrs, dict) and attrs.get("trace_id"):
+            return attrs["trace_id"], attrs.get("parent_span_id")
+    headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+    if headers.get("x-trace-id"):
+        return headers["x-trace-id"], headers.get("x-parent-span-id")
+    return None, None
+
+
+def wrap(fn):
+    """Run fn in the caller's trace context (for work submitted to a thread pool)."""
+    trace, parent = _trace.get(), _span.get()
+
+    def run(*args, **kwargs):
+        trace_token, span_token = _trace.set(trace), _span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+    return run
+
+
+# ----- handler decorator -----
+
+def traced_handler(function):
+    """Decorate a Lambda handler: one trace per invocation, exported when it returns."""
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event=None, context=None):
+            if _exporter is None:
+                return handler(event, context)
+            trace_id, parent_id = extract(event if isinstance(event, dict) else {})
+            trace = Trace(os.environ.get("AWS_LAMBDA_FUNCTION_NAME", function), trace_id, parent_id)
+            trace_token, span_token = _trace.set(trace), _span.set(trace.root_id)
+            status = None
+            try:
+                response = handler(event, context)
+                status = response.get("statusCode") if isinstance(response, dict) else None
+                if isinstance(response, dict) and isinstance(response.get("headers"), dict):
+                    response["headers"]["X-Trace-Id"] = trace.trace_id
+                return response
+            finally:
+                _span.reset(span_token)
+                _trace.reset(trace_token)
+                _export(trace, status)
+        return wrapper
+    return decorator
+
+
+def _export(trace, status):
+    exporter = _exporter
+    if exporter is None:
+        return
+    try:
+        exporter.export(emf_records(trace, status))
+    except Exception as e:
+        print(f"[ClinicalSetu] Trace export failed: {e}")  # tracing must never fail a request
+
+
+def emf_records(trace, status=None):
+    """EMF records for a finished trace."""
+    timestamp = int(time.time() * 1000)
+    common = {"Function": trace.function, "trace_id": trace.trace_id, **trace.properties}
+    if trace.parent_id:
+        common["parent_span_id"] = trace.parent_id
+
+    def record(dimensions, metrics, values):
+        return {
+            "_aws": {"Timestamp": timestamp, "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE, "Dimensions": [dimensions],
+                "Metrics": [{"Name": name, "Unit": unit} for name, unit in metrics],
+            }]},
+            **common, **values,
+        }
+
+    request_ms = (time.perf_counter() - trace.start) * 1000
+    metric = "WarmupDuration" if trace.properties.get("warmup") else "RequestDuration"
+    records = [record(["Function"], [(metric, "Milliseconds")],
+                      {metric: round(request_ms, 2), "status_code": status, "span_id": trace.root_id})]
+
+    by_name = {}
+    for s in trace.spans:
+        by_name.setdefault((s["name"], s["kind"]), []).append(s)
+    for (name, kind), spans in by_name.items():
+        durations = [round(s["ms"], 2) for s in spans][:MAX_EMF_VALUES]
+        errors = sum(1 for s in spans if s["error"])
+        records.append(record(["Function", "Span"], [("Duration", "Milliseconds"), ("Errors", "Count")], {
+            "Span": name, "Kind": kind, "Duration": durations if len(durations) > 1 else durations[0],
+            "Errors": errors, "spans": [{k: v for k, v in s.items() if k not in ("name", "kind")} for s in spans],
+        }))
+
+    if trace.counters:
+        records.append(record(["Function"], [(name, "Count") for name in sorted(trace.counters)], dict(trace.counters)))
+    return records
+
+
+# ----- AWS SDK instrumentation -----
+
+def _before_call(model, context, **kwargs):
+    if _trace.get() is not None:
+        context["clinicalsetu_span"] = (time.perf_counter(), _span.get(), model)
+
+
+def _record_call(context, error):
+    started = context.pop("clinicalsetu_span", None) if context is not None else None
+    trace = _trace.get()
+    if started is None or trace is None:
+        return
+    model = started[2]
+    service = model.service_model.service_name
+    trace.add_span({
+        "name": f"{service}.{model.name}", "kind": _SERVICE_KINDS.get(service, "aws"),
+        "span_id": _new_id(), "parent_id": started[1] or trace.root_id,
+        "ms": (time.perf_counter() - started[0]) * 1000, "error": error,
+    })
+
+
+def _after_call(http_response, parsed, model, context, **kwargs):
+    error = (parsed or {}).get("Error", {}).get("Code") if http_response.status_code >= 300 else None
+    _record_call(context, error)
+
+
+def _after_call_error(exception, context, **kwargs):
+    # Emitted without the operation model (connection errors, missing credentials)
+    _record_call(context, type(exception).__name__)
+
+
+def _needs_retry(response, operation, **kwargs):
+    # Fires for every HTTP attempt, so throttles absorbed by the SDK's own retries are counted too
+    if response is None or _trace.get() is None:
+        return None
+    code = (response[1] or {}).get("Error", {}).get("Code", "")
+    if "Throttl" in code or code == "TooManyRequestsException":
+        service = operation.service_model.service_name
+        count(f"{_SERVICE_KINDS.get(service, service)}_throttles")
+    return None
+
+
+def instrument_boto3():
+    """Time every call made by boto3 clients created from the default session after this point."""
+    import boto3
+
+    if boto3.DEFAULT_SESSION is None:
+        boto3.setup_default_session()
+    events = boto3.DEFAULT_SESSION.events
+    events.register("before-call", _before_call, unique_id="clinicalsetu-trace-before")
+    events.register("after-call", _after_call, unique_id="clinicalsetu-trace-after")
+    events.register("after-call-error", _after_call_error, unique_id="clinicalsetu-trace-error")
+    events.register("needs-retry", _needs_retry, unique_id="clinicalsetu-trace-retry")
@@ -0,0 +1,189 @@
+"""
+ClinicalSetu - Translation Cache
+Two-tier cache for translated patient summaries, keyed by
+(SHA-256 of the canonical summary JSON, target language, prompt version):
+
+  1. In-process LRU (per Lambda container, TTL-bounded)
+  2. DynamoDB cache table shared with the consultation cache
+     (cache_key = "translation#<prompt version>#<language>#<summary hash>")
+
+Translations pre-warmed right after a consultation is processed are also
+stored against the consultation ID
+(cache_key = "translation#<prompt version>#<language>#consultation#<id>").
+
+Bumping the prompt version in process_consultation invalidates every entry
+without a table scan. Counters and per-tier latency feed the /api/translate
+response metadata and benchmarks (stats()).
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+MEMORY_MAX_ENTRIES = 256
+MEMORY_TTL = 3600  # seconds
+DYNAMO_TTL = 30 * 86400  # seconds; translations of a fixed summary never go stale
+
+
+def summary_hash(summary):
+    canonical = json.dumps(summary, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def normalize_language(language):
+    return " ".join(str(language).split()).lower()
+
+
+def cache_key(summary, language, prompt_version):
+    return f"translation#{prompt_version}#{normalize_language(language)}#{summary_hash(summary)}"
+
+
+def consultation_cache_key(consultation_id, language, prompt_version):
+    return f"translation#{prompt_version}#{normalize_language(language)}#consultation#{consultation_id}"
+
+
+class TranslationCache:
+    """
+    table_factory returns the DynamoDB cache table (or None when caching is unavailable);
+    it is called once, on first use, so a missing table costs one lookup per container.
+    """
+
+    def __init__(self, table_factory=None, max_entries=MEMORY_MAX_ENTRIES, memory_ttl=MEMORY_TTL,
+                 dynamo_ttl=DYNAMO_TTL):
+        self.table_factory = table_factory
+        self.max_entries = max_entries
+        self.memory_ttl = memory_ttl
+        self.dynamo_ttl = dynamo_ttl
+        self.memory = OrderedDict()  # key -> (expires_at, translated)
+        self.lock = threading.Lock()
+        self._table = None
+        self._table_resolved = False
+        self.counters = {"memory_hits": 0, "dynamo_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+        self.latency = {}  # tier -> [count, total_ms, max_ms]
+
+    # ----- tiers -----
+
+    def _get_table(self):
+        if not self._table_resolved:
+            self._table = self.table_factory() if self.table_factory else None
+            self._table_resolved = True
+        return self._table
+
+    def _memory_get(self, key):
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.memory[key]
+                return None
+            self.memory.move_to_end(key)
+            return entry[1]
+
+    def _memory_put(self, key, translated):
+        with self.lock:
+            self.memory[key] = (time.monotonic() + self.memory_ttl, translated)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def _dynamo_get(self, key):
+        table = self._get_table()
+        if table is None:
+            return None
+        try:
+            item = table.get_item(Key={"cache_key": key}).get("Item")
+        except Exception:
+            self._count("errors")
+            return None
+        if not item or int(item.get("ttl", 0)) < time.time():
+            return None
+        return json.loads(item["result_json"])
+
+    def _dynamo_put(self, key, translated, language):
+        table = self._get_table()
+        if table is None:
+            return
+        now = int(time.time())
+        try:
+            table.put_item(Item={
+                "cache_key": key,
+                "result_json": json.dumps(translated, ensure_ascii=False),
+                "language": normalize_language(language),
+                "cached_at": now,
+                "ttl": now + self.dynamo_ttl,
+            })
+        except Exception:
+            self._count("errors")  # Caching failure should not break translation
+
+    # ----- public API -----
+
+    def get_or_translate(self, summary, language, prompt_version, translate):
+        """
+        Return (translated, tier) where tier is "memory", "dynamodb" or "miss".
+        On a miss translate(summary, language) is called and the result stored in both tiers.
+        """
+        start = time.perf_counter()
+        key = cache_key(summary, language, prompt_version)
+
+        translated = self._memory_get(key)
+        if translated is not None:
+            return translated, self._record("memory", start)
+
+        translated = self._dynamo_get(key)
+        if translated is not None:
+            self._memory_put(key, translated)
+            return translated, self._record("dynamodb", start)
+
+        translated = translate(summary, language)
+        self._memory_put(key, translated)
+        self._dynamo_put(key, translated, language)
+        self._count("stores")
+        return translated, self._record("miss", start)
+
+    def put_for_consultation(self, consultation_id, language, prompt_version, translated):
+        key = consultation_cache_key(consultation_id, language, prompt_version)
+        self._memory_put(key, translated)
+        self._dynamo_put(key, translated, language)
+
+    def get_for_consultation(self, consultation_id, language, prompt_version):
+        """Pre-warmed translation for a consultation, or None."""
+        key = consultation_cache_key(consultation_id, language, prompt_version)
+        translated = self._memory_get(key)
+        if translated is None:
+            translated = self._dynamo_get(key)
+            if translated is not None:
+                self._memory_put(key, translated)
+        return translated
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+            latency = {
+                tier: {"count": n, "avg_ms": round(total / n, 2), "max_ms": round(peak, 2)}
+                for tier, (n, total, peak) in self.latency.items()
+            }
+            entries = len(self.memory)
+        lookups = counters["memory_hits"] + counters["dynamo_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["dynamo_hits"]
+        return {
+            **counters,
+            "memory_entries": entries,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "latency": latency,
+        }
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _record(self, tier, start):
+        ms = (time.perf_counter() - start) * 1000
+        counter = {"memory": "memory_hits", "dynamodb": "dynamo_hits", "miss": "misses"}[tier]
+        with self.lock:
+            self.counters[counter] += 1
+            n, total, peak = self.latency.get(tier, (0, 0.0, 0.0))
+            self.latency[tier] = (n + 1, total + ms, max(peak, ms))
+        return tier
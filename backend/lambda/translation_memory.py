@@ -0,0 +1,219 @@
+"""
+ClinicalSetu - Translation Memory
+Field-level translation of patient summaries. A summary is split into its leaf
+strings; strings translated before (per language) are served from a phrase
+memory and only the unseen ones are sent to the model, as one compact JSON
+array. The translated strings are then put back into the original structure.
+
+Boilerplate such as the disclaimer, standard warning signs, lifestyle advice
+and dosing instructions recurs across patients, so it is translated once per
+language and reused.
+
+Phrase memory tiers:
+  1. In-process dict (per Lambda container, size-bounded)
+  2. DynamoDB cache table shared with the consultation cache
+     (cache_key = "phrase#<prompt version>#<language>#<text hash>"), read with
+     BatchGetItem and written with dynamo_batch.batch_write
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from dynamo_batch import batch_write
+from translation_cache import normalize_language
+
+# Leaf keys copied through untranslated (medication names stay in English)
+UNTRANSLATED_KEYS = {"name"}
+
+MEMORY_MAX_ENTRIES = 8192
+DYNAMO_TTL = 90 * 86400  # seconds
+BATCH_GET_LIMIT = 100  # DynamoDB BatchGetItem max keys per call
+
+
+def leaf_strings(summary):
+    """Return every translatable, non-blank string in the summary, in document order."""
+    leaves = []
+
+    def walk(value, key):
+        if isinstance(value, str):
+            if value.strip() and key not in UNTRANSLATED_KEYS:
+                leaves.append(value)
+        elif isinstance(value, dict):
+            for child_key, child in value.items():
+                walk(child, child_key)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child, key)
+
+    walk(summary, None)
+    return leaves
+
+
+def reassemble(summary, translations):
+    """Copy of summary with every translatable string replaced via translations (text -> translated)."""
+
+    def build(value, key):
+        if isinstance(value, str):
+            return translations.get(value, value) if key not in UNTRANSLATED_KEYS else value
+        if isinstance(value, dict):
+            return {k: build(child, k) for k, child in value.items()}
+        if isinstance(value, list):
+            return [build(child, key) for child in value]
+        return value
+
+    return build(summary, None)
+
+
+def phrase_key(text, language, prompt_version):
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"phrase#{prompt_version}#{normalize_language(language)}#{digest}"
+
+
+class PhraseMemory:
+    """
+    table_factory returns the DynamoDB cache table (or None for an in-process-only memory);
+    it is called once, on first use.
+    """
+
+    def __init__(self, table_factory=None, max_entries=MEMORY_MAX_ENTRIES, dynamo_ttl=DYNAMO_TTL):
+        self.table_factory = table_factory
+        self.max_entries = max_entries
+        self.dynamo_ttl = dynamo_ttl
+        self.memory = OrderedDict()  # phrase key -> translated
+        self.lock = threading.Lock()
+        self._table = None
+        self._table_resolved = False
+        self.counters = {"strings": 0, "memory_hits": 0, "dynamo_hits": 0, "misses": 0, "errors": 0}
+
+    def _get_table(self):
+        if not self._table_resolved:
+            self._table = self.table_factory() if self.table_factory else None
+            self._table_resolved = True
+        return self._table
+
+    def _remember(self, key, translated):
+        with self.lock:
+            self.memory[key] = translated
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def get_many(self, texts, language, prompt_version):
+        """Return {text: translated} for the texts already in memory (either tier)."""
+        keys = {phrase_key(text, language, prompt_version): text for text in texts}
+        found, pending = {}, []
+        with self.lock:
+            for key, text in keys.items():
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[text] = self.memory[key]
+                else:
+                    pending.append(key)
+        memory_hits = len(found)
+
+        table = self._get_table()
+        if table is not None and pending:
+            for key, translated in self._batch_get(table, pending).items():
+                found[keys[key]] = translated
+                self._remember(key, translated)
+
+        with self.lock:
+            self.counters["strings"] += len(keys)
+            self.counters["memory_hits"] += memory_hits
+            self.counters["dynamo_hits"] += len(found) - memory_hits
+            self.counters["misses"] += len(keys) - len(found)
+        return found
+
+    def _batch_get(self, table, keys):
+        client = table.meta.client
+        now = time.time()
+        found = {}
+        for i in range(0, len(keys), BATCH_GET_LIMIT):
+            request = {table.name: {
+                "Keys": [{"cache_key": key} for key in keys[i:i + BATCH_GET_LIMIT]],
+                "ProjectionExpression": "cache_key, translated, #ttl",
+                "ExpressionAttributeNames": {"#ttl": "ttl"},
+            }}
+            # Unprocessed keys get one retry; anything still missing is just re-translated
+            for _ in range(2):
+                try:
+                    resp = client.batch_get_item(RequestItems=request)
+                except Exception:
+                    with self.lock:
+                        self.counters["errors"] += 1
+                    break
+                for item in resp.get("Responses", {}).get(table.name, []):
+                    if int(item.get("ttl", 0)) >= now:
+                        found[item["cache_key"]] = item["translated"]
+                request = resp.get("UnprocessedKeys") or {}
+                if not request:
+                    break
+        return found
+
+    def put_many(self, translations, language, prompt_version):
+        """Store {text: translated} in both tiers."""
+        items = []
+        now = int(time.time())
+        for text, translated in translations.items():
+            key = phrase_key(text, language, prompt_version)
+            self._remember(key, translated)
+            items.append({
+                "cache_key": key,
+                "source": text,
+                "translated": translated,
+                "language": normalize_language(language),
+                "cached_at": now,
+                "ttl": now + self.dynamo_ttl,
+            })
+
+        table = self._get_table()
+        if table is None or not items:
+            return
+        try:
+            result = batch_write(table, table.name, items, key_attrs=("cache_key",))
+        except Exception:
+            result = {"unprocessed": items}
+        if result["unprocessed"]:
+            with self.lock:
+                self.counters["errors"] += 1  # Memory write failure should not break translation
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+            entries = len(self.memory)
+        hits = counters["memory_hits"] + counters["dynamo_hits"]
+        return {
+            **counters,
+            "memory_entries": entries,
+            "hit_rate": hits / counters["strings"] if counters["strings"] else 0.0,
+        }
+
+
+def translate_fields(summary, language, memory, translate_strings, prompt_version):
+    """
+    Translate summary leaf by leaf. translate_strings(texts, language) must return a list of
+    translations in the same order (one model call for all unseen strings).
+    Returns (translated summary, {"strings", "unique", "from_memory", "translated"}).
+    """
+    leaves = leaf_strings(summary)
+    texts = list(dict.fromkeys(leaves))
+    known = memory.get_many(texts, language, prompt_version)
+    unseen = [text for text in texts if text not in known]
+
+    if unseen:
+        translated = translate_strings(unseen, language)
+        if not isinstance(translated, list) or len(translated) != len(unseen) \
+                or not all(isinstance(t, str) for t in translated):
+            raise ValueError(f"Expected {len(unseen)} translated strings from the model")
+        fresh = dict(zip(unseen, translated))
+        memory.put_many(fresh, language, prompt_version)
+        known.update(fresh)
+
+    return reassemble(summary, known), {
+        "strings": len(leaves),
+        "unique": len(texts),
+        "from_memory": len(texts) - len(unseen),
+        "translated": len(unseen),
+    }
@@ -0,0 +1,200 @@
+"""
+ClinicalSetu - Consolidated Clinical Trial Corpus Store
+Keeps the fetched ClinicalTrials.gov corpus in a single SQLite file instead of
+one pretty-printed JSON file per NCT ID.
+
+Features:
+  - O(1) lookup by NCT ID (primary key)
+  - Incremental upsert: a trial is only rewritten when its last_updated changes
+  - Streaming iteration in NCT ID order without loading the whole corpus
+  - Exporter back to per-file JSON (data/trials/NCT*.json) for Knowledge Base ingestion
+  - Importer for existing per-file JSON directories
+
+Usage:
+  python backend/lambda/trial_store.py --import data/trials   # Migrate per-file JSON into the store
+  python backend/lambda/trial_store.py --export data/trials   # Write per-file JSON for KB upload
+  python backend/lambda/trial_store.py --stats                # Trial count, last_updated range, file size
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import sys
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    nct_id       TEXT PRIMARY KEY,
+    last_updated TEXT NOT NULL DEFAULT '',
+    body         TEXT NOT NULL
+)
+"""
+
+ITER_BATCH_SIZE = 500
+
+
+def default_store_path():
+    """Return data/trials.sqlite under the project root."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(script_dir))
+    return os.path.join(project_root, "data", "trials.sqlite")
+
+
+class TrialStore:
+    """SQLite-backed trial corpus keyed by NCT ID."""
+
+    def __init__(self, path=None):
+        self.path = path or default_store_path()
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM trials").fetchone()[0]
+
+    def __contains__(self, nct_id):
+        row = self.conn.execute("SELECT 1 FROM trials WHERE nct_id = ?", (nct_id,)).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        return self.iter_trials()
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, nct_id):
+        """Return the parsed trial for an NCT ID, or None."""
+        row = self.conn.execute("SELECT body FROM trials WHERE nct_id = ?", (nct_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_last_updated(self, nct_id):
+        """Return the stored last_updated date for an NCT ID without decoding the body."""
+        row = self.conn.execute("SELECT last_updated FROM trials WHERE nct_id = ?", (nct_id,)).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, trial):
+        """Insert or update one trial. Returns True if the row was new or changed."""
+        changed = self._upsert(trial)
+        self.conn.commit()
+        return changed
+
+    def upsert_many(self, trials):
+        """Upsert an iterable of trials in one transaction. Returns the list of new/changed NCT IDs."""
+        changed = []
+        with self.conn:
+            for trial in trials:
+                if self._upsert(trial):
+                    changed.append(trial["trial_id"])
+        return changed
+
+    def _upsert(self, trial):
+        cur = self.conn.execute(
+            """
+            INSERT INTO trials (nct_id, last_updated, body) VALUES (?, ?, ?)
+            ON CONFLICT(nct_id) DO UPDATE SET
+                last_updated = excluded.last_updated,
+                body = excluded.body
+            WHERE trials.last_updated != excluded.last_updated
+            """,
+            (
+                trial["trial_id"],
+                trial.get("last_updated") or "",
+                json.dumps(trial, ensure_ascii=False, separators=(",", ":")),
+            ),
+        )
+        return cur.rowcount > 0
+
+    def delete(self, nct_id):
+        with self.conn:
+            cur = self.conn.execute("DELETE FROM trials WHERE nct_id = ?", (nct_id,))
+        return cur.rowcount > 0
+
+    def stats(self):
+        """Trial count, oldest/newest last_updated and the database file size in bytes."""
+        count, oldest, newest = self.conn.execute(
+            "SELECT COUNT(*), MIN(NULLIF(last_updated, '')), MAX(NULLIF(last_updated, '')) FROM trials"
+        ).fetchone()
+        size = sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+        return {"trials": count, "oldest_update": oldest, "newest_update": newest, "size_bytes": size}
+
+    def iter_ids(self):
+        """Stream NCT IDs in sorted order."""
+        cur = self.conn.execute("SELECT nct_id FROM trials ORDER BY nct_id")
+        for (nct_id,) in cur:
+            yield nct_id
+
+    def iter_trials(self, batch_size=ITER_BATCH_SIZE):
+        """Stream parsed trials in NCT ID order, fetching batch_size rows at a time."""
+        cur = self.conn.execute("SELECT body FROM trials ORDER BY nct_id")
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for (body,) in rows:
+                yield json.loads(body)
+
+    def export_json(self, out_dir, nct_ids=None):
+        """
+        Write trials as per-file JSON (<out_dir>/<NCT ID>.json) for Knowledge Base ingestion.
+        Exports only nct_ids when given, otherwise the whole corpus. Returns the file count.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        if nct_ids is None:
+            trials = self.iter_trials()
+        else:
+            trials = (t for t in (self.get(n) for n in nct_ids) if t)
+
+        count = 0
+        for trial in trials:
+            filepath = os.path.join(out_dir, f"{trial['trial_id']}.json")
+            with open(filepath, "w", encoding="utf-8") as f:
+                json.dump(trial, f, indent=2, ensure_ascii=False)
+            count += 1
+        return count
+
+    def import_json_dir(self, in_dir):
+        """Load an existing data/trials/ directory of per-file JSON. Returns new/changed NCT IDs."""
+        def _read():
+            for filepath in sorted(glob.glob(os.path.join(in_dir, "*.json"))):
+                try:
+                    with open(filepath, "r", encoding="utf-8") as f:
+                        trial = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"  Skipping {filepath}: {e}")
+                    continue
+                if trial.get("trial_id"):
+                    yield trial
+
+        return self.upsert_many(_read())
+
+
+if __name__ == "__main__":
+    store_path = os.environ.get("TRIAL_STORE_PATH") or default_store_path()
+    with TrialStore(store_path) as store:
+        if "--import" in sys.argv:
+            src = sys.argv[sys.argv.index("--import") + 1]
+            changed = store.import_json_dir(src)
+            print(f"Imported {len(changed)} new/updated trials from {src}")
+        if "--export" in sys.argv:
+            dest = sys.argv[sys.argv.index("--export") + 1]
+            count = store.export_json(dest)
+            print(f"Exported {count} trials to {dest}")
+        if "--stats" in sys.argv:
+            stats = store.stats()
+            print(f"Store: {store_path}")
+            print(f"  Trials:       {stats['trials']}")
+            print(f"  Last updated: {stats['oldest_update'] or '-'} .. {stats['newest_update'] or '-'}")
+            print(f"  Size:         {stats['size_bytes'] / 1024:,.1f} KB")
+        else:
+            print(f"Store: {store_path} ({len(store)} trials)")
@@ -4,19 +4,165 @@ Handles saving and retrieving patient visit records from DynamoDB.
 
 Routes (dispatched by path):
   POST /api/save-visit      - Save a finalized consultation visit
+  POST /api/save-visits     - Save many visits in one call (BatchWriteItem, 25 per chunk)
   POST /api/patient-visits   - Fetch visits for a patient by phone number
+  POST /api/doctor-visits    - Fetch visits recorded by a doctor
+  POST /api/hospital-visits  - Fetch a patient's visits at one hospital (base table, optional date range)
+  POST /api/doctor-day-visits - Fetch a doctor's visits at one hospital on one day (doctor-day-index)
+  POST /api/visit-detail     - Fetch one full visit by its pk/sk
+
+List routes are paginated: pass `limit` and the `next_token` from the previous
+page, and optionally `fields` (a list of attribute names, or "summary" for the
+dashboard list columns) to project only what the view renders. Responses are
+{"items": [...], "next_token": "<opaque>" | null}.
+
+Date filters take ISO-8601 prefixes ("2025", "2025-03", "2025-03-14",
+"2025-03-14T09:00:00Z"): `date` matches every visit starting with the prefix,
+`from_date` / `to_date` bound an inclusive range (a date-only `to_date` covers
+the whole day). Each becomes a key condition, so only matching visits are read.
+
+List responses are cached per container for VISIT_CACHE_TTL seconds as the
+serialized response body, tagged by phone number / doctor name. Saving a visit
+drops every cached page for its phone and doctor; other containers catch up
+when the TTL expires. Responses carry X-Cache: HIT | MISS.
+
+With VISIT_DOCS_BUCKET (or VISIT_DOCS_DIR) set, the large per-visit documents
+(patient_summary, medications, warning_signs) are written to compressed objects
+(visit_documents) and list queries read only the index columns plus `doc_ref`;
+/api/visit-detail loads the documents back.
 """
 
+import base64
+import binascii
 import json
 import os
+import re
+import threading
 import time
 import boto3
-from decimal import Decimal
+from botocore.exceptions import ClientError
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import lifecycle
+import tracing
+from dynamo_batch import batch_write
+from visit_codec import dumps, to_dynamo
+from visit_documents import DOCUMENT_FIELDS, hydrate, offload, store_from_env
 
+tracing.instrument_boto3()  # DynamoDB and S3 (visit_documents) calls become trace spans
 dynamodb = boto3.resource("dynamodb", region_name=os.environ.get("AWS_REGION_NAME", "us-east-1"))
 VISITS_TABLE = os.environ.get("VISITS_TABLE", "clinicalsetu-visits-prod")
+doc_store = store_from_env()  # None keeps documents inline in the item
+
+MAX_PAGE_SIZE = 100
+MAX_BATCH_VISITS = 500
+CACHE_TTL = float(os.environ.get("VISIT_CACHE_TTL", "30"))  # seconds; 0 disables the cache
+CACHE_MAX_ENTRIES = int(os.environ.get("VISIT_CACHE_SIZE", "512"))
+
+# Columns rendered by the dashboard / portal list views (pk + sk allow a detail fetch)
+SUMMARY_FIELDS = [
+    "pk", "sk", "consultation_id", "visit_date", "patient_name", "patient_age", "patient_gender",
+    "doctor_name", "doctor_speciality", "hospital", "diagnosis", "phone_number",
+]
+VISIT_FIELDS = set(SUMMARY_FIELDS) | {
+    "patient_id", "patient_summary", "medications", "follow_up", "warning_signs", "created_at", "doctor_day",
+    "doc_ref", "doc_bytes",
+}
+
+# "2025", "2025-03", "2025-03-14", "2025-03-14T09", ... "2025-03-14T09:30:00Z"
+_DATE_PREFIX_RE = re.compile(r"^\d{4}(-\d{2}(-\d{2}(T\d{2}(:\d{2}(:\d{2}(\.\d+)?Z?)?)?)?)?)?$")
+_DAY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# A saved visit_date: "2025-03-14", "2025-03-14T09:30:00Z", "2025-03-14T09:30:00.123+05:30", ...
+_VISIT_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$")
+# Sorts after every character that can follow a date prefix in visit_date ("T", digits, ":", "Z")
+_RANGE_END = "~"
+
+
+def _visits_table():
+    """The visits Table object, built once per container (per dynamodb resource)."""
+    return lifecycle.resource(f"table:{VISITS_TABLE}", lambda: dynamodb.Table(VISITS_TABLE), dynamodb)
+
+
+def doctor_day_key(hospital, doctor_name, visit_date):
+    """Composite doctor-day-index hash key: one partition per hospital, doctor and calendar day."""
+    return f"HOSPITAL#{hospital}#DOCTOR#{doctor_name}#DAY#{visit_date[:10]}"
+
+
+class _PageCache:
+    """
+    LRU of serialized list-query responses with a TTL, invalidated by tag
+    (("phone", number) / ("doctor", name)). Thread-safe for the local dev server.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, tag, body)
+        self.tags = {}  # tag -> set of keys
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def put(self, key, tag, body):
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (time.monotonic() + self.ttl, tag, body)
+            self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, *tags):
+        with self.lock:
+            for tag in tags:
+                for key in self.tags.pop(tag, ()):
+                    if self.entries.pop(key, None) is not None:
+                        self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+
+    def _drop(self, key):
+        _expires, tag, _body = self.entries.pop(key)
+        keys = self.tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.tags[tag]
+
+
+_page_cache = _PageCache(CACHE_TTL, CACHE_MAX_ENTRIES)
 
 
+def cache_stats():
+    """Hit/miss counters for the container's list-query cache (local server /health, benchmarks)."""
+    stats = dict(_page_cache.stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["entries"] = len(_page_cache.entries)
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+@tracing.traced_handler("visit_api")
+@lifecycle.handler
 def lambda_handler(event, context):
     if event.get("httpMethod") == "OPTIONS":
         return _cors(200, "")
@@ -26,36 +172,45 @@ def lambda_handler(event, context):
 
     if path.endswith("/save-visit"):
         return _save_visit(body)
+    elif path.endswith("/save-visits"):
+        return _save_visits(body)
     elif path.endswith("/patient-visits"):
         return _get_visits(body)
+    elif path.endswith("/doctor-day-visits"):
+        return _get_doctor_day_visits(body)
     elif path.endswith("/doctor-visits"):
         return _get_doctor_visits(body)
+    elif path.endswith("/hospital-visits"):
+        return _get_hospital_visits(body)
+    elif path.endswith("/visit-detail"):
+        return _get_visit_detail(body)
     else:
         return _cors(404, json.dumps({"error": "Not found"}))
 
 
-def _save_visit(body):
-    table = dynamodb.Table(VISITS_TABLE)
-
+def _build_visit_item(body):
+    """Build a DynamoDB-ready visit item from a request body. Raises ValueError if invalid."""
     phone = body.get("phone_number", "")
     hospital = body.get("hospital", "Unknown")
-    consultation_id = body.get("consultation_id", "")
     visit_date = body.get("visit_date") or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
     if not phone:
-        return _cors(400, json.dumps({"error": "phone_number is required"}))
+        raise ValueError("phone_number is required")
+    if not isinstance(visit_date, str) or not _VISIT_DATE_RE.match(visit_date):
+        raise ValueError("visit_date must be an ISO-8601 string")
 
+    doctor_name = body.get("doctor_name", "")
     item = {
         "pk": f"HOSPITAL#{hospital}#PHONE#{phone}",
         "sk": f"VISIT#{visit_date}",
         "phone_number": phone,
         "visit_date": visit_date,
-        "consultation_id": consultation_id,
+        "consultation_id": body.get("consultation_id", ""),
         "patient_name": body.get("patient_name", ""),
         "patient_age": body.get("patient_age", 0),
         "patient_gender": body.get("patient_gender", ""),
         "patient_id": body.get("patient_id", ""),
-        "doctor_name": body.get("doctor_name", ""),
+        "doctor_name": doctor_name,
         "doctor_speciality": body.get("doctor_speciality", ""),
         "hospital": hospital,
         "diagnosis": body.get("diagnosis", ""),
@@ -65,69 +220,334 @@ def _save_visit(body):
         "warning_signs": body.get("warning_signs", []),
         "created_at": int(time.time()),
     }
+    # Sparse GSI: visits without a doctor stay out of doctor-day-index
+    if doctor_name:
+        item["doctor_day"] = doctor_day_key(hospital, doctor_name, visit_date)
 
     # Convert floats to Decimal for DynamoDB
-    item = json.loads(json.dumps(item), parse_float=Decimal)
+    return to_dynamo(item)
+
+
+def _save_visit(body):
+    table = _visits_table()
+    consultation_id = body.get("consultation_id", "")
+
+    try:
+        item = _build_visit_item(body)
+    except ValueError as e:
+        return _cors(400, json.dumps({"error": str(e)}))
+
+    # Documents first, so a stored item never points at a missing object
+    _offload_documents([item])
     table.put_item(Item=item)
+    _invalidate_cached(item)
 
     return _cors(200, json.dumps({"status": "saved", "consultation_id": consultation_id}))
 
 
+def _save_visits(body):
+    visits = body.get("visits")
+    if not isinstance(visits, list) or not visits:
+        return _cors(400, json.dumps({"error": "visits must be a non-empty list"}))
+    if len(visits) > MAX_BATCH_VISITS:
+        return _cors(400, json.dumps({"error": f"At most {MAX_BATCH_VISITS} visits per request"}))
+
+    items, errors = [], []
+    for i, visit in enumerate(visits):
+        try:
+            items.append(_build_visit_item(visit))
+        except (ValueError, AttributeError) as e:
+            errors.append({"index": i, "error": str(e) if isinstance(e, ValueError) else "visit must be an object"})
+
+    _offload_documents(items)
+    result = batch_write(dynamodb, VISITS_TABLE, items) if items else {"written": 0, "unprocessed": []}
+    for item in items:
+        _invalidate_cached(item)
+    failed = [it["consultation_id"] for it in result["unprocessed"]]
+
+    status = 200 if not errors and not failed else 207
+    return _cors(status, json.dumps({
+        "status": "saved" if status == 200 else "partial",
+        "saved": result["written"],
+        "invalid": errors,
+        "unprocessed": failed,
+    }))
+
+
+def _offload_documents(items):
+    if doc_store is None or not items:
+        return
+    if len(items) == 1:
+        offload(items[0], doc_store)
+        return
+    with ThreadPoolExecutor(max_workers=min(16, len(items))) as pool:
+        list(pool.map(tracing.wrap(lambda item: offload(item, doc_store)), items))
+
+
 def _get_visits(body):
-    table = dynamodb.Table(VISITS_TABLE)
+    table = _visits_table()
     phone = body.get("phone_number", "")
 
     if not phone:
         return _cors(400, json.dumps({"error": "phone_number is required"}))
 
-    resp = table.query(
+    return _query_page(
+        table, body, default_limit=20, cache_tag=("phone", phone),
         IndexName="phone-index",
         KeyConditionExpression="phone_number = :ph",
         ExpressionAttributeValues={":ph": phone},
         ScanIndexForward=False,  # newest first
-        Limit=20,
     )
 
-    items = resp.get("Items", [])
-    # Convert Decimal to float/int for JSON serialization
-    return _cors(200, json.dumps(items, default=_decimal_default))
-
 
 def _get_doctor_visits(body):
-    table = dynamodb.Table(VISITS_TABLE)
+    table = _visits_table()
     doctor_name = body.get("doctor_name", "")
 
     if not doctor_name:
         return _cors(400, json.dumps({"error": "doctor_name is required"}))
 
-    resp = table.query(
+    return _query_page(
+        table, body, default_limit=50, cache_tag=("doctor", doctor_name),
         IndexName="doctor-index",
         KeyConditionExpression="doctor_name = :dn",
         ExpressionAttributeValues={":dn": doctor_name},
         ScanIndexForward=False,
-        Limit=50,
     )
 
-    items = resp.get("Items", [])
-    return _cors(200, json.dumps(items, default=_decimal_default))
 
+def _get_hospital_visits(body):
+    table = _visits_table()
+    hospital = body.get("hospital", "")
+    phone = body.get("phone_number", "")
 
-def _decimal_default(obj):
-    if isinstance(obj, Decimal):
-        if obj % 1 == 0:
-            return int(obj)
-        return float(obj)
-    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+    if not hospital or not phone:
+        return _cors(400, json.dumps({"error": "hospital and phone_number are required"}))
 
+    try:
+        range_condition, range_values = _date_range_condition("sk", "VISIT#", body)
+    except ValueError as e:
+        return _cors(400, json.dumps({"error": str(e)}))
 
-def _cors(status, body):
+    return _query_page(
+        table, body, default_limit=20, cache_tag=("phone", phone),
+        KeyConditionExpression=f"pk = :pk AND {range_condition}",
+        ExpressionAttributeValues={":pk": f"HOSPITAL#{hospital}#PHONE#{phone}", **range_values},
+        ScanIndexForward=False,
+    )
+
+
+def _get_doctor_day_visits(body):
+    table = _visits_table()
+    hospital = body.get("hospital", "")
+    doctor_name = body.get("doctor_name", "")
+    day = body.get("day") or time.strftime("%Y-%m-%d", time.gmtime())
+
+    if not hospital or not doctor_name:
+        return _cors(400, json.dumps({"error": "hospital and doctor_name are required"}))
+    if not isinstance(day, str) or not _DAY_RE.match(day):
+        return _cors(400, json.dumps({"error": "day must be YYYY-MM-DD"}))
+
+    # Optional time-of-day window, e.g. from_date "2025-03-14T09" to_date "2025-03-14T13"
+    try:
+        range_condition, range_values = _date_range_condition("visit_date", "", body, within=day)
+    except ValueError as e:
+        return _cors(400, json.dumps({"error": str(e)}))
+
+    key_condition = "doctor_day = :dd"
+    if range_values:
+        key_condition += f" AND {range_condition}"
+
+    return _query_page(
+        table, body, default_limit=50, cache_tag=("doctor", doctor_name),
+        IndexName="doctor-day-index",
+        KeyConditionExpression=key_condition,
+        ExpressionAttributeValues={":dd": doctor_day_key(hospital, doctor_name, day), **range_values},
+        # Chronological: the day's queue in arrival order
+        ScanIndexForward=bool(body.get("oldest_first", True)),
+    )
+
+
+def _date_range_condition(attr, prefix, body, within=None):
+    """
+    Build a range-key condition from `date` / `from_date` / `to_date` in the request body.
+    Returns (expression, values); with no filters it matches every key starting with prefix.
+    `within` rejects bounds outside a fixed prefix (the day of a doctor-day query).
+    """
+    date, start, end = body.get("date"), body.get("from_date"), body.get("to_date")
+    for name, value in (("date", date), ("from_date", start), ("to_date", end)):
+        if value is not None and (not isinstance(value, str) or not _DATE_PREFIX_RE.match(value)):
+            raise ValueError(f"{name} must be an ISO-8601 date or timestamp prefix")
+        if value and within and not value.startswith(within):
+            raise ValueError(f"{name} must fall on {within}")
+    if date and (start or end):
+        raise ValueError("Use either date or from_date/to_date, not both")
+
+    if start or end:
+        low = prefix + (start or within or "")
+        high = prefix + (end or within or "") + _RANGE_END
+        if low > high:
+            raise ValueError("from_date must not be after to_date")
+        return f"{attr} BETWEEN :lo AND :hi", {":lo": low, ":hi": high}
+    if date or prefix:
+        return f"begins_with({attr}, :dp)", {":dp": prefix + (date or "")}
+    return "", {}
+
+
+def _get_visit_detail(body):
+    table = _visits_table()
+    pk = body.get("pk", "")
+    sk = body.get("sk", "")
+
+    if not pk or not sk:
+        return _cors(400, json.dumps({"error": "pk and sk are required"}))
+
+    kwargs = {"Key": {"pk": pk, "sk": sk}}
+    try:
+        wanted = _field_list(body.get("fields"))
+        projected = wanted
+        if wanted and "doc_ref" not in wanted and any(f in DOCUMENT_FIELDS for f in wanted):
+            projected = wanted + ["doc_ref"]
+        kwargs.update(_projection_kwargs(projected))
+    except ValueError as e:
+        return _cors(400, json.dumps({"error": str(e)}))
+
+    item = table.get_item(**kwargs).get("Item")
+    if not item:
+        return _cors(404, json.dumps({"error": "Visit not found"}))
+    # Lazy load: only the detail view pays for the offloaded documents
+    if not wanted or any(f in DOCUMENT_FIELDS for f in wanted):
+        hydrate(item, doc_store)
+    if wanted:
+        item = {k: item[k] for k in wanted if k in item}
+    return _cors(200, dumps(item))
+
+
+def _invalidate_cached(item):
+    _page_cache.invalidate(("phone", item["phone_number"]), ("doctor", item.get("doctor_name", "")))
+
+
+def _query_page(table, body, default_limit, cache_tag=None, **query_kwargs):
+    """
+    Run one page of a visits query, applying limit / next_token / fields from the request body.
+    With a cache_tag, a 200 response body is cached under the full query shape and served as-is
+    on repeat requests.
+    """
+    cache_key = None
+    if cache_tag and CACHE_TTL > 0:
+        cache_key = json.dumps(
+            [query_kwargs, body.get("limit"), body.get("next_token"), body.get("fields")],
+            sort_keys=True, default=str,
+        )
+        cached = _page_cache.get(cache_key)
+        tracing.count("visit_cache_hits" if cached is not None else "visit_cache_misses")
+        if cached is not None:
+            return _cors(200, cached, cache="HIT")
+
+    try:
+        query_kwargs["Limit"] = _page_limit(body.get("limit"), default_limit)
+        start_key = _decode_token(body.get("next_token"))
+        query_kwargs.update(_projection_kwargs(body.get("fields")))
+    except ValueError as e:
+        return _cors(400, json.dumps({"error": str(e)}))
+
+    if start_key:
+        query_kwargs["ExclusiveStartKey"] = start_key
+
+    try:
+        resp = table.query(**query_kwargs)
+    except ClientError as e:
+        # A token from another endpoint/index (or hand-made) fails DynamoDB's start key validation
+        if start_key and e.response["Error"]["Code"] == "ValidationException":
+            return _cors(400, json.dumps({"error": "Invalid next_token"}))
+        raise
+    page = {
+        "items": resp.get("Items", []),
+        "next_token": _encode_token(resp.get("LastEvaluatedKey")),
+    }
+    # Decimals go through visit_codec's type-checked hook on the C encoder
+    serialized = dumps(page)
+    if cache_key is not None:
+        _page_cache.put(cache_key, cache_tag, serialized)
+        return _cors(200, serialized, cache="MISS")
+    return _cors(200, serialized)
+
+
+def _page_limit(limit, default_limit):
+    if limit in (None, ""):
+        return default_limit
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _field_list(fields):
+    """Normalize a `fields` value (list, comma-separated string or "summary"); None means all fields."""
+    if not fields:
+        return None
+    if fields == "summary":
+        return list(SUMMARY_FIELDS)
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in VISIT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(fields)
+
+
+def _projection_kwargs(fields):
+    """Build ProjectionExpression kwargs for a `fields` list, or "summary" for the list columns."""
+    fields = _field_list(fields)
+    if not fields:
+        return {}
+    # Alias every attribute so DynamoDB reserved words can never break the expression
+    names = {f"#f{i}": f for i, f in enumerate(fields)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def _encode_token(last_key):
+    """Encode a LastEvaluatedKey as an opaque URL-safe continuation token."""
+    if not last_key:
+        return None
+    raw = json.dumps(last_key, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_token(token):
+    if not token:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8"))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise ValueError("Invalid next_token")
+    if not isinstance(key, dict) or not all(isinstance(v, str) for v in key.values()):
+        raise ValueError("Invalid next_token")
+    return key
+
+
+def _cors(status, body, cache=None):
+    headers = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key",
+        "Access-Control-Allow-Methods": "POST,OPTIONS",
+    }
+    if cache:
+        headers["X-Cache"] = cache
     return {
         "statusCode": status,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key",
-            "Access-Control-Allow-Methods": "POST,OPTIONS",
-        },
+        "headers": headers,
         "body": body,
     }
+
+
+# DescribeTable on warm-up ({"warmup": true} / scheduled pings): opens the DynamoDB connection
+lifecycle.on_warmup("visit_api.visits_table", lambda: _visits_table().load())
+lifecycle.init_done()
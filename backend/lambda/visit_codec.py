@@ -0,0 +1,53 @@
+"""
+ClinicalSetu - Visit Item Codec
+Converts visit records between DynamoDB and JSON.
+
+boto3's resource layer hands back every number as Decimal, which json cannot
+serialize on its own.
+  - dumps: C JSON encoder with a type-checked Decimal hook (int(d) == d instead
+    of `d % 1`). Visit bodies are mostly strings, so letting the C encoder walk
+    them beats a Python pre-pass.
+  - to_dynamo: the write direction (float -> Decimal), shared with dynamo_batch
+
+Usage:
+  from visit_codec import dumps
+  body = dumps({"items": resp["Items"], "next_token": token})
+"""
+
+import json
+from decimal import Decimal
+
+
+def _number(d):
+    """Decimal -> int when integral (Decimal("5.0") included), else float."""
+    i = int(d)
+    return i if i == d else float(d)
+
+
+def _default(obj):
+    if type(obj) is Decimal:
+        return _number(obj)
+    if type(obj) is set:
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+_dumps = json.JSONEncoder(default=_default).encode
+
+
+def to_dynamo(value):
+    """Return value with every float converted to Decimal (boto3 rejects Python floats)."""
+    if isinstance(value, float):
+        # str() keeps the shortest round-trip repr, matching json.loads(..., parse_float=Decimal)
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: to_dynamo(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_dynamo(v) for v in value]
+    return value
+
+
+def dumps(obj):
+    """json.dumps for resource-layer results (Decimals anywhere); same output as the old default hook."""
+    return _dumps(obj)
+
@@ -0,0 +1,118 @@
+"""
+ClinicalSetu - Visit Document Store
+Keeps the large per-visit documents (patient_summary, medications, warning_signs)
+out of the visits table. The DynamoDB item keeps the index / list columns plus a
+`doc_ref`; the documents live as one gzip-compressed JSON object per visit in S3
+(or a local directory for development and benchmarks) and are fetched only by
+the detail view.
+
+Items without a doc_ref (saved before offloading, or with no store configured)
+keep their documents inline and are returned unchanged.
+
+Environment variables:
+  VISIT_DOCS_BUCKET    - S3 bucket for visit documents (enables offloading)
+  VISIT_DOCS_PREFIX    - key prefix inside the bucket (default: visit-docs/)
+  VISIT_DOCS_DIR       - local directory instead of S3 (development)
+  VISIT_DOCS_MIN_BYTES - keep documents inline below this JSON size (default: 1024)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import boto3
+
+from visit_codec import dumps
+
+DOCUMENT_FIELDS = ("patient_summary", "medications", "warning_signs")
+MIN_OFFLOAD_BYTES = int(os.environ.get("VISIT_DOCS_MIN_BYTES", "1024"))
+
+
+def decode(blob):
+    return json.loads(gzip.decompress(blob).decode("utf-8"))
+
+
+def document_key(pk, sk):
+    """Stable object name for a visit; hashed so hospital / doctor names never need escaping."""
+    digest = hashlib.sha256(f"{pk}|{sk}".encode("utf-8")).hexdigest()
+    return f"{digest[:2]}/{digest}.json.gz"
+
+
+class S3DocumentStore:
+    def __init__(self, bucket, prefix="visit-docs/", client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = boto3.client("s3", region_name=os.environ.get("AWS_REGION_NAME", "us-east-1"))
+        return self._client
+
+    def put(self, key, blob):
+        self.client.put_object(
+            Bucket=self.bucket, Key=self.prefix + key, Body=blob,
+            ContentType="application/json", ContentEncoding="gzip",
+        )
+        return f"s3://{self.bucket}/{self.prefix}{key}"
+
+    def get(self, ref):
+        bucket, _, key = ref[len("s3://"):].partition("/")
+        return self.client.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+
+class LocalDocumentStore:
+    def __init__(self, root):
+        self.root = root
+
+    def put(self, key, blob):
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(blob)
+        return f"file://{key}"
+
+    def get(self, ref):
+        with open(os.path.join(self.root, ref[len("file://"):]), "rb") as f:
+            return f.read()
+
+
+def store_from_env():
+    """The configured document store, or None to keep documents inline."""
+    if os.environ.get("VISIT_DOCS_BUCKET"):
+        return S3DocumentStore(os.environ["VISIT_DOCS_BUCKET"], os.environ.get("VISIT_DOCS_PREFIX", "visit-docs/"))
+    if os.environ.get("VISIT_DOCS_DIR"):
+        return LocalDocumentStore(os.environ["VISIT_DOCS_DIR"])
+    return None
+
+
+def offload(item, store, min_bytes=None):
+    """
+    Move the document fields of a visit item into the store (in place).
+    Leaves doc_ref (where the object lives) and doc_bytes (compressed size) on the item.
+    Returns True if the documents were offloaded.
+    """
+    if store is None:
+        return False
+    doc = {f: item[f] for f in DOCUMENT_FIELDS if f in item}
+    if not doc:
+        return False
+    raw = dumps(doc)
+    if len(raw) < (MIN_OFFLOAD_BYTES if min_bytes is None else min_bytes):
+        return False
+    blob = gzip.compress(raw.encode("utf-8"), compresslevel=6)
+    item["doc_ref"] = store.put(document_key(item["pk"], item["sk"]), blob)
+    item["doc_bytes"] = len(blob)
+    for f in doc:
+        del item[f]
+    return True
+
+
+def hydrate(item, store):
+    """Merge the offloaded documents back into a visit item (in place); no-op for inline items."""
+    ref = item.get("doc_ref")
+    if not ref or store is None:
+        return item
+    item.update(decode(store.get(ref)))
+    return item
@@ -1,81 +1,318 @@
 """
 Local development server for ClinicalSetu.
-Runs the Lambda handler locally with a simple HTTP server.
+Runs every Lambda handler behind one concurrent HTTP server (one process, e.g. an
+on-prem clinic box or local dev):
+
+  POST /api/process, /api/translate         -> process_consultation
+  POST /api/process-agent                   -> invoke_agent
+  POST /api/save-visit, /api/save-visits,
+       /api/patient-visits, /api/doctor-visits,
+       /api/hospital-visits, /api/doctor-day-visits,
+       /api/visit-detail                    -> visit_api
+  POST /api/fetch-trials                    -> fetch_trials (TRIALS_BUCKET etc. as in Lambda)
+  GET  /health                              -> status, admission queue depths per lane, circuit breaker states,
+                                               container lifecycle (init, first-request and steady-state latency),
+                                               visit list cache hits / misses (once visit_api is loaded)
+  GET  /warmup                              -> import every handler and run the warm-up (lifecycle.warmup)
+
+Concurrency: connections are served on their own threads (ThreadingHTTPServer,
+HTTP/1.1 keep-alive, idle connections closed after LOCAL_SERVER_KEEPALIVE_S),
+capped at LOCAL_SERVER_MAX_CONNECTIONS (503 beyond). Handler invocations go
+through the admission controller (backend/lambda/admission.py). It provides
+ADMISSION_CONCURRENCY slots and priority lanes (interactive / translation /
+batch via X-Priority) with bounded queues. A request whose queue wait would
+exceed its lane deadline gets 429 with Retry-After instead of piling up work.
+/health and CORS preflights bypass admission, so a long consultation never
+blocks them. Bodies above LOCAL_SERVER_MAX_BODY_BYTES are rejected with 413
+before they are read.
+
+Deadlines: each handler gets a stand-in Lambda context whose
+get_remaining_time_in_millis() counts down from the function's CloudFormation
+timeout (FUNCTION_TIMEOUT_S, or LOCAL_SERVER_TIMEOUT_S for all), starting when
+the request arrives, so queueing eats into the budget as it would in Lambda.
+
+Warm-up: handler modules are imported on first use, so the first request pays
+for the imports, template reads, table resolution and the first TLS
+connections. GET /warmup (or LOCAL_SERVER_WARMUP=true at start-up) does all of
+that up front, as provisioned concurrency or a scheduled ping does in Lambda.
+
+Streaming: large responses are sent with chunked transfer encoding. A client
+sending "Accept: text/event-stream" gets the headers immediately, a heartbeat
+event every LOCAL_SERVER_HEARTBEAT_S while the handler runs (keeps proxies
+from timing out a 60-second consultation), then one "result" event carrying
+{"statusCode", "headers", "body"}.
+
 Requires: pip install boto3
 AWS credentials must be configured (aws configure or env vars).
 """
 
+import base64
+import importlib
 import json
 import sys
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
 
 # Add lambda directory to path
 sys.path.insert(0, str(Path(__file__).parent / "lambda"))
-from process_consultation import lambda_handler
+import admission  # noqa: E402
+import circuit_breaker  # noqa: E402
+import lifecycle  # noqa: E402
+
+ROUTES = {
+    "/api/process": "process_consultation",
+    "/api/translate": "process_consultation",
+    "/api/process-agent": "invoke_agent",
+    "/api/save-visit": "visit_api",
+    "/api/save-visits": "visit_api",
+    "/api/patient-visits": "visit_api",
+    "/api/doctor-visits": "visit_api",
+    "/api/hospital-visits": "visit_api",
+    "/api/doctor-day-visits": "visit_api",
+    "/api/visit-detail": "visit_api",
+    "/api/fetch-trials": "fetch_trials",
+}
+
+MAX_CONNECTIONS = int(os.environ.get("LOCAL_SERVER_MAX_CONNECTIONS", "256"))
+MAX_BODY_BYTES = int(os.environ.get("LOCAL_SERVER_MAX_BODY_BYTES", str(10 * 1024 * 1024)))
+KEEPALIVE_S = float(os.environ.get("LOCAL_SERVER_KEEPALIVE_S", "15"))
+HEARTBEAT_S = float(os.environ.get("LOCAL_SERVER_HEARTBEAT_S", "10"))
+CHUNK_BYTES = 64 * 1024
+
+# Lambda timeouts from infrastructure/cloudformation.yaml
+FUNCTION_TIMEOUT_S = {"process_consultation": 120, "invoke_agent": 300, "visit_api": 30, "fetch_trials": 300}
+TIMEOUT_OVERRIDE_S = os.environ.get("LOCAL_SERVER_TIMEOUT_S")
+
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+
+def get_handler(module_name):
+    """Import a Lambda module on first use (each creates its AWS clients at import)."""
+    with _handlers_lock:
+        if module_name not in _handlers:
+            _handlers[module_name] = importlib.import_module(module_name).lambda_handler
+        return _handlers[module_name]
+
+
+def warmup():
+    """Import every handler module, then run the registered warm-up tasks."""
+    imports = {}
+    for module_name in sorted(set(ROUTES.values())):
+        start = time.perf_counter()
+        try:
+            get_handler(module_name)
+            imports[module_name] = {"ms": round((time.perf_counter() - start) * 1000, 1), "ok": True}
+        except Exception as e:
+            imports[module_name] = {"ms": round((time.perf_counter() - start) * 1000, 1), "ok": False, "error": str(e)}
+    return {"imports": imports, **lifecycle.warmup()}
+
+
+def visit_cache_stats():
+    """visit_api's list-query cache counters, or None before the module is first used (not imported here)."""
+    visit_api = sys.modules.get("visit_api")
+    return visit_api.cache_stats() if visit_api is not None else None
+
+
+class LocalContext:
+    """The parts of the Lambda context object the handlers use."""
+
+    def __init__(self, function_name, timeout_s):
+        self.function_name = function_name
+        self._deadline = time.monotonic() + timeout_s
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+class LocalServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog
+
+    def __init__(self, address, handler_class, controller, max_connections=MAX_CONNECTIONS):
+        super().__init__(address, handler_class)
+        self.admission = controller
+        self.connections = threading.BoundedSemaphore(max_connections)
+
+    def process_request(self, request, client_address):
+        if not self.connections.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\n"
+                                b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+            finally:
+                self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.connections.release()
 
 
 class CORSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    timeout = KEEPALIVE_S  # idle keep-alive connections are closed after this
+
+    CORS_HEADERS = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "POST, GET, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type",
+    }
+
     def _send_cors_headers(self):
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "POST, GET, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        for name, value in self.CORS_HEADERS.items():
+            self.send_header(name, value)
 
     def do_OPTIONS(self):
         self.send_response(200)
         self._send_cors_headers()
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
     def do_POST(self):
-        if self.path in ("/api/process", "/api/translate"):
-            content_length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(content_length).decode("utf-8")
+        module_name = ROUTES.get(self.path.split("?", 1)[0])
+        length = int(self.headers.get("Content-Length") or 0)
+        if module_name is None:
+            self._discard_body(length)
+            return self._send_json(404, {"error": "Not found"})
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True  # the unread body makes the connection unusable
+            return self._send_json(413, {"error": f"Body exceeds {MAX_BODY_BYTES} bytes"})
+        body = self.rfile.read(length).decode("utf-8")
 
-            print(f"\n{'='*60}")
-            print(f"Handling {self.path}...")
-
-            event = {"body": body, "path": self.path}
-            result = lambda_handler(event, None)
-
-            self.send_response(result["statusCode"])
-            self._send_cors_headers()
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(result["body"].encode("utf-8"))
+        event = {"body": body, "path": self.path.split("?", 1)[0], "httpMethod": "POST",
+                 "headers": dict(self.headers)}
+        start = time.perf_counter()
+        if "text/event-stream" in self.headers.get("Accept", ""):
+            return self._stream_events(lambda: self._invoke(module_name, event))
+        try:
+            result = self._invoke(module_name, event)
+        except Exception as e:
+            return self._send_json(500, {"error": f"Handler error: {e}"})
+        self._send_result(result)
+        print(f"[API] {self.path} -> {result.get('statusCode')} in {(time.perf_counter() - start) * 1000:.0f}ms")
 
-            parsed = json.loads(result["body"])
-            if "metadata" in parsed:
-                print(f"Done in {parsed['metadata']['total_processing_time_ms']}ms")
-            print(f"{'='*60}\n")
-        else:
-            self.send_response(404)
-            self.end_headers()
-            self.wfile.write(b'{"error": "Not found"}')
+    def _invoke(self, module_name, event):
+        """Run the handler in its admission lane; a shed request becomes a 429 response."""
+        timeout_s = float(TIMEOUT_OVERRIDE_S or FUNCTION_TIMEOUT_S[module_name])
+        context = LocalContext(module_name, timeout_s)
+        try:
+            with self.server.admission.admit(admission.lane_for(event), admission.deadline_for(event)):
+                return get_handler(module_name)(event, context)
+        except admission.Shed as e:
+            return e.response()
 
     def do_GET(self):
         if self.path == "/health":
-            self.send_response(200)
-            self._send_cors_headers()
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "ok", "service": "ClinicalSetu API"}).encode())
+            self._send_json(200, {"status": "ok", "service": "ClinicalSetu API",
+                                  "admission": self.server.admission.stats(),
+                                  "circuits": circuit_breaker.stats(),
+                                  "lifecycle": lifecycle.stats(),
+                                  "visit_cache": visit_cache_stats()})
+        elif self.path == "/warmup":
+            self._send_json(200, warmup())
         else:
-            self.send_response(404)
+            self._send_json(404, {"error": "Not found"})
+
+    # ----- responses -----
+
+    def _send_json(self, status, payload, headers=None):
+        self._send_result({"statusCode": status, "headers": headers or {}, "body": json.dumps(payload)})
+
+    def _send_result(self, result):
+        body = result.get("body") or ""
+        data = base64.b64decode(body) if result.get("isBase64Encoded") else str(body).encode("utf-8")
+        self.send_response(result.get("statusCode", 200))
+        headers = {**self.CORS_HEADERS, "Content-Type": "application/json", **(result.get("headers") or {})}
+        for name, value in headers.items():
+            self.send_header(name, str(value))
+        if len(data) <= CHUNK_BYTES:
+            self.send_header("Content-Length", str(len(data)))
             self.end_headers()
+            self.wfile.write(data)
+            return
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(0, len(data), CHUNK_BYTES):
+            self._write_chunk(data[i:i + CHUNK_BYTES])
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_events(self, invoke):
+        """Server-sent events: heartbeats while the handler runs, then the result."""
+        self.send_response(200)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        outcome = {}
+        done = threading.Event()
+
+        def work():
+            try:
+                outcome["result"] = invoke()
+            except Exception as e:
+                outcome["result"] = {"statusCode": 500, "body": json.dumps({"error": f"Handler error: {e}"})}
+            finally:
+                done.set()
+
+        threading.Thread(target=work, daemon=True).start()
+        start = time.perf_counter()
+        try:
+            while not done.wait(HEARTBEAT_S):
+                elapsed = int((time.perf_counter() - start) * 1000)
+                self._write_chunk(f"event: heartbeat\ndata: {json.dumps({'elapsed_ms': elapsed})}\n\n".encode())
+            result = outcome["result"]
+            payload = {"statusCode": result.get("statusCode", 200), "headers": result.get("headers") or {},
+                       "body": result.get("body") or ""}
+            self._write_chunk(f"event: result\ndata: {json.dumps(payload)}\n\n".encode())
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client went away; the handler still finishes in its slot
+
+    def _discard_body(self, length):
+        if 0 < length <= MAX_BODY_BYTES:
+            self.rfile.read(length)
+        elif length:
+            self.close_connection = True
 
     def log_message(self, format, *args):
-        print(f"[API] {args[0]}")
+        pass  # completed API calls are logged in do_POST
+
+
+def make_server(host="0.0.0.0", port=3001, controller=None, max_connections=MAX_CONNECTIONS):
+    """
+    Build the server (port 0 picks a free port); call serve_forever() to run it.
+    A given admission controller becomes the process-wide one, so handlers see the request as admitted.
+    """
+    if controller is not None:
+        admission.set_controller(controller)
+    return LocalServer((host, port), CORSHandler, admission.controller(), max_connections)
 
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 3001))
-    server = HTTPServer(("0.0.0.0", port), CORSHandler)
+    server = make_server(port=port)
+    if os.environ.get("LOCAL_SERVER_WARMUP", "false").lower() == "true":
+        print(f"Warm-up: {json.dumps(warmup())}")
     print(f"\nClinicalSetu Local API Server")
     print(f"{'='*40}")
     print(f"Running on http://localhost:{port}")
     print(f"Health: http://localhost:{port}/health")
-    print(f"API:    POST http://localhost:{port}/api/process")
+    print(f"API:    POST http://localhost:{port}/api/process (+ /api/process-agent, visit routes, /api/fetch-trials)")
+    lanes = server.admission.lanes.values()
+    print(f"Slots:  {server.admission.concurrency} ({', '.join(f'{l.name} queue {l.max_queue}' for l in lanes)}), "
+          f"{MAX_CONNECTIONS} connections")
     print(f"Region: {os.environ.get('AWS_REGION', 'us-east-1')}")
     print(f"{'='*40}\n")
     print("Ensure AWS credentials are configured (aws configure)")
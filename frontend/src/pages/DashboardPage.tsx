@@ -1,8 +1,8 @@
 import { useNavigate } from 'react-router-dom';
 import { useState, useEffect } from 'react';
 import { Plus, FileText, LogOut, Activity, Clock, Stethoscope, ChevronRight, Search, Sparkles, Loader2, AlertCircle, Calendar } from 'lucide-react';
-import { fetchDoctorVisits } from '../services/api';
-import type { Visit } from '../types';
+import { fetchDoctorVisits, fetchVisitDetail } from '../services/api';
+import type { Visit, VisitSummary } from '../types';
 
 interface Props {
   doctor: { id: string; name: string; speciality: string; hospital: string };
@@ -12,8 +12,11 @@ interface Props {
 
 export default function DashboardPage({ doctor, onLogout, onSelectVisit }: Props) {
   const navigate = useNavigate();
-  const [visits, setVisits] = useState<Visit[]>([]);
+  const [visits, setVisits] = useState<VisitSummary[]>([]);
+  const [nextToken, setNextToken] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [openingVisit, setOpeningVisit] = useState<string | null>(null);
   const [error, setError] = useState('');
   const [searchQuery, setSearchQuery] = useState('');
 
@@ -21,11 +24,39 @@ export default function DashboardPage({ doctor, onLogout, onSelectVisit }: Props
     setLoading(true);
     setError('');
     fetchDoctorVisits(doctor.name)
-      .then((data) => setVisits(data))
+      .then((page) => {
+        setVisits(page.items);
+        setNextToken(page.next_token);
+      })
       .catch((err) => setError(err.message || 'Failed to load consultations'))
       .finally(() => setLoading(false));
   }, [doctor.name]);
 
+  const loadMore = () => {
+    if (!nextToken) return;
+    setLoadingMore(true);
+    fetchDoctorVisits(doctor.name, nextToken)
+      .then((page) => {
+        setVisits((prev) => [...prev, ...page.items]);
+        setNextToken(page.next_token);
+      })
+      .catch((err) => setError(err.message || 'Failed to load consultations'))
+      .finally(() => setLoadingMore(false));
+  };
+
+  const openVisit = (visit: VisitSummary) => {
+    // List rows carry summary columns only; fetch the full record for the detail view
+    if (!visit.pk || !visit.sk) return;
+    setOpeningVisit(visit.consultation_id + visit.visit_date);
+    fetchVisitDetail(visit.pk, visit.sk)
+      .then((full: Visit) => {
+        onSelectVisit(full);
+        navigate('/visit-detail');
+      })
+      .catch((err) => setError(err.message || 'Failed to load consultation'))
+      .finally(() => setOpeningVisit(null));
+  };
+
   const filteredVisits = visits.filter((v) => {
     if (!searchQuery.trim()) return true;
     const q = searchQuery.toLowerCase();
@@ -213,10 +244,8 @@ export default function DashboardPage({ doctor, onLogout, onSelectVisit }: Props
           {filteredVisits.map((visit) => (
             <button
               key={visit.consultation_id + visit.visit_date}
-              onClick={() => {
-                onSelectVisit(visit);
-                navigate('/visit-detail');
-              }}
+              onClick={() => openVisit(visit)}
+              disabled={openingVisit !== null}
               className="w-full group bg-white rounded-2xl p-5 border border-slate-200/60 shadow-sm hover:border-medical-300 hover:shadow-md hover:shadow-medical-500/5 transition-all duration-300 text-left cursor-pointer"
             >
               <div className="flex items-start gap-4">
@@ -252,11 +281,29 @@ export default function DashboardPage({ doctor, onLogout, onSelectVisit }: Props
                   </div>
                 </div>
 
-                <ChevronRight className="w-5 h-5 text-slate-300 group-hover:text-medical-500 group-hover:translate-x-1 transition-all duration-300 shrink-0 mt-2" />
+                {openingVisit === visit.consultation_id + visit.visit_date ? (
+                  <Loader2 className="w-5 h-5 text-medical-500 animate-spin shrink-0 mt-2" />
+                ) : (
+                  <ChevronRight className="w-5 h-5 text-slate-300 group-hover:text-medical-500 group-hover:translate-x-1 transition-all duration-300 shrink-0 mt-2" />
+                )}
               </div>
             </button>
           ))}
         </div>
+
+        {/* Pagination */}
+        {!loading && nextToken && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="inline-flex items-center gap-2 bg-white border border-slate-200/60 text-slate-700 px-4 py-2 rounded-xl text-sm font-medium hover:border-medical-300 transition-all cursor-pointer disabled:opacity-60"
+            >
+              {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+              Load more consultations
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );
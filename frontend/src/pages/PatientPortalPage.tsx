@@ -3,7 +3,7 @@ import {
   LogOut, User, FileText, Calendar, Clock, Shield, Stethoscope,
   Heart, ChevronRight, CheckCircle2, Sparkles, Activity, Loader2, RefreshCw
 } from 'lucide-react';
-import { fetchPatientVisits } from '../services/api';
+import { fetchPatientVisits, fetchVisitDetail } from '../services/api';
 import type { Visit } from '../types';
 
 interface Props {
@@ -13,17 +13,22 @@ interface Props {
 
 export default function PatientPortalPage({ onLogout, phone }: Props) {
   const [visits, setVisits] = useState<Visit[]>([]);
+  const [nextToken, setNextToken] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [selectedVisit, setSelectedVisit] = useState<string | null>(null);
+  // Full records for visits whose documents were offloaded, keyed by consultation_id
+  const [details, setDetails] = useState<Record<string, Visit>>({});
+  const [loadingDetail, setLoadingDetail] = useState(false);
 
   const loadVisits = () => {
     setLoading(true);
     setError('');
     fetchPatientVisits(phone)
-      .then((data) => {
-        setVisits(data);
-        if (data.length > 0) setSelectedVisit(data[0].consultation_id);
+      .then((page) => {
+        setVisits(page.items);
+        setNextToken(page.next_token);
+        if (page.items.length > 0) setSelectedVisit(page.items[0].consultation_id);
       })
       .catch((err) => {
         console.error('Failed to fetch visits:', err);
@@ -32,11 +37,34 @@ export default function PatientPortalPage({ onLogout, phone }: Props) {
       .finally(() => setLoading(false));
   };
 
+  const loadOlderVisits = () => {
+    if (!nextToken) return;
+    fetchPatientVisits(phone, nextToken)
+      .then((page) => {
+        setVisits((prev) => [...prev, ...page.items]);
+        setNextToken(page.next_token);
+      })
+      .catch((err) => console.error('Failed to fetch older visits:', err));
+  };
+
   useEffect(() => {
     if (phone) loadVisits();
   }, [phone]);
 
-  const activeVisit = visits.find(v => v.consultation_id === selectedVisit);
+  // List items may omit the documents (doc_ref); load the selected visit's on demand
+  useEffect(() => {
+    const visit = visits.find(v => v.consultation_id === selectedVisit);
+    if (!visit || !visit.doc_ref || visit.patient_summary || details[visit.consultation_id]) return;
+    if (!visit.pk || !visit.sk) return;
+    setLoadingDetail(true);
+    fetchVisitDetail(visit.pk, visit.sk)
+      .then((full) => setDetails((prev) => ({ ...prev, [visit.consultation_id]: full })))
+      .catch((err) => console.error('Failed to fetch visit detail:', err))
+      .finally(() => setLoadingDetail(false));
+  }, [selectedVisit, visits]);
+
+  const listedVisit = visits.find(v => v.consultation_id === selectedVisit);
+  const activeVisit = (listedVisit && details[listedVisit.consultation_id]) || listedVisit;
   const patientName = visits.length > 0 ? visits[0].patient_name : 'Patient';
   const patientAge = visits.length > 0 ? visits[0].patient_age : 0;
   const patientGender = visits.length > 0 ? visits[0].patient_gender : '';
@@ -199,6 +227,14 @@ export default function PatientPortalPage({ onLogout, phone }: Props) {
                       <ChevronRight className="w-4 h-4 text-slate-300 shrink-0" />
                     </button>
                   ))}
+                  {nextToken && (
+                    <button
+                      onClick={loadOlderVisits}
+                      className="w-full p-2 text-xs font-medium text-medical-600 hover:bg-medical-50 rounded-lg transition-all cursor-pointer"
+                    >
+                      Load older visits
+                    </button>
+                  )}
                 </div>
               </div>
             </div>
@@ -223,6 +259,13 @@ export default function PatientPortalPage({ onLogout, phone }: Props) {
                     </div>
                   </div>
 
+                  {loadingDetail && !summary && (
+                    <div className="flex items-center gap-2 text-sm text-slate-500">
+                      <Loader2 className="w-4 h-4 animate-spin" />
+                      Loading visit details...
+                    </div>
+                  )}
+
                   {/* Summary */}
                   {summaryText && (
                     <div className="bg-medical-50/50 border border-medical-200/30 rounded-xl p-5">
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { Consultation, ProcessingResult, Visit } from '../types';
+import type { Consultation, ProcessingResult, Visit, VisitPage, VisitSummary } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:3001';
 // Lambda Function URL bypasses API Gateway 29s timeout limit
@@ -40,6 +40,18 @@ export async function translateSummary(summary: Record<string, unknown>, targetL
   return data.translated_summary || data;
 }
 
+// Several languages in one call (translated concurrently server-side); failed languages are in `errors`
+export async function translateSummaryBatch(
+  summary: Record<string, unknown>,
+  targetLanguages: string[],
+): Promise<{ translations: Record<string, Record<string, unknown>>; errors: Record<string, string> }> {
+  const response = await api.post('/api/translate', { summary, target_languages: targetLanguages });
+  const data = typeof response.data.body === 'string'
+    ? JSON.parse(response.data.body)
+    : response.data;
+  return { translations: data.translations || {}, errors: data.errors || {} };
+}
+
 export async function saveVisit(data: {
   phone_number: string;
   hospital: string;
@@ -63,16 +75,71 @@ export async function saveVisit(data: {
   return result;
 }
 
-export async function fetchDoctorVisits(doctorName: string): Promise<Visit[]> {
-  const response = await api.post('/api/doctor-visits', { doctor_name: doctorName });
+// Dashboard list: summary columns only, paginated; open a visit with fetchVisitDetail
+export async function fetchDoctorVisits(doctorName: string, nextToken?: string | null): Promise<VisitPage<VisitSummary>> {
+  const response = await api.post('/api/doctor-visits', {
+    doctor_name: doctorName,
+    fields: 'summary',
+    next_token: nextToken || undefined,
+  });
+  const result = typeof response.data.body === 'string'
+    ? JSON.parse(response.data.body)
+    : response.data;
+  return result;
+}
+
+export async function fetchPatientVisits(phoneNumber: string, nextToken?: string | null): Promise<VisitPage<Visit>> {
+  const response = await api.post('/api/patient-visits', {
+    phone_number: phoneNumber,
+    next_token: nextToken || undefined,
+  });
+  const result = typeof response.data.body === 'string'
+    ? JSON.parse(response.data.body)
+    : response.data;
+  return result;
+}
+
+// One patient's visits at one hospital; date is an ISO prefix ('2025', '2025-03', '2025-03-14')
+export async function fetchHospitalVisits(
+  hospital: string,
+  phoneNumber: string,
+  range: { date?: string; from_date?: string; to_date?: string } = {},
+  nextToken?: string | null,
+): Promise<VisitPage<Visit>> {
+  const response = await api.post('/api/hospital-visits', {
+    hospital,
+    phone_number: phoneNumber,
+    ...range,
+    next_token: nextToken || undefined,
+  });
+  const result = typeof response.data.body === 'string'
+    ? JSON.parse(response.data.body)
+    : response.data;
+  return result;
+}
+
+// A doctor's visits at one hospital on one day (defaults to today, UTC), in arrival order
+export async function fetchDoctorDayVisits(
+  hospital: string,
+  doctorName: string,
+  day?: string,
+  nextToken?: string | null,
+): Promise<VisitPage<VisitSummary>> {
+  const response = await api.post('/api/doctor-day-visits', {
+    hospital,
+    doctor_name: doctorName,
+    day,
+    fields: 'summary',
+    next_token: nextToken || undefined,
+  });
   const result = typeof response.data.body === 'string'
     ? JSON.parse(response.data.body)
     : response.data;
   return result;
 }
 
-export async function fetchPatientVisits(phoneNumber: string): Promise<Visit[]> {
-  const response = await api.post('/api/patient-visits', { phone_number: phoneNumber });
+export async function fetchVisitDetail(pk: string, sk: string): Promise<Visit> {
+  const response = await api.post('/api/visit-detail', { pk, sk });
   const result = typeof response.data.body === 'string'
     ? JSON.parse(response.data.body)
     : response.data;
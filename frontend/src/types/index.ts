@@ -209,6 +209,8 @@ export interface TrialMatches {
 }
 
 export interface Visit {
+  pk?: string;
+  sk?: string;
   consultation_id: string;
   visit_date: string;
   patient_name: string;
@@ -222,6 +224,19 @@ export interface Visit {
   medications: Array<{ name: string; how: string }>;
   follow_up: string;
   warning_signs: string[];
+  // Set when patient_summary / medications / warning_signs live in the document store;
+  // list queries then omit them and /api/visit-detail loads them
+  doc_ref?: string;
+}
+
+// List-view projection returned by /api/doctor-visits with fields: 'summary'
+export type VisitSummary = Pick<Visit,
+  'pk' | 'sk' | 'consultation_id' | 'visit_date' | 'patient_name' | 'patient_age' | 'patient_gender' |
+  'doctor_name' | 'doctor_speciality' | 'hospital' | 'diagnosis'>;
+
+export interface VisitPage<T> {
+  items: T[];
+  next_token: string | null;
 }
 
 export interface ProcessingStep {
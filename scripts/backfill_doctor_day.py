@@ -0,0 +1,59 @@
+"""
+ClinicalSetu - doctor_day Backfill
+Adds the doctor-day-index key (doctor_day) to visits saved before the index
+existed, so /api/doctor-day-visits also returns older visits. Safe to re-run:
+items that already carry doctor_day are skipped.
+
+Usage:
+  python scripts/backfill_doctor_day.py
+  python scripts/backfill_doctor_day.py --dry-run
+
+Environment variables:
+  VISITS_TABLE  - DynamoDB table name (default: clinicalsetu-visits-prod)
+  AWS_REGION    - AWS region (default: us-east-1)
+"""
+
+import os
+import sys
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "lambda"))
+from visit_api import doctor_day_key  # noqa: E402
+
+VISITS_TABLE = os.environ.get("VISITS_TABLE", "clinicalsetu-visits-prod")
+REGION = os.environ.get("AWS_REGION", "us-east-1")
+
+
+def backfill(dry_run=False):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    table = dynamodb.Table(VISITS_TABLE)
+
+    scan_kwargs = {
+        "ProjectionExpression": "pk, sk, hospital, doctor_name, visit_date",
+        "FilterExpression": "attribute_not_exists(doctor_day) AND attribute_exists(doctor_name)",
+    }
+    updated = skipped = 0
+    while True:
+        resp = table.scan(**scan_kwargs)
+        for item in resp.get("Items", []):
+            if not item.get("doctor_name") or not item.get("visit_date"):
+                skipped += 1
+                continue
+            key = doctor_day_key(item.get("hospital", "Unknown"), item["doctor_name"], item["visit_date"])
+            if not dry_run:
+                table.update_item(
+                    Key={"pk": item["pk"], "sk": item["sk"]},
+                    UpdateExpression="SET doctor_day = :dd",
+                    ExpressionAttributeValues={":dd": key},
+                )
+            updated += 1
+        if "LastEvaluatedKey" not in resp:
+            break
+        scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    verb = "Would update" if dry_run else "Updated"
+    print(f"[Backfill] {verb} {updated} visits ({skipped} skipped without doctor/date).")
+
+
+if __name__ == "__main__":
+    backfill(dry_run="--dry-run" in sys.argv)
@@ -0,0 +1,154 @@
+"""
+ClinicalSetu - Admission Control Load Test
+Drives backend/local_server.py over HTTP with Bedrock on the offline endpoint
+(scripts/fake_bedrock.py) and measures /api/process latency for the
+interactive lane, with and without batch pressure:
+
+  interactive only        - a few doctors (closed loop with think time)
+  + batch (lanes)         - the same doctors plus a flood of X-Priority: batch
+                            re-processing clients; batch may use half the slots
+  + batch (single FIFO)   - the same load through one FIFO lane, i.e. no priority
+
+Batch clients back off for Retry-After on 429. Reported per phase: interactive
+p50/p95/p99, batch throughput, 429s per lane, and the peak queue depth seen on
+/health.
+
+Usage:
+  python scripts/bench_admission.py
+  python scripts/bench_admission.py --seconds 30 --slots 8 --batch-clients 24 --output bench_results/admission.json
+"""
+
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import fake_bedrock  # noqa: E402
+from bench_pipeline import percentiles  # noqa: E402
+
+
+def arg(flag, default, cast=str):
+    return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+
+fake_server, fake_url = fake_bedrock.serve(arg("--profile", "nova-lite"), time_scale=arg("--time-scale", 0.05, float))
+os.environ.update(fake_bedrock.endpoint_env(fake_url))
+
+import admission  # noqa: E402
+import local_server  # noqa: E402
+import process_consultation as pc  # noqa: E402
+
+
+def post(port, body, priority):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    try:
+        start = time.perf_counter()
+        conn.request("POST", "/api/process", body=body,
+                     headers={"Content-Type": "application/json", "X-Priority": priority})
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status, resp.getheader("Retry-After"), (time.perf_counter() - start) * 1000
+    finally:
+        conn.close()
+
+
+def run_phase(label, controller, interactive_clients, batch_clients, seconds, consultations):
+    server = local_server.make_server("127.0.0.1", 0, controller=controller)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    stop = time.perf_counter() + seconds
+    lock = threading.Lock()
+    results = {"interactive": [], "batch": []}
+    shed = {"interactive": 0, "batch": 0}
+    peak_queue = [0]
+
+    def client(priority, think_s, i):
+        n = i
+        while time.perf_counter() < stop:
+            body = json.dumps(consultations[n % len(consultations)])
+            n += 1
+            status, retry_after, ms = post(port, body, priority)
+            with lock:
+                if status == 200:
+                    results[priority].append(ms)
+                elif status == 429:
+                    shed[priority] += 1
+            if status == 429:
+                time.sleep(float(retry_after or 1))
+            elif think_s:
+                time.sleep(think_s)
+
+    def monitor():
+        while time.perf_counter() < stop:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            conn.request("GET", "/health")
+            stats = json.loads(conn.getresponse().read())["admission"]
+            conn.close()
+            peak_queue[0] = max(peak_queue[0], stats["queued"])
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=client, args=("interactive", 0.5, i)) for i in range(interactive_clients)]
+    threads += [threading.Thread(target=client, args=("batch", 0, i)) for i in range(batch_clients)]
+    threads.append(threading.Thread(target=monitor))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    server.shutdown()
+    server.server_close()
+
+    inter = percentiles(results["interactive"])
+    row = {"phase": label, "interactive": inter, "batch_completed": len(results["batch"]),
+           "batch_per_min": round(len(results["batch"]) / seconds * 60, 1), "shed": shed,
+           "peak_queue_depth": peak_queue[0], "admission": controller.stats()}
+    print(f"  {label:<28} {inter.get('count', 0):>5} {inter.get('p50', 0):>9.0f} {inter.get('p95', 0):>9.0f} "
+          f"{inter.get('p99', 0):>9.0f} {row['batch_per_min']:>10.1f} {shed['interactive']:>7} {shed['batch']:>7} "
+          f"{peak_queue[0]:>7}")
+    return row
+
+
+def main():
+    seconds = arg("--seconds", 15, float)
+    slots = arg("--slots", 4, int)
+    interactive_clients = arg("--interactive-clients", 2, int)
+    batch_clients = arg("--batch-clients", 12, int)
+    output = arg("--output", None)
+
+    pc.CACHE_ENABLED = False  # every request runs the model
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        consultations = json.load(f)
+
+    def single_fifo_lane():
+        return {"interactive": admission.Lane("interactive", 0, max_queue=1024, max_wait_ms=600000)}
+
+    print(f"\nAdmission control load test ({slots} slots, {interactive_clients} interactive clients, "
+          f"{batch_clients} batch clients, {seconds:.0f} s per phase)")
+    print("=" * 100)
+    print(f"  {'phase':<28} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'batch/min':>10} "
+          f"{'429 int':>7} {'429 bat':>7} {'peak q':>7}")
+    rows = [
+        run_phase("interactive only", admission.Controller(slots), interactive_clients, 0, seconds, consultations),
+        run_phase("+ batch (lanes)", admission.Controller(slots), interactive_clients, batch_clients, seconds,
+                  consultations),
+        run_phase("+ batch (single FIFO)", admission.Controller(slots, single_fifo_lane()), interactive_clients,
+                  batch_clients, seconds, consultations),
+    ]
+    base, lanes, fifo = (r["interactive"].get("p99") or 0 for r in rows)
+    print(f"\n  interactive p99 under batch pressure: {lanes / base:.2f}x with lanes, {fifo / base:.2f}x without")
+
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump({"slots": slots, "seconds": seconds, "phases": rows}, f, indent=2)
+        print(f"  Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+ClinicalSetu - Cold Start Benchmark
+Measures first-request vs. steady-state latency of a fresh container, with and
+without the warm-up (backend/lambda/lifecycle.py). Every run is a new Python
+process standing in for a new Lambda container: it imports the handlers, then
+optionally sends {"warmup": true} (what provisioned-concurrency init or the
+WarmupSchedule ping does), then serves requests.
+
+Bedrock is scripts/fake_bedrock.py (profile "instant" by default, so the model
+time does not hide the container's own overhead), DynamoDB is
+scripts/local_dynamodb.py. Against real endpoints the first request also pays
+DNS and the TLS handshakes, which the warm-up moves out of the request too.
+
+Reported per mode (cold / warmed), median over the runs:
+  import_ms    handler module imports (clients, registries)
+  warmup_ms    the warm-up invocation (warmed mode)
+  first_ms     first /api/process request and first /api/patient-visits request
+  steady       p50 / p99 of the following requests
+
+Usage:
+  python scripts/bench_cold_start.py
+  python scripts/bench_cold_start.py --runs 5 --requests 20 --profile nova-lite --time-scale 0.05
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+
+def arg(flag, default, cast=str):
+    return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+def container(profile, time_scale, requests, warm):
+    """One fresh container: returns its measurements (runs in the child process)."""
+    import fake_bedrock
+
+    _, url = fake_bedrock.serve(profile, time_scale=time_scale)
+    os.environ.update(fake_bedrock.endpoint_env(url))
+    os.environ["KNOWLEDGE_BASE_ID"] = ""
+
+    start = time.perf_counter()
+    import process_consultation as pc
+    import visit_api
+    import_ms = (time.perf_counter() - start) * 1000
+
+    from local_dynamodb import CACHE_TABLE_SCHEMA, VISITS_TABLE_SCHEMA, LocalDynamoDB
+    from bench_visit_queries import load_seed_visits
+    ddb = LocalDynamoDB(latency_ms=2)
+    ddb.create_table(pc.CACHE_TABLE, **CACHE_TABLE_SCHEMA)
+    ddb.create_table(visit_api.VISITS_TABLE, **VISITS_TABLE_SCHEMA)
+    pc.dynamodb = visit_api.dynamodb = ddb
+    pc.CACHE_ENABLED = False  # every request runs the pipeline
+    visit_api._page_cache = visit_api._PageCache(0, 1)
+    seed = load_seed_visits()[:50]
+    visits_table = ddb.Table(visit_api.VISITS_TABLE)  # seeded directly: no handler call before the first request
+    for visit in seed:
+        visits_table.put_item(Item=visit_api._build_visit_item(visit))
+
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        consultations = json.load(f)
+
+    warmup_ms = None
+    if warm:
+        start = time.perf_counter()
+        report = json.loads(pc.lambda_handler({"warmup": True}, None)["body"])["warmup"]
+        warmup_ms = (time.perf_counter() - start) * 1000
+        failed = {k: v["error"] for k, v in report["tasks"].items() if not v["ok"]}
+        if failed:
+            print(f"warm-up task(s) failed: {failed}", file=sys.stderr)
+
+    def timed(handler, event):
+        start = time.perf_counter()
+        result = handler(event, None)
+        assert result["statusCode"] == 200, result["body"][:200]
+        return (time.perf_counter() - start) * 1000
+
+    process = [timed(pc.lambda_handler, consultations[i % len(consultations)]) for i in range(requests + 1)]
+    visits = [timed(visit_api.lambda_handler, {"path": "/api/patient-visits", "body": json.dumps(
+        {"phone_number": seed[i % len(seed)]["phone_number"], "limit": 20, "fields": "summary"})})
+        for i in range(requests + 1)]
+    return {"import_ms": import_ms, "warmup_ms": warmup_ms,
+            "process_first_ms": process[0], "process_p50": percentile(process[1:], 0.5),
+            "process_p99": percentile(process[1:], 0.99),
+            "visits_first_ms": visits[0], "visits_p50": percentile(visits[1:], 0.5),
+            "visits_p99": percentile(visits[1:], 0.99)}
+
+
+def main():
+    if "--child" in sys.argv:
+        result = container(arg("--profile", "instant"), arg("--time-scale", 1.0, float), arg("--requests", 10, int),
+                           "--warm" in sys.argv)
+        print("RESULT " + json.dumps(result))
+        return
+
+    runs = arg("--runs", 3, int)
+    passthrough = [a for flag in ("--profile", "--time-scale", "--requests") if flag in sys.argv
+                   for a in (flag, sys.argv[sys.argv.index(flag) + 1])]
+    print(f"\nCold start benchmark ({runs} fresh processes per mode, "
+          f"profile {arg('--profile', 'instant')} at {arg('--time-scale', 1.0, float)}x)")
+    print("=" * 100)
+    print(f"  {'mode':<8} {'import':>8} {'warm-up':>8} | {'process first':>13} {'p50':>7} {'p99':>7} | "
+          f"{'visits first':>12} {'p50':>7} {'p99':>7}")
+    print("-" * 100)
+    for mode in ("cold", "warmed"):
+        results = []
+        for _ in range(runs):
+            cmd = [sys.executable, os.path.abspath(__file__), "--child", *passthrough] + (["--warm"] if mode == "warmed" else [])
+            out = subprocess.run(cmd, capture_output=True, text=True, cwd=PROJECT_ROOT)
+            line = next((l for l in out.stdout.splitlines() if l.startswith("RESULT ")), None)
+            if line is None:
+                print(out.stdout[-2000:], out.stderr[-2000:])
+                sys.exit(1)
+            results.append(json.loads(line[len("RESULT "):]))
+
+        def med(key):
+            values = [r[key] for r in results if r[key] is not None]
+            return f"{statistics.median(values):.1f}" if values else "-"
+
+        print(f"  {mode:<8} {med('import_ms'):>8} {med('warmup_ms'):>8} | {med('process_first_ms'):>13} "
+              f"{med('process_p50'):>7} {med('process_p99'):>7} | {med('visits_first_ms'):>12} "
+              f"{med('visits_p50'):>7} {med('visits_p99'):>7}")
+    print("=" * 100)
+    print("  ms, median over runs; first = the container's first request, p50/p99 = the requests after it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+ClinicalSetu - Condition Normalization Benchmark
+Measures throughput of backend/lambda/conditions.py over every diagnosis in the
+synthetic data: seeded visit diagnoses (scripts/seed_visits.py) plus the
+consultation narratives and referral reasons in data/synthetic_consultations.json.
+Also times candidate lookup against a generated trial index, after asserting
+the mapping of wordings that are easy to get wrong (EXPECTED; exits non-zero
+on a mismatch).
+
+Usage:
+  python scripts/bench_conditions.py
+  python scripts/bench_conditions.py --rounds 5000 --trials 50000
+"""
+
+import ast
+import json
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+
+from conditions import CONCEPTS, TrialConditionIndex, concept_name, normalize  # noqa: E402
+
+
+# Wordings (ClinicalTrials.gov MeSH forms, colloquial phrasing) -> expected concept IDs
+EXPECTED = {
+    "Diabetes Mellitus, Type 1": {"E10"},
+    "Diabetes Mellitus, Type 2": {"E11"},
+    "Diabetes Mellitus Type 2": {"E11"},
+    "Diabetes Mellitus, Insulin-Dependent": {"E10"},
+    "Gestational Diabetes": {"O24"},
+    "Diabetes, Gestational": {"O24"},
+    "Hypoglycemia - low blood sugar": {"E16"},
+    "Diabetic Nephropathy": {"E11.2", "E11", "N18"},
+    "Fasting blood sugar 140 mg/dL": set(),
+    "Type 2 Diabetes Mellitus with Peripheral Neuropathy": {"E11.4", "E11"},
+}
+
+
+def load_seed_diagnoses():
+    """Read SEED_VISITS diagnoses without importing seed_visits (which connects to DynamoDB)."""
+    path = os.path.join(PROJECT_ROOT, "scripts", "seed_visits.py")
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", "") == "SEED_VISITS":
+            return [v["diagnosis"] for v in ast.literal_eval(node.value)]
+    return []
+
+
+def load_consultation_texts():
+    path = os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")
+    consultations = json.loads(open(path, encoding="utf-8").read())
+    texts = []
+    for c in consultations:
+        texts.append(c["consultation_text"])
+        if c.get("referral_reason"):
+            texts.append(c["referral_reason"])
+    return texts
+
+
+def make_trials(n, rng):
+    """Generate trial records whose conditions are drawn from the concept dictionary."""
+    names = [name for name, _parents, _syns in CONCEPTS.values()]
+    synonyms = [syn for _name, _parents, syns in CONCEPTS.values() for syn in syns]
+    return [
+        {"trial_id": f"NCT{i:08d}", "conditions": [rng.choice(names), rng.choice(synonyms).title()]}
+        for i in range(n)
+    ]
+
+
+def bench(label, fn, items, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            fn(item)
+    elapsed = time.perf_counter() - start
+    total = len(items) * rounds
+    print(f"  {label:<34} {total / elapsed:>12,.0f} /sec  ({elapsed / total * 1e6:.1f} µs each)")
+
+
+def main():
+    rounds = 2000
+    n_trials = 20000
+    if "--rounds" in sys.argv:
+        rounds = int(sys.argv[sys.argv.index("--rounds") + 1])
+    if "--trials" in sys.argv:
+        n_trials = int(sys.argv[sys.argv.index("--trials") + 1])
+
+    diagnoses = load_seed_diagnoses()
+    texts = load_consultation_texts()
+
+    print("\nExpected mappings")
+    print("=" * 70)
+    mismatches = 0
+    for text, expected in EXPECTED.items():
+        ids = normalize(text)
+        ok = set(ids) == expected
+        mismatches += not ok
+        print(f"  [{'PASS' if ok else 'FAIL'}] {text[:44]:<44} -> {', '.join(ids) or '-'}")
+    if mismatches:
+        print(f"  {mismatches} mapping(s) wrong")
+        sys.exit(1)
+
+    print("\nSeed visit diagnoses")
+    print("=" * 70)
+    for d in diagnoses:
+        ids = normalize(d)
+        print(f"  {d[:52]:<52} -> {', '.join(ids) or '-'}")
+
+    print("\nThroughput")
+    print("=" * 70)
+    bench("normalize(seed diagnosis)", normalize, diagnoses, rounds)
+    bench("normalize(consultation narrative)", normalize, texts, max(1, rounds // 10))
+
+    start = time.perf_counter()
+    index = TrialConditionIndex(make_trials(n_trials, random.Random(42)))
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"  {'index build':<34} {n_trials:>12,} trials in {build_ms:,.0f} ms")
+    bench("candidate_ids(seed diagnosis)", index.candidate_ids, diagnoses, max(1, rounds // 10))
+    bench("candidate_ids(..., limit=10)", lambda d: index.candidate_ids(d, limit=10), diagnoses, rounds)
+
+    print("\nCandidates per seed diagnosis")
+    print("=" * 70)
+    for d in diagnoses:
+        ids = normalize(d)
+        names = ", ".join(concept_name(c) for c in ids)
+        print(f"  {len(index.candidate_ids(d)):>6,} trials  {names}")
+
+
+if __name__ == "__main__":
+    main()
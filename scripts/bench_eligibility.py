@@ -0,0 +1,146 @@
+"""
+ClinicalSetu - Eligibility Parser Benchmark
+Measures parse throughput (studies/sec) of backend/lambda/eligibility.py over a
+large corpus of generated ClinicalTrials.gov fixture studies, alongside the
+legacy split/replace/lstrip parser it replaced. split_criteria alone is timed
+too: the difference to parse_eligibility is the numeric constraint extraction.
+
+Usage:
+  python scripts/bench_eligibility.py                 # 20,000 studies
+  python scripts/bench_eligibility.py --studies 100000
+"""
+
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+
+from eligibility import parse_eligibility, split_criteria  # noqa: E402
+from fetch_trials import parse_study  # noqa: E402
+
+INCLUSION_LINES = [
+    "Adults aged {lo}-{hi} years with confirmed diagnosis of {cond}",
+    "HbA1c between {a1c_lo}% and {a1c_hi}% at screening",
+    "eGFR ≥ {egfr} mL/min/1.73 m2",
+    "BMI of {bmi_lo} to {bmi_hi} kg/m2",
+    "Stable dose of metformin for at least 3 months prior to screening",
+    "Able to provide written informed consent",
+    "Fasting plasma glucose < {fpg} mg/dL",
+    "LVEF ≤ 40% documented within 12 months",
+]
+EXCLUSION_LINES = [
+    "Type 1 diabetes or secondary forms of diabetes",
+    "Systolic BP > {sbp} mmHg at screening",
+    "Serum creatinine above {creat} mg/dL",
+    "Pregnant or breastfeeding women",
+    "History of malignancy within the past 5 years",
+    "Participation in another interventional study within 30 days",
+    "Active tuberculosis or HIV infection",
+]
+BULLETS = ["* ", "- ", "{n}. ", "{n}) ", "    * "]
+AGE_UNITS = ["Years", "Years", "Years", "Months", "Weeks"]
+CONDITIONS = ["Type 2 Diabetes", "Hypertension", "COPD", "Heart Failure", "Chronic Kidney Disease"]
+
+
+def make_study(rng, i):
+    """Generate one fixture study shaped like the v2 API response."""
+    fields = {
+        "lo": rng.randint(18, 40), "hi": rng.randint(60, 85), "cond": rng.choice(CONDITIONS),
+        "a1c_lo": rng.choice([6.5, 7.0, 7.5]), "a1c_hi": rng.choice([9.5, 10.0, 10.5]),
+        "egfr": rng.choice([30, 45, 60]), "bmi_lo": rng.choice([18, 25]), "bmi_hi": rng.choice([35, 40, 45]),
+        "fpg": rng.choice([240, 270]), "sbp": rng.choice([160, 180]), "creat": rng.choice([1.5, 2.0]),
+    }
+    bullet = rng.choice(BULLETS)
+    inc = rng.sample(INCLUSION_LINES, rng.randint(3, len(INCLUSION_LINES)))
+    exc = rng.sample(EXCLUSION_LINES, rng.randint(3, len(EXCLUSION_LINES)))
+    lines = ["Inclusion Criteria:", ""]
+    lines += [bullet.format(n=n) + line.format(**fields) for n, line in enumerate(inc, 1)]
+    lines += ["", rng.choice(["Exclusion Criteria:", "Key Exclusion Criteria:"]), ""]
+    lines += [bullet.format(n=n) + line.format(**fields) for n, line in enumerate(exc, 1)]
+
+    return {
+        "protocolSection": {
+            "identificationModule": {"nctId": f"NCT{i:08d}", "briefTitle": f"Fixture study {i}"},
+            "statusModule": {"overallStatus": "RECRUITING", "lastUpdatePostDateStruct": {"date": "2025-06-01"}},
+            "conditionsModule": {"conditions": [fields["cond"]]},
+            "eligibilityModule": {
+                "eligibilityCriteria": "\n".join(lines),
+                "minimumAge": f"{rng.randint(1, 40)} {rng.choice(AGE_UNITS)}",
+                "maximumAge": rng.choice(["75 Years", "85 Years", ""]),
+                "sex": rng.choice(["ALL", "FEMALE", "MALE"]),
+            },
+        }
+    }
+
+
+def legacy_parse(eligibility):
+    """The pre-eligibility.py inline parser from fetch_trials.parse_study, kept for comparison."""
+    elig_text = eligibility.get("eligibilityCriteria", "")
+
+    def parse_age(age_str):
+        if not age_str:
+            return None
+        try:
+            return int(age_str.split()[0])
+        except (ValueError, IndexError):
+            return None
+
+    inclusion_text = ""
+    exclusion_list = []
+    if "Exclusion Criteria:" in elig_text:
+        parts = elig_text.split("Exclusion Criteria:")
+        inclusion_text = parts[0].replace("Inclusion Criteria:", "").strip()
+        exclusion_list = [
+            line.strip().lstrip("0123456789.-) ").strip()
+            for line in parts[1].strip().split("\n")
+            if line.strip() and not line.strip().startswith("Exclusion")
+        ]
+        exclusion_list = [e for e in exclusion_list if len(e) > 3]
+    elif "Inclusion Criteria:" in elig_text:
+        inclusion_text = elig_text.replace("Inclusion Criteria:", "").strip()
+    inclusion = [
+        line.strip().lstrip("0123456789.-) ").strip()
+        for line in inclusion_text.split("\n")
+        if line.strip() and len(line.strip()) > 3
+    ]
+    return parse_age(eligibility.get("minimumAge", "")), parse_age(eligibility.get("maximumAge", "")), inclusion[:6], exclusion_list[:8]
+
+
+def bench(label, fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {len(items) / elapsed:>12,.0f} studies/sec  ({elapsed * 1000:,.0f} ms)")
+    return elapsed
+
+
+def main():
+    n = 20000
+    if "--studies" in sys.argv:
+        n = int(sys.argv[sys.argv.index("--studies") + 1])
+
+    rng = random.Random(42)
+    studies = [make_study(rng, i) for i in range(n)]
+    modules = [s["protocolSection"]["eligibilityModule"] for s in studies]
+
+    print(f"\nEligibility parser benchmark ({n:,} fixture studies)")
+    print("=" * 70)
+    bench("legacy inline parser", legacy_parse, modules)
+    bench("split_criteria only", lambda m: split_criteria(m.get("eligibilityCriteria", "")), modules)
+    bench("parse_eligibility", parse_eligibility, modules)
+    bench("parse_study (full record)", parse_study, studies)
+
+    parsed = [parse_eligibility(m) for m in modules]
+    constraints = sum(len(p["constraints"]) for p in parsed)
+    sub_year = sum(1 for p in parsed if p["age_min"] is not None and p["age_min"] < 1)
+    print("-" * 70)
+    print(f"  Numeric constraints extracted: {constraints:,} ({constraints / n:.1f}/study)")
+    print(f"  Studies with sub-year minimum age: {sub_year:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+ClinicalSetu - JSON Recovery Benchmark
+Runs the llm_json recovery pipeline over a corpus of malformed model outputs
+and compares it with the old parser (strip ``` fences + json.loads).
+
+The corpus is built deterministically from the seed visit summaries
+(scripts/seed_visits.py) by applying the failure modes seen from Nova:
+fences, leading/trailing prose, trailing commas, single quotes / Python
+literals, missing commas, unquoted keys (left to the repair model call) and
+output truncated at MAX_TOKENS. The repair model tier is a stub that returns
+the original JSON; it is costed at --repair-ms in the estimate.
+
+Reported per failure mode: which tier recovered it, exact-match rate (the
+original value back; truncated outputs can only be recovered partially),
+share of top-level keys kept, and parse time. The summary line estimates
+seconds saved when every failed parse would otherwise cost a full step
+regeneration (--regen-s).
+
+Usage:
+  python scripts/bench_json_recovery.py
+  python scripts/bench_json_recovery.py --samples 500 --regen-s 8 --repair-ms 1500
+"""
+
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import llm_json  # noqa: E402
+from bench_visit_queries import load_seed_visits  # noqa: E402
+
+
+def old_parse(text):
+    return json.loads(llm_json.strip_fences(text))
+
+
+# ----- corruptions -----
+
+def fenced(rng, text):
+    return f"```json\n{text}\n```"
+
+
+def leading_prose(rng, text):
+    return "Here is the patient summary in the requested JSON format:\n\n" + text
+
+
+def trailing_prose(rng, text):
+    return text + "\n\nNote: medication names were kept in English as instructed."
+
+
+def trailing_commas(rng, text):
+    return re.sub(r"(\S)(\s*[}\]])", lambda m: m.group(1) + ("," if rng.random() < 0.5 else "") + m.group(2), text)
+
+
+def single_quotes(rng, text):
+    return repr(json.loads(text))
+
+
+def missing_comma(rng, text):
+    positions = [m.start() for m in re.finditer(r'",\s*"', text)]
+    i = rng.choice(positions)
+    return text[:i + 1] + text[i + 2:]
+
+
+def unquoted_keys(rng, text):
+    return re.sub(r'"(\w+)":', r"\1:", text)
+
+
+def truncated(rng, text):
+    return text[: int(len(text) * rng.uniform(0.6, 0.98))]
+
+
+def prose_and_truncated(rng, text):
+    return leading_prose(rng, truncated(rng, text))
+
+
+CORRUPTIONS = [fenced, leading_prose, trailing_prose, trailing_commas, single_quotes, missing_comma,
+               unquoted_keys, truncated, prose_and_truncated]
+
+
+def build_corpus(samples, seed=7):
+    rng = random.Random(seed)
+    originals = []
+    for visit in load_seed_visits():
+        originals.append(visit["patient_summary"])
+        originals.append({"medications": visit["medications"], "warning_signs": visit["warning_signs"]})
+    corpus = []
+    for i in range(samples):
+        original = originals[i % len(originals)]
+        corruption = CORRUPTIONS[i % len(CORRUPTIONS)]
+        text = json.dumps(original, indent=rng.choice([None, 2]), ensure_ascii=False)
+        corpus.append((corruption.__name__, corruption(rng, text), original))
+    return corpus
+
+
+def main():
+    samples = 400
+    regen_s = 6.0
+    repair_ms = 1500.0
+    if "--samples" in sys.argv:
+        samples = int(sys.argv[sys.argv.index("--samples") + 1])
+    if "--regen-s" in sys.argv:
+        regen_s = float(sys.argv[sys.argv.index("--regen-s") + 1])
+    if "--repair-ms" in sys.argv:
+        repair_ms = float(sys.argv[sys.argv.index("--repair-ms") + 1])
+
+    corpus = build_corpus(samples)
+    by_mode = defaultdict(lambda: {"old_ok": 0, "tiers": Counter(), "exact": 0, "keys": 0.0, "n": 0, "us": []})
+    model_calls = 0
+
+    for mode, text, original in corpus:
+        row = by_mode[mode]
+        row["n"] += 1
+        try:
+            row["old_ok"] += old_parse(text) == original
+        except json.JSONDecodeError:
+            pass
+
+        def repair_call(prompt, original=original):
+            nonlocal model_calls
+            model_calls += 1
+            return json.dumps(original)
+
+        start = time.perf_counter()
+        try:
+            value, tier = llm_json.parse_llm_json(text, repair_call=repair_call)
+        except json.JSONDecodeError:
+            value, tier = None, "failed"
+        row["us"].append((time.perf_counter() - start) * 1e6)
+        row["tiers"][tier] += 1
+        row["exact"] += value == original
+        if isinstance(value, dict):
+            row["keys"] += len(value.keys() & original.keys()) / len(original)
+
+    print(f"\nJSON recovery benchmark ({samples} malformed outputs from {len(load_seed_visits())} seed visits)")
+    print("=" * 100)
+    print(f"  {'failure mode':<22} {'old parser':>10}  {'strict':>6} {'extract':>7} {'repair':>6} {'model':>5} "
+          f"{'failed':>6}  {'exact':>6} {'keys':>5}  {'p50 µs':>7}")
+    totals = Counter()
+    old_ok = 0
+    for mode, row in by_mode.items():
+        n = row["n"]
+        old_ok += row["old_ok"]
+        totals.update(row["tiers"])
+        print(f"  {mode:<22} {row['old_ok'] / n:>10.0%}  "
+              + " ".join(f"{row['tiers'][t]:>{w}}" for t, w in
+                         (("strict", 6), ("extract", 7), ("repair", 6), ("model", 5), ("failed", 6)))
+              + f"  {row['exact'] / n:>6.0%} {row['keys'] / n:>5.0%}  {statistics.median(row['us']):>7.0f}")
+
+    local = totals["strict"] + totals["extract"] + totals["repair"]
+    old_failures = samples - old_ok
+    new_failures = totals["failed"]
+    saved = (old_failures - new_failures) * regen_s - model_calls * repair_ms / 1000
+    print(f"\n  old parser:  {old_ok}/{samples} parsed, {old_failures} failed steps")
+    print(f"  recovery:    {local}/{samples} parsed locally, {totals['model']} via repair call, "
+          f"{new_failures} failed")
+    print(f"  estimated time saved vs. regenerating failed steps ({regen_s:.0f} s each, "
+          f"repair call {repair_ms / 1000:.1f} s): {saved:,.0f} s over {samples} outputs "
+          f"({saved / samples:.2f} s per output)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+ClinicalSetu - Partial Regeneration Benchmark
+Compares recovering an invalid output by regenerating the whole document with
+regenerating only the sections that fail schema validation
+(backend/lambda/output_schemas.py), for all five outputs.
+
+Valid outputs are the OUTPUT FORMAT examples from backend/prompts/*.txt plus the
+seed visit summaries (scripts/seed_visits.py). Each is broken in one of three
+ways: truncated at MAX_TOKENS and recovered by llm_json's repair tier
+(trailing sections lost), one section replaced by a string, or one section
+dropped. A stub model answers from the original output, so the merged result
+can be compared with it; its latency is modelled as a fixed time to first
+token plus a per-output-token cost (tokens ~ chars / 4). No AWS calls.
+"exact" is below 100% for truncated outputs: a value cut mid-string still
+validates, so it is kept rather than regenerated.
+
+Usage:
+  python scripts/bench_partial_regeneration.py
+  python scripts/bench_partial_regeneration.py --samples 300 --ttft-ms 500 --ms-per-token 10
+"""
+
+import json
+import os
+import random
+import sys
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import llm_json  # noqa: E402
+import output_schemas  # noqa: E402
+from bench_visit_queries import load_seed_visits  # noqa: E402
+
+OUTPUTS = ["soap_note", "patient_summary", "referral_letter", "discharge_summary", "trial_matching"]
+
+
+def tokens(text):
+    return len(text) / 4
+
+
+def prompt_example(name):
+    with open(os.path.join(PROJECT_ROOT, "backend", "prompts", f"{name}.txt"), encoding="utf-8") as f:
+        template = f.read()
+    example = template[template.index("{{", template.index("OUTPUT FORMAT")):]
+    return template, json.loads(example.replace("{{", "{").replace("}}", "}"))
+
+
+def sections_of(value, schema):
+    root = tuple(schema.get("x-section-root", ()))
+    paths = [(key,) for key in value if (key,) != root]
+    node = value
+    for part in root:
+        node = node[part]
+    return paths + [root + (key,) for key in node] if root else paths
+
+
+# ----- corruptions (return the broken, parsed output) -----
+
+def truncated(rng, original, schema):
+    text = json.dumps(original, indent=2)
+    broken, _ = llm_json.parse_llm_json(text[: int(len(text) * rng.uniform(0.5, 0.95))])
+    return broken
+
+
+def wrong_type(rng, original, schema):
+    broken = json.loads(json.dumps(original))
+    path = rng.choice(sections_of(original, schema))
+    node = broken
+    for part in path[:-1]:
+        node = node[part]
+    node[path[-1]] = "See above" if not isinstance(node[path[-1]], str) else 0
+    return broken
+
+
+def missing_section(rng, original, schema):
+    broken = json.loads(json.dumps(original))
+    required = [p for p in sections_of(original, schema) if _required(schema, p)]
+    path = rng.choice(required)
+    node = broken
+    for part in path[:-1]:
+        node = node[part]
+    del node[path[-1]]
+    return broken
+
+
+def _nest(path, value):
+    for part in reversed(path):
+        value = {part: value}
+    return value
+
+
+def _required(schema, path):
+    node = schema
+    for part in path[:-1]:
+        node = node["properties"][part]
+    return path[-1] in node.get("required", [])
+
+
+CORRUPTIONS = [truncated, wrong_type, missing_section]
+
+
+class StubModel:
+    """Answers full prompts with the original output and partial prompts with just the requested fields."""
+
+    def __init__(self, ttft_ms, ms_per_token):
+        self.ttft_ms = ttft_ms
+        self.ms_per_token = ms_per_token
+        self.original = None
+        self.usage = {"calls": 0, "in": 0.0, "out": 0.0, "ms": 0.0}
+
+    def __call__(self, prompt):
+        if "PARTIAL REGENERATION" in prompt:
+            fields = prompt.rsplit("just these fields: ", 1)[1].split(". Do not", 1)[0]
+            patch = {}
+            for field in fields.split(", "):
+                path = tuple(field.split("."))
+                value, found = output_schemas._get(self.original, path)
+                if found:
+                    output_schemas.merge_sections(patch, _nest(path, value), [path])
+            response = json.dumps(patch, indent=2)
+        else:
+            response = json.dumps(self.original, indent=2)
+        self.usage["calls"] += 1
+        self.usage["in"] += tokens(prompt)
+        self.usage["out"] += tokens(response)
+        self.usage["ms"] += self.ttft_ms + tokens(response) * self.ms_per_token
+        return llm_json.parse_llm_json(response)[0]
+
+    def reset(self):
+        self.usage = dict.fromkeys(self.usage, 0.0)
+
+
+def main():
+    samples = 150
+    ttft_ms = 400.0
+    ms_per_token = 8.0
+    for flag in ("--samples", "--ttft-ms", "--ms-per-token"):
+        if flag in sys.argv:
+            raw = sys.argv[sys.argv.index(flag) + 1]
+            if flag == "--samples":
+                samples = int(raw)
+            elif flag == "--ttft-ms":
+                ttft_ms = float(raw)
+            else:
+                ms_per_token = float(raw)
+
+    rng = random.Random(5)
+    corpus = []
+    for name in OUTPUTS:
+        template, example = prompt_example(name)
+        originals = [example]
+        if name == "patient_summary":
+            originals += [v["patient_summary"] for v in load_seed_visits()]
+        corpus.append((name, template, originals))
+
+    model = StubModel(ttft_ms, ms_per_token)
+    rows = defaultdict(lambda: defaultdict(float))
+    for i in range(samples):
+        name, template, originals = corpus[i % len(corpus)]
+        original = originals[rng.randrange(len(originals))]
+        corruption = CORRUPTIONS[(i // len(corpus)) % len(CORRUPTIONS)]
+        schema = output_schemas.load_schema(name)
+        broken = corruption(rng, original, schema)
+        if not output_schemas.validate(broken, schema):
+            continue  # truncation only cut optional trailing content
+        model.original = original
+        row = rows[name]
+        row["n"] += 1
+
+        model.reset()
+        model(template)
+        row["full_ms"] += model.usage["ms"]
+        row["full_out"] += model.usage["out"]
+
+        model.reset()
+        merged, report = output_schemas.ensure_valid(name, broken, template, model)
+        row["partial_ms"] += model.usage["ms"]
+        row["partial_out"] += model.usage["out"]
+        row["partial_in"] += model.usage["in"]
+        row["sections"] += len(report["regenerated_sections"])
+        row["valid"] += report["valid"]
+        row["exact"] += merged == original
+
+    print(f"\nPartial regeneration benchmark ({samples} broken outputs; stub model {ttft_ms:.0f} ms TTFT + "
+          f"{ms_per_token:.0f} ms/output token)")
+    print("=" * 100)
+    print(f"  {'output':<18} {'n':>4} {'sections':>8}  {'full regen':>10} {'partial':>8}  "
+          f"{'out tokens full/partial':>24}  {'valid':>6} {'exact':>6}")
+    total = defaultdict(float)
+    for name in OUTPUTS:
+        row = rows[name]
+        n = row["n"] or 1
+        for key, value in row.items():
+            total[key] += value
+        print(f"  {name:<18} {row['n']:>4.0f} {row['sections'] / n:>8.1f}  {row['full_ms'] / n:>8.0f}ms "
+              f"{row['partial_ms'] / n:>6.0f}ms  {row['full_out'] / n:>11.0f} / {row['partial_out'] / n:<10.0f}  "
+              f"{row['valid'] / n:>6.0%} {row['exact'] / n:>6.0%}")
+    n = total["n"] or 1
+    print(f"\n  mean recovery latency: full {total['full_ms'] / n:.0f} ms vs partial {total['partial_ms'] / n:.0f} ms "
+          f"({1 - total['partial_ms'] / total['full_ms']:.0%} less); output tokens "
+          f"{1 - total['partial_out'] / total['full_out']:.0%} fewer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+ClinicalSetu - End-to-End Pipeline Benchmark
+Replays data/synthetic_consultations.json through the real handlers and writes
+machine-readable results, so runs can be compared between commits.
+
+Scenarios:
+  process  - process_consultation.lambda_handler (/api/process), then /api/translate
+             of the patient summary; repeated rounds exercise the consultation,
+             translation and phrase caches
+  agent    - invoke_agent.lambda_handler (supervisor + tool calls)
+  visits   - visit_api: save-visit, patient-visits, doctor-visits, visit-detail
+
+Backends:
+  stub (default) - Bedrock is scripts/fake_bedrock.py (latency/throttle profile,
+                   --time-scale), DynamoDB is scripts/local_dynamodb.py
+  live           - whatever the AWS environment points at (real Bedrock, agent and
+                   tables: BEDROCK_AGENT_ID, DYNAMODB_CACHE_TABLE, VISITS_TABLE, ...)
+
+Reported per scenario and concurrency: p50/p95/p99 of the request and of each
+processing step / route, throughput, error count, cache hit rates, and model
+tokens (stub: counted by the fake; live: not available). The model usage the
+handlers report per step (tokens, model vs. wall time, cost) is saved under
+"usage"; scripts/report_usage.py summarizes it.
+
+Usage:
+  python scripts/bench_pipeline.py
+  python scripts/bench_pipeline.py --concurrency 1,4,16 --rounds 3 --profile throttled
+  python scripts/bench_pipeline.py --output bench/HEAD.json --compare bench/main.json
+  python scripts/bench_pipeline.py --backend live --scenarios process --concurrency 2
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import model_usage  # noqa: E402
+
+SCENARIOS = ["process", "agent", "visits"]
+TRANSLATE_LANGUAGE = "Hindi"
+
+
+def percentiles(values):
+    """Nearest-rank p50/p95/p99 (ms)."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(q):
+        return round(ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.999999) - 1))], 1)
+
+    return {"count": len(ordered), "p50": rank(0.50), "p95": rank(0.95), "p99": rank(0.99),
+            "max": round(ordered[-1], 1)}
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+class Recorder:
+    """Thread-safe latency samples per metric, counters, and model usage summaries per step."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.usage = defaultdict(list)
+
+    def add_usage(self, metric, usage):
+        with self.lock:
+            self.usage[metric].append(usage)
+
+    def sample(self, metric, ms):
+        with self.lock:
+            self.samples[metric].append(ms)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def timed(self, metric, fn):
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.sample(metric, (time.perf_counter() - start) * 1000)
+
+
+# ----- backends -----
+
+class Backend:
+    def __init__(self, kind, profile, time_scale):
+        self.kind = kind
+        self.fake = None
+        if kind == "stub":
+            from fake_bedrock import endpoint_env, serve
+
+            self.server, url = serve(profile, time_scale=time_scale)
+            self.fake = self.server.fake
+            os.environ.update(endpoint_env(url))
+        import invoke_agent
+        import process_consultation
+        import visit_api
+
+        self.pc, self.agent, self.visit_api = process_consultation, invoke_agent, visit_api
+
+    def reset(self):
+        """Fresh caches (a new container) before each run."""
+        from bedrock_cache import MemoryBackend, PromptCache
+        from translation_cache import TranslationCache
+        from translation_memory import PhraseMemory
+
+        pc = self.pc
+        if self.kind == "stub":
+            from local_dynamodb import CACHE_TABLE_SCHEMA, VISITS_TABLE_SCHEMA, LocalDynamoDB
+
+            ddb = LocalDynamoDB(latency_ms=3)
+            ddb.create_table(pc.CACHE_TABLE, **CACHE_TABLE_SCHEMA)
+            ddb.create_table(self.visit_api.VISITS_TABLE, **VISITS_TABLE_SCHEMA)
+            pc.dynamodb = ddb
+            self.visit_api.dynamodb = ddb
+        pc._translation_cache = TranslationCache(table_factory=pc._get_cache_table)
+        pc._phrase_memory = PhraseMemory(table_factory=lambda: pc._get_cache_table() if pc.CACHE_ENABLED else None)
+        if pc._prompt_cache.mode != "off" and pc._prompt_cache.backend.name == "memory":
+            pc._prompt_cache = PromptCache(MemoryBackend(), pc._prompt_cache.mode)
+        self.visit_api._page_cache = self.visit_api._PageCache(self.visit_api.CACHE_TTL,
+                                                               self.visit_api.CACHE_MAX_ENTRIES)
+
+    def tokens(self):
+        if not self.fake:
+            return None
+        stats = self.fake.stats()
+        return {"input": stats["input_tokens"], "output": stats["output_tokens"],
+                "throttled": stats["throttled"], "requests": sum(stats["requests"].values())}
+
+
+# ----- scenarios -----
+
+def consultations(rounds):
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        base = json.load(f)
+    return [dict(c) for _ in range(rounds) for c in base]
+
+
+def run_process(backend, rec, consultation):
+    pc = backend.pc
+    start = time.perf_counter()
+    resp = pc.lambda_handler({"path": "/api/process", "body": json.dumps(consultation)}, None)
+    ms = (time.perf_counter() - start) * 1000
+    rec.sample("request", ms)
+    body = json.loads(resp["body"])
+    if resp["statusCode"] != 200:
+        rec.count("errors")
+        return
+    meta = body["metadata"]
+    rec.sample("request (cache hit)" if meta.get("cache_hit") else "request (cache miss)", ms)
+    rec.count("consultation_cache_hits" if meta.get("cache_hit") else "consultation_cache_misses")
+    if not meta.get("cache_hit"):
+        for step in body["processing_steps"]:
+            rec.sample(step["step"], step["duration_ms"])
+            rec.count("steps_failed" if step["status"] == "failed" else "steps_completed")
+            if "usage" in step:
+                rec.add_usage(step["step"], step["usage"])
+        rec.add_usage("request", meta["usage"])
+    summary = body.get("patient_summary")
+    if summary and "error" not in summary:
+        resp = rec.timed("translate", lambda: pc.lambda_handler(
+            {"path": "/api/translate", "body": json.dumps({"summary": summary, "target_language": TRANSLATE_LANGUAGE})},
+            None))
+        if resp["statusCode"] != 200:
+            rec.count("errors")
+            return
+        tier = json.loads(resp["body"])["metrics"]["cache"][TRANSLATE_LANGUAGE]
+        rec.count(f"translation_{tier}")
+
+
+def run_agent(backend, rec, consultation):
+    resp = rec.timed("request", lambda: backend.agent.lambda_handler({"body": json.dumps(consultation)}, None))
+    if resp["statusCode"] != 200:
+        rec.count("errors")
+        return
+    meta = json.loads(resp["body"])["metadata"]
+    rec.count("tools_called", meta["tools_called"])
+    rec.add_usage("supervisor", meta["supervisor_usage"])
+
+
+def run_visits(backend, rec, consultation, i):
+    from bench_visit_queries import load_seed_visits
+
+    visit_api = backend.visit_api
+    seed = load_seed_visits()
+    visit = dict(seed[i % len(seed)])
+    visit.update(consultation_id=f"{consultation['id']}-{i}", patient_name=consultation["patient"]["name"],
+                 doctor_name=consultation["doctor"]["name"], hospital=consultation["doctor"]["hospital"],
+                 phone_number=f"+9190000{i % 16:05d}", visit_date=f"2025-06-{1 + i % 28:02d}T10:{i % 60:02d}:00Z")
+
+    def call(route, body):
+        start = time.perf_counter()
+        resp = visit_api.lambda_handler({"path": f"/api/{route}", "body": json.dumps(body)}, None)
+        ms = (time.perf_counter() - start) * 1000
+        rec.sample(route, ms)
+        if resp["statusCode"] != 200:
+            rec.count("errors")
+            return None
+        cache = (resp.get("headers") or {}).get("X-Cache")
+        if cache:
+            rec.count(f"visit_cache_{cache.lower()}")
+        return json.loads(resp["body"])
+
+    start = time.perf_counter()
+    call("save-visit", visit)
+    page = call("patient-visits", {"phone_number": visit["phone_number"], "limit": 20, "fields": "summary"})
+    call("doctor-visits", {"doctor_name": visit["doctor_name"], "limit": 50, "fields": "summary"})
+    if page and page["items"]:
+        call("visit-detail", {"pk": page["items"][0]["pk"], "sk": page["items"][0]["sk"]})
+    call("patient-visits", {"phone_number": visit["phone_number"], "limit": 20, "fields": "summary"})  # portal reload
+    rec.sample("request", (time.perf_counter() - start) * 1000)
+
+
+def cache_rates(counters):
+    def rate(hit_keys, miss_keys):
+        hits = sum(counters.get(k, 0) for k in hit_keys)
+        total = hits + sum(counters.get(k, 0) for k in miss_keys)
+        return round(hits / total, 3) if total else None
+
+    return {
+        "consultation": rate(["consultation_cache_hits"], ["consultation_cache_misses"]),
+        "translation": rate(["translation_memory", "translation_dynamodb"], ["translation_miss", "translation_disabled"]),
+        "visit_list": rate(["visit_cache_hit"], ["visit_cache_miss"]),
+    }
+
+
+def run(backend, scenario, concurrency, rounds):
+    backend.reset()
+    items = consultations(rounds)
+    rec = Recorder()
+    tokens_before = backend.tokens()
+    fn = {"process": lambda job: run_process(backend, rec, job[1]),
+          "agent": lambda job: run_agent(backend, rec, job[1]),
+          "visits": lambda job: run_visits(backend, rec, job[1], job[0])}[scenario]
+
+    def guarded(job):
+        try:
+            fn(job)
+        except Exception as e:
+            print(f"  {scenario} request failed: {e}")
+            rec.count("errors")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(guarded, enumerate(items)))
+    elapsed = time.perf_counter() - start
+
+    tokens_after = backend.tokens()
+    tokens = ({k: tokens_after[k] - tokens_before[k] for k in tokens_after} if tokens_after else None)
+    counters = dict(rec.counters)
+    result = {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(items),
+        "errors": counters.get("errors", 0),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(items) / elapsed, 3),
+        "latency_ms": {metric: percentiles(values) for metric, values in rec.samples.items()},
+        "cache_hit_rate": cache_rates(counters),
+        "counters": counters,
+        "tokens": tokens,
+        # Per step: {"requests": n, **model_usage.summarize(...)} summed over the run (see report_usage.py)
+        "usage": {metric: {"requests": len(usages), **model_usage.summarize(usages)}
+                  for metric, usages in rec.usage.items()},
+    }
+    if scenario == "process":
+        result["prompt_cache"] = backend.pc._prompt_cache.stats()
+        result["phrase_memory"] = backend.pc._phrase_memory.stats()
+    return result
+
+
+# ----- reporting -----
+
+def print_run(result):
+    rates = ", ".join(f"{k} {v:.0%}" for k, v in result["cache_hit_rate"].items() if v is not None) or "-"
+    tokens = result["tokens"]
+    print(f"\n  {result['scenario']} @ concurrency {result['concurrency']}: {result['requests']} requests, "
+          f"{result['throughput_rps']:.2f} req/s, {result['errors']} errors; cache hit rate: {rates}")
+    if tokens:
+        print(f"    model tokens in/out {tokens['input']:,}/{tokens['output']:,} over {tokens['requests']} calls "
+              f"({tokens['throttled']} throttled)")
+    print(f"    {'metric':<32} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for metric, p in sorted(result["latency_ms"].items(), key=lambda kv: kv[0] != "request"):
+        if p["count"]:
+            print(f"    {metric:<32} {p['count']:>5} {p['p50']:>9.1f} {p['p95']:>9.1f} {p['p99']:>9.1f}")
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r["scenario"], r["concurrency"]): r for r in baseline["runs"]}
+    print(f"\nCompared with {baseline_path} (commit {(baseline.get('commit') or '?')[:10]})")
+    print("=" * 100)
+    print(f"  {'scenario @ concurrency':<24} {'metric':<32} {'p50':>18} {'p95':>18}")
+    for run_result in current["runs"]:
+        before = old.get((run_result["scenario"], run_result["concurrency"]))
+        if not before:
+            continue
+        label = f"{run_result['scenario']} @ {run_result['concurrency']}"
+        for metric, p in run_result["latency_ms"].items():
+            q = before["latency_ms"].get(metric)
+            if not q or not q.get("count") or not p.get("count"):
+                continue
+            cells = []
+            for key in ("p50", "p95"):
+                delta = (p[key] - q[key]) / q[key] if q[key] else 0.0
+                cells.append(f"{q[key]:>7.0f}->{p[key]:<6.0f}{delta:+5.0%}")
+            print(f"  {label:<24} {metric:<32} {cells[0]:>18} {cells[1]:>18}")
+        print(f"  {label:<24} {'throughput req/s':<32} {before['throughput_rps']:>7.2f}->{run_result['throughput_rps']:.2f}")
+
+
+def main():
+    def arg(flag, default, cast=str):
+        return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    kind = arg("--backend", "stub")
+    profile = arg("--profile", "nova-lite")
+    time_scale = arg("--time-scale", 0.05, float)
+    levels = [int(c) for c in arg("--concurrency", "1,4").split(",")]
+    rounds = arg("--rounds", 2, int)
+    scenarios = arg("--scenarios", ",".join(SCENARIOS)).split(",")
+    output = arg("--output", os.path.join(PROJECT_ROOT, "bench_results", "pipeline.json"))
+    baseline = arg("--compare", None)
+
+    backend = Backend(kind, profile, time_scale)
+    commit, dirty = git_commit()
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "backend": kind,
+        "profile": profile if kind == "stub" else None,
+        "time_scale": time_scale if kind == "stub" else None,
+        "rounds": rounds,
+        "runs": [],
+    }
+
+    print(f"\nPipeline benchmark ({kind} backend{f', {profile} profile x{time_scale}' if kind == 'stub' else ''}; "
+          f"{rounds} rounds of the synthetic consultations; concurrency {levels})")
+    print("=" * 100)
+    for scenario in scenarios:
+        for concurrency in levels:
+            result = run(backend, scenario, concurrency, rounds)
+            results["runs"].append(result)
+            print_run(result)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n  Results written to {output}")
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
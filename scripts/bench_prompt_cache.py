@@ -0,0 +1,152 @@
+"""
+ClinicalSetu - Prompt Cache Benchmark
+Runs the /api/process pipeline (process_consultation.lambda_handler) over the
+synthetic consultations with a fake Bedrock runtime client (fixed latency per
+converse call, answers from scripts/fake_bedrock.py's canned outputs), then
+records and replays it through the bedrock_cache backends:
+
+  live             - BEDROCK_CACHE_MODE=off
+  record (sqlite)  - every call goes to the model and is stored in a SQLite file
+  replay (sqlite)  - a fresh cache over the same file; the client raises on any call
+  replay (memory)  - recorded and replayed in-process
+  replay (dynamodb)- recorded and replayed on the in-memory DynamoDB stand-in
+
+The consultation-level cache is disabled so every run executes all steps.
+Replays must make zero model calls and return the same outputs as the recording,
+and every step of every run must complete with a schema-valid output (no
+regenerated sections); the benchmark exits non-zero otherwise.
+
+Usage:
+  python scripts/bench_prompt_cache.py
+  python scripts/bench_prompt_cache.py --model-ms 400 --runs 3
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+os.environ["KNOWLEDGE_BASE_ID"] = ""  # trial matching on the bundled trials only
+
+import bedrock_cache  # noqa: E402
+import process_consultation as pc  # noqa: E402
+from fake_bedrock import CannedOutputs  # noqa: E402
+from local_dynamodb import CACHE_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+
+CANNED = CannedOutputs()
+
+
+class FakeBedrockRuntime:
+    """converse() sleeps model_ms and answers with fake_bedrock's canned output for the prompt."""
+
+    def __init__(self, model_ms, offline=False):
+        self.model_ms = model_ms
+        self.offline = offline
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def converse(self, modelId, messages, inferenceConfig, **_):
+        if self.offline:
+            raise RuntimeError("Bedrock called during an offline replay")
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.model_ms / 1000)
+        answer = CANNED.answer(messages[0]["content"][0]["text"])
+        return {"output": {"message": {"content": [{"text": answer}]}}}
+
+
+def consultations():
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        return json.load(f)
+
+
+def run_all(items):
+    """
+    Process every consultation; returns (per-consultation ms, outputs without timings, problems).
+    A problem is a step that did not complete or needed its schema check (invalid or regenerated).
+    """
+    timings, outputs, problems = [], [], []
+    for consultation in items:
+        start = time.perf_counter()
+        resp = pc.lambda_handler({"path": "/api/process", "body": json.dumps(consultation)}, None)
+        timings.append((time.perf_counter() - start) * 1000)
+        body = json.loads(resp["body"])
+        assert resp["statusCode"] == 200, body
+        problems += [f"{consultation['patient']['name']}: {step['step']} "
+                     f"{step.get('schema') or step['status']}"
+                     for step in body["processing_steps"] if step["status"] != "completed" or "schema" in step]
+        outputs.append({k: v for k, v in body.items() if k not in ("metadata", "processing_steps")})
+    return timings, outputs, problems
+
+
+def main():
+    model_ms = 200.0
+    runs = 1
+    if "--model-ms" in sys.argv:
+        model_ms = float(sys.argv[sys.argv.index("--model-ms") + 1])
+    if "--runs" in sys.argv:
+        runs = int(sys.argv[sys.argv.index("--runs") + 1])
+
+    pc.CACHE_ENABLED = False  # consultation-level cache off: every step runs
+    items = consultations() * runs
+    sqlite_path = os.path.join(tempfile.mkdtemp(), "bedrock_cache.sqlite")
+    ddb = LocalDynamoDB(latency_ms=2)
+    ddb.create_table(pc.CACHE_TABLE, **CACHE_TABLE_SCHEMA)
+    ddb_table = ddb.Table(pc.CACHE_TABLE)
+
+    scenarios = [
+        ("live", None, "off", False),
+        ("record (sqlite)", lambda: bedrock_cache.SQLiteBackend(sqlite_path), "record", False),
+        ("replay (sqlite)", lambda: bedrock_cache.SQLiteBackend(sqlite_path), "replay", True),
+        ("record (memory)", None, "record", False),
+        ("replay (memory)", None, "replay", True),
+        ("record (dynamodb)", lambda: bedrock_cache.DynamoBackend(lambda: ddb_table), "record", False),
+        ("replay (dynamodb)", lambda: bedrock_cache.DynamoBackend(lambda: ddb_table), "replay", True),
+    ]
+
+    print(f"\nPrompt cache benchmark ({len(items)} consultations, fake Bedrock {model_ms:.0f} ms per call)")
+    print("=" * 100)
+    print(f"  {'scenario':<20} {'p50 ms':>8} {'total s':>8} {'model calls':>12} {'hits':>6} {'stores':>7}  same output")
+    recorded = None
+    memory_backend = None
+    failures = []
+    for label, make_backend, mode, offline in scenarios:
+        if label.endswith("(memory)"):
+            memory_backend = memory_backend if mode == "replay" else bedrock_cache.MemoryBackend()
+            backend = memory_backend
+        else:
+            backend = make_backend() if make_backend else None
+        pc._prompt_cache = bedrock_cache.PromptCache(backend, mode)
+        client = FakeBedrockRuntime(model_ms, offline=offline)
+        pc.bedrock_runtime = client
+
+        timings, outputs, problems = run_all(items)
+        if label == "live":
+            recorded = outputs
+        failures += [f"{label}: {p}" for p in problems]
+        if outputs != recorded:
+            failures.append(f"{label}: outputs differ from the live run")
+        stats = pc._prompt_cache.stats()
+        print(f"  {label:<20} {statistics.median(timings):>8.1f} {sum(timings) / 1000:>8.2f} {client.calls:>12} "
+              f"{stats['hits']:>6} {stats['stores']:>7}  {'yes' if outputs == recorded else 'NO'}")
+
+    size = sum(os.path.getsize(p) for p in (sqlite_path, sqlite_path + "-wal") if os.path.exists(p))
+    print(f"\n  SQLite recording: {len(bedrock_cache.SQLiteBackend(sqlite_path))} responses, "
+          f"{size / 1024:.0f} KB at {sqlite_path}")
+    if failures:
+        print(f"\n  {len(failures)} problem(s):")
+        for failure in failures[:20]:
+            print(f"    {failure}")
+        sys.exit(1)
+    print("  every step completed with a schema-valid output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+ClinicalSetu - Translation Cache Benchmark
+Replays patients toggling languages on the results page through
+process_consultation's /api/translate handler with a stubbed model (fixed
+latency, no AWS calls) and the DynamoDB cache tier on the in-memory stand-in
+(scripts/local_dynamodb.py).
+
+Scenarios:
+  uncached              - every toggle pays a model call (the old behaviour)
+  cached, 2 containers  - same toggles spread over two containers: memory hits,
+                          DynamoDB hits from the sibling container, misses
+  sequential vs batch   - 3 languages one request at a time vs. target_languages
+
+Usage:
+  python scripts/bench_translation_cache.py
+  python scripts/bench_translation_cache.py --toggles 300 --model-ms 400
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import process_consultation as pc  # noqa: E402
+from bench_visit_queries import load_seed_visits  # noqa: E402
+from fakes import stub_model  # noqa: E402
+from local_dynamodb import CACHE_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+from translation_cache import TranslationCache  # noqa: E402
+
+LANGUAGES = ["Hindi", "Bengali", "Tamil", "Marathi", "Telugu"]
+
+
+def translate(summary, language=None, languages=None):
+    body = {"summary": summary}
+    if languages:
+        body["target_languages"] = languages
+    else:
+        body["target_language"] = language
+    start = time.perf_counter()
+    resp = pc.lambda_handler({"path": "/api/translate", "body": json.dumps(body)}, None)
+    assert resp["statusCode"] == 200, resp["body"]
+    return (time.perf_counter() - start) * 1000, json.loads(resp["body"])
+
+
+def new_container(table_factory):
+    pc._translation_cache = TranslationCache(table_factory=table_factory)
+    return pc._translation_cache
+
+
+def report(label, timings, calls):
+    timings = sorted(timings)
+    print(f"  {label:<24} {statistics.median(timings):>8.1f} ms p50  {timings[int(len(timings) * 0.95)]:>8.1f} ms p95  "
+          f"{len(timings):>5} requests  {calls:>5} model calls")
+
+
+def main():
+    n_toggles = 200
+    model_ms = 300.0
+    if "--toggles" in sys.argv:
+        n_toggles = int(sys.argv[sys.argv.index("--toggles") + 1])
+    if "--model-ms" in sys.argv:
+        model_ms = float(sys.argv[sys.argv.index("--model-ms") + 1])
+
+    summaries = [v["patient_summary"] for v in load_seed_visits()]
+    rng = random.Random(11)
+    toggles = [(rng.randrange(len(summaries)), rng.choice(LANGUAGES[:3])) for _ in range(n_toggles)]
+    calls = stub_model(pc, model_ms)
+    pc.TRANSLATION_MEMORY_ENABLED = False  # isolate the summary-level cache (see bench_translation_memory.py)
+
+    print(f"\nTranslation cache benchmark ({n_toggles} toggles over {len(summaries)} summaries, "
+          f"{model_ms:.0f} ms stub model)")
+    print("=" * 100)
+
+    pc.CACHE_ENABLED = False
+    calls["translate"] = 0
+    timings = [translate(summaries[i], lang)[0] for i, lang in toggles[: max(10, n_toggles // 10)]]
+    report("uncached (sampled)", timings, calls["translate"])
+    pc.CACHE_ENABLED = True
+
+    ddb = LocalDynamoDB(latency_ms=4)
+    ddb.create_table("translations", **CACHE_TABLE_SCHEMA)
+    factory = lambda: ddb.Table("translations")  # noqa: E731
+    calls["translate"] = 0
+    tiers = {"memory": [], "dynamodb": [], "miss": []}
+    half = len(toggles) // 2
+    for part in (toggles[:half], toggles[half:]):
+        new_container(factory)
+        for i, lang in part:
+            ms, body = translate(summaries[i], lang)
+            tiers[body["metrics"]["cache"][lang]].append(ms)
+    all_timings = [ms for v in tiers.values() for ms in v]
+    report("cached, 2 containers", all_timings, calls["translate"])
+    print(f"    hit rate {1 - len(tiers['miss']) / len(all_timings):.0%} "
+          f"(container 2 cache stats: {json.dumps(pc._translation_cache.stats()['latency'])})")
+    for tier, values in tiers.items():
+        if values:
+            print(f"    {tier:<10} {len(values):>5} requests  {statistics.mean(values):>8.1f} ms avg")
+
+    print("\n Three languages for a fresh summary")
+    new_container(factory)
+    fresh = dict(summaries[0], greeting=summaries[0].get("greeting", "") + " (seq)")
+    start = time.perf_counter()
+    for lang in LANGUAGES[:3]:
+        translate(fresh, lang)
+    seq_ms = (time.perf_counter() - start) * 1000
+    fresh = dict(summaries[0], greeting=summaries[0].get("greeting", "") + " (batch)")
+    batch_ms, body = translate(fresh, languages=LANGUAGES[:3])
+    print(f"  sequential requests      {seq_ms:>8.1f} ms")
+    print(f"  target_languages batch   {batch_ms:>8.1f} ms  ({len(body['translations'])} languages, "
+          f"{len(body['errors'])} errors)")
+
+
+if __name__ == "__main__":
+    main()
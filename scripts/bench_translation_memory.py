@@ -0,0 +1,93 @@
+"""
+ClinicalSetu - Translation Memory Benchmark
+Translates the seed visit summaries (scripts/seed_visits.py) into three
+languages with process_consultation.translate_patient_summary and a stubbed
+model (no AWS calls), comparing whole-document translation with the
+field-level phrase memory. The memory's DynamoDB tier runs on the in-memory
+stand-in (scripts/local_dynamodb.py).
+
+Tokens are estimated as characters / 4 for both prompt and response.
+
+Scenarios:
+  whole document     - every summary sent as full JSON (the old behaviour)
+  field-level, cold  - empty memory; recurring strings (disclaimer, dosing
+                       instructions, warning signs) are translated once
+  new container      - empty in-process memory, phrases read from DynamoDB
+  edited summaries   - one field changed per summary (doctor edit / regenerate)
+
+Usage:
+  python scripts/bench_translation_memory.py
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import process_consultation as pc  # noqa: E402
+from bench_visit_queries import load_seed_visits  # noqa: E402
+from fakes import stub_model  # noqa: E402
+from local_dynamodb import CACHE_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+from translation_memory import PhraseMemory  # noqa: E402
+
+LANGUAGES = ["Hindi", "Bengali", "Tamil"]
+
+
+def run(label, summaries, usage, baseline=None):
+    for key in usage:
+        usage[key] = 0
+    expected = {}
+    for lang in LANGUAGES:
+        for i, summary in enumerate(summaries):
+            translated = pc.translate_patient_summary(summary, lang)
+            expected[(i, lang)] = translated
+    total = usage["input"] + usage["output"]
+    line = (f"  {label:<20} {usage['translate']:>5} calls  {usage['input']:>8,.0f} in  "
+            f"{usage['output']:>8,.0f} out  {total:>8,.0f} tokens")
+    if baseline:
+        line += f"  ({1 - total / baseline:.0%} fewer)"
+    print(line)
+    return total, expected
+
+
+def memory_line(memory):
+    stats = memory.stats()
+    print(f"  {'':<20} {stats['strings']:>5} strings looked up: {stats['memory_hits']} memory, "
+          f"{stats['dynamo_hits']} DynamoDB, {stats['misses']} translated -> {stats['hit_rate']:.0%} from memory")
+
+
+def main():
+    summaries = [v["patient_summary"] for v in load_seed_visits()]
+    usage = stub_model(pc)
+    pc.CACHE_ENABLED = True
+
+    print(f"\nTranslation memory benchmark ({len(summaries)} seed summaries x {len(LANGUAGES)} languages)")
+    print("=" * 100)
+
+    pc.TRANSLATION_MEMORY_ENABLED = False
+    baseline, whole = run("whole document", summaries, usage)
+
+    pc.TRANSLATION_MEMORY_ENABLED = True
+    ddb = LocalDynamoDB()
+    ddb.create_table("cache", **CACHE_TABLE_SCHEMA)
+    factory = lambda: ddb.Table("cache")  # noqa: E731
+
+    pc._phrase_memory = PhraseMemory(table_factory=factory)
+    _, fields = run("field-level, cold", summaries, usage, baseline)
+    memory_line(pc._phrase_memory)
+    assert fields == whole, "field-level output differs from whole-document output"
+
+    pc._phrase_memory = PhraseMemory(table_factory=factory)
+    run("new container", summaries, usage, baseline)
+    memory_line(pc._phrase_memory)
+
+    edited = [dict(s, visit_summary=s["visit_summary"] + " Please continue your medicines.") for s in summaries]
+    pc._phrase_memory.counters = dict.fromkeys(pc._phrase_memory.counters, 0)
+    run("edited summaries", edited, usage, baseline)
+    memory_line(pc._phrase_memory)
+
+
+if __name__ == "__main__":
+    main()
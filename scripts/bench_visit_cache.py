@@ -0,0 +1,116 @@
+"""
+ClinicalSetu - Visit Cache Benchmark
+Replays a patient-portal / dashboard read mix against visit_api with the
+per-container list cache off and on, using the in-memory DynamoDB stand-in
+(scripts/local_dynamodb.py) with simulated network latency.
+
+Workload: each request reads one patient's visits (/api/patient-visits) or the
+doctor's summary list (/api/doctor-visits), with patients drawn from a skewed
+distribution (a few patients refresh the portal repeatedly). A share of
+requests save a new visit, which invalidates that patient's and doctor's pages.
+
+Usage:
+  python scripts/bench_visit_cache.py
+  python scripts/bench_visit_cache.py --requests 5000 --patients 200 --write-ratio 0.05 --latency-ms 5
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import visit_api  # noqa: E402
+from bench_visit_queries import load_seed_visits  # noqa: E402
+from local_dynamodb import VISITS_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+
+DOCTORS = ["Dr. Rojina Mallick", "Dr. Arjun Menon", "Dr. Kavya Iyer"]
+
+
+def make_workload(n_requests, n_patients, write_ratio, rng):
+    phones = [f"+9190000{i:05d}" for i in range(n_patients)]
+    weights = [1 / (i + 1) for i in range(n_patients)]  # Zipf-like: a few hot patients
+    ops = []
+    for i in range(n_requests):
+        r = rng.random()
+        if r < write_ratio:
+            ops.append(("save", rng.choices(phones, weights)[0], rng.choice(DOCTORS), i))
+        elif r < write_ratio + 0.2:
+            ops.append(("doctor", None, rng.choice(DOCTORS), i))
+        else:
+            ops.append(("patient", rng.choices(phones, weights)[0], None, i))
+    return phones, ops
+
+
+def run(label, ttl, phones, ops, latency_ms):
+    ddb = LocalDynamoDB()
+    ddb.create_table(visit_api.VISITS_TABLE, **VISITS_TABLE_SCHEMA)
+    visit_api.dynamodb = ddb
+    visit_api.CACHE_TTL = ttl
+    visit_api._page_cache = visit_api._PageCache(ttl, visit_api.CACHE_MAX_ENTRIES)
+
+    templates = load_seed_visits()
+    for i, phone in enumerate(phones):
+        for j in range(3):
+            visit = dict(templates[(i + j) % len(templates)])
+            visit.update(phone_number=phone, doctor_name=DOCTORS[(i + j) % len(DOCTORS)],
+                         visit_date=f"2025-0{1 + j}-{1 + i % 28:02d}T10:00:00Z")
+            visit_api.lambda_handler({"path": "/api/save-visit", "body": json.dumps(visit)}, None)
+    visit_api._page_cache.clear()
+    ddb.latency_ms, ddb.per_kb_ms = latency_ms, 0.02
+    table = ddb.Table(visit_api.VISITS_TABLE)
+    reads_before = table.stats["reads"]
+
+    timings = []
+    start = time.perf_counter()
+    for op, phone, doctor, i in ops:
+        if op == "save":
+            visit = dict(templates[i % len(templates)])
+            visit.update(phone_number=phone, doctor_name=doctor, visit_date=f"2025-06-01T{i % 24:02d}:{i % 60:02d}:{i % 59:02d}Z")
+            event = {"path": "/api/save-visit", "body": json.dumps(visit)}
+        elif op == "doctor":
+            event = {"path": "/api/doctor-visits", "body": json.dumps({"doctor_name": doctor, "fields": "summary"})}
+        else:
+            event = {"path": "/api/patient-visits", "body": json.dumps({"phone_number": phone})}
+        t0 = time.perf_counter()
+        resp = visit_api.lambda_handler(event, None)
+        timings.append((time.perf_counter() - t0) * 1000)
+        assert resp["statusCode"] == 200, resp
+    elapsed = time.perf_counter() - start
+
+    stats = visit_api.cache_stats()
+    timings.sort()
+    print(f"  {label:<12} {len(ops) / elapsed:>9,.0f} req/s  {statistics.median(timings):>7.2f} ms p50  "
+          f"{timings[int(len(timings) * 0.95)]:>7.2f} ms p95  {table.stats['reads'] - reads_before:>6,} queries  "
+          f"hit rate {stats['hit_rate']:>6.1%}  ({stats['invalidations']:,} invalidated, {stats['evictions']:,} evicted)")
+
+
+def main():
+    n_requests = 3000
+    n_patients = 150
+    write_ratio = 0.05
+    latency_ms = 5.0
+    if "--requests" in sys.argv:
+        n_requests = int(sys.argv[sys.argv.index("--requests") + 1])
+    if "--patients" in sys.argv:
+        n_patients = int(sys.argv[sys.argv.index("--patients") + 1])
+    if "--write-ratio" in sys.argv:
+        write_ratio = float(sys.argv[sys.argv.index("--write-ratio") + 1])
+    if "--latency-ms" in sys.argv:
+        latency_ms = float(sys.argv[sys.argv.index("--latency-ms") + 1])
+
+    phones, ops = make_workload(n_requests, n_patients, write_ratio, random.Random(7))
+    print(f"\nVisit cache benchmark ({n_requests:,} requests, {n_patients} patients, "
+          f"{write_ratio:.0%} writes, {latency_ms} ms round trip)")
+    print("=" * 120)
+    run("cache off", 0, phones, ops, latency_ms)
+    run("cache 30s", 30, phones, ops, latency_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+ClinicalSetu - Visit Codec Benchmark
+Times serialization of visit query results to a JSON response body on large
+result sets (default 10,000 visits built from the seeded visits).
+
+Paths compared:
+  json.dumps(default=...)      - the old visit_api path (one callback + `% 1` per Decimal)
+  visit_codec.dumps            - C encoder with a type-checked Decimal hook
+  float -> Decimal on write    - JSON round trip vs. visit_codec.to_dynamo
+
+Usage:
+  python scripts/bench_visit_codec.py
+  python scripts/bench_visit_codec.py --items 50000 --rounds 3
+"""
+
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from bench_visit_queries import load_seed_visits  # noqa: E402
+from visit_codec import dumps, to_dynamo  # noqa: E402
+
+try:
+    from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+except ImportError:  # boto3 not installed: only the floats become Decimal
+    TypeDeserializer = TypeSerializer = None
+
+
+def _decimal_default(obj):
+    if isinstance(obj, Decimal):
+        if obj % 1 == 0:
+            return int(obj)
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+def make_visits(n):
+    templates = load_seed_visits()
+    visits = []
+    for i in range(n):
+        visit = dict(templates[i % len(templates)])
+        visit["consultation_id"] = f"CONSULT-CODEC-{i:05d}"
+        visit["created_at"] = 1735689600 + i
+        visit["vitals"] = {"temperature_c": 37.2 + (i % 10) / 10, "spo2": 97, "weight_kg": 61.5}
+        visits.append(visit)
+    return visits
+
+
+def bench(label, fn, rounds, n_items):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<30} {best * 1000:>9,.1f} ms  {n_items / best:>12,.0f} items/sec")
+    return best, out
+
+
+def main():
+    n_items = 10000
+    rounds = 5
+    if "--items" in sys.argv:
+        n_items = int(sys.argv[sys.argv.index("--items") + 1])
+    if "--rounds" in sys.argv:
+        rounds = int(sys.argv[sys.argv.index("--rounds") + 1])
+
+    raw = make_visits(n_items)
+    if TypeDeserializer:
+        # What a resource-layer query returns: every number (ints included) as Decimal
+        ser, de = TypeSerializer(), TypeDeserializer()
+        typed = [{k: ser.serialize(v) for k, v in to_dynamo(it).items()} for it in raw]
+        items = [{k: de.deserialize(v) for k, v in it.items()} for it in typed]
+    else:
+        items = [to_dynamo(v) for v in raw]
+
+    print(f"\nVisit codec benchmark ({n_items:,} items, best of {rounds})")
+    print("=" * 70)
+    print(" Read: items -> response body")
+    old, old_body = bench("json.dumps(default=...)", lambda: json.dumps({"items": items}, default=_decimal_default), rounds, n_items)
+    new, new_body = bench("visit_codec.dumps", lambda: dumps({"items": items}), rounds, n_items)
+    assert old_body == new_body, "codec output differs from the default-hook output"
+
+    print(" Write: request dicts -> DynamoDB items")
+    round_trip, _ = bench("json round trip", lambda: [json.loads(json.dumps(v), parse_float=Decimal) for v in raw],
+                          rounds, n_items)
+    direct, _ = bench("visit_codec.to_dynamo", lambda: [to_dynamo(v) for v in raw], rounds, n_items)
+
+    print("-" * 70)
+    print(f"  read {old / new:.1f}x faster with visit_codec.dumps, write {round_trip / direct:.1f}x with to_dynamo")
+
+
+if __name__ == "__main__":
+    main()
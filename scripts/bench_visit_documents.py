@@ -0,0 +1,122 @@
+"""
+ClinicalSetu - Visit Document Offload Benchmark
+Compares visits stored with their documents inline (patient_summary,
+medications, warning_signs in the DynamoDB item) against offloaded documents
+(visit_documents.LocalDocumentStore in a temp directory standing in for S3),
+using the in-memory DynamoDB stand-in (scripts/local_dynamodb.py).
+
+Reported per query: read capacity consumed (RCU, 4 KB units), response payload
+and latency. The list cache is disabled so every call reaches the table.
+
+Usage:
+  python scripts/bench_visit_documents.py
+  python scripts/bench_visit_documents.py --visits 1000 --latency-ms 5
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import visit_api  # noqa: E402
+from bench_visit_queries import load_seed_visits  # noqa: E402
+from local_dynamodb import VISITS_TABLE_SCHEMA, LocalDynamoDB, item_size  # noqa: E402
+from visit_documents import LocalDocumentStore  # noqa: E402
+
+DOCTOR = "Dr. Rojina Mallick"
+PHONE = "+919000000001"
+ROUNDS = 20
+
+
+def setup(n_visits, store):
+    ddb = LocalDynamoDB()
+    ddb.create_table(visit_api.VISITS_TABLE, **VISITS_TABLE_SCHEMA)
+    visit_api.dynamodb = ddb
+    visit_api.doc_store = store
+    visit_api.CACHE_TTL = 0
+
+    templates = load_seed_visits()
+    visits = []
+    for i in range(n_visits):
+        visit = dict(templates[i % len(templates)])
+        visit["doctor_name"] = DOCTOR
+        # Every 10th visit belongs to one returning patient (the portal scenario)
+        visit["phone_number"] = PHONE if i % 10 == 0 else f"+9191000{i:05d}"
+        visit["consultation_id"] = f"CONSULT-DOC-{i:05d}"
+        visit["visit_date"] = f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00Z"
+        visits.append(visit)
+    for i in range(0, len(visits), visit_api.MAX_BATCH_VISITS):
+        resp = visit_api.lambda_handler(
+            {"path": "/api/save-visits", "body": json.dumps({"visits": visits[i:i + visit_api.MAX_BATCH_VISITS]})}, None
+        )
+        assert resp["statusCode"] == 200, resp["body"]
+    return ddb
+
+
+def measure(ddb, path, body):
+    table = ddb.Table(visit_api.VISITS_TABLE)
+    rcu_before = table.stats["rcu"]
+    timings, size = [], 0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        resp = visit_api.lambda_handler({"path": path, "body": json.dumps(body)}, None)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert resp["statusCode"] == 200, resp
+        size = len(resp["body"])
+    return (table.stats["rcu"] - rcu_before) / ROUNDS, size, statistics.median(timings)
+
+
+def run(label, n_visits, latency_ms, store):
+    ddb = setup(n_visits, store)
+    table = ddb.Table(visit_api.VISITS_TABLE)
+    ddb.latency_ms, ddb.per_kb_ms = latency_ms, 0.02
+    sizes = [item_size(it) for it in table.items.values()]
+    doc_bytes = [int(it["doc_bytes"]) for it in table.items.values() if "doc_bytes" in it]
+
+    first = json.loads(visit_api.lambda_handler(
+        {"path": "/api/patient-visits", "body": json.dumps({"phone_number": PHONE, "limit": 1})}, None
+    )["body"])["items"][0]
+
+    print(f"\n{label}: item {statistics.mean(sizes) / 1024:.2f} KB avg / {max(sizes) / 1024:.2f} KB max"
+          + (f", document object {statistics.mean(doc_bytes) / 1024:.2f} KB gzip avg" if doc_bytes else ""))
+    rows = [
+        ("patient-visits, limit 20", "/api/patient-visits", {"phone_number": PHONE, "limit": 20}),
+        ("doctor-visits, limit 50", "/api/doctor-visits", {"doctor_name": DOCTOR, "limit": 50}),
+        ("visit-detail (1 visit)", "/api/visit-detail", {"pk": first["pk"], "sk": first["sk"]}),
+    ]
+    results = {}
+    for name, path, body in rows:
+        rcu, size, ms = measure(ddb, path, body)
+        results[name] = (rcu, size, ms)
+        print(f"  {name:<26} {rcu:>7.1f} RCU  {size / 1024:>9.1f} KB  {ms:>7.1f} ms p50")
+    return results
+
+
+def main():
+    n_visits = 500
+    latency_ms = 5.0
+    if "--visits" in sys.argv:
+        n_visits = int(sys.argv[sys.argv.index("--visits") + 1])
+    if "--latency-ms" in sys.argv:
+        latency_ms = float(sys.argv[sys.argv.index("--latency-ms") + 1])
+
+    print(f"\nVisit document offload benchmark ({n_visits:,} visits, {latency_ms} ms round trip)")
+    print("=" * 80)
+    before = run("Inline documents", n_visits, latency_ms, None)
+    with tempfile.TemporaryDirectory() as root:
+        after = run("Offloaded documents", n_visits, latency_ms, LocalDocumentStore(root))
+
+    print("-" * 80)
+    for name in before:
+        (rcu_b, size_b, _), (rcu_a, size_a, _) = before[name], after[name]
+        print(f"  {name:<26} RCU {rcu_b:.1f} -> {rcu_a:.1f}   payload {size_b / 1024:.1f} -> {size_a / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
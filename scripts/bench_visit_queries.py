@@ -0,0 +1,150 @@
+"""
+ClinicalSetu - Visit Query Benchmark
+Compares response size and latency of the doctor dashboard list query before
+and after pagination + summary projection, against the in-memory DynamoDB
+stand-in (scripts/local_dynamodb.py) with simulated network latency.
+
+Scenarios:
+  full items, limit 50      - what the dashboard fetched before (whole patient_summary per visit)
+  summary fields, limit 50  - dashboard list view with fields="summary"
+  summary, page through all - every visit for the doctor via next_token
+  detail fetch              - one /api/visit-detail call when a row is opened
+  today, client-side filter - page the doctor's summary list, keep one hospital + day
+  today, doctor-day-index   - one /api/doctor-day-visits key-condition query
+
+Usage:
+  python scripts/bench_visit_queries.py
+  python scripts/bench_visit_queries.py --visits 2000 --latency-ms 8
+"""
+
+import ast
+import json
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import visit_api  # noqa: E402
+from local_dynamodb import VISITS_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+
+DOCTOR = "Dr. Rojina Mallick"
+
+
+def load_seed_visits():
+    """Read SEED_VISITS without importing seed_visits (which connects to DynamoDB)."""
+    path = os.path.join(PROJECT_ROOT, "scripts", "seed_visits.py")
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", "") == "SEED_VISITS":
+            return ast.literal_eval(node.value)
+    return []
+
+
+def seed(n):
+    templates = load_seed_visits()
+    for i in range(n):
+        visit = dict(templates[i % len(templates)])
+        visit["doctor_name"] = DOCTOR
+        visit["phone_number"] = f"+9190000{i:05d}"
+        visit["consultation_id"] = f"CONSULT-BENCH-{i:05d}"
+        visit["visit_date"] = f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00Z"
+        resp = visit_api.lambda_handler({"path": "/api/save-visit", "body": json.dumps(visit)}, None)
+        assert resp["statusCode"] == 200, resp
+
+
+def call(path, body):
+    start = time.perf_counter()
+    resp = visit_api.lambda_handler({"path": path, "body": json.dumps(body)}, None)
+    elapsed = (time.perf_counter() - start) * 1000
+    assert resp["statusCode"] == 200, resp
+    return resp["body"], elapsed
+
+
+def scenario(label, fn, rounds):
+    timings, sizes, calls = [], [], []
+    for _ in range(rounds):
+        size, ms, n_calls = fn()
+        timings.append(ms)
+        sizes.append(size)
+        calls.append(n_calls)
+    print(f"  {label:<28} {statistics.mean(sizes) / 1024:>10,.1f} KB  "
+          f"{statistics.median(timings):>9,.1f} ms p50  {max(timings):>9,.1f} ms max  {calls[0]:>4} call(s)")
+
+
+def main():
+    n_visits = 500
+    latency_ms = 5.0
+    rounds = 20
+    if "--visits" in sys.argv:
+        n_visits = int(sys.argv[sys.argv.index("--visits") + 1])
+    if "--latency-ms" in sys.argv:
+        latency_ms = float(sys.argv[sys.argv.index("--latency-ms") + 1])
+
+    ddb = LocalDynamoDB()
+    ddb.create_table(visit_api.VISITS_TABLE, **VISITS_TABLE_SCHEMA)
+    visit_api.dynamodb = ddb
+    visit_api.CACHE_TTL = 0  # measure the queries themselves, not the list cache (bench_visit_cache.py)
+    seed(n_visits)
+    # Simulated network: fixed round trip + transfer time (~50 MB/s)
+    ddb.latency_ms, ddb.per_kb_ms = latency_ms, 0.02
+
+    def full_page():
+        body, ms = call("/api/doctor-visits", {"doctor_name": DOCTOR, "limit": 50})
+        return len(body), ms, 1
+
+    def summary_page():
+        body, ms = call("/api/doctor-visits", {"doctor_name": DOCTOR, "limit": 50, "fields": "summary"})
+        return len(body), ms, 1
+
+    def summary_all():
+        token, size, total_ms, n = None, 0, 0.0, 0
+        while True:
+            body, ms = call("/api/doctor-visits", {"doctor_name": DOCTOR, "limit": 100, "fields": "summary", "next_token": token})
+            size, total_ms, n = size + len(body), total_ms + ms, n + 1
+            token = json.loads(body)["next_token"]
+            if not token:
+                return size, total_ms, n
+
+    first = json.loads(call("/api/doctor-visits", {"doctor_name": DOCTOR, "limit": 1, "fields": "summary"})[0])["items"][0]
+
+    def detail():
+        body, ms = call("/api/visit-detail", {"pk": first["pk"], "sk": first["sk"]})
+        return len(body), ms, 1
+
+    hospital, day = first["hospital"], first["visit_date"][:10]
+
+    def today_filtered():
+        token, size, total_ms, n, todays = None, 0, 0.0, 0, []
+        while True:
+            body, ms = call("/api/doctor-visits", {"doctor_name": DOCTOR, "limit": 100, "fields": "summary", "next_token": token})
+            size, total_ms, n = size + len(body), total_ms + ms, n + 1
+            page = json.loads(body)
+            todays += [v for v in page["items"] if v["hospital"] == hospital and v["visit_date"].startswith(day)]
+            token = page["next_token"]
+            if not token:
+                return size, total_ms, n
+
+    def today_indexed():
+        body, ms = call("/api/doctor-day-visits", {"hospital": hospital, "doctor_name": DOCTOR, "day": day, "fields": "summary"})
+        return len(body), ms, 1
+
+    print(f"\nVisit query benchmark ({n_visits:,} visits, {latency_ms} ms simulated round trip)")
+    print("=" * 90)
+    scenario("full items, limit 50", full_page, rounds)
+    scenario("summary fields, limit 50", summary_page, rounds)
+    scenario("summary, page through all", summary_all, max(1, rounds // 4))
+    scenario("detail fetch (1 visit)", detail, rounds)
+    scenario("today, client-side filter", today_filtered, max(1, rounds // 4))
+    scenario("today, doctor-day-index", today_indexed, rounds)
+    table = ddb.Table(visit_api.VISITS_TABLE)
+    print("-" * 90)
+    print(f"  Stand-in totals: {table.stats['reads']:,} reads, {table.stats['rcu']:,.1f} RCU, "
+          f"{table.stats['bytes_returned'] / 1024:,.0f} KB returned")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+ClinicalSetu - Circuit Breaker Check
+Runs process_consultation against the offline Bedrock endpoint
+(scripts/fake_bedrock.py, nova-lite profile at 0.05x time) with outages
+injected into the fake (503 ServiceUnavailableException for the primary model
+or the Knowledge Base) and a DynamoDB cache that cannot be reached, then checks
+the breakers in backend/lambda/circuit_breaker.py.
+
+Checks:
+  1. state machine: opens at the error rate, fails fast, admits one half-open
+     probe at a time, re-opens on a failed probe, closes on a good one;
+     rejected requests (ValidationException) do not count as failures
+  2. primary model down: once its breaker opens, consultations go straight to
+     the fallback model without calling the primary (no retries, no back-off),
+     and the request trace carries the breaker counters and state
+  3. primary model back: the half-open probe closes the breaker
+  4. Knowledge Base down: trial matching stops calling retrieve_and_generate
+     once open and still completes (plain generation)
+  5. DynamoDB cache unreachable: once open, cache lookups are skipped
+  6. stats() reports every breaker
+
+Exits non-zero if a check fails.
+
+Usage:
+  python scripts/check_circuit_breakers.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import fake_bedrock  # noqa: E402
+
+fake_server, fake_url = fake_bedrock.serve("nova-lite", time_scale=0.05)
+os.environ.update(fake_bedrock.endpoint_env(fake_url))
+
+from botocore.exceptions import ClientError, EndpointConnectionError  # noqa: E402
+
+import circuit_breaker  # noqa: E402
+import process_consultation as pc  # noqa: E402
+import tracing  # noqa: E402
+
+failures = []
+
+
+def check(name, ok, detail=""):
+    print(f"  [{'PASS' if ok else 'FAIL'}] {name}" + (f" ({detail})" if detail else ""))
+    if not ok:
+        failures.append(name)
+
+
+def client_error(code, status):
+    return ClientError({"Error": {"Code": code, "Message": code},
+                        "ResponseMetadata": {"HTTPStatusCode": status}}, "Converse")
+
+
+def attempt(breaker, error=None):
+    """One guarded call; returns "ok", "failed" or "rejected"."""
+    try:
+        with breaker.guard():
+            if error:
+                raise error
+        return "ok"
+    except circuit_breaker.CircuitOpen:
+        return "rejected"
+    except Exception:
+        return "failed"
+
+
+class UnreachableDynamoDB:
+    """boto3 resource stand-in whose every call fails to connect."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def Table(self, name):
+        self.calls += 1
+        raise EndpointConnectionError(endpoint_url=f"https://dynamodb/{name}")
+
+
+def run(event):
+    start = time.perf_counter()
+    result = pc.lambda_handler({"body": json.dumps(event)}, None)
+    return result["statusCode"], json.loads(result["body"]), (time.perf_counter() - start) * 1000
+
+
+def unavailable():
+    return fake_server.fake.stats()["unavailable"]
+
+
+def check_state_machine():
+    b = circuit_breaker.Breaker("unit", window_s=10, min_calls=4, error_rate=0.5, open_s=0.2)
+    outage = client_error("ServiceUnavailableException", 503)
+    outcomes = [attempt(b, outage), attempt(b), attempt(b, outage)]  # below min_calls
+    still_closed = b.state == "closed"
+    outcomes += [attempt(b, outage)]  # 3 of 4 failed
+    check("opens at the error rate", still_closed and b.state == "open" and attempt(b) == "rejected",
+          f"{outcomes} -> {b.state}")
+
+    time.sleep(0.25)
+    gate, results = threading.Event(), []
+
+    def slow_probe():
+        with b.guard():
+            gate.wait(1)
+
+    probe = threading.Thread(target=slow_probe)
+    probe.start()
+    time.sleep(0.05)
+    results.append(attempt(b))  # second caller while the probe is in flight
+    gate.set()
+    probe.join()
+    check("one half-open probe at a time", results == ["rejected"] and b.state == "closed", f"then {b.state}")
+
+    for _ in range(4):
+        attempt(b, outage)
+    time.sleep(0.25)
+    reopened = attempt(b, outage) == "failed" and b.state == "open"
+    time.sleep(0.25)
+    closed = attempt(b) == "ok" and b.state == "closed"
+    check("failed probe re-opens, good probe closes", reopened and closed, json.dumps(b.stats()))
+
+    v = circuit_breaker.Breaker("validation", min_calls=2)
+    for _ in range(5):
+        attempt(v, client_error("ValidationException", 400))
+    check("rejected requests are not outages", v.state == "closed" and v.stats()["window_failures"] == 0)
+
+
+def main():
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        consultations = json.load(f)
+    pc.CACHE_ENABLED = False
+    pc.BASE_DELAY = 0.05
+    exporter = tracing.MemoryExporter()
+    tracing.set_exporter(exporter)
+
+    print("\nCircuit breaker check (fake Bedrock nova-lite at 0.05x)")
+    print("=" * 100)
+    check_state_machine()
+
+    # 2. Primary model down
+    primary = circuit_breaker.get(f"bedrock:{pc.MODEL_ID}")
+    primary.open_s = 3600
+    fake_server.fake.outages.add(pc.MODEL_ID)
+    status, _, first_ms = run(consultations[0])
+    failed_calls = unavailable()
+    exporter.clear()
+    status2, body, open_ms = run(consultations[1])
+    counters = next((r for r in exporter.records if "circuit_bedrock_us_amazon_nova_lite_v1_0_rejected" in r), {})
+    check("primary down: breaker opens during the first consultation", status == 200 and primary.state == "open",
+          f"{failed_calls} failed primary calls, {first_ms:.0f} ms")
+    check("open breaker: straight to the fallback", status2 == 200 and unavailable() == failed_calls
+          and all(s["status"] == "completed" for s in body["processing_steps"]) and open_ms < first_ms / 2,
+          f"{open_ms:.0f} ms, 0 primary calls")
+    check("breaker counters and state on the trace",
+          counters.get("circuit_bedrock_us_amazon_nova_lite_v1_0_rejected", 0) >= 5
+          and counters.get("circuit_bedrock_us_amazon_nova_lite_v1_0") == "open",
+          f"rejected {counters.get('circuit_bedrock_us_amazon_nova_lite_v1_0_rejected')}")
+
+    # 3. Primary back: the probe closes the breaker
+    fake_server.fake.outages.discard(pc.MODEL_ID)
+    primary.open_s = 0.0
+    status, body, ms = run(consultations[2])
+    check("recovered primary closes the breaker", status == 200 and primary.state == "closed"
+          and primary.counters["closed"] == 1, f"{ms:.0f} ms")
+
+    # 4. Knowledge Base down
+    kb = circuit_breaker.get(f"knowledge_base:{pc.KNOWLEDGE_BASE_ID}")
+    kb.open_s = 3600
+    fake_server.fake.outages.add("retrieve_and_generate")
+    trial_statuses, kb_start = [], unavailable()
+    for c in consultations * 2:
+        if kb.state == "open":
+            break
+        trial_statuses.append(run(c)[1]["processing_steps"][-1]["status"])
+    before_open = unavailable()
+    for c in consultations[:3]:
+        trial_statuses.append(run(c)[1]["processing_steps"][-1]["status"])
+    check("KB down: no RAG calls once open, trial matching still completes",
+          kb.state == "open" and unavailable() == before_open and set(trial_statuses) == {"completed"},
+          f"{before_open - kb_start} failed HTTP calls (SDK retries included) until open, "
+          f"then {unavailable() - before_open} over 3 consultations, "
+          f"trial steps {sorted(set(trial_statuses))}")
+    fake_server.fake.outages.clear()
+
+    # 5. DynamoDB cache unreachable
+    pc.CACHE_ENABLED = True
+    pc.dynamodb, ddb = UnreachableDynamoDB(), pc.dynamodb
+    cache = circuit_breaker.get(f"dynamodb:{pc.CACHE_TABLE}")
+    cache.open_s = 3600
+    for i in range(cache.min_calls + 2):
+        pc._get_cached_result(f"key-{i}")
+    check("DynamoDB down: cache lookups skipped once open",
+          cache.state == "open" and pc.dynamodb.calls == cache.min_calls,
+          f"{pc.dynamodb.calls} attempts for {cache.min_calls + 2} lookups")
+    pc.dynamodb, pc.CACHE_ENABLED = ddb, False
+
+    # 6. Stats
+    stats = circuit_breaker.stats()
+    check("stats() lists every breaker", {primary.name, kb.name, cache.name} <= set(stats)
+          and stats[kb.name]["state"] == "open", json.dumps({k: v["state"] for k, v in stats.items()}))
+
+    print("=" * 100)
+    if failures:
+        print(f"  {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("  all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+ClinicalSetu - Request Deadline Check
+Runs process_consultation against the offline Bedrock endpoint
+(scripts/fake_bedrock.py, nova-lite profile at 0.1x time) with a stand-in
+Lambda context whose remaining time is cut short, and the cache table on the
+in-memory DynamoDB stand-in. Budgets are derived from an unbounded run, and
+the deadline knobs are scaled to the fake's time (0.1x).
+
+Checks:
+  1. no deadline: all 5 steps complete, deadline_exceeded is false, result cached
+  2. budget for 4 steps: trial matching is dropped (skipped), the rest complete,
+     200 with deadline_exceeded, and the partial result is not cached
+  3. budget ends inside the patient summary: the step is abandoned at the
+     deadline, the response comes back within the budget with the SOAP note
+  4. budget shorter than the SOAP note: 504 with deadline_exceeded and the steps
+  5. Bedrock always throttled: retries and the fallback are cut to the budget
+     (DeadlineExceeded well before the unbounded retry schedule would end)
+  6. batch translation returns the languages that fit and marks the rest
+
+Exits non-zero if a check fails.
+
+Usage:
+  python scripts/check_deadlines.py
+"""
+
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import fake_bedrock  # noqa: E402
+
+TIME_SCALE = 0.1
+fake_server, fake_url = fake_bedrock.serve("nova-lite", time_scale=TIME_SCALE)
+os.environ.update(fake_bedrock.endpoint_env(fake_url))
+os.environ["KNOWLEDGE_BASE_ID"] = ""  # trial matching on the bundled trials only
+
+import deadline  # noqa: E402
+import process_consultation as pc  # noqa: E402
+from fakes import FakeContext  # noqa: E402
+from local_dynamodb import CACHE_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+
+failures = []
+
+
+def check(name, ok, detail=""):
+    print(f"  [{'PASS' if ok else 'FAIL'}] {name}" + (f" ({detail})" if detail else ""))
+    if not ok:
+        failures.append(name)
+
+
+def run(event, budget_ms=None):
+    """(status, body, ms) of one handler call; budget_ms None = no deadline."""
+    start = time.perf_counter()
+    result = pc.lambda_handler(event, FakeContext(budget_ms) if budget_ms is not None else None)
+    return result["statusCode"], json.loads(result["body"]), (time.perf_counter() - start) * 1000
+
+
+def statuses(body):
+    return {s["step"]: s["status"] for s in body["processing_steps"]}
+
+
+def cached(ddb, event):
+    key = pc._compute_cache_key(event["consultation_text"], event["patient"], event.get("referral_reason"))
+    return ddb.Table(pc.CACHE_TABLE).get_item(Key={"cache_key": key}).get("Item") is not None
+
+
+def main():
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        consultations = json.load(f)
+    ddb = LocalDynamoDB(latency_ms=1)
+    ddb.create_table(pc.CACHE_TABLE, **CACHE_TABLE_SCHEMA)
+    pc.dynamodb = ddb
+    deadline.SAFETY_MS = 1500 * TIME_SCALE
+    pc.MIN_ATTEMPT_MS = 2000 * TIME_SCALE
+    pc.BASE_DELAY, pc.MAX_DELAY = 1.0 * TIME_SCALE, 15.0 * TIME_SCALE
+    tolerance_ms = 150
+
+    print(f"\nDeadline check (fake Bedrock nova-lite at {TIME_SCALE}x, safety {deadline.SAFETY_MS:.0f} ms, "
+          f"min attempt {pc.MIN_ATTEMPT_MS:.0f} ms)")
+    print("=" * 100)
+
+    # 1. Unbounded
+    status, body, full_ms = run(consultations[0])
+    durations = {s["step"]: s["duration_ms"] for s in body["processing_steps"]}
+    check("no deadline: all steps complete", status == 200 and set(statuses(body).values()) == {"completed"}
+          and body["metadata"]["deadline_exceeded"] is False and cached(ddb, consultations[0]),
+          f"{full_ms:.0f} ms, steps {durations}")
+    first_four = sum(durations.values()) - durations["Clinical Trial Matching"]
+
+    # 2. Trial matching dropped first
+    event = consultations[1]
+    budget = first_four + durations["Clinical Trial Matching"] * 0.5
+    status, body, ms = run(event, budget)
+    steps = statuses(body)
+    check("trial matching dropped first", status == 200 and steps["Clinical Trial Matching"] == "skipped"
+          and list(steps.values()).count("completed") == 4 and body["metadata"]["deadline_exceeded"] is True
+          and body["trial_matches"]["error"] == "Deadline exceeded",
+          f"budget {budget:.0f} ms, {ms:.0f} ms, {steps}")
+    check("partial result not cached", not cached(ddb, event))
+
+    # 3. Deadline inside a step: the patient summary starts with room for an attempt, not for the step
+    budget = durations["SOAP Note Generation"] + max(pc.MIN_ATTEMPT_MS + 50,
+                                                      durations["Patient Summary Generation"] * 0.6)
+    pc.CACHE_ENABLED = False
+    status, body, ms = run(consultations[0], budget)
+    pc.CACHE_ENABLED = True
+    steps = statuses(body)
+    check("overrunning step abandoned at the deadline",
+          status == 200 and "deadline_exceeded" in steps.values() and steps["SOAP Note Generation"] == "completed"
+          and body["soap_note"] and ms < budget + tolerance_ms and body["metadata"]["deadline_exceeded"],
+          f"budget {budget:.0f} ms, {ms:.0f} ms, {steps}")
+
+    # 4. Not even the SOAP note fits
+    budget = durations["SOAP Note Generation"] * 0.5
+    status, body, ms = run(consultations[3], budget)
+    check("SOAP note past the deadline -> 504", status == 504 and body["deadline_exceeded"] is True
+          and body["processing_steps"] and ms < budget + tolerance_ms, f"budget {budget:.0f} ms, {ms:.0f} ms")
+
+    # 5. Budget-aware retries and fallback
+    profile = fake_server.fake.profile
+    fake_server.fake.profile = fake_bedrock.Profile(throttle_rate=1.0)
+    unbounded_ms = 2 * sum(min(pc.BASE_DELAY * 2 ** a + 0.5, pc.MAX_DELAY)  # jitter is up to 1 s
+                           for a in range(pc.MAX_RETRIES - 1)) * 1000
+    budget = 300
+    start = time.perf_counter()
+    try:
+        with deadline.scope(budget_ms=budget):
+            pc.invoke_bedrock("ping " + str(time.time()))
+        error = None
+    except Exception as e:
+        error = e
+    ms = (time.perf_counter() - start) * 1000
+    fake_server.fake.profile = profile
+    check("retries and fallback cut to the budget", isinstance(error, deadline.DeadlineExceeded)
+          and ms < budget + tolerance_ms, f"{ms:.0f} ms vs ~{unbounded_ms:.0f} ms unbounded: {error}")
+
+    # 6. Batch translation
+    summary = run(consultations[4])[1]["patient_summary"]
+    start = time.perf_counter()
+    run({"path": "/api/translate", "body": json.dumps({"summary": summary, "target_language": "Hindi"})})
+    one_ms = (time.perf_counter() - start) * 1000
+    budget = one_ms * 0.5
+    status, body, ms = run({"path": "/api/translate", "body": json.dumps(
+        {"summary": summary, "target_languages": ["Hindi", "Tamil", "Telugu"]})}, budget)
+    check("batch translation cut at the deadline", status == 200 and "Hindi" in body["translations"]
+          and body["errors"] == {"Tamil": "Deadline exceeded", "Telugu": "Deadline exceeded"}
+          and body["deadline_exceeded"] is True and ms < budget + tolerance_ms,
+          f"budget {budget:.0f} ms, {ms:.0f} ms, errors {body.get('errors')}")
+
+    print("=" * 100)
+    if failures:
+        print(f"  {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("  all checks passed")
+
+
+if __name__ == "__main__":
+    main()
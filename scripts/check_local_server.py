@@ -0,0 +1,167 @@
+"""
+ClinicalSetu - Local Server Check
+Starts backend/local_server.py in-process (2 admission slots, interactive queue
+of 2) with Bedrock
+on the offline endpoint (scripts/fake_bedrock.py, nova-lite profile at 0.1x time) and
+DynamoDB on the in-memory stand-in, then checks it over real HTTP.
+
+Checks:
+  1. /health answers in milliseconds while consultations occupy every worker
+  2. two consultations run concurrently (wall time well under 2x one)
+  3. keep-alive: several requests reuse one connection
+  4. backpressure: a burst beyond slots + queue gets 429 + Retry-After,
+     and the rest complete
+  5. visit_api and invoke_agent routes are served; unknown routes -> 404
+  6. oversized bodies -> 413; large responses are chunked
+  7. Accept: text/event-stream -> heartbeats while running, then the result
+
+Exits non-zero if a check fails.
+
+Usage:
+  python scripts/check_local_server.py
+"""
+
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import fake_bedrock  # noqa: E402
+
+fake_server, fake_url = fake_bedrock.serve("nova-lite", time_scale=0.1)
+os.environ.update(fake_bedrock.endpoint_env(fake_url))
+
+import admission  # noqa: E402
+import local_server  # noqa: E402
+import process_consultation as pc  # noqa: E402
+import visit_api  # noqa: E402
+from bench_visit_queries import load_seed_visits  # noqa: E402
+from local_dynamodb import VISITS_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+
+failures = []
+
+
+def check(name, ok, detail=""):
+    print(f"  [{'PASS' if ok else 'FAIL'}] {name}" + (f" ({detail})" if detail else ""))
+    if not ok:
+        failures.append(name)
+
+
+def request(port, method, path, body=None, headers=None, conn=None):
+    """(status, headers, body text, ms). Reuses conn when given."""
+    own = conn is None
+    conn = conn or http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    start = time.perf_counter()
+    conn.request(method, path, body=data, headers={"Content-Type": "application/json", **(headers or {})})
+    resp = conn.getresponse()
+    text = resp.read().decode("utf-8")
+    ms = (time.perf_counter() - start) * 1000
+    if own:
+        conn.close()
+    return resp.status, dict(resp.getheaders()), text, ms
+
+
+def main():
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        consultations = json.load(f)
+    pc.CACHE_ENABLED = False  # every consultation runs the model
+    ddb = LocalDynamoDB(latency_ms=2)
+    ddb.create_table(visit_api.VISITS_TABLE, **VISITS_TABLE_SCHEMA)
+    visit_api.dynamodb = ddb
+
+    lanes = admission.default_lanes()
+    lanes["interactive"].max_queue = 2
+    server = local_server.make_server("127.0.0.1", 0, controller=admission.Controller(2, lanes))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    print(f"\nLocal server check (port {port}, 2 slots, interactive queue 2, fake Bedrock nova-lite)")
+    print("=" * 100)
+
+    status, _, _, single_ms = request(port, "POST", "/api/process", consultations[0])
+    check("consultation served", status == 200, f"{single_ms:.0f} ms")
+
+    # 1-2. Two consultations in flight; /health stays fast
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        start = time.perf_counter()
+        futures = [pool.submit(request, port, "POST", "/api/process", c) for c in consultations[:2]]
+        time.sleep(single_ms / 4000)
+        health = [request(port, "GET", "/health") for _ in range(5)]
+        results = [f.result() for f in futures]
+        pair_ms = (time.perf_counter() - start) * 1000
+    stats = json.loads(health[0][2])["admission"]
+    check("/health fast while busy", max(h[3] for h in health) < 100 and stats["running"] == 2,
+          f"max {max(h[3] for h in health):.1f} ms, {stats['running']} running")
+    check("consultations run concurrently", all(r[0] == 200 for r in results) and pair_ms < 1.6 * single_ms,
+          f"2 in {pair_ms:.0f} ms vs 1 in {single_ms:.0f} ms")
+
+    # 3. Keep-alive
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    request(port, "GET", "/health", conn=conn)
+    sock = conn.sock
+    statuses = [request(port, "GET", "/health", conn=conn)[0] for _ in range(3)]
+    check("keep-alive reuses the connection", conn.sock is sock and statuses == [200] * 3)
+    conn.close()
+
+    # 4. Backpressure: 2 running + 2 queued; the rest are shed
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        burst = list(pool.map(lambda c: request(port, "POST", "/api/process", c),
+                              (consultations * 2)[:8]))
+    ok = sum(1 for r in burst if r[0] == 200)
+    shed = [r for r in burst if r[0] == 429]
+    check("burst beyond the queue is shed", ok >= 4 and len(shed) >= 1 and ok + len(shed) == 8 and
+          all(r[1].get("Retry-After") for r in shed), f"{ok} served, {len(shed)} x 429")
+    stats = json.loads(request(port, "GET", "/health")[2])["admission"]["lanes"]["interactive"]
+    check("rejections counted", stats["shed_queue_full"] + stats["shed_deadline"] == len(shed),
+          f"queue full {stats['shed_queue_full']}, deadline {stats['shed_deadline']}")
+
+    # 5. Other handlers
+    visit = dict(load_seed_visits()[0], consultation_id="CHECK-1")
+    status_save = request(port, "POST", "/api/save-visit", visit)[0]
+    status_list, _, text, _ = request(port, "POST", "/api/patient-visits", {"phone_number": visit["phone_number"]})
+    check("visit_api routes", status_save == 200 and status_list == 200 and json.loads(text)["items"],
+          f"save {status_save}, list {status_list}")
+    status, _, text, ms = request(port, "POST", "/api/process-agent", consultations[1])
+    check("invoke_agent route", status == 200 and "soap_note" in json.loads(text), f"{ms:.0f} ms")
+    check("unknown route -> 404", request(port, "POST", "/api/nope", {})[0] == 404)
+
+    # 6. Limits and chunked responses
+    local_server.MAX_BODY_BYTES, max_body = 1024, local_server.MAX_BODY_BYTES
+    check("oversized body -> 413", request(port, "POST", "/api/process", consultations[0])[0] == 413)
+    local_server.MAX_BODY_BYTES = max_body
+    local_server.CHUNK_BYTES, chunk = 1024, local_server.CHUNK_BYTES
+    status, headers, text, _ = request(port, "POST", "/api/process", consultations[2])
+    check("large response chunked", status == 200 and headers.get("Transfer-Encoding") == "chunked"
+          and json.loads(text)["soap_note"], f"{len(text)} bytes")
+    local_server.CHUNK_BYTES = chunk
+
+    # 7. Server-sent events
+    local_server.HEARTBEAT_S = 0.05
+    status, headers, text, ms = request(port, "POST", "/api/process", consultations[3],
+                                        headers={"Accept": "text/event-stream"})
+    events = [block.split("\n") for block in text.strip().split("\n\n")]
+    names = [lines[0].split(": ", 1)[1] for lines in events]
+    result = json.loads(events[-1][1].split(": ", 1)[1])
+    check("event stream", status == 200 and headers.get("Content-Type") == "text/event-stream"
+          and names[-1] == "result" and names.count("heartbeat") >= 2 and result["statusCode"] == 200,
+          f"{names.count('heartbeat')} heartbeats over {ms:.0f} ms")
+
+    server.shutdown()
+    print("=" * 100)
+    if failures:
+        print(f"  {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("  all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+ClinicalSetu - Translation Pre-warm Check
+Local end-to-end check of pre-warmed translations in process_consultation with
+a stubbed model (fixed latency per call, no AWS calls) and the cache table on
+the in-memory DynamoDB stand-in (scripts/local_dynamodb.py).
+
+Checks:
+  1. /api/process latency is unchanged with pre-warming on (background work only)
+  2. after the pre-warm, /api/translate for a configured language is a cache read,
+     both by summary and by consultation_id alone
+  3. inside Lambda the work goes to an asynchronous self-invocation, and that
+     invocation stores the translations
+  4. an unconfigured language still translates on demand; consultation_id alone -> 404
+
+Exits non-zero if a check fails.
+
+Usage:
+  python scripts/check_prewarm_translations.py
+  python scripts/check_prewarm_translations.py --model-ms 200
+"""
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import process_consultation as pc  # noqa: E402
+from bench_visit_queries import load_seed_visits  # noqa: E402
+from fakes import FakeContext, stub_model  # noqa: E402
+from local_dynamodb import CACHE_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+from translation_cache import TranslationCache  # noqa: E402
+from translation_memory import PhraseMemory  # noqa: E402
+
+LANGUAGES = ["Hindi", "Bengali", "Tamil"]
+
+
+def new_container():
+    ddb = LocalDynamoDB(latency_ms=2)
+    ddb.create_table(pc.CACHE_TABLE, **CACHE_TABLE_SCHEMA)
+    pc.dynamodb = ddb
+    pc._translation_cache = TranslationCache(table_factory=pc._get_cache_table)
+    pc._phrase_memory = PhraseMemory(table_factory=pc._get_cache_table)
+
+
+def process(consultation, context=None):
+    start = time.perf_counter()
+    resp = pc.lambda_handler({"path": "/api/process", "body": json.dumps(consultation)}, context)
+    assert resp["statusCode"] == 200, resp["body"]
+    return (time.perf_counter() - start) * 1000, json.loads(resp["body"])
+
+
+def translate(body):
+    start = time.perf_counter()
+    resp = pc.lambda_handler({"path": "/api/translate", "body": json.dumps(body)}, None)
+    return (time.perf_counter() - start) * 1000, resp["statusCode"], json.loads(resp["body"])
+
+
+def consultations(n):
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        base = json.load(f)
+    out = []
+    for i in range(n):
+        c = dict(base[i % len(base)])
+        c["id"] = f"PREWARM-{i}"
+        c["consultation_text"] = f"{c['consultation_text']} (run {i})"  # defeat the consultation cache
+        out.append(c)
+    return out
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def check(label, ok, detail=""):
+    print(f"  [{'PASS' if ok else 'FAIL'}] {label}{'  ' + detail if detail else ''}")
+    return ok
+
+
+class FakeLambdaClient:
+    """Delivers Event invocations to process_consultation.lambda_handler on a separate thread."""
+
+    def __init__(self):
+        self.invocations = []
+        self.threads = []
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        event = json.loads(Payload)
+        self.invocations.append((FunctionName, InvocationType, event))
+        thread = threading.Thread(target=pc.lambda_handler, args=(event, None))
+        thread.start()
+        self.threads.append(thread)
+        return {"StatusCode": 202}
+
+
+def main():
+    model_ms = 100.0
+    if "--model-ms" in sys.argv:
+        model_ms = float(sys.argv[sys.argv.index("--model-ms") + 1])
+    n = 8
+
+    summary = load_seed_visits()[0]["patient_summary"]
+    calls = stub_model(pc, model_ms, generate=summary)
+    pc.CACHE_ENABLED = True
+    results = []
+
+    print(f"\nTranslation pre-warm check ({model_ms:.0f} ms stub model, {n} consultations, "
+          f"languages {', '.join(LANGUAGES)})")
+    print("=" * 100)
+
+    # 1. Main path latency, pre-warm off vs on
+    new_container()
+    pc.PREWARM_LANGUAGES = ""
+    off = [process(c)[0] for c in consultations(n)]
+    new_container()
+    pc.PREWARM_LANGUAGES = ",".join(LANGUAGES)
+    on, bodies = [], []
+    for c in consultations(n):
+        ms, body = process(c)
+        on.append(ms)
+        bodies.append(body)
+    p50_off, p50_on = statistics.median(off), statistics.median(on)
+    print(f"  /api/process p50: pre-warm off {p50_off:.0f} ms, on {p50_on:.0f} ms")
+    results.append(check("main path latency unchanged", p50_on <= p50_off * 1.10 + 5,
+                         f"({p50_on - p50_off:+.0f} ms)"))
+    results.append(check("metadata lists pre-warmed languages",
+                         bodies[-1]["metadata"]["prewarmed_languages"] == LANGUAGES))
+
+    # 2. Translate after pre-warm: cache reads
+    cid = bodies[-1]["metadata"]["consultation_id"]
+    ready = wait_for(lambda: all(
+        pc._translation_cache.get_for_consultation(cid, lang, pc.TRANSLATION_PROMPT_VERSION) for lang in LANGUAGES))
+    results.append(check("pre-warm finished in background", ready))
+    before = calls["translate"]
+    by_summary = [translate({"summary": summary, "target_language": lang}) for lang in LANGUAGES]
+    by_id = [translate({"consultation_id": cid, "target_language": lang}) for lang in LANGUAGES]
+    tiers = [body["metrics"]["cache"] for _, _, body in by_summary + by_id]
+    worst = max(ms for ms, _, _ in by_summary + by_id)
+    results.append(check("translate is a cache read (no model calls)", calls["translate"] == before,
+                         f"(tiers {tiers}, slowest {worst:.1f} ms)"))
+    results.append(check("consultation_id lookup served pre-warmed",
+                         all(body["metrics"]["cache"][lang] == "prewarmed"
+                             for (_, _, body), lang in zip(by_id, LANGUAGES))))
+
+    # 3. Lambda path: asynchronous self-invocation
+    new_container()
+    fake_lambda = FakeLambdaClient()
+    pc.lambda_client = fake_lambda
+    ms, body = process(consultations(n + 1)[-1], FakeContext())
+    cid = body["metadata"]["consultation_id"]
+    sent = bool(fake_lambda.invocations)  # sent on the request thread, before the response
+    delivered = sent and wait_for(lambda: all(not t.is_alive() for t in fake_lambda.threads))
+    _, _, event = fake_lambda.invocations[0] if fake_lambda.invocations else (None, None, {})
+    results.append(check("Lambda context -> Event self-invocation sent before the response",
+                         delivered and fake_lambda.invocations[0][1] == "Event"
+                         and event.get("languages") == LANGUAGES, f"({ms:.0f} ms main path)"))
+    _, status, body = translate({"consultation_id": cid, "target_language": LANGUAGES[0]})
+    results.append(check("async invocation stored translations",
+                         status == 200 and body["metrics"]["cache"][LANGUAGES[0]] == "prewarmed"))
+
+    # 4. Unconfigured language
+    ms, status, body = translate({"summary": summary, "target_language": "Marathi"})
+    results.append(check("unconfigured language translated on demand",
+                         status == 200 and body["metrics"]["cache"]["Marathi"] == "miss", f"({ms:.0f} ms)"))
+    _, status, _ = translate({"consultation_id": cid, "target_language": "Telugu"})
+    results.append(check("consultation_id only, not pre-warmed -> 404", status == 404))
+
+    print(f"\n  {sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+ClinicalSetu - Single-Flight Check
+Sends identical consultations at the same time to process_consultation against
+the offline Bedrock endpoint (scripts/fake_bedrock.py, nova-lite profile at
+0.05x time) with the cache table on the in-memory DynamoDB stand-in. A second
+copy of the module, loaded under another name, plays a second Lambda container
+sharing the table.
+
+Checks:
+  1. in-process: 4 concurrent identical requests run the pipeline once (model
+     calls of one run), all get the same outputs, 3 are marked coalesced
+  2. across containers: the second container's request waits on the lease and
+     is answered from the first container's cached result (no model calls)
+  3. lease released without a result: the waiting request takes over and
+     generates
+  4. expired lease (crashed holder): the waiting request takes over after it
+  5. a lease held past the waiting request's deadline: 504 within the budget
+  6. the lease item is removed once the result is cached
+  7. lease held but unreadable (get_item failing): the waiting request polls at
+     the poll interval instead of spinning, and finishes within its deadline
+
+Exits non-zero if a check fails.
+
+Usage:
+  python scripts/check_single_flight.py
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import fake_bedrock  # noqa: E402
+
+fake_server, fake_url = fake_bedrock.serve("nova-lite", time_scale=0.05)
+os.environ.update(fake_bedrock.endpoint_env(fake_url))
+os.environ["KNOWLEDGE_BASE_ID"] = ""  # trial matching on the bundled trials only
+
+import circuit_breaker  # noqa: E402
+import process_consultation as pc  # noqa: E402
+import single_flight  # noqa: E402
+import tracing  # noqa: E402
+from fakes import FakeContext  # noqa: E402
+from local_dynamodb import CACHE_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+
+failures = []
+
+
+def check(name, ok, detail=""):
+    print(f"  [{'PASS' if ok else 'FAIL'}] {name}" + (f" ({detail})" if detail else ""))
+    if not ok:
+        failures.append(name)
+
+
+def second_container():
+    """Another copy of process_consultation: its own single-flight group and lease owner."""
+    spec = importlib.util.spec_from_file_location(
+        "process_consultation_2", os.path.join(PROJECT_ROOT, "backend", "lambda", "process_consultation.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def model_calls():
+    return sum(fake_server.fake.stats()["requests"].values())
+
+
+def fresh_cache(*modules):
+    ddb = LocalDynamoDB(latency_ms=1)
+    ddb.create_table(pc.CACHE_TABLE, **CACHE_TABLE_SCHEMA)
+    for module in modules:
+        module.dynamodb = ddb
+    return ddb
+
+
+def run(module, event, budget_ms=None):
+    start = time.perf_counter()
+    result = module.lambda_handler(event, FakeContext(budget_ms) if budget_ms is not None else None)
+    return result["statusCode"], json.loads(result["body"]), (time.perf_counter() - start) * 1000
+
+
+def concurrently(*calls):
+    """Start each (delay_s, fn) on its own thread; returns their results in order."""
+    results = [None] * len(calls)
+
+    def target(i, delay_s, fn):
+        time.sleep(delay_s)
+        results[i] = fn()
+
+    threads = [threading.Thread(target=target, args=(i, d, fn)) for i, (d, fn) in enumerate(calls)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class UnreadableLeases:
+    """DynamoDB stand-in whose get_item fails for lease items (counted); everything else passes through."""
+
+    def __init__(self, ddb):
+        self.ddb = ddb
+        self.lease_reads = 0
+
+    def Table(self, name):
+        outer, table = self, self.ddb.Table(name)
+
+        class Table:
+            def __getattr__(self, attr):
+                return getattr(table, attr)
+
+            def get_item(self, Key, **kwargs):
+                if Key["cache_key"].startswith("lease#"):
+                    outer.lease_reads += 1
+                    raise RuntimeError("lease read failed")
+                return table.get_item(Key=Key, **kwargs)
+        return Table()
+
+
+def key_of(event):
+    return pc._compute_cache_key(event["consultation_text"], event["patient"], event.get("referral_reason"))
+
+
+def main():
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        consultations = json.load(f)
+    single_flight.POLL_S = 0.05
+    exporter = tracing.MemoryExporter()
+    tracing.set_exporter(exporter)
+    pc2 = second_container()
+
+    print("\nSingle-flight check (fake Bedrock nova-lite at 0.05x)")
+    print("=" * 100)
+
+    # Model calls of one pipeline run
+    fresh_cache(pc)
+    before = model_calls()
+    _, _, one_ms = run(pc, consultations[0])
+    per_run = model_calls() - before
+
+    # 1. In-process
+    fresh_cache(pc)
+    exporter.clear()
+    before = model_calls()
+    results = concurrently(*[(0.01 * i, lambda: run(pc, consultations[0])) for i in range(4)])
+    calls = model_calls() - before
+    coalesced = sum(r.get("consultation_coalesced", 0) for r in exporter.records)
+    check("in-process: one pipeline for 4 identical requests",
+          calls == per_run and all(r[0] == 200 for r in results)
+          and len({json.dumps(r[1]["soap_note"], sort_keys=True) for r in results}) == 1 and coalesced == 3,
+          f"{calls} model calls (one run: {per_run}), {coalesced} coalesced, "
+          f"{', '.join(f'{r[2]:.0f}' for r in results)} ms")
+
+    # 2. Across containers
+    ddb = fresh_cache(pc, pc2)
+    before = model_calls()
+    (s1, b1, ms1), (s2, b2, ms2) = concurrently((0, lambda: run(pc, consultations[1])),
+                                                (0.05, lambda: run(pc2, consultations[1])))
+    calls = model_calls() - before
+    check("across containers: second request served from the first's result",
+          s1 == s2 == 200 and calls == per_run and b2["metadata"].get("coalesced") is True
+          and b2["soap_note"] == b1["soap_note"],
+          f"{calls} model calls, first {ms1:.0f} ms, second {ms2:.0f} ms")
+
+    # 6. Lease removed after the result is cached
+    check("lease item removed", ddb.Table(pc.CACHE_TABLE).get_item(
+        Key=single_flight.Lease.item_key(key_of(consultations[1]))).get("Item") is None)
+
+    # 3. Lease released without a result
+    fresh_cache(pc, pc2)
+    other = single_flight.Lease(pc2._get_cache_table, breaker=f"dynamodb:{pc.CACHE_TABLE}")
+    key = key_of(consultations[2])
+    held = other.acquire(key, hold_s=60)
+    release_after = 0.3
+    (status, body, ms), _ = concurrently((0, lambda: run(pc, consultations[2])),
+                                         (release_after, lambda: other.release(key)))
+    check("released without a result: waiting request generates",
+          held == "acquired" and status == 200 and not body["metadata"].get("coalesced")
+          and ms >= release_after * 1000, f"{ms:.0f} ms (released after {release_after * 1000:.0f} ms)")
+
+    # 4. Expired lease
+    fresh_cache(pc, pc2)
+    key = key_of(consultations[3])
+    held = other.acquire(key, hold_s=0.3)
+    status, body, ms = run(pc, consultations[3])
+    check("expired lease taken over", held == "acquired" and status == 200 and ms >= 300
+          and not body["metadata"].get("coalesced"), f"{ms:.0f} ms")
+
+    # 5. Lease held past the deadline
+    fresh_cache(pc, pc2)
+    key = key_of(consultations[4])
+    other.acquire(key, hold_s=60)
+    budget = 400
+    status, body, ms = run(pc, consultations[4], budget_ms=budget)
+    check("held past the deadline -> 504", status == 504 and ms < budget + 150,
+          f"budget {budget} ms, {ms:.0f} ms: {body.get('error')}")
+    other.release(key)
+
+    # 7. Lease unreadable
+    ddb = fresh_cache(pc, pc2)
+    key = key_of(consultations[5])
+    other.acquire(key, hold_s=60)
+    flaky = pc.dynamodb = UnreadableLeases(ddb)
+    status, body, ms = run(pc, consultations[5], budget_ms=budget)
+    polls = budget / 1000 / single_flight.POLL_S
+    check("unreadable lease: polled, not spun", status in (200, 504) and ms < budget + 150
+          and flaky.lease_reads <= polls + 2,
+          f"{status} in {ms:.0f} ms, {flaky.lease_reads} lease reads (~{polls:.0f} polls in the budget)")
+    other.release(key)
+    circuit_breaker.reset()
+
+    print("=" * 100)
+    print(f"  one pipeline run: {one_ms:.0f} ms, {per_run} model calls")
+    if failures:
+        print(f"  {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("  all checks passed")
+
+
+if __name__ == "__main__":
+    main()
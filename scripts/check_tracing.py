@@ -0,0 +1,174 @@
+"""
+ClinicalSetu - Tracing Check
+Runs invoke_agent (with the tool executor Lambda running inside the fake agent)
+and process_consultation against the offline Bedrock endpoint
+(scripts/fake_bedrock.py, throttled profile) with tracing on the in-memory
+exporter, then checks the exported records.
+
+Checks:
+  1. invoke_agent and every tool executor invocation share one trace ID, passed
+     through Bedrock Agent sessionAttributes, and the response carries X-Trace-Id
+  2. tool executor traces have a span per tool and per Converse call
+  3. /api/process has a span per step with the Converse calls nested under them,
+     and bedrock_throttles matches the throttles the fake served
+  4. every record is well-formed CloudWatch EMF
+  5. a warm-up ping is exported as WarmupDuration (property warmup), not as
+     RequestDuration
+  6. with the exporter off, handlers run untraced and nothing is recorded
+
+Exits non-zero if a check fails.
+
+Usage:
+  python scripts/check_tracing.py
+  python scripts/check_tracing.py --print   # also dump the records of one request
+"""
+
+import json
+import numbers
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import fake_bedrock  # noqa: E402
+
+server, url = fake_bedrock.serve("throttled", time_scale=0.02, agent_tools="local")
+os.environ.update(fake_bedrock.endpoint_env(url))
+
+import invoke_agent  # noqa: E402
+import process_consultation as pc  # noqa: E402
+import tracing  # noqa: E402
+
+failures = []
+
+
+def check(name, ok, detail=""):
+    print(f"  [{'PASS' if ok else 'FAIL'}] {name}" + (f" ({detail})" if detail else ""))
+    if not ok:
+        failures.append(name)
+
+
+def spans(records, kind=None):
+    found = []
+    for r in records:
+        if "Span" in r and (kind is None or r["Kind"] == kind):
+            found.extend({"name": r["Span"], **s} for s in r["spans"])
+    return found
+
+
+def by_function(records, function):
+    return [r for r in records if r["Function"] == function]
+
+
+def emf_problems(record):
+    meta = record.get("_aws", {})
+    if not isinstance(meta.get("Timestamp"), int):
+        return "missing Timestamp"
+    for directive in meta.get("CloudWatchMetrics", []):
+        if not directive.get("Namespace"):
+            return "missing Namespace"
+        for dimension_set in directive["Dimensions"]:
+            if any(not isinstance(record.get(d), str) for d in dimension_set):
+                return f"dimension not a string member: {dimension_set}"
+        for metric in directive["Metrics"]:
+            value = record.get(metric["Name"])
+            values = value if isinstance(value, list) else [value]
+            if not values or len(values) > tracing.MAX_EMF_VALUES or \
+                    not all(isinstance(v, numbers.Number) for v in values):
+                return f"bad value for {metric['Name']}: {value!r}"
+    return None if meta.get("CloudWatchMetrics") else "no CloudWatchMetrics"
+
+
+def main():
+    with open(os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")) as f:
+        consultations = json.load(f)
+    exporter = tracing.MemoryExporter()
+    tracing.set_exporter(exporter)
+    pc.CACHE_ENABLED = False  # every step calls the model
+    pc.BASE_DELAY = 0.01
+
+    print("\nTracing check (fake Bedrock, throttled profile)")
+    print("=" * 100)
+
+    # 1-2. Multi-agent: invoke_agent -> fake supervisor -> agent_tool_executor
+    response = invoke_agent.lambda_handler({"body": json.dumps(consultations[0])}, None)
+    records = list(exporter.records)
+    invoker = by_function(records, "invoke_agent")
+    tools = by_function(records, "agent_tool_executor")
+    trace_id = invoker[0]["trace_id"] if invoker else None
+    tool_requests = [r for r in tools if "RequestDuration" in r]
+    check("agent request succeeded", response["statusCode"] == 200, response["statusCode"])
+    check("X-Trace-Id header", response["headers"].get("X-Trace-Id") == trace_id)
+    check("tool executor invoked", len(tool_requests) >= 4, f"{len(tool_requests)} invocations")
+    check("one trace ID across Lambdas", {r["trace_id"] for r in records} == {trace_id}, trace_id)
+    root = next(r["span_id"] for r in invoker if "RequestDuration" in r)
+    check("tool invocations parented to invoke_agent", all(r.get("parent_span_id") == root for r in tool_requests))
+    check("agent stream span", any(s["name"].startswith("bedrock-agent-runtime.InvokeAgent") for s in spans(invoker)))
+    tool_spans = {s["name"] for s in spans(tools, "tool")}
+    converse = spans(tools, "bedrock")
+    check("tool spans", {"generate_soap", "generate_patient_summary"} <= tool_spans, ", ".join(sorted(tool_spans)))
+    check("Converse spans in tool executor", any(s["name"] == "bedrock-runtime.Converse" for s in converse),
+          f"{len(converse)} spans")
+    if "--print" in sys.argv:
+        print(json.dumps(invoker, indent=2))
+
+    # 3. Monolithic pipeline with throttling
+    exporter.clear()
+    throttled_before = server.fake.counters["throttled"]
+    traces = []
+    for consultation in consultations[:3]:
+        response = pc.lambda_handler({"path": "/api/process", "body": json.dumps(consultation)}, None)
+        traces.append(response["headers"].get("X-Trace-Id"))
+    records = list(exporter.records)
+    step_spans = spans(records, "step")
+    step_ids = {s["span_id"] for s in step_spans}
+    converse = [s for s in spans(records, "bedrock") if s["name"] == "bedrock-runtime.Converse"]
+    counters = {}
+    for r in records:
+        if "RequestDuration" not in r and "Span" not in r:
+            for name in r["_aws"]["CloudWatchMetrics"][0]["Metrics"]:
+                counters[name["Name"]] = counters.get(name["Name"], 0) + r[name["Name"]]
+    throttled = server.fake.counters["throttled"] - throttled_before
+    check("one trace per request", len({r["trace_id"] for r in records}) == 3 and set(traces) == {
+        r["trace_id"] for r in records})
+    check("step spans", len(step_spans) == 15, f"{len(step_spans)} spans")
+    check("Converse spans nested under steps", converse and all(s["parent_id"] in step_ids for s in converse),
+          f"{len(converse)} spans")
+    check("consultation cache misses counted", counters.get("consultation_cache_misses") == 3)
+    check("bedrock_throttles matches the fake", counters.get("bedrock_throttles", 0) == throttled,
+          f"{counters.get('bedrock_throttles', 0)} counted, {throttled} served")
+
+    # 4. EMF structure
+    exporter.clear()
+    invoke_agent.lambda_handler({"body": json.dumps(consultations[1])}, None)
+    pc.lambda_handler({"path": "/api/process", "body": json.dumps(consultations[1])}, None)
+    problems = [p for p in map(emf_problems, exporter.records) if p]
+    check("records are valid EMF", not problems and exporter.records,
+          problems[0] if problems else f"{len(exporter.records)} records")
+
+    # 5. Warm-up ping
+    exporter.clear()
+    pc.lambda_handler({"warmup": True}, None)
+    requests = [r for r in exporter.records if "RequestDuration" in r or "WarmupDuration" in r]
+    check("warm-up kept out of RequestDuration",
+          len(requests) == 1 and "RequestDuration" not in requests[0] and requests[0].get("warmup") is True,
+          f"{len(requests)} request record(s)")
+
+    # 6. Exporter off
+    exporter.clear()
+    tracing.set_exporter(None)
+    response = pc.lambda_handler({"path": "/api/process", "body": json.dumps(consultations[2])}, None)
+    check("untraced request", response["statusCode"] == 200 and "X-Trace-Id" not in response["headers"]
+          and not exporter.records)
+
+    print("=" * 100)
+    if failures:
+        print(f"  {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("  all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,667 @@
+"""
+ClinicalSetu - Fake Bedrock Runtime
+Local HTTP stand-in for the Bedrock endpoints the Lambdas call, speaking the
+real wire protocol so unmodified boto3 clients can point at it through the
+standard endpoint overrides:
+
+  AWS_ENDPOINT_URL_BEDROCK_RUNTIME=http://localhost:4010
+  AWS_ENDPOINT_URL_BEDROCK_AGENT_RUNTIME=http://localhost:4010
+
+Implements:
+  bedrock-runtime        converse, converse_stream (event stream, paced by tokens/sec)
+  bedrock-agent-runtime  invoke_agent (chunk + trace event stream), retrieve,
+                         retrieve_and_generate
+
+Answers are canned JSON derived from data/synthetic_consultations.json: the
+output type is read from the prompt's OUTPUT FORMAT section, the consultation
+from the patient name in the prompt, and the prompt's example structure is
+filled with that consultation's details (seed visit summaries are used for
+the patient summary where scripts/seed_visits.py has one). invoke_agent plays
+the supervisor: one action group call per tool, either canned or executed by
+agent_tool_executor.lambda_handler in this process (--agent-tools local).
+
+Profiles set the latency distribution (log-normal time to first token plus
+output tokens / tokens-per-second), the throttle rate and a concurrency quota
+above which requests are throttled. --time-scale shrinks every sleep for quick
+load runs. Counters: GET /_stats. Outages: add a model ID or an operation name
+("retrieve_and_generate", "retrieve", "invoke_agent") to server.fake.outages
+and those calls fail with 503 ServiceUnavailableException until removed.
+
+Usage:
+  python scripts/fake_bedrock.py --port 4010 --profile nova-lite
+  python scripts/fake_bedrock.py --profile throttled --load 40 --concurrency 8
+  python scripts/fake_bedrock.py --profile nova-lite --time-scale 0.1 --load 24 --agent-tools local
+
+In Python (benchmarks):
+  from fake_bedrock import serve, endpoint_env
+  server, url = serve("nova-lite", time_scale=0.1)
+  os.environ.update(endpoint_env(url))   # before importing the handlers
+"""
+
+import base64
+import json
+import math
+import os
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from bench_visit_queries import load_seed_visits  # noqa: E402
+
+OUTPUTS = ["soap_note", "patient_summary", "referral_letter", "discharge_summary", "trial_matching"]
+# Key in a prompt's OUTPUT FORMAT section -> output type (checked in this order)
+OUTPUT_MARKERS = [
+    ('"trial_matches"', "trial_matching"),
+    ('"discharge_summary"', "discharge_summary"),
+    ('"referral_letter"', "referral_letter"),
+    ('"greeting"', "patient_summary"),
+    ('"subjective"', "soap_note"),
+]
+AGENT_TOOLS = [
+    ("SOAPAgent", "generate_soap", "soap_note"),
+    ("SummaryAgent", "generate_patient_summary", "patient_summary"),
+    ("ReferralAgent", "generate_referral", "referral_letter"),
+    ("ReferralAgent", "generate_discharge", "discharge_summary"),
+    ("TrialAgent", "search_trials", "trial_matching"),
+]
+
+
+@dataclass(frozen=True)
+class Profile:
+    ttft_ms: float = 0.0  # median time to first token
+    ttft_sigma: float = 0.0  # log-normal spread
+    tokens_per_sec: float = 0.0  # 0 = instant
+    throttle_rate: float = 0.0
+    max_concurrency: int = 0  # in-flight model calls above this are throttled (0 = unlimited)
+    retrieve_ms: float = 0.0
+    agent_step_ms: float = 0.0  # supervisor orchestration overhead per tool call
+
+
+PROFILES = {
+    "instant": Profile(),
+    "nova-lite": Profile(ttft_ms=350, ttft_sigma=0.35, tokens_per_sec=120, max_concurrency=50,
+                         retrieve_ms=180, agent_step_ms=600),
+    "nova-micro": Profile(ttft_ms=250, ttft_sigma=0.3, tokens_per_sec=200, max_concurrency=50,
+                          retrieve_ms=180, agent_step_ms=500),
+    "throttled": Profile(ttft_ms=350, ttft_sigma=0.35, tokens_per_sec=120, throttle_rate=0.15,
+                         max_concurrency=8, retrieve_ms=180, agent_step_ms=600),
+    "degraded": Profile(ttft_ms=1200, ttft_sigma=0.6, tokens_per_sec=40, throttle_rate=0.05,
+                        max_concurrency=20, retrieve_ms=900, agent_step_ms=1500),
+}
+
+
+def tokens(text):
+    return max(1, math.ceil(len(text) / 4))
+
+
+# ----- canned outputs -----
+
+def _examples():
+    examples = {}
+    for name in OUTPUTS:
+        with open(os.path.join(PROJECT_ROOT, "backend", "prompts", f"{name}.txt"), encoding="utf-8") as f:
+            template = f.read()
+        raw = template[template.index("{{", template.index("OUTPUT FORMAT")):]
+        examples[name] = raw.replace("{{", "{").replace("}}", "}")
+    return examples
+
+
+def _first_sentence(text):
+    return re.split(r"(?<=[.!?])\s", text.strip(), 1)[0]
+
+
+def _trial_id(text):
+    return f"NCT{zlib.crc32(text.encode('utf-8')) % 10**8:08d}"
+
+
+class CannedOutputs:
+    """Per-consultation outputs built from the prompt OUTPUT FORMAT examples."""
+
+    def __init__(self):
+        path = os.path.join(PROJECT_ROOT, "data", "synthetic_consultations.json")
+        with open(path, encoding="utf-8") as f:
+            self.consultations = json.load(f)
+        seed = {v["patient_name"]: v for v in load_seed_visits()}
+        examples = _examples()
+        self.outputs = [self._build(c, seed.get(c["patient"]["name"]), examples) for c in self.consultations]
+
+    def _build(self, c, visit, examples):
+        patient, doctor = c["patient"], c["doctor"]
+        diagnosis = (visit or {}).get("diagnosis") or c.get("referral_reason") or _first_sentence(c["consultation_text"])
+        fills = {
+            "{patient_name}": patient["name"],
+            "{patient_age}": str(patient["age"]),
+            "{patient_gender}": patient["gender"],
+            "{doctor_name}": doctor["name"],
+            "{referring_doctor}": f"{doctor['name']}, {doctor['speciality']}",
+            "{specialist_type}": c.get("specialist_type") or "Specialist",
+            "{current_date}": time.strftime("%Y-%m-%d"),
+            "[Patient Name]": patient["name"],
+        }
+        out = {}
+        for name, raw in examples.items():
+            for placeholder, value in fills.items():
+                raw = raw.replace(placeholder, value.replace('"', "'"))
+            out[name] = json.loads(raw)
+
+        soap = out["soap_note"]
+        soap["subjective"]["chief_complaint"] = _first_sentence(c["consultation_text"])
+        soap["subjective"]["history_of_present_illness"] = c["consultation_text"]
+        soap["assessment"]["primary_diagnosis"] = diagnosis
+        soap["plan"]["referrals"] = [c["specialist_type"]] if c.get("referral_reason") else []
+        if visit:
+            out["patient_summary"] = visit["patient_summary"]
+            soap["plan"]["follow_up"] = visit["follow_up"]
+        if c.get("referral_reason"):
+            out["referral_letter"]["referral_letter"]["reason_for_referral"] = c["referral_reason"]
+        else:
+            out["referral_letter"] = {"referral_letter": None, "message": "No referral indicated",
+                                      "confidence_score": 0}
+        trials = out["trial_matching"]
+        trials["patient_profile_extracted"].update(age=patient["age"], gender=patient["gender"],
+                                                   primary_diagnosis=diagnosis)
+        match = trials["trial_matches"][0]
+        match["trial_id"] = _trial_id(diagnosis)
+        match["trial_title"] = f"A Phase 3 Study in Adults With {diagnosis}"
+        return out
+
+    def consultation_index(self, text):
+        for i, c in enumerate(self.consultations):
+            if c["patient"]["name"] in text:
+                return i
+        return zlib.crc32(text.encode("utf-8")) % len(self.consultations)
+
+    def answer(self, prompt):
+        """Model answer text for a prompt (JSON string)."""
+        if prompt.startswith("Translate") and "STRINGS:\n" in prompt:
+            language = prompt.split("into ", 1)[1].split(".", 1)[0]
+            texts = json.loads(prompt.split("STRINGS:\n", 1)[1].split("\n\n", 1)[0])
+            return json.dumps([f"[{language}] {t}" for t in texts], ensure_ascii=False)
+        if prompt.startswith("Translate") and "PATIENT SUMMARY JSON:\n" in prompt:
+            return prompt.split("PATIENT SUMMARY JSON:\n", 1)[1].split("\n\nReturn ONLY", 1)[0]
+        if "supposed to be a single valid JSON value" in prompt:  # llm_json repair call
+            return "{}"
+        start = prompt.rfind("OUTPUT FORMAT")
+        section = prompt[start:] if start != -1 else prompt[prompt.rfind("Return ONLY"):]
+        name = next((n for marker, n in OUTPUT_MARKERS if marker in section), "soap_note")
+        return json.dumps(self.outputs[self.consultation_index(prompt)][name], ensure_ascii=False)
+
+    def trials(self):
+        """Knowledge base documents: one trial per consultation diagnosis."""
+        docs = []
+        for out in self.outputs:
+            match = out["trial_matching"]["trial_matches"][0]
+            docs.append({
+                "text": f"{match['trial_id']}: {match['trial_title']}. Phase: {match['trial_phase']}. "
+                        f"Status: {match['enrollment_status']}. Sponsor: {match['sponsor']}.",
+                "uri": f"s3://clinicalsetu-trials/{match['trial_id']}.json",
+            })
+        return docs
+
+
+# ----- event stream encoding (application/vnd.amazon.eventstream) -----
+
+def _header(name, value):
+    name, value = name.encode("utf-8"), value.encode("utf-8")
+    return struct.pack("!B", len(name)) + name + b"\x07" + struct.pack("!H", len(value)) + value
+
+
+def encode_event(event_type, payload):
+    headers = (_header(":event-type", event_type) + _header(":content-type", "application/json")
+               + _header(":message-type", "event"))
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    prelude = struct.pack("!II", 16 + len(headers) + len(body), len(headers))
+    message = prelude + struct.pack("!I", zlib.crc32(prelude)) + headers + body
+    return message + struct.pack("!I", zlib.crc32(message))
+
+
+# ----- server -----
+
+class Throttled(Exception):
+    pass
+
+
+class FakeBedrock:
+    def __init__(self, profile, time_scale=1.0, seed=7, agent_tools="canned"):
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.time_scale = time_scale
+        self.agent_tools = agent_tools
+        self.canned = CannedOutputs()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.outages = set()
+        self.counters = {"requests": {}, "throttled": 0, "unavailable": 0, "rejected": 0, "input_tokens": 0,
+                         "output_tokens": 0}
+
+    def sleep(self, ms):
+        if ms > 0:
+            time.sleep(ms * self.time_scale / 1000)
+
+    def ttft_ms(self):
+        p = self.profile
+        if not p.ttft_ms:
+            return 0.0
+        with self.lock:
+            return p.ttft_ms * math.exp(self.rng.gauss(0, p.ttft_sigma))
+
+    def generation_ms(self, output_tokens):
+        tps = self.profile.tokens_per_sec
+        return output_tokens / tps * 1000 if tps else 0.0
+
+    def admit(self, op):
+        """Count the request and take a concurrency slot; raises Throttled."""
+        with self.lock:
+            self.counters["requests"][op] = self.counters["requests"].get(op, 0) + 1
+            quota = self.profile.max_concurrency
+            if self.rng.random() < self.profile.throttle_rate or (quota and self.in_flight >= quota):
+                self.counters["throttled"] += 1
+                raise Throttled()
+            self.in_flight += 1
+
+    def release(self, input_tokens=0, output_tokens=0):
+        with self.lock:
+            self.in_flight -= 1
+            self.counters["input_tokens"] += input_tokens
+            self.counters["output_tokens"] += output_tokens
+
+    def stats(self):
+        with self.lock:
+            return json.loads(json.dumps({**self.counters, "in_flight": self.in_flight}))
+
+    # ----- operations -----
+
+    def converse(self, body):
+        prompt = _prompt_text(body)
+        text = self.canned.answer(prompt)
+        start = time.perf_counter()
+        self.admit("converse")
+        try:
+            usage = {"inputTokens": tokens(prompt), "outputTokens": tokens(text)}
+            self.sleep(self.ttft_ms() + self.generation_ms(usage["outputTokens"]))
+        finally:
+            self.release(tokens(prompt), tokens(text))
+        usage["totalTokens"] = usage["inputTokens"] + usage["outputTokens"]
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+            "stopReason": "end_turn",
+            "usage": usage,
+            "metrics": {"latencyMs": int((time.perf_counter() - start) * 1000)},
+        }
+
+    def converse_stream(self, body, emit):
+        prompt = _prompt_text(body)
+        text = self.canned.answer(prompt)
+        start = time.perf_counter()
+        self.admit("converse_stream")
+        try:
+            emit(encode_event("messageStart", {"role": "assistant"}))
+            self.sleep(self.ttft_ms())
+            pieces = [text[i:i + 64] for i in range(0, len(text), 64)]  # ~16 tokens per delta
+            for piece in pieces:
+                emit(encode_event("contentBlockDelta", {"contentBlockIndex": 0, "delta": {"text": piece}}))
+                self.sleep(self.generation_ms(tokens(piece)))
+            emit(encode_event("contentBlockStop", {"contentBlockIndex": 0}))
+            emit(encode_event("messageStop", {"stopReason": "end_turn"}))
+            usage = {"inputTokens": tokens(prompt), "outputTokens": tokens(text)}
+            usage["totalTokens"] = usage["inputTokens"] + usage["outputTokens"]
+            emit(encode_event("metadata", {
+                "usage": usage, "metrics": {"latencyMs": int((time.perf_counter() - start) * 1000)},
+            }))
+        finally:
+            self.release(tokens(prompt), tokens(text))
+
+    def retrieve(self, kb_id, body):
+        self.admit("retrieve")
+        try:
+            self.sleep(self.profile.retrieve_ms)
+            query = body.get("retrievalQuery", {}).get("text", "")
+            results = self._search(query)
+        finally:
+            self.release()
+        return {"retrievalResults": [
+            {"content": {"text": doc["text"]}, "location": {"type": "S3", "s3Location": {"uri": doc["uri"]}},
+             "score": score} for score, doc in results
+        ]}
+
+    def retrieve_and_generate(self, body):
+        query = body.get("input", {}).get("text", "")
+        self.admit("retrieve_and_generate")
+        try:
+            results = self._search(query)
+            text = " ".join(doc["text"] for _, doc in results)
+            self.sleep(self.profile.retrieve_ms + self.ttft_ms() + self.generation_ms(tokens(text)))
+        finally:
+            self.release(tokens(query), tokens(text))
+        return {
+            "sessionId": str(uuid.uuid4()),
+            "output": {"text": text},
+            "citations": [{"generatedResponsePart": {"textResponsePart": {"text": doc["text"]}},
+                           "retrievedReferences": [{"content": {"text": doc["text"]},
+                                                    "location": {"type": "S3", "s3Location": {"uri": doc["uri"]}}}]}
+                          for _, doc in results],
+        }
+
+    def _search(self, query, limit=3):
+        words = set(re.findall(r"[a-z0-9]+", query.lower()))
+        scored = []
+        for doc in self.canned.trials():
+            overlap = len(words & set(re.findall(r"[a-z0-9]+", doc["text"].lower())))
+            scored.append((round(overlap / (len(words) or 1), 3), doc))
+        scored.sort(key=lambda pair: -pair[0])
+        return scored[:limit]
+
+    def invoke_agent(self, agent_id, alias_id, session_id, body, emit):
+        prompt = body.get("inputText", "")
+        self.admit("invoke_agent")
+        try:
+            consultation = self.canned.consultations[self.canned.consultation_index(prompt)]
+            outputs = {}
+            for collaborator, function, output in AGENT_TOOLS:
+                if function == "generate_referral" and "No referral is needed" in prompt:
+                    continue
+                trace = {"agentId": agent_id, "agentAliasId": alias_id, "sessionId": session_id}
+                # Supervisor orchestration step: reads the prompt plus tool outputs so far, decides the next call
+                usage = {"inputTokens": tokens(prompt) + sum(tokens(t) for t in outputs.values()),
+                         "outputTokens": tokens(f"Next, ask {collaborator} to call {function}.")}
+                with self.lock:
+                    self.counters["input_tokens"] += usage["inputTokens"]
+                    self.counters["output_tokens"] += usage["outputTokens"]
+                emit(encode_event("trace", {**trace, "trace": {"orchestrationTrace": {"modelInvocationOutput": {
+                    "metadata": {"usage": usage}}}}}))
+                emit(encode_event("trace", {**trace, "trace": {"orchestrationTrace": {"invocationInput": {
+                    "invocationType": "AGENT_COLLABORATOR",
+                    "agentCollaboratorInvocationInput": {"agentCollaboratorName": collaborator}}}}}))
+                emit(encode_event("trace", {**trace, "trace": {"orchestrationTrace": {"invocationInput": {
+                    "invocationType": "ACTION_GROUP",
+                    "actionGroupInvocationInput": {"actionGroupName": "ClinicalTools", "function": function}}}}}))
+                self.sleep(self.profile.agent_step_ms)
+                text = self._run_tool(function, output, consultation, outputs, body)
+                emit(encode_event("trace", {**trace, "trace": {"orchestrationTrace": {"observation": {
+                    "type": "ACTION_GROUP", "actionGroupInvocationOutput": {"text": text}}}}}))
+            summary = (f"Generated SOAP note, patient summary, discharge summary and trial signals for "
+                       f"{consultation['patient']['name']}.")
+            emit(encode_event("chunk", {"bytes": base64.b64encode(summary.encode("utf-8")).decode("ascii")}))
+        finally:
+            self.release()
+
+    def _run_tool(self, function, output, consultation, outputs, body):
+        if self.agent_tools != "local":
+            text = json.dumps(self.canned.outputs[self.canned.consultations.index(consultation)][output])
+            self.sleep(self.ttft_ms() + self.generation_ms(tokens(text)))
+            with self.lock:
+                self.counters["input_tokens"] += tokens(body.get("inputText", ""))
+                self.counters["output_tokens"] += tokens(text)
+            outputs[output] = text
+            return text
+        import agent_tool_executor
+
+        patient, doctor = consultation["patient"], consultation["doctor"]
+        soap = outputs.get("soap_note", "{}")
+        params = {
+            "generate_soap": {"consultation_text": consultation["consultation_text"], "patient_name": patient["name"],
+                              "patient_age": patient["age"], "patient_gender": patient["gender"]},
+            "generate_patient_summary": {"soap_note_json": soap, "patient_name": patient["name"],
+                                         "doctor_name": doctor["name"]},
+            "generate_referral": {"soap_note_json": soap, "referral_reason": consultation.get("referral_reason"),
+                                  "referring_doctor": doctor["name"],
+                                  "specialist_type": consultation.get("specialist_type")},
+            "generate_discharge": {"soap_note_json": soap, "patient_name": patient["name"],
+                                   "patient_age": patient["age"], "patient_gender": patient["gender"],
+                                   "doctor_name": doctor["name"]},
+            "search_trials": {"soap_assessment": json.dumps(json.loads(soap).get("assessment", {})),
+                              "patient_age": patient["age"], "patient_gender": patient["gender"]},
+        }[function]
+        event = {
+            "actionGroup": "ClinicalTools", "function": function,
+            "parameters": [{"name": k, "type": "string", "value": v} for k, v in params.items()],
+            "sessionAttributes": body.get("sessionState", {}).get("sessionAttributes", {}),
+        }
+        response = agent_tool_executor.lambda_handler(event, None)
+        text = response["response"]["functionResponse"]["responseBody"]["TEXT"]["body"]
+        outputs[output] = text
+        return text
+
+
+def _prompt_text(body):
+    return "".join(block.get("text", "") for message in body.get("messages", [])
+                   for block in message.get("content", []))
+
+
+_ROUTES = [
+    (re.compile(r"^/model/([^/]+)/converse$"), "converse"),
+    (re.compile(r"^/model/([^/]+)/converse-stream$"), "converse_stream"),
+    (re.compile(r"^/agents/([^/]+)/agentAliases/([^/]+)/sessions/([^/]+)/text$"), "invoke_agent"),
+    (re.compile(r"^/knowledgebases/([^/]+)/retrieve$"), "retrieve"),
+    (re.compile(r"^/retrieveAndGenerate$"), "retrieve_and_generate"),
+]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are separate writes; no delayed-ACK stall on keep-alive
+    fake = None  # FakeBedrock, set by serve()
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            self._json(200, self.fake.stats())
+        else:
+            self._json(404, {"message": "Not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        path = self.path.split("?", 1)[0]
+        for pattern, op in _ROUTES:
+            m = pattern.match(path)
+            if m:
+                break
+        else:
+            return self._json(404, {"message": f"Unknown operation {path}"}, "UnknownOperationException")
+        args = [unquote(g) for g in m.groups()]
+        if (args[0] if op.startswith("converse") else op) in self.fake.outages:
+            with self.fake.lock:
+                self.fake.counters["unavailable"] += 1
+            return self._json(503, {"message": "Service unavailable"}, "ServiceUnavailableException")
+        if op.startswith("converse") and not body.get("messages"):  # as Bedrock does; used to prime connections
+            with self.fake.lock:
+                self.fake.counters["rejected"] += 1
+            return self._json(400, {"message": "A conversation must start with a user message."},
+                              "ValidationException")
+        try:
+            if op == "converse":
+                self._json(200, self.fake.converse(body))
+            elif op == "retrieve":
+                self._json(200, self.fake.retrieve(args[0], body))
+            elif op == "retrieve_and_generate":
+                self._json(200, self.fake.retrieve_and_generate(body))
+            elif op == "converse_stream":
+                self._stream(lambda emit: self.fake.converse_stream(body, emit))
+            else:
+                self._stream(lambda emit: self.fake.invoke_agent(*args, body, emit),
+                             {"x-amz-bedrock-agent-session-id": args[2]})
+        except Throttled:
+            self._json(429, {"message": "Too many requests, please wait before trying again."},
+                       "ThrottlingException")
+
+    def _json(self, status, payload, error_type=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if error_type:
+            self.send_header("x-amzn-ErrorType", error_type)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, produce, headers=None):
+        """Chunked application/vnd.amazon.eventstream response; headers go out on the first event."""
+        started = []
+
+        def emit(event):
+            if not started:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+                self.send_header("Transfer-Encoding", "chunked")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                started.append(True)
+            self.wfile.write(f"{len(event):x}\r\n".encode("ascii") + event + b"\r\n")
+            self.wfile.flush()
+
+        produce(emit)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(profile="instant", port=0, time_scale=1.0, agent_tools="canned", seed=7):
+    """Start the fake on a daemon thread. Returns (server, base URL); server.fake holds the counters."""
+    fake = FakeBedrock(profile, time_scale=time_scale, seed=seed, agent_tools=agent_tools)
+    handler = type("FakeBedrockHandler", (Handler,), {"fake": fake})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.fake = fake
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def endpoint_env(url):
+    """Environment that points boto3 Bedrock clients at the fake (set before the handlers are imported)."""
+    return {
+        "AWS_ENDPOINT_URL_BEDROCK_RUNTIME": url,
+        "AWS_ENDPOINT_URL_BEDROCK_AGENT_RUNTIME": url,
+        "AWS_ACCESS_KEY_ID": os.environ.get("AWS_ACCESS_KEY_ID", "fake"),
+        "AWS_SECRET_ACCESS_KEY": os.environ.get("AWS_SECRET_ACCESS_KEY", "fake"),
+        "AWS_REGION": os.environ.get("AWS_REGION", "us-east-1"),
+        "BEDROCK_AGENT_ID": os.environ.get("BEDROCK_AGENT_ID", "FAKEAGENT"),
+        "BEDROCK_AGENT_ALIAS_ID": os.environ.get("BEDROCK_AGENT_ALIAS_ID", "FAKEALIAS"),
+        "KNOWLEDGE_BASE_ID": os.environ.get("KNOWLEDGE_BASE_ID", "FAKEKB"),
+    }
+
+
+# ----- load generator -----
+
+def run_load(url, requests, concurrency):
+    """Drive every handler through real boto3 clients against the fake. Returns per-handler results."""
+    os.environ.update(endpoint_env(url))
+    import boto3
+    import agent_tool_executor
+    import invoke_agent
+    import process_consultation
+    from local_dynamodb import CACHE_TABLE_SCHEMA, LocalDynamoDB
+
+    ddb = LocalDynamoDB(latency_ms=2)
+    ddb.create_table(process_consultation.CACHE_TABLE, **CACHE_TABLE_SCHEMA)
+    process_consultation.dynamodb = ddb
+    process_consultation.CACHE_ENABLED = False  # every request runs the full pipeline
+    runtime = boto3.client("bedrock-runtime", region_name=os.environ["AWS_REGION"])
+    consultations = CannedOutputs().consultations
+
+    def process(c):
+        resp = process_consultation.lambda_handler({"path": "/api/process", "body": json.dumps(c)}, None)
+        return resp["statusCode"] == 200 and "SOAP" not in json.loads(resp["body"]).get("error", "")
+
+    def agent(c):
+        resp = invoke_agent.lambda_handler({"body": json.dumps(c)}, None)
+        return resp["statusCode"] == 200 and bool(json.loads(resp["body"])["soap_note"])
+
+    def trials(c):
+        event = {"function": "search_trials", "parameters": [
+            {"name": "soap_assessment", "value": json.dumps({"primary_diagnosis": c.get("referral_reason") or ""})},
+            {"name": "patient_age", "value": str(c["patient"]["age"])},
+            {"name": "patient_gender", "value": c["patient"]["gender"]},
+        ]}
+        body = agent_tool_executor.lambda_handler(event, None)["response"]["functionResponse"]["responseBody"]
+        return "trial_matches" in json.loads(body["TEXT"]["body"])
+
+    def stream(c):
+        response = runtime.converse_stream(
+            modelId=process_consultation.MODEL_ID,
+            messages=[{"role": "user", "content": [{"text": f"Summarise the visit of {c['patient']['name']}. "
+                                                            "OUTPUT FORMAT: {\"greeting\": \"\"}"}]}])
+        text = "".join(e["contentBlockDelta"]["delta"]["text"] for e in response["stream"] if "contentBlockDelta" in e)
+        return "greeting" in json.loads(text)
+
+    handlers = [("process_consultation", process), ("invoke_agent", agent),
+                ("agent_tool_executor.search_trials", trials), ("converse_stream", stream)]
+    jobs = [(handlers[i % len(handlers)], consultations[i % len(consultations)]) for i in range(requests)]
+    results = {name: {"ok": 0, "failed": 0, "ms": []} for name, _ in handlers}
+
+    def run(job):
+        (name, fn), c = job
+        start = time.perf_counter()
+        try:
+            ok = fn(c)
+        except Exception as e:
+            print(f"  {name} failed: {e}")
+            ok = False
+        return name, ok, (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for name, ok, ms in pool.map(run, jobs):
+            results[name]["ok" if ok else "failed"] += 1
+            results[name]["ms"].append(ms)
+    return results
+
+
+def main():
+    def arg(flag, default, cast=str):
+        return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    profile = arg("--profile", "nova-lite")
+    time_scale = arg("--time-scale", 1.0, float)
+    agent_tools = arg("--agent-tools", "canned")
+    load = arg("--load", 0, int)
+    if profile not in PROFILES:
+        sys.exit(f"Unknown profile {profile}; choose from {', '.join(PROFILES)}")
+
+    server, url = serve(profile, port=arg("--port", 0 if load else 4010, int), time_scale=time_scale,
+                        agent_tools=agent_tools)
+    if not load:
+        print(f"\nFake Bedrock ({profile}, time scale {time_scale}) on {url}")
+        for name, value in endpoint_env(url).items():
+            print(f"  export {name}={value}")
+        print("Press Ctrl+C to stop\n")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    concurrency = arg("--concurrency", 8, int)
+    start = time.perf_counter()
+    results = run_load(url, load, concurrency)
+    elapsed = time.perf_counter() - start
+    stats = server.fake.stats()
+    print(f"\nFake Bedrock load run ({profile}, time scale {time_scale}, {load} requests, "
+          f"concurrency {concurrency}, agent tools {agent_tools})")
+    print("=" * 100)
+    print(f"  {'handler':<36} {'ok':>4} {'failed':>6} {'p50 ms':>8} {'max ms':>8}")
+    for name, row in results.items():
+        ms = sorted(row["ms"]) or [0]
+        print(f"  {name:<36} {row['ok']:>4} {row['failed']:>6} {ms[len(ms) // 2]:>8.0f} {ms[-1]:>8.0f}")
+    print(f"\n  {load / elapsed:.1f} requests/s; fake served {json.dumps(stats['requests'])}, "
+          f"throttled {stats['throttled']}, tokens in/out {stats['input_tokens']}/{stats['output_tokens']}")
+    server.shutdown()
+    sys.exit(0 if all(row["failed"] == 0 for row in results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+ClinicalSetu - Shared Check/Benchmark Fakes
+Stand-ins used by more than one script under scripts/, kept in one place so
+the checks and benchmarks exercise the same fakes.
+
+Provides:
+  - FakeContext  - Lambda context with a remaining-time budget and a function ARN
+  - tag          - fake translation: prefixes each string with [<language>]
+  - stub_model   - replaces process_consultation.invoke_bedrock with a fake that
+                   returns a fixed generation answer, tags translations, and
+                   counts calls and estimated tokens (characters / 4)
+
+Usage:
+  from fakes import FakeContext, stub_model
+  usage = stub_model(pc, model_ms=100, generate=summary)
+  pc.lambda_handler(event, FakeContext(budget_ms=5000))
+"""
+
+import json
+import threading
+import time
+
+import deadline
+
+FUNCTION_ARN = "arn:aws:lambda:us-east-1:000000000000:function:clinicalsetu-api-dev"
+MAX_LAMBDA_MS = 900_000
+
+
+class FakeContext:
+    """Remaining time counts down from budget_ms plus deadline.SAFETY_MS, so handlers see budget_ms."""
+
+    def __init__(self, budget_ms=MAX_LAMBDA_MS, function_arn=FUNCTION_ARN):
+        self.invoked_function_arn = function_arn
+        self._deadline = time.monotonic() + (budget_ms + deadline.SAFETY_MS) / 1000
+
+    def get_remaining_time_in_millis(self):
+        return int((self._deadline - time.monotonic()) * 1000)
+
+
+def tag(value, language, key=None):
+    """Fake translation; medication names stay in English as the prompts ask."""
+    if isinstance(value, str):
+        return value if key == "name" or not value.strip() else f"[{language}] {value}"
+    if isinstance(value, list):
+        return [tag(v, language, key) for v in value]
+    if isinstance(value, dict):
+        return {k: tag(v, language, k) for k, v in value.items()}
+    return value
+
+
+def estimate_tokens(text):
+    return len(text) / 4
+
+
+def stub_model(pc, model_ms=0.0, generate=None):
+    """Replace pc.invoke_bedrock with a fixed-latency fake; returns its (thread-safe) usage counters.
+
+    Translate prompts (whole summary or string batch) are answered with tag();
+    any other prompt returns `generate` as JSON.
+    """
+    usage = {"generate": 0, "translate": 0, "input": 0.0, "output": 0.0}
+    lock = threading.Lock()
+
+    def fake_invoke(prompt, **_):
+        if model_ms:
+            time.sleep(model_ms / 1000)
+        if prompt.startswith("Translate"):
+            kind = "translate"
+            language = prompt.split("into ", 1)[1].split(".", 1)[0]
+            marker = "STRINGS:\n" if "STRINGS:\n" in prompt else "PATIENT SUMMARY JSON:\n"
+            payload = json.loads(prompt.split(marker, 1)[1].rsplit("\n\nReturn ONLY", 1)[0])
+            response = json.dumps(tag(payload, language), ensure_ascii=False)
+        else:
+            if generate is None:
+                raise AssertionError(f"stub_model: unexpected generation prompt: {prompt[:80]!r}")
+            kind = "generate"
+            response = json.dumps(generate)
+        with lock:
+            usage[kind] += 1
+            usage["input"] += estimate_tokens(prompt)
+            usage["output"] += estimate_tokens(response)
+        return response
+
+    pc.invoke_bedrock = fake_invoke
+    return usage
@@ -0,0 +1,122 @@
+"""
+ClinicalSetu - Visit Write Load Test
+Measures visit ingestion throughput against the in-memory DynamoDB stand-in
+(scripts/local_dynamodb.py) with simulated network latency and throttling.
+
+Scenarios:
+  per-item put_item         - the old path: JSON round trip + one PutItem per visit
+  /api/save-visits          - visit_api batch route (validation + BatchWriteItem)
+  dynamo_batch.batch_write  - the bulk writer called directly (seed_visits.py path)
+
+Usage:
+  python scripts/load_test_visit_writes.py
+  python scripts/load_test_visit_writes.py --visits 2000 --latency-ms 8 --unprocessed-rate 0.1
+"""
+
+import ast
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend", "lambda"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import visit_api  # noqa: E402
+from dynamo_batch import batch_write  # noqa: E402
+from local_dynamodb import VISITS_TABLE_SCHEMA, LocalDynamoDB  # noqa: E402
+
+
+def load_seed_visits():
+    """Read SEED_VISITS without importing seed_visits (which connects to DynamoDB)."""
+    path = os.path.join(PROJECT_ROOT, "scripts", "seed_visits.py")
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", "") == "SEED_VISITS":
+            return ast.literal_eval(node.value)
+    return []
+
+
+def make_visits(n):
+    templates = load_seed_visits()
+    visits = []
+    for i in range(n):
+        visit = dict(templates[i % len(templates)])
+        visit["phone_number"] = f"+9190000{i:05d}"
+        visit["consultation_id"] = f"CONSULT-LOAD-{i:05d}"
+        visit["visit_date"] = f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00Z"
+        visits.append(visit)
+    return visits
+
+
+def fresh_db(latency_ms, unprocessed_rate):
+    ddb = LocalDynamoDB(latency_ms=latency_ms, unprocessed_rate=unprocessed_rate)
+    ddb.create_table(visit_api.VISITS_TABLE, **VISITS_TABLE_SCHEMA)
+    visit_api.dynamodb = ddb
+    return ddb
+
+
+def per_item(ddb, visits):
+    table = ddb.Table(visit_api.VISITS_TABLE)
+    for visit in visits:
+        item = dict(visit)
+        item["pk"] = f"HOSPITAL#{visit['hospital']}#PHONE#{visit['phone_number']}"
+        item["sk"] = f"VISIT#{visit['visit_date']}"
+        item["created_at"] = int(time.time())
+        table.put_item(Item=json.loads(json.dumps(item), parse_float=Decimal))
+    return len(visits)
+
+
+def api_batch(ddb, visits):
+    saved = 0
+    for i in range(0, len(visits), visit_api.MAX_BATCH_VISITS):
+        resp = visit_api.lambda_handler(
+            {"path": "/api/save-visits", "body": json.dumps({"visits": visits[i:i + visit_api.MAX_BATCH_VISITS]})}, None
+        )
+        saved += json.loads(resp["body"])["saved"]
+    return saved
+
+
+def direct_batch(ddb, visits):
+    items = [visit_api._build_visit_item(v) for v in visits]
+    return batch_write(ddb, visit_api.VISITS_TABLE, items)["written"]
+
+
+def run(label, fn, visits, latency_ms, unprocessed_rate):
+    ddb = fresh_db(latency_ms, unprocessed_rate)
+    start = time.perf_counter()
+    written = fn(ddb, visits)
+    elapsed = time.perf_counter() - start
+    table = ddb.Table(visit_api.VISITS_TABLE)
+    print(f"  {label:<28} {written:>7,} written  {elapsed:>8.2f} s  {written / elapsed:>10,.0f} items/sec  "
+          f"{len(table.items):>7,} stored")
+    return written / elapsed
+
+
+def main():
+    n_visits = 1000
+    latency_ms = 5.0
+    unprocessed_rate = 0.05
+    if "--visits" in sys.argv:
+        n_visits = int(sys.argv[sys.argv.index("--visits") + 1])
+    if "--latency-ms" in sys.argv:
+        latency_ms = float(sys.argv[sys.argv.index("--latency-ms") + 1])
+    if "--unprocessed-rate" in sys.argv:
+        unprocessed_rate = float(sys.argv[sys.argv.index("--unprocessed-rate") + 1])
+
+    visits = make_visits(n_visits)
+
+    print(f"\nVisit write load test ({n_visits:,} visits, {latency_ms} ms round trip, "
+          f"{unprocessed_rate:.0%} unprocessed per batch)")
+    print("=" * 90)
+    baseline = run("per-item put_item", per_item, visits, latency_ms, 0.0)
+    api = run("/api/save-visits", api_batch, visits, latency_ms, unprocessed_rate)
+    direct = run("dynamo_batch.batch_write", direct_batch, visits, latency_ms, unprocessed_rate)
+    print("-" * 90)
+    print(f"  Speedup vs per-item: /api/save-visits {api / baseline:.1f}x, batch_write {direct / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+ClinicalSetu - Local DynamoDB Stand-in
+In-memory replacement for the subset of the boto3 DynamoDB *resource* API that
+the Lambdas use, so visit_api and the cache paths can be benchmarked without AWS.
+
+Supports:
+  - Table.put_item / get_item / delete_item / update_item (SET only) / query
+  - KeyConditionExpression: `hk = :v [AND rk = | < | <= | > | >= :x]`,
+    `AND begins_with(rk, :p)`, `AND rk BETWEEN :a AND :b` (with #name aliases)
+  - GSIs (sparse), ScanIndexForward, Limit, ExclusiveStartKey / LastEvaluatedKey,
+    ProjectionExpression
+  - ConditionExpression (put / update / delete): attribute_not_exists(a) and
+    `a = | < | <= | > | >= :v` terms joined by OR
+  - ReturnConsumedCapacity (RCU/WCU from item size, 4 KB / 1 KB units)
+  - meta.client.batch_write_item with a configurable UnprocessedItems rate
+  - Simulated latency: fixed per call + per KB returned
+  - Rejects Python floats like boto3 does ("Float types are not supported")
+
+Usage:
+  from local_dynamodb import LocalDynamoDB, VISITS_TABLE_SCHEMA
+  ddb = LocalDynamoDB(latency_ms=4, per_kb_ms=0.05)
+  ddb.create_table("clinicalsetu-visits-prod", **VISITS_TABLE_SCHEMA)
+  visit_api.dynamodb = ddb
+"""
+
+import copy
+import json
+import math
+import random
+import re
+import threading
+import time
+from decimal import Decimal
+
+# Mirrors VisitsTable in infrastructure/cloudformation.yaml
+VISITS_TABLE_SCHEMA = {
+    "hash_key": "pk",
+    "range_key": "sk",
+    "indexes": {
+        "phone-index": ("phone_number", "visit_date"),
+        "doctor-index": ("doctor_name", "visit_date"),
+        "doctor-day-index": ("doctor_day", "visit_date"),
+    },
+}
+
+# Mirrors CacheTable in infrastructure/cloudformation.yaml
+CACHE_TABLE_SCHEMA = {"hash_key": "cache_key", "range_key": None, "indexes": {}}
+
+_HASH_RE = re.compile(r"^\s*(#?\w+)\s*=\s*(:\w+)\s*(?:AND\s+(.+))?$", re.IGNORECASE | re.DOTALL)
+_BEGINS_RE = re.compile(r"^\s*begins_with\s*\(\s*(#?\w+)\s*,\s*(:\w+)\s*\)\s*$", re.IGNORECASE)
+_BETWEEN_RE = re.compile(r"^\s*(#?\w+)\s+BETWEEN\s+(:\w+)\s+AND\s+(:\w+)\s*$", re.IGNORECASE)
+_COMPARE_RE = re.compile(r"^\s*(#?\w+)\s*(=|<=|>=|<|>)\s*(:\w+)\s*$")
+_NOT_EXISTS_RE = re.compile(r"attribute_not_exists\s*\(\s*(#?\w+)\s*\)", re.IGNORECASE)
+_SET_RE = re.compile(r"^\s*SET\s+(.+)$", re.IGNORECASE | re.DOTALL)
+
+_COMPARATORS = {
+    "=": lambda a, b: a == b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _condition_ok(expr, item, names=None, values=None):
+    """Evaluate a ConditionExpression (terms joined by OR) against the stored item (None if absent)."""
+    names, values = names or {}, values or {}
+    for term in re.split(r"\s+OR\s+", expr.strip(), flags=re.IGNORECASE):
+        m = _NOT_EXISTS_RE.fullmatch(term.strip())
+        if m:
+            if item is None or names.get(m.group(1), m.group(1)) not in item:
+                return True
+            continue
+        m = _COMPARE_RE.match(term)
+        if not m:
+            raise ValueError(f"Unsupported ConditionExpression: {expr}")
+        attr = names.get(m.group(1), m.group(1))
+        if item is not None and attr in item and _COMPARATORS[m.group(2)](item[attr], values[m.group(3)]):
+            return True
+    return False
+
+
+class ConditionalCheckFailed(Exception):
+    """Raised on a failed ConditionExpression (botocore raises ClientError with this code)."""
+
+    def __init__(self):
+        super().__init__("The conditional request failed")
+        self.response = {"Error": {"Code": "ConditionalCheckFailedException", "Message": str(self)}}
+
+
+def item_size(item):
+    """Approximate DynamoDB item size in bytes (attribute names + JSON-encoded values)."""
+    return len(json.dumps(item, default=_json_default, separators=(",", ":")).encode("utf-8"))
+
+
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+def _reject_floats(value):
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, dict):
+        for v in value.values():
+            _reject_floats(v)
+    elif isinstance(value, (list, tuple, set)):
+        for v in value:
+            _reject_floats(v)
+
+
+class _Meta:
+    def __init__(self, client):
+        self.client = client
+
+
+class LocalTable:
+    def __init__(self, db, name, hash_key, range_key=None, indexes=None):
+        self.db = db
+        self.name = name
+        self.table_name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = dict(indexes or {})
+        self.items = {}
+        self.lock = threading.Lock()
+        self.meta = _Meta(db.client)
+        self.stats = {"reads": 0, "writes": 0, "rcu": 0.0, "wcu": 0.0, "bytes_returned": 0}
+
+    # ----- helpers -----
+
+    def _key(self, item):
+        return (item[self.hash_key], item[self.range_key]) if self.range_key else (item[self.hash_key],)
+
+    def _key_dict(self, item):
+        key = {self.hash_key: item[self.hash_key]}
+        if self.range_key:
+            key[self.range_key] = item[self.range_key]
+        return key
+
+    def _capacity(self, size_bytes, write=False):
+        if write:
+            units = max(1, math.ceil(size_bytes / 1024))
+            self.stats["wcu"] += units
+            return units
+        units = max(1, math.ceil(size_bytes / 4096)) * 0.5
+        self.stats["rcu"] += units
+        return units
+
+    def _sleep(self, size_bytes=0):
+        delay = self.db.latency_ms + self.db.per_kb_ms * size_bytes / 1024
+        if self.db.jitter_ms:
+            delay += random.uniform(0, self.db.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def load(self):
+        return None
+
+    # ----- single item -----
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+                 ReturnConsumedCapacity=None, **_):
+        _reject_floats(Item)
+        size = item_size(Item)
+        with self.lock:
+            key = self._key(Item)
+            if ConditionExpression and not _condition_ok(ConditionExpression, self.items.get(key),
+                                                         ExpressionAttributeNames, ExpressionAttributeValues):
+                raise ConditionalCheckFailed()
+            self.items[key] = copy.deepcopy(Item)
+            self.stats["writes"] += 1
+            units = self._capacity(size, write=True)
+        self._sleep()
+        resp = {}
+        if ReturnConsumedCapacity:
+            resp["ConsumedCapacity"] = {"TableName": self.name, "CapacityUnits": units}
+        return resp
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None, ReturnConsumedCapacity=None, **_):
+        with self.lock:
+            item = self.items.get(self._key(Key))
+            self.stats["reads"] += 1
+            units = self._capacity(item_size(item) if item else 0)
+            item = copy.deepcopy(item) if item else None
+        if item and ProjectionExpression:
+            item = _project(item, ProjectionExpression, ExpressionAttributeNames)
+        size = item_size(item) if item else 0
+        self.stats["bytes_returned"] += size
+        self._sleep(size)
+        resp = {"Item": item} if item else {}
+        if ReturnConsumedCapacity:
+            resp["ConsumedCapacity"] = {"TableName": self.name, "CapacityUnits": units}
+        return resp
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+                    **_):
+        with self.lock:
+            key = self._key(Key)
+            if ConditionExpression and not _condition_ok(ConditionExpression, self.items.get(key),
+                                                         ExpressionAttributeNames, ExpressionAttributeValues):
+                raise ConditionalCheckFailed()
+            self.items.pop(key, None)
+            self.stats["writes"] += 1
+            self._capacity(0, write=True)
+        self._sleep()
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None, ExpressionAttributeNames=None,
+                    ConditionExpression=None, **_):
+        values = ExpressionAttributeValues or {}
+        names = ExpressionAttributeNames or {}
+        _reject_floats(values)
+        m = _SET_RE.match(UpdateExpression)
+        if not m:
+            raise ValueError(f"Unsupported UpdateExpression: {UpdateExpression}")
+        with self.lock:
+            key = self._key(Key)
+            if ConditionExpression and not _condition_ok(ConditionExpression, self.items.get(key), names, values):
+                raise ConditionalCheckFailed()
+            item = self.items.setdefault(key, dict(Key))
+            for assignment in m.group(1).split(","):
+                attr, placeholder = (p.strip() for p in assignment.split("="))
+                item[names.get(attr, attr)] = copy.deepcopy(values[placeholder])
+            self.stats["writes"] += 1
+            self._capacity(item_size(item), write=True)
+        self._sleep()
+        return {}
+
+    # ----- query -----
+
+    def query(self, KeyConditionExpression, ExpressionAttributeValues=None, ExpressionAttributeNames=None,
+              IndexName=None, ScanIndexForward=True, Limit=None, ExclusiveStartKey=None,
+              ProjectionExpression=None, ReturnConsumedCapacity=None, **_):
+        values = ExpressionAttributeValues or {}
+        names = ExpressionAttributeNames or {}
+
+        if IndexName:
+            hash_attr, range_attr = self.indexes[IndexName]
+        else:
+            hash_attr, range_attr = self.hash_key, self.range_key
+
+        m = _HASH_RE.match(KeyConditionExpression)
+        if not m:
+            raise ValueError(f"Unsupported KeyConditionExpression: {KeyConditionExpression}")
+        hk_attr = names.get(m.group(1), m.group(1))
+        if hk_attr != hash_attr:
+            raise ValueError(f"Query key condition must use hash key {hash_attr}, got {hk_attr}")
+        hk_value = values[m.group(2)]
+        range_pred = _range_predicate(m.group(3), names, values, range_attr)
+
+        with self.lock:
+            matched = [
+                it for it in self.items.values()
+                if it.get(hash_attr) == hk_value
+                and (range_attr is None or range_attr in it)
+                and range_pred(it)
+            ]
+            order = (lambda it: (it.get(range_attr, ""), self._key(it))) if range_attr else self._key
+            matched.sort(key=order, reverse=not ScanIndexForward)
+
+            if ExclusiveStartKey:
+                start = order(ExclusiveStartKey)
+                if ScanIndexForward:
+                    matched = [it for it in matched if order(it) > start]
+                else:
+                    matched = [it for it in matched if order(it) < start]
+
+            last_key = None
+            if Limit is not None and len(matched) > Limit:
+                matched = matched[:Limit]
+                last = matched[-1]
+                last_key = self._key_dict(last)
+                if IndexName:
+                    last_key[hash_attr] = last[hash_attr]
+                    last_key[range_attr] = last[range_attr]
+
+            read_bytes = sum(item_size(it) for it in matched)
+            self.stats["reads"] += 1
+            units = self._capacity(read_bytes)
+            items = [copy.deepcopy(it) for it in matched]
+
+        if ProjectionExpression:
+            items = [_project(it, ProjectionExpression, names) for it in items]
+        returned = sum(item_size(it) for it in items)
+        self.stats["bytes_returned"] += returned
+        self._sleep(returned)
+
+        resp = {"Items": items, "Count": len(items), "ScannedCount": len(items)}
+        if last_key:
+            resp["LastEvaluatedKey"] = last_key
+        if ReturnConsumedCapacity:
+            resp["ConsumedCapacity"] = {"TableName": self.name, "CapacityUnits": units}
+        return resp
+
+
+def _range_predicate(expr, names, values, range_attr):
+    if not expr:
+        return lambda it: True
+    m = _BEGINS_RE.match(expr)
+    if m:
+        attr, prefix = names.get(m.group(1), m.group(1)), values[m.group(2)]
+        _check_range_attr(attr, range_attr)
+        return lambda it: str(it.get(attr, "")).startswith(prefix)
+    m = _BETWEEN_RE.match(expr)
+    if m:
+        attr, low, high = names.get(m.group(1), m.group(1)), values[m.group(2)], values[m.group(3)]
+        _check_range_attr(attr, range_attr)
+        return lambda it: attr in it and low <= it[attr] <= high
+    m = _COMPARE_RE.match(expr)
+    if m:
+        attr, op, val = names.get(m.group(1), m.group(1)), m.group(2), values[m.group(3)]
+        _check_range_attr(attr, range_attr)
+        cmp = _COMPARATORS[op]
+        return lambda it: attr in it and cmp(it[attr], val)
+    raise ValueError(f"Unsupported range key condition: {expr}")
+
+
+def _check_range_attr(attr, range_attr):
+    if attr != range_attr:
+        raise ValueError(f"Range key condition must use {range_attr}, got {attr}")
+
+
+def _project(item, projection, names):
+    names = names or {}
+    out = {}
+    for attr in projection.split(","):
+        attr = attr.strip()
+        attr = names.get(attr, attr)
+        if attr in item:
+            out[attr] = item[attr]
+    return out
+
+
+class LocalDynamoDBClient:
+    """Low-level client subset (batch_write_item, batch_get_item) shared by all tables of a LocalDynamoDB."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def batch_write_item(self, RequestItems, ReturnConsumedCapacity=None, **_):
+        unprocessed = {}
+        consumed = []
+        for table_name, requests in RequestItems.items():
+            if len(requests) > 25:
+                raise ValueError("Too many items requested for the BatchWriteItem call (max 25)")
+            table = self.db.tables[table_name]
+            units = 0
+            for req in requests:
+                if self.db.unprocessed_rate and random.random() < self.db.unprocessed_rate:
+                    unprocessed.setdefault(table_name, []).append(req)
+                    continue
+                if "PutRequest" in req:
+                    item = req["PutRequest"]["Item"]
+                    _reject_floats(item)
+                    with table.lock:
+                        table.items[table._key(item)] = copy.deepcopy(item)
+                        table.stats["writes"] += 1
+                        units += table._capacity(item_size(item), write=True)
+                elif "DeleteRequest" in req:
+                    with table.lock:
+                        table.items.pop(table._key(req["DeleteRequest"]["Key"]), None)
+                        table.stats["writes"] += 1
+                        units += table._capacity(0, write=True)
+            consumed.append({"TableName": table_name, "CapacityUnits": units})
+            table._sleep()
+        resp = {"UnprocessedItems": unprocessed}
+        if ReturnConsumedCapacity:
+            resp["ConsumedCapacity"] = consumed
+        return resp
+
+    def batch_get_item(self, RequestItems, **_):
+        responses, unprocessed = {}, {}
+        for table_name, request in RequestItems.items():
+            if len(request["Keys"]) > 100:
+                raise ValueError("Too many items requested for the BatchGetItem call (max 100)")
+            table = self.db.tables[table_name]
+            size = 0
+            for key in request["Keys"]:
+                if self.db.unprocessed_rate and random.random() < self.db.unprocessed_rate:
+                    unprocessed.setdefault(table_name, dict(request, Keys=[]))["Keys"].append(key)
+                    continue
+                with table.lock:
+                    item = copy.deepcopy(table.items.get(table._key(key)))
+                    table.stats["reads"] += 1
+                    table._capacity(item_size(item) if item else 0)
+                if item is None:
+                    continue
+                if request.get("ProjectionExpression"):
+                    item = _project(item, request["ProjectionExpression"], request.get("ExpressionAttributeNames"))
+                size += item_size(item)
+                responses.setdefault(table_name, []).append(item)
+            table.stats["bytes_returned"] += size
+            table._sleep(size)
+        return {"Responses": responses, "UnprocessedKeys": unprocessed}
+
+
+class LocalDynamoDB:
+    """Stand-in for boto3.resource("dynamodb")."""
+
+    def __init__(self, latency_ms=0.0, per_kb_ms=0.0, jitter_ms=0.0, unprocessed_rate=0.0):
+        self.latency_ms = latency_ms
+        self.per_kb_ms = per_kb_ms
+        self.jitter_ms = jitter_ms
+        self.unprocessed_rate = unprocessed_rate
+        self.tables = {}
+        self.client = LocalDynamoDBClient(self)
+        self.meta = _Meta(self.client)
+
+    def create_table(self, name, hash_key, range_key=None, indexes=None):
+        self.tables[name] = LocalTable(self, name, hash_key, range_key, indexes)
+        return self.tables[name]
+
+    def Table(self, name):
+        if name not in self.tables:
+            raise KeyError(f"Table not found: {name} (call create_table first)")
+        return self.tables[name]
@@ -18,6 +18,11 @@ SHARED_PROMPTS = [
     ("backend/prompts/referral_letter.txt", "prompts/referral_letter.txt"),
     ("backend/prompts/trial_matching.txt", "prompts/trial_matching.txt"),
     ("backend/prompts/discharge_summary.txt", "prompts/discharge_summary.txt"),
+    ("backend/prompts/schemas/soap_note.json", "prompts/schemas/soap_note.json"),
+    ("backend/prompts/schemas/patient_summary.json", "prompts/schemas/patient_summary.json"),
+    ("backend/prompts/schemas/referral_letter.json", "prompts/schemas/referral_letter.json"),
+    ("backend/prompts/schemas/trial_matching.json", "prompts/schemas/trial_matching.json"),
+    ("backend/prompts/schemas/discharge_summary.json", "prompts/schemas/discharge_summary.json"),
 ]
 
 SHARED_DATA = []
@@ -42,6 +47,21 @@ def create_zip(output_name, files):
 # 1. Monolithic Lambda (fallback path)
 create_zip("lambda_deployment.zip", [
     ("backend/lambda/process_consultation.py", "lambda_function.py"),
+    ("backend/lambda/translation_cache.py", "translation_cache.py"),
+    ("backend/lambda/translation_memory.py", "translation_memory.py"),
+    ("backend/lambda/llm_json.py", "llm_json.py"),
+    ("backend/lambda/output_schemas.py", "output_schemas.py"),
+    ("backend/lambda/bedrock_cache.py", "bedrock_cache.py"),
+    ("backend/lambda/tracing.py", "tracing.py"),
+    ("backend/lambda/model_usage.py", "model_usage.py"),
+    ("backend/lambda/admission.py", "admission.py"),
+    ("backend/lambda/deadline.py", "deadline.py"),
+    ("backend/lambda/circuit_breaker.py", "circuit_breaker.py"),
+    ("backend/lambda/lifecycle.py", "lifecycle.py"),
+    ("backend/lambda/single_flight.py", "single_flight.py"),
+    ("backend/lambda/dynamo_batch.py", "dynamo_batch.py"),
+    ("backend/lambda/conditions.py", "conditions.py"),
+    ("backend/lambda/trial_store.py", "trial_store.py"),
     *SHARED_PROMPTS,
     *SHARED_DATA,
 ])
@@ -51,8 +71,26 @@ create_zip("agent_lambda_deployment.zip", [
     ("backend/lambda/agent_tool_executor.py", "agent_tool_executor.py"),
     ("backend/lambda/invoke_agent.py", "invoke_agent.py"),
     ("backend/lambda/process_consultation.py", "process_consultation.py"),
+    ("backend/lambda/translation_cache.py", "translation_cache.py"),
+    ("backend/lambda/translation_memory.py", "translation_memory.py"),
+    ("backend/lambda/llm_json.py", "llm_json.py"),
+    ("backend/lambda/output_schemas.py", "output_schemas.py"),
+    ("backend/lambda/bedrock_cache.py", "bedrock_cache.py"),
+    ("backend/lambda/tracing.py", "tracing.py"),
+    ("backend/lambda/model_usage.py", "model_usage.py"),
+    ("backend/lambda/admission.py", "admission.py"),
+    ("backend/lambda/deadline.py", "deadline.py"),
+    ("backend/lambda/circuit_breaker.py", "circuit_breaker.py"),
+    ("backend/lambda/lifecycle.py", "lifecycle.py"),
+    ("backend/lambda/single_flight.py", "single_flight.py"),
     ("backend/lambda/fetch_trials.py", "fetch_trials.py"),
+    ("backend/lambda/trial_store.py", "trial_store.py"),
+    ("backend/lambda/eligibility.py", "eligibility.py"),
+    ("backend/lambda/conditions.py", "conditions.py"),
     ("backend/lambda/visit_api.py", "visit_api.py"),
+    ("backend/lambda/dynamo_batch.py", "dynamo_batch.py"),
+    ("backend/lambda/visit_codec.py", "visit_codec.py"),
+    ("backend/lambda/visit_documents.py", "visit_documents.py"),
     *SHARED_PROMPTS,
     *SHARED_DATA,
 ])
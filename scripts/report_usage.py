@@ -0,0 +1,80 @@
+"""
+ClinicalSetu - Model Usage Report
+Summarizes the model usage saved by scripts/bench_pipeline.py ("usage" in each
+run): per processing step, tokens in/out, model latency (converse
+metrics.latencyMs) vs. wall time, output tokens/sec, and estimated cost.
+
+"other ms" is wall time not spent in the model: prompt building, JSON parsing,
+retries/throttling back-off and network. It is the part a faster model cannot fix.
+A slow step with high tokens in/out is bound by prompt or output size. A slow step
+with a low model share is bound by queueing or retries. Consultations served from
+the consultation cache make no model calls and are not counted (n).
+
+Usage:
+  python scripts/report_usage.py                       # bench_results/pipeline.json
+  python scripts/report_usage.py bench/HEAD.json --scenario process
+"""
+
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def per_request(usage, key):
+    return usage[key] / usage["requests"] if usage["requests"] else 0.0
+
+
+def print_run(run):
+    usage = run.get("usage") or {}
+    if not usage:
+        return
+    print(f"\n  {run['scenario']} @ concurrency {run['concurrency']}: {run['requests']} requests in "
+          f"{run['elapsed_s']:.1f} s")
+    print(f"    {'step':<30} {'n':>4} {'calls':>6} {'tok in':>8} {'tok out':>8} {'model ms':>9} {'wall ms':>9} "
+          f"{'other ms':>9} {'model %':>8} {'tok/s':>7} {'USD':>10}")
+    steps = sorted(usage.items(), key=lambda kv: kv[0] in ("request", "supervisor"))
+    for name, u in steps:
+        if name in ("request", "supervisor"):
+            print(f"    {'-' * 124}")
+        share = f"{u['model_time_share']:.0%}" if u.get("model_time_share") is not None else "-"
+        tps = f"{u['tokens_per_sec']:.0f}" if u.get("tokens_per_sec") else "-"
+        model_ms, wall_ms = per_request(u, "model_latency_ms"), per_request(u, "wall_ms")
+        other = f"{max(wall_ms - model_ms, 0):.0f}" if model_ms else "-"  # agent traces carry no model latency
+        print(f"    {name[:30]:<30} {u['requests']:>4} {per_request(u, 'model_calls'):>6.1f} "
+              f"{per_request(u, 'input_tokens'):>8.0f} {per_request(u, 'output_tokens'):>8.0f} "
+              f"{model_ms:>9.0f} {wall_ms:>9.0f} {other:>9} {share:>8} {tps:>7} "
+              f"{per_request(u, 'estimated_cost_usd'):>10.6f}")
+    total = usage.get("request") or usage.get("supervisor")
+    if total and total["requests"]:
+        cost = per_request(total, "estimated_cost_usd")
+        output_tps = total["output_tokens"] / run["elapsed_s"] if run["elapsed_s"] else 0.0
+        print(f"    per generated consultation ${cost:.6f} (${cost * 1000:.2f} per 1,000); "
+              f"{output_tps:,.0f} output tokens/s across the run; "
+              f"{total['cached_calls']} of {total['model_calls']} calls served from the prompt cache")
+    if "supervisor" in usage:
+        print("    (supervisor orchestration only; tool executor usage is in its trace counters)")
+
+
+def main():
+    has_path = len(sys.argv) > 1 and not sys.argv[1].startswith("--")
+    path = sys.argv[1] if has_path else os.path.join(PROJECT_ROOT, "bench_results", "pipeline.json")
+    scenario = sys.argv[sys.argv.index("--scenario") + 1] if "--scenario" in sys.argv else None
+
+    with open(path) as f:
+        results = json.load(f)
+    print(f"\nModel usage report: {path} (commit {(results.get('commit') or '?')[:10]}, {results['backend']} backend"
+          f"{', ' + results['profile'] + ' profile' if results.get('profile') else ''})")
+    print("=" * 100)
+    print("  per-request averages; model ms = converse metrics.latencyMs, wall ms = as seen by the handler")
+    runs = [r for r in results["runs"] if r.get("usage") and (scenario is None or r["scenario"] == scenario)]
+    if not runs:
+        print("  no model usage in this file (re-run scripts/bench_pipeline.py)")
+        return
+    for run in runs:
+        print_run(run)
+
+
+if __name__ == "__main__":
+    main()
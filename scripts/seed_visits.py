@@ -9,13 +9,19 @@ Usage:
 Environment variables:
   VISITS_TABLE  - DynamoDB table name (default: clinicalsetu-visits-prod)
   AWS_REGION    - AWS region (default: us-east-1)
+  VISIT_DOCS_BUCKET - (Optional) store visit documents in S3 like visit_api does
 """
 
-import json
 import os
+import sys
 import time
 import boto3
-from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "lambda"))
+from dynamo_batch import batch_write  # noqa: E402
+from visit_codec import to_dynamo  # noqa: E402
+from visit_api import doctor_day_key  # noqa: E402
+from visit_documents import offload, store_from_env  # noqa: E402
 
 VISITS_TABLE = os.environ.get("VISITS_TABLE", "clinicalsetu-visits-prod")
 REGION = os.environ.get("AWS_REGION", "us-east-1")
@@ -381,12 +387,13 @@ def seed():
     except Exception:
         pass
 
+    items = []
     for visit in SEED_VISITS:
         phone = visit["phone_number"]
         hospital = visit["hospital"]
         visit_date = visit["visit_date"]
 
-        item = {
+        items.append(to_dynamo({
             "pk": f"HOSPITAL#{hospital}#PHONE#{phone}",
             "sk": f"VISIT#{visit_date}",
             "phone_number": phone,
@@ -405,13 +412,22 @@ def seed():
             "follow_up": visit["follow_up"],
             "warning_signs": visit["warning_signs"],
             "created_at": int(time.time()),
-        }
+            "doctor_day": doctor_day_key(hospital, visit["doctor_name"], visit_date),
+        }))
+
+    store = store_from_env()
+    for item in items:
+        offload(item, store)
 
-        item = json.loads(json.dumps(item), parse_float=Decimal)
-        table.put_item(Item=item)
-        print(f"[Seed] Inserted: {visit['consultation_id']} - {visit['patient_name']} ({visit['doctor_name']})")
+    result = batch_write(dynamodb, VISITS_TABLE, items)
+    skipped = {(i["pk"], i["sk"]) for i in result["unprocessed"]}
+    for item in items:
+        if (item["pk"], item["sk"]) not in skipped:
+            print(f"[Seed] Inserted: {item['consultation_id']} - {item['patient_name']} ({item['doctor_name']})")
 
-    print(f"[Seed] Done — {len(SEED_VISITS)} visits seeded.")
+    if result["unprocessed"]:
+        print(f"[Seed] WARNING: {len(result['unprocessed'])} visits still unprocessed after retries")
+    print(f"[Seed] Done — {result['written']} visits seeded in {result['batches']} batch call(s).")
 
 
 if __name__ == "__main__":